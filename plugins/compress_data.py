@@ -3,13 +3,23 @@ Plugin to compress HAMMA trigger data files during quiet hours.
 
 Uses the hamma.compression module for optimized compression of trigger data.
 Only runs during configured quiet hours, deferring CPU and I/O to other processes.
+Alternatively, the adaptive schedule runs whenever live load allows,
+throttling or pausing on the trigger rate, CPU load and DATA drive I/O
+(see AdaptiveScheduler).
+
+Every archive written is recorded in the drive's compression manifest,
+<drive>/compressed/manifest.jsonl (see scripts/compress_manifest.py).
 """
 
 # Standard library imports
+import concurrent.futures
 import datetime
+import importlib.util
+import multiprocessing
 import os
 import re
 import subprocess
+import time
 from pathlib import Path
 
 # Local imports
@@ -19,10 +29,277 @@ import brokkr.pipeline.base
 from hamma.compression import compress_file
 
 DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}$")
+SCHEDULES = ("quiet_hours", "adaptive", "adaptive_in_quiet_hours")
+THROTTLE_FRACTION = 0.5  # of a load limit: one file at a time above this
+RESUME_FRACTION = 0.8  # of a load limit: a pause ends below this
+PROC_MOUNTS = "/proc/mounts"
+PROC_DISKSTATS = "/proc/diskstats"
+IO_BUDGET_MODULE = (Path(__file__).resolve().parent.parent
+                    / "scripts" / "io_budget.py")
+MANIFEST_MODULE = (Path(__file__).resolve().parent.parent
+                   / "scripts" / "compress_manifest.py")
+
+
+def load_io_budget():
+    """Load scripts/io_budget.py, the DATA drive I/O budget shared with scrub.
+
+    Plugins are loaded by path, so the module is too.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "io_budget", IO_BUDGET_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_compress_manifest():
+    """Load scripts/compress_manifest.py, the manifest shared with scrub.
+
+    Plugins are loaded by path, so the module is too.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "compress_manifest", MANIFEST_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+compress_manifest = load_compress_manifest()
+
+
+def _set_worker_priority():
+    # Pool initializer: lowest CPU and I/O priority in each worker
+    try:
+        os.nice(19 - os.nice(0))
+        subprocess.call(
+            ["ionice", "-c", "3", "-p", str(os.getpid())],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except Exception:
+        pass
+
+
+def default_max_workers():
+    """Leave one core for the pipeline: os.cpu_count() - 1, at least 1."""
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+class AdaptiveScheduler:
+    """
+    Throttle or pause compression on live load signals.
+
+    Three signals are sampled, each over the time since the previous
+    sample (at least min_interval apart):
+
+    - trigger rate: live science packets per second, from the live-write
+      counter the io_budget_live step keeps on the shared I/O budget;
+    - CPU load: the 1-minute load average per core, less the compression
+      workers' own share;
+    - drive busy: the fraction of time the DATA drives' block devices
+      spent doing I/O (/proc/diskstats), less compression's own share,
+      taken as the fraction of the bytes moved that compression read
+      and wrote.
+
+    Each is divided by its limit; the worst ratio decides the level.
+    At or above 1 compression pauses, and only resumes once the worst
+    ratio is back under RESUME_FRACTION. Above THROTTLE_FRACTION it is
+    throttled to one file at a time. A limit of None ignores that signal,
+    as does a signal that cannot be read.
+
+    Parameters
+    ----------
+    drives : list of Path
+        Mount points of the DATA drives to watch.
+    budget : io_budget.IOBudget or None
+        Budget whose live-write counter gives the trigger rate.
+    max_trigger_rate : float or None
+        Triggers per second at which compression pauses.
+    max_load : float or None
+        Load average per core at which compression pauses.
+    max_drive_busy : float or None
+        Drive busy fraction (0-1) at which compression pauses.
+    min_interval : float
+        Minimum seconds between samples; the last level is reused in
+        between.
+    """
+
+    RUN = "run"
+    THROTTLE = "throttle"
+    PAUSE = "pause"
+
+    def __init__(self, drives, budget=None, max_trigger_rate=1.0,
+                 max_load=0.8, max_drive_busy=0.6, min_interval=10):
+        self.budget = budget
+        self.limits = {
+            "trigger_rate": max_trigger_rate,
+            "load": max_load,
+            "drive_busy": max_drive_busy,
+        }
+        self.min_interval = min_interval
+        self.devices = self._find_devices(drives)
+        self.level = self.RUN
+        self.signals = {}
+        self._last_time = None
+        self._last_counters = None
+
+    @staticmethod
+    def _find_devices(drives):
+        # Block device names (e.g. sda1) of the mount points in drives
+        mount_points = {str(drive) for drive in drives}
+        devices = []
+        try:
+            with open(PROC_MOUNTS) as f:
+                for line in f:
+                    fields = line.split()
+                    if (len(fields) > 1 and fields[1] in mount_points
+                            and fields[0].startswith("/dev/")):
+                        devices.append(os.path.basename(
+                            os.path.realpath(fields[0])))
+        except OSError:
+            pass
+        return devices
+
+    def _read_counters(self):
+        # Cumulative live writes, per-device I/O milliseconds and bytes
+        counters = {"live_writes": None, "io_ms": {}, "io_bytes": {}}
+        if self.budget is not None:
+            try:
+                counters["live_writes"] = (
+                    self.budget.status()["live"]["writes"])
+            except Exception:
+                pass
+        if self.devices:
+            try:
+                with open(PROC_DISKSTATS) as f:
+                    for line in f:
+                        fields = line.split()
+                        if len(fields) > 12 and fields[2] in self.devices:
+                            counters["io_ms"][fields[2]] = int(fields[12])
+                            # Sectors read and written, 512 bytes each
+                            counters["io_bytes"][fields[2]] = 512 * (
+                                int(fields[5]) + int(fields[9]))
+            except (OSError, ValueError):
+                pass
+        return counters
+
+    def sample(self, own_workers=0, own_bytes=None):
+        """
+        Sample the load signals since the previous sample.
+
+        Parameters
+        ----------
+        own_workers : int
+            Compression processes currently running, whose share of the
+            load average is not counted. Default is 0.
+        own_bytes : int, optional
+            Cumulative bytes compression has read and written on the
+            DATA drives, whose share of drive busy is not counted.
+            Default is None (count all of it).
+
+        Returns
+        -------
+        dict
+            trigger_rate, load and drive_busy; None where unknown,
+            including the rates on the first sample.
+        """
+        now = time.monotonic()
+        counters = self._read_counters()
+        counters["own_bytes"] = own_bytes
+        signals = {"trigger_rate": None, "load": None, "drive_busy": None}
+        try:
+            signals["load"] = max(0.0, os.getloadavg()[0] - own_workers) / (
+                os.cpu_count() or 1)
+        except OSError:
+            pass
+        if self._last_time is not None and now > self._last_time:
+            elapsed = now - self._last_time
+            last = self._last_counters
+            if (counters["live_writes"] is not None
+                    and last["live_writes"] is not None):
+                signals["trigger_rate"] = max(
+                    0, counters["live_writes"] - last["live_writes"]) / elapsed
+            busy = [
+                (io_ms - last["io_ms"][device]) / 1000 / elapsed
+                for device, io_ms in counters["io_ms"].items()
+                if device in last["io_ms"]
+            ]
+            if busy:
+                signals["drive_busy"] = min(1.0, max(busy)) * (
+                    1 - self._own_share(counters, last))
+        self._last_time = now
+        self._last_counters = counters
+        return signals
+
+    @staticmethod
+    def _own_share(counters, last):
+        # Fraction (0-1) of the bytes the drives moved that compression
+        # moved itself; 0 when either count is unknown
+        if counters["own_bytes"] is None or last["own_bytes"] is None:
+            return 0.0
+        moved = sum(
+            io_bytes - last["io_bytes"][device]
+            for device, io_bytes in counters["io_bytes"].items()
+            if device in last["io_bytes"])
+        if moved <= 0:
+            return 0.0
+        own = counters["own_bytes"] - last["own_bytes"]
+        return min(1.0, max(0.0, own / moved))
+
+    def update(self, own_workers=0, own_bytes=None):
+        """
+        Return the level compression should run at now.
+
+        Parameters
+        ----------
+        own_workers : int
+            Compression processes currently running. Default is 0.
+        own_bytes : int, optional
+            Cumulative bytes compression has read and written on the
+            DATA drives. Default is None.
+
+        Returns
+        -------
+        str
+            RUN, THROTTLE or PAUSE.
+        """
+        if (self._last_time is not None
+                and time.monotonic() - self._last_time < self.min_interval):
+            return self.level
+        self.signals = self.sample(own_workers, own_bytes)
+        worst = self.worst_ratio()
+        if worst >= 1 or (self.level == self.PAUSE
+                          and worst >= RESUME_FRACTION):
+            self.level = self.PAUSE
+        elif worst >= THROTTLE_FRACTION:
+            self.level = self.THROTTLE
+        else:
+            self.level = self.RUN
+        return self.level
+
+    def worst_ratio(self):
+        """Return the largest signal/limit ratio of the last sample."""
+        ratios = [
+            self.signals[name] / limit
+            for name, limit in self.limits.items()
+            if limit and self.signals.get(name) is not None
+        ]
+        return max(ratios, default=0.0)
+
+    def describe(self):
+        """Describe the last sample for log messages."""
+        parts = []
+        for name, limit in self.limits.items():
+            value = self.signals.get(name)
+            if value is not None:
+                parts.append("{} {:.2f}{}".format(
+                    name.replace("_", " "), value,
+                    " (limit {:.2f})".format(limit) if limit else ""))
+        return ", ".join(parts) or "no signals"
 
 
 class CompressData(brokkr.pipeline.base.OutputStep):
-    """Compress HAMMA trigger data files during quiet hours."""
+    """Compress HAMMA trigger data files during quiet hours or light load."""
 
     def __init__(self,
                  source_path,
@@ -34,6 +311,14 @@ class CompressData(brokkr.pipeline.base.OutputStep):
                  quiet_start=8,
                  quiet_end=0,
                  drive_glob=None,
+                 io_budget=False,
+                 max_workers=None,
+                 schedule="quiet_hours",
+                 max_trigger_rate=1.0,
+                 max_load=0.8,
+                 max_drive_busy=0.6,
+                 pause_poll=30,
+                 max_pause=900,
                  **output_step_kwargs):
         """
         Compress HAMMA trigger data files during quiet hours.
@@ -77,6 +362,43 @@ class CompressData(brokkr.pipeline.base.OutputStep):
             (e.g., "DATA??"). When set, the plugin looks for date dirs
             inside each matching drive dir. When None, date dirs are
             expected directly under source_path. Default is None.
+        io_budget : bool or str
+            Take each file's size from the I/O budget shared with
+            hamma_scrub recovery (scripts/io_budget.py) before compressing
+            it, so compression waits out live writes and shares one rate
+            with recovery. A string is used as the bucket file path.
+            Default is False (ionice only).
+        max_workers : int, optional
+            Number of worker processes compressing files in parallel,
+            each at nice 19 and ionice idle. 1 compresses in the pipeline
+            process itself. Default is None (one less than the number
+            of CPU cores, at least 1).
+        schedule : str
+            When compression runs:
+            - 'quiet_hours': only between quiet_start and quiet_end
+            - 'adaptive': whenever live load allows (see
+              AdaptiveScheduler), at any hour
+            - 'adaptive_in_quiet_hours': adaptive, within quiet hours
+            Default is 'quiet_hours'.
+        max_trigger_rate : float
+            Adaptive schedule: live triggers per second at which
+            compression pauses; it is throttled to one file at a time
+            from half of this. Needs the io_budget_live step in the
+            science pipeline. Default is 1.0.
+        max_load : float
+            Adaptive schedule: 1-minute load average per core, excluding
+            the compression workers, at which compression pauses.
+            Default is 0.8.
+        max_drive_busy : float
+            Adaptive schedule: fraction of time a DATA drive is busy
+            with I/O other than compression's own at which compression
+            pauses. Default is 0.6.
+        pause_poll : float
+            Adaptive schedule: seconds between load checks while paused.
+            Default is 30.
+        max_pause : float
+            Adaptive schedule: seconds a pause may last before the pass
+            ends, to be retried on the next pipeline run. Default is 900.
         output_step_kwargs : **kwargs, optional
             Keyword arguments to pass to the OutputStep constructor.
 
@@ -92,7 +414,48 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         self.quiet_start = quiet_start
         self.quiet_end = quiet_end
         self.drive_glob = drive_glob
+        self.max_workers = max_workers or default_max_workers()
+        if schedule not in SCHEDULES:
+            raise ValueError("schedule must be one of {}, not {!r}".format(
+                ", ".join(SCHEDULES), schedule))
+        self.schedule = schedule
+        self.scheduler_limits = {
+            "max_trigger_rate": max_trigger_rate,
+            "max_load": max_load,
+            "max_drive_busy": max_drive_busy,
+        }
+        self.pause_poll = pause_poll
+        self.max_pause = max_pause
+        self.paused_seconds = 0.0
+        self._scheduler = None
         self._priority_set = False
+        self.bytes_compressed = 0
+        self.io_bytes = 0
+        self.compress_seconds = 0.0
+        self._manifests = {}
+
+        self.budget = None
+        self.budget_wait = 0.0
+        if io_budget:
+            try:
+                module = load_io_budget()
+                self.budget = (module.IOBudget(io_budget)
+                               if isinstance(io_budget, str)
+                               else module.IOBudget())
+            except Exception as e:
+                self.logger.warning(
+                    "Could not load I/O budget, compressing without it: %s",
+                    e)
+
+        # The adaptive schedule reads live writes off the budget
+        self._live_budget = self.budget
+        if self.schedule != "quiet_hours" and self._live_budget is None:
+            try:
+                self._live_budget = load_io_budget().IOBudget()
+            except Exception as e:
+                self.logger.warning(
+                    "Could not load I/O budget, scheduling without the "
+                    "trigger rate: %s", e)
 
     def _is_quiet_time(self, current_time):
         """
@@ -116,6 +479,83 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         else:
             return current_hour >= self.quiet_start or current_hour < self.quiet_end
 
+    def _in_window(self, current_time):
+        """
+        Check if current time is within the schedule's outer bound.
+
+        Parameters
+        ----------
+        current_time : datetime
+            The current time to check.
+
+        Returns
+        -------
+        bool
+            True if within quiet hours or the schedule has no bound.
+        """
+        if self.schedule == "adaptive":
+            return True
+        return self._is_quiet_time(current_time)
+
+    def _admit(self, in_flight):
+        """
+        Return how many files may be in flight, waiting out high load.
+
+        Under the adaptive schedule, waits while the scheduler says
+        pause, for up to max_pause seconds.
+
+        Parameters
+        ----------
+        in_flight : int
+            Files being compressed right now.
+
+        Returns
+        -------
+        int
+            max_workers, 1 while throttled, or 0 to end the pass (the
+            window closed or load stayed high).
+        """
+        if not self._in_window(datetime.datetime.utcnow()):
+            return 0
+        if self._scheduler is None:
+            return self.max_workers
+
+        paused_at = None
+        while True:
+            level = self._scheduler.update(own_workers=in_flight,
+                                           own_bytes=self.io_bytes)
+            if level != AdaptiveScheduler.PAUSE:
+                if paused_at is not None:
+                    self.paused_seconds += time.monotonic() - paused_at
+                    self.logger.info(
+                        "Load subsided (%s), resuming compression",
+                        self._scheduler.describe())
+                if level == AdaptiveScheduler.THROTTLE:
+                    return 1
+                return self.max_workers
+            if paused_at is None:
+                paused_at = time.monotonic()
+                self.logger.info("Compression paused for load: %s",
+                                 self._scheduler.describe())
+            elif time.monotonic() - paused_at >= self.max_pause:
+                self.paused_seconds += time.monotonic() - paused_at
+                self.logger.info(
+                    "Load still high after %.0f s (%s), ending pass",
+                    self.max_pause, self._scheduler.describe())
+                return 0
+            time.sleep(self.pause_poll)
+            if not self._in_window(datetime.datetime.utcnow()):
+                self.paused_seconds += time.monotonic() - paused_at
+                return 0
+
+    def _make_scheduler(self):
+        """Create the pass's AdaptiveScheduler, or None for quiet hours."""
+        if self.schedule == "quiet_hours":
+            return None
+        return AdaptiveScheduler(
+            self._get_data_roots(), budget=self._live_budget,
+            **self.scheduler_limits)
+
     def _get_data_roots(self):
         """
         Get the root directories that contain date-named data directories.
@@ -220,8 +660,8 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         try:
             current_time = input_data['time'].value
 
-            # Only work during quiet hours
-            if not self._is_quiet_time(current_time):
+            # Only work during quiet hours (or the adaptive bound)
+            if not self._in_window(current_time):
                 self.logger.debug(
                     "Outside quiet hours (%02d:00-%02d:00), skipping",
                     self.quiet_start, self.quiet_end)
@@ -232,8 +672,14 @@ class CompressData(brokkr.pipeline.base.OutputStep):
 
             if compressed_count > 0 or error_count > 0:
                 self.logger.info(
-                    "Compression pass: %d compressed, %d skipped, %d errors",
-                    compressed_count, skipped_count, error_count)
+                    "Compression pass: %d compressed (%.1f MB in %.0f s, "
+                    "%.2f MB/s, %d workers), %d skipped, %d errors "
+                    "(%.1f s waiting for I/O budget, %.0f s paused for "
+                    "load)",
+                    compressed_count, self.bytes_compressed / 1e6,
+                    self.compress_seconds, self.compress_rate() / 1e6,
+                    self.max_workers, skipped_count, error_count,
+                    self.budget_wait, self.paused_seconds)
             elif skipped_count > 0:
                 self.logger.debug(
                     "Compression pass: up to date (%d checked)",
@@ -247,6 +693,27 @@ class CompressData(brokkr.pipeline.base.OutputStep):
 
         return input_data
 
+    def compress_rate(self):
+        """Return the last pass's compressed input in bytes per second."""
+        if self.compress_seconds <= 0:
+            return 0.0
+        return self.bytes_compressed / self.compress_seconds
+
+    def _make_pool(self):
+        """Create the worker pool, or None to compress in-process.
+
+        Workers are forked, so they start from this (already niced)
+        process and need nothing pickled but the files to compress.
+        Processes are only started once work is submitted.
+        """
+        if self.max_workers <= 1:
+            return None
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_set_worker_priority,
+        )
+
     def compress_old_files(self):
         """Compress trigger files, resuming from last compressed position.
 
@@ -257,6 +724,10 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         On the first run (no compressed output yet), processes everything
         older than min_age_days.
 
+        With max_workers > 1, files are compressed by a process pool.
+        When quiet hours end no more files are handed out, and the files
+        already being compressed are finished before returning.
+
         Returns
         -------
         tuple
@@ -265,12 +736,46 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         compressed_count = 0
         skipped_count = 0
         error_count = 0
+        self.budget_wait = 0.0
+        self.bytes_compressed = 0
+        self.io_bytes = 0
+        self.compress_seconds = 0.0
+        self.paused_seconds = 0.0
 
         if not self.source_path.exists():
             self.logger.warning(
                 "Source path does not exist: %s", self.source_path)
             return compressed_count, skipped_count, error_count
 
+        start_time = time.monotonic()
+        self._scheduler = self._make_scheduler()
+        pool = self._make_pool()
+        try:
+            for result in self._compress_data_roots(pool):
+                compressed_count += result[0]
+                skipped_count += result[1]
+                error_count += result[2]
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+            self.compress_seconds = time.monotonic() - start_time
+
+        return compressed_count, skipped_count, error_count
+
+    def _compress_data_roots(self, pool):
+        """
+        Compress eligible date directories on every data root.
+
+        Parameters
+        ----------
+        pool : concurrent.futures.Executor or None
+            Worker pool from _make_pool(), or None to compress in-process.
+
+        Yields
+        ------
+        tuple
+            (compressed_count, skipped_count, error_count) per directory.
+        """
         data_roots = self._get_data_roots()
 
         cutoff_time = datetime.datetime.utcnow() - datetime.timedelta(
@@ -280,14 +785,26 @@ class CompressData(brokkr.pipeline.base.OutputStep):
             output_path = data_root / self.output_subdir
             output_path.mkdir(parents=True, exist_ok=True)
 
-            resume_pos = self._find_resume_position(data_root)
+            manifest = self._load_manifest(output_path)
+            # Recoveries land in any hour, so they don't mark progress
+            compressed_hours = [
+                source.split("/")[0]
+                for source, record in manifest.items()
+                if not record.get("recovered")
+            ]
+            if compressed_hours:
+                resume_pos = max(compressed_hours)
+            elif manifest:
+                resume_pos = None
+            else:
+                resume_pos = self._find_resume_position(data_root)
 
             for data_dir in sorted(data_root.iterdir()):
                 # Re-check quiet hours so we stop when the window ends
-                if not self._is_quiet_time(datetime.datetime.utcnow()):
+                if not self._in_window(datetime.datetime.utcnow()):
                     self.logger.info(
                         "Quiet hours ended, stopping compression")
-                    return compressed_count, skipped_count, error_count
+                    return
 
                 if not data_dir.is_dir():
                     continue
@@ -307,7 +824,8 @@ class CompressData(brokkr.pipeline.base.OutputStep):
                     out_subdir = output_path / data_dir.name
                     bin_files = list(data_dir.glob("*.bin"))
                     all_done = all(
-                        (out_subdir / (f.stem + ".hmc")).exists()
+                        self._source_name(f) in manifest
+                        or (out_subdir / (f.stem + ".hmc")).exists()
                         for f in bin_files
                     )
                     if all_done and bin_files:
@@ -323,29 +841,38 @@ class CompressData(brokkr.pipeline.base.OutputStep):
                         continue
 
                     result = self._compress_directory_files(
-                        data_dir, output_path)
-                    compressed_count += result[0]
-                    skipped_count += result[1]
-                    error_count += result[2]
+                        data_dir, output_path, pool, manifest)
 
                 except Exception as e:
                     self.logger.error(
                         "Error processing directory %s: %s",
                         data_dir.name, e)
-                    error_count += 1
-
-        return compressed_count, skipped_count, error_count
+                    result = (0, 0, 1)
+                yield result
 
-    def _compress_directory_files(self, data_dir, output_path):
+    def _compress_directory_files(self, data_dir, output_path, pool=None,
+                                  manifest=None):
         """
         Compress all .bin files in a directory.
 
+        Files listed in the drive's manifest are skipped without touching
+        the filesystem. Others are only skipped if their .hmc exists (e.g.
+        written before the manifest), and are then added to the manifest.
+        With a pool, at most max_workers files are in flight at once, so
+        stopping at the end of quiet hours only waits for those.
+
         Parameters
         ----------
         data_dir : Path
             The directory containing .bin files.
         output_path : Path
             The directory where compressed files will be stored.
+        pool : concurrent.futures.Executor, optional
+            Worker pool to compress the files with. Default is None
+            (compress in this process).
+        manifest : dict, optional
+            The drive's manifest records by source, from _load_manifest().
+            Default is None (load it from output_path).
 
         Returns
         -------
@@ -360,29 +887,96 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         out_subdir = output_path / data_dir.name
         out_subdir.mkdir(parents=True, exist_ok=True)
 
+        if manifest is None:
+            manifest = self._load_manifest(output_path)
+
         # Find all .bin files in the directory
         bin_files = list(data_dir.glob("*.bin"))
+        pending = {}
+        finish_times = {}
 
-        for bin_file in bin_files:
-            # Re-check quiet hours so we stop when the window ends
-            if not self._is_quiet_time(datetime.datetime.utcnow()):
-                break
-
-            # Check if already compressed
-            hmc_file = out_subdir / (bin_file.stem + ".hmc")
-            if hmc_file.exists():
-                skipped_count += 1
-                continue
-
-            # Compress the file
-            if self._compress_file(bin_file, out_subdir):
+        def finish(bin_file, success, source_stat, duration):
+            nonlocal compressed_count, error_count
+            if success:
                 compressed_count += 1
+                try:
+                    self.io_bytes += (
+                        out_subdir / (bin_file.stem + ".hmc")).stat().st_size
+                except OSError:
+                    pass
+                self._record_compressed(
+                    manifest, output_path, bin_file, source_stat, duration)
                 # Delete original if configured
                 if self.delete_originals:
                     self._remove_file(bin_file)
             else:
                 error_count += 1
 
+        def collect(return_when):
+            done, _ = concurrent.futures.wait(
+                pending, return_when=return_when)
+            for future in done:
+                bin_file, source_stat, start = pending.pop(future)
+                finish(bin_file, self._collect_result(future, bin_file),
+                       source_stat,
+                       finish_times.pop(future, time.monotonic()) - start)
+
+        # A file that fails here must not strand the ones already in flight
+        try:
+            for bin_file in bin_files:
+                try:
+                    # Check if already compressed
+                    if self._source_name(bin_file) in manifest:
+                        skipped_count += 1
+                        continue
+                    hmc_file = out_subdir / (bin_file.stem + ".hmc")
+                    if hmc_file.exists():
+                        self._record_compressed(
+                            manifest, output_path, bin_file, bin_file.stat(),
+                            None, adopted=True)
+                        skipped_count += 1
+                        continue
+
+                    # Re-check quiet hours and load; stop when either says so
+                    limit = self._admit(len(pending))
+                    if not limit:
+                        if pending:
+                            self.logger.info(
+                                "Stopping compression, draining %d workers",
+                                len(pending))
+                        break
+
+                    # Compress the file
+                    source_stat = bin_file.stat()
+                    self.io_bytes += source_stat.st_size
+                    if pool is None:
+                        start = time.monotonic()
+                        success = self._compress_file(bin_file, out_subdir)
+                        finish(bin_file, success, source_stat,
+                               time.monotonic() - start)
+                        continue
+                    while len(pending) >= limit:
+                        collect(concurrent.futures.FIRST_COMPLETED)
+                    self._take_budget(bin_file)
+                    start = time.monotonic()
+                    future = pool.submit(
+                        compress_file,
+                        str(bin_file),
+                        output_dir=str(out_subdir),
+                        method=self.method,
+                        step=self.step,
+                    )
+                    future.add_done_callback(
+                        lambda f: finish_times.setdefault(f, time.monotonic()))
+                    pending[future] = (bin_file, source_stat, start)
+                except Exception as e:
+                    self.logger.error(
+                        "Error compressing %s: %s", bin_file.name, e)
+                    error_count += 1
+        finally:
+            if pending:
+                collect(concurrent.futures.ALL_COMPLETED)
+
         # If directory is now empty and delete_originals is True, remove it
         if self.delete_originals:
             remaining = list(data_dir.glob("*"))
@@ -391,6 +985,85 @@ class CompressData(brokkr.pipeline.base.OutputStep):
 
         return compressed_count, skipped_count, error_count
 
+    @staticmethod
+    def _source_name(bin_file):
+        """Return a trigger file's manifest name, '<date dir>/<file>'."""
+        return "{}/{}".format(bin_file.parent.name, bin_file.name)
+
+    def _load_manifest(self, output_path):
+        """
+        Return a drive's manifest records by source name.
+
+        The manifest is cached between passes; only lines appended since
+        the last read are parsed, and it is re-read if it shrank. A drive
+        without one gets a manifest listing the archives already on it.
+
+        Parameters
+        ----------
+        output_path : Path
+            The drive's compressed output directory.
+
+        Returns
+        -------
+        dict
+            Manifest records keyed by source, the latest record winning.
+        """
+        path = output_path / compress_manifest.MANIFEST_NAME
+        offset, records = self._manifests.get(path, (0, {}))
+        try:
+            if path.stat().st_size < offset:
+                offset, records = 0, {}
+        except FileNotFoundError:
+            try:
+                compress_manifest.append_manifest(output_path)
+            except OSError as e:
+                self.logger.warning(
+                    "Could not create manifest %s: %s", path, e)
+            offset, records = 0, {}
+        new_records, offset = compress_manifest.read_manifest(path, offset)
+        for record in new_records:
+            records[record["source"]] = record
+        self._manifests[path] = (offset, records)
+        return records
+
+    def _record_compressed(self, manifest, output_path, bin_file,
+                           source_stat, duration, adopted=False):
+        """
+        Append a finished archive to the drive's manifest.
+
+        Parameters
+        ----------
+        manifest : dict
+            The drive's manifest records by source, updated in place.
+        output_path : Path
+            The drive's compressed output directory.
+        bin_file : Path
+            The source .bin file.
+        source_stat : os.stat_result
+            Stat of the source, taken before it was compressed.
+        duration : float or None
+            Seconds spent compressing; None if not known.
+        adopted : bool
+            The archive predates the manifest, so the method and step it
+            was made with are unknown and it is not checksummed.
+            Default is False.
+        """
+        output = "{}/{}.hmc".format(bin_file.parent.name, bin_file.stem)
+        try:
+            record = compress_manifest.make_record(
+                output_path, self._source_name(bin_file), output,
+                source_stat,
+                method=None if adopted else self.method,
+                step=None if adopted else self.step,
+                duration=duration, checksum=not adopted)
+            compress_manifest.append_manifest(output_path, record)
+        except Exception as e:
+            self.logger.warning(
+                "Could not add %s to manifest in %s: %s",
+                bin_file.name, output_path, e)
+            return
+        manifest[record["source"]] = record
+
     def _compress_file(self, input_file, output_dir):
         """
         Compress a single trigger file using hamma.compression.
@@ -410,6 +1083,8 @@ class CompressData(brokkr.pipeline.base.OutputStep):
         self.logger.debug("Compressing file: %s", input_file.name)
 
         try:
+            self._take_budget(input_file)
+
             # Use hamma.compression.compress_file
             results = compress_file(
                 str(input_file),
@@ -417,25 +1092,72 @@ class CompressData(brokkr.pipeline.base.OutputStep):
                 method=self.method,
                 step=self.step
             )
+            return self._check_results(input_file, results)
 
-            if results and len(results) > 0:
-                result = results[0]
-                self.logger.debug(
-                    "Compressed %s: %.1f%% (method=%s)",
-                    input_file.name,
-                    result['ratio'] * 100,
-                    result['method'])
-                return True
-            else:
-                self.logger.error(
-                    "Compression returned no results for %s", input_file.name)
-                return False
+        except Exception as e:
+            self.logger.error(
+                "Error compressing %s: %s", input_file.name, e)
+            return False
+
+    def _collect_result(self, future, input_file):
+        """
+        Check the outcome of a file compressed by a pool worker.
+
+        Parameters
+        ----------
+        future : concurrent.futures.Future
+            The finished compress_file() call.
+        input_file : Path
+            The .bin file that was compressed.
 
+        Returns
+        -------
+        bool
+            True if compression was successful, False otherwise.
+        """
+        try:
+            return self._check_results(input_file, future.result())
         except Exception as e:
             self.logger.error(
                 "Error compressing %s: %s", input_file.name, e)
             return False
 
+    def _take_budget(self, input_file):
+        """Take the file's size from the shared I/O budget, if enabled."""
+        if self.budget is not None:
+            self.budget_wait += self.budget.take(
+                input_file.stat().st_size, "compress")
+
+    def _check_results(self, input_file, results):
+        """
+        Log the compress_file() results and count the bytes compressed.
+
+        Parameters
+        ----------
+        input_file : Path
+            The .bin file that was compressed.
+        results : list of dict
+            The return value of hamma.compression.compress_file.
+
+        Returns
+        -------
+        bool
+            True if compression returned a result, False otherwise.
+        """
+        if results and len(results) > 0:
+            result = results[0]
+            self.logger.debug(
+                "Compressed %s: %.1f%% (method=%s)",
+                input_file.name,
+                result['ratio'] * 100,
+                result['method'])
+            self.bytes_compressed += input_file.stat().st_size
+            return True
+        else:
+            self.logger.error(
+                "Compression returned no results for %s", input_file.name)
+            return False
+
     def _remove_file(self, file_path):
         """
         Safely remove a file.
@@ -0,0 +1,119 @@
+"""
+Plugin to give live trigger writes priority on the shared DATA drive I/O budget.
+
+Runs in the science_disk_write pipeline just before the binary file output.
+Each packet is noted on the budget (scripts/io_budget.py), which pauses
+scrub recovery and compression while triggers are being written, and the
+budget's telemetry is exported periodically for node_exporter.
+"""
+
+# Standard library imports
+import importlib.util
+import time
+from pathlib import Path
+
+# Local imports
+import brokkr.pipeline.base
+
+IO_BUDGET_MODULE = (Path(__file__).resolve().parent.parent
+                    / "scripts" / "io_budget.py")
+
+
+def load_io_budget():
+    """Load scripts/io_budget.py, the DATA drive I/O budget shared with scrub.
+
+    Plugins are loaded by path, so the module is too.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "io_budget", IO_BUDGET_MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class IOBudgetLive(brokkr.pipeline.base.OutputStep):
+    """Mark live science writes on the shared I/O budget."""
+
+    def __init__(self,
+                 key_name="science_packet",
+                 budget_path=None,
+                 live_hold=None,
+                 metrics_file=None,
+                 metrics_interval=60,
+                 **output_step_kwargs):
+        """
+        Mark live science writes on the shared I/O budget.
+
+        Parameters
+        ----------
+        key_name : str
+            Key of the packet in the pipeline data; its length is the
+            number of bytes about to be written. Default is
+            "science_packet".
+        budget_path : str, optional
+            Bucket state file. Default is io_budget.BUDGET_PATH, the one
+            hamma_scrub and the compression plugin use.
+        live_hold : float, optional
+            Seconds background I/O stays paused after each live packet.
+            Default is io_budget.LIVE_HOLD.
+        metrics_file : str, optional
+            Prometheus textfile the budget's telemetry (bytes and waits
+            per consumer) is written to. Default is None (not exported).
+        metrics_interval : float
+            Minimum seconds between metrics_file updates. Default is 60.
+        output_step_kwargs : **kwargs, optional
+            Keyword arguments to pass to the OutputStep constructor.
+
+        """
+        super().__init__(**output_step_kwargs)
+
+        self.key_name = key_name
+        self.metrics_file = metrics_file
+        self.metrics_interval = metrics_interval
+        self._last_metrics_time = None
+
+        self.io_budget = load_io_budget()
+        budget_kwargs = {}
+        if live_hold is not None:
+            budget_kwargs["live_hold"] = live_hold
+        self.budget = self.io_budget.IOBudget(
+            budget_path or self.io_budget.BUDGET_PATH, **budget_kwargs)
+
+    def execute(self, input_data=None):
+        """
+        Note the packet as a live write, then export metrics if due.
+
+        Parameters
+        ----------
+        input_data : any, optional
+            Per iteration input data passed from previous PipelineSteps.
+            Expected to contain the packet under key_name.
+
+        Returns
+        -------
+        input_data : same as input_data
+            Input data passed through for further steps to consume.
+        """
+        try:
+            packet = input_data[self.key_name].value
+            self.budget.note_live(len(packet) if packet else 0)
+            self._write_metrics()
+        except Exception as e:
+            self.logger.error(
+                "%s in %s on step %s: %s",
+                type(e).__name__, type(self), self.name, e)
+            self.logger.info("Error details:", exc_info=True)
+
+        return input_data
+
+    def _write_metrics(self):
+        """Write the budget telemetry if metrics_interval has elapsed."""
+        if not self.metrics_file:
+            return
+        now = time.monotonic()
+        if (self._last_metrics_time is not None
+                and now - self._last_metrics_time < self.metrics_interval):
+            return
+        self._last_metrics_time = now
+        self.io_budget.write_prometheus(self.budget.status(),
+                                        self.metrics_file)
@@ -0,0 +1,240 @@
+"""Per-drive manifest of compressed trigger archives.
+
+Every .hmc archive written to a DATA drive, by the CompressData plugin
+or by hamma_scrub.py --recover-compressed, is recorded in an append-only
+manifest on its drive, <drive>/compressed/manifest.jsonl, one JSON
+object per line:
+
+    {"source": "2026-01-15T10/trigger01.bin", "size": ..., "mtime": ...,
+     "output": "2026-01-15T10/trigger01.hmc", "output_size": ...,
+     "method": "quantize", "step": 8, "duration": ..., "sha256": "...",
+     "time": "2026-01-16T08:00:03Z"}
+
+source is relative to the drive and output to the compressed directory.
+Archives recovered straight to .hmc carry "recovered": true; their
+source never existed on the drive, so size and mtime are those of the
+trigger as assembled. A line is only written once its archive is
+complete, so the manifest is the list of archives ready to transfer
+(see hamma_download.py).
+
+Appends are serialized with an exclusive flock, so both writers can
+share one manifest. Whichever writer creates it also adopts the
+archives already on the drive, listing them without a checksum, method
+or step (not known, or not worth a full read of the drive).
+"""
+
+# Standard library imports
+import datetime
+import fcntl
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+
+MANIFEST_NAME = "manifest.jsonl"
+DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}$")
+RECOVERED_SUFFIX = "_recovered"  # stem suffix of hamma_scrub recoveries
+
+
+def parse_records(lines):
+    """
+    Parse manifest lines into records, skipping any that are not valid.
+
+    A valid record is a JSON object naming both its source and its
+    output archive; anything else, such as a line torn by a crash, is
+    skipped. read_manifest() and hamma_download.py share this test.
+
+    Parameters
+    ----------
+    lines : iterable of str or bytes
+        Manifest lines, one JSON object each.
+
+    Returns
+    -------
+    list of dict
+        The valid records, in order.
+    """
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and record.get("source") \
+                and record.get("output"):
+            records.append(record)
+    return records
+
+
+def read_manifest(path, offset=0):
+    """
+    Read the manifest records appended after offset.
+
+    Invalid lines, such as one torn by a crash, are skipped (see
+    parse_records()).
+
+    Parameters
+    ----------
+    path : str or Path
+        The manifest file.
+    offset : int
+        Byte position to start reading at. Default is 0 (whole file).
+
+    Returns
+    -------
+    tuple
+        (records, offset): the records as a list of dicts, and the
+        position just past the last complete line, to resume from.
+    """
+    try:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    end = data.rfind(b"\n") + 1
+    return parse_records(data[:end].splitlines()), offset + end
+
+
+def file_sha256(path):
+    """Return the hex SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def make_record(output_path, source, output, source_stat=None, method=None,
+                step=None, duration=None, checksum=True, recovered=False):
+    """
+    Build the manifest record for a finished archive.
+
+    Parameters
+    ----------
+    output_path : str or Path
+        The drive's compressed directory.
+    source : str
+        The source, '<date dir>/<file>.bin', relative to the drive.
+    output : str
+        The archive, '<date dir>/<file>.hmc', relative to output_path.
+    source_stat : os.stat_result, optional
+        Stat of the source taken before it was compressed; None if the
+        source is gone.
+    method, step : optional
+        The hamma.compression settings used; None if not known.
+    duration : float, optional
+        Seconds spent compressing; None if not known.
+    checksum : bool
+        Whether to record the archive's SHA-256. Default is True.
+    recovered : bool
+        The archive was recovered straight to .hmc. Default is False.
+
+    Returns
+    -------
+    dict
+        The record, as described in the module docstring.
+    """
+    hmc_file = Path(output_path) / output
+    record = {
+        "source": source,
+        "size": source_stat.st_size if source_stat else None,
+        "mtime": source_stat.st_mtime if source_stat else None,
+        "output": output,
+        "output_size": hmc_file.stat().st_size,
+        "method": method,
+        "step": step,
+        "duration": None if duration is None else round(duration, 3),
+        "sha256": file_sha256(hmc_file) if checksum else None,
+        "time": datetime.datetime.now(datetime.timezone.utc).strftime(
+            "%Y-%m-%dT%H:%M:%SZ"),
+    }
+    if recovered:
+        record["recovered"] = True
+    return record
+
+
+def adopt_archives(output_path, skip=()):
+    """
+    Build records for the archives already in a compressed directory.
+
+    Parameters
+    ----------
+    output_path : str or Path
+        The drive's compressed directory.
+    skip : iterable of str
+        Outputs not to adopt, e.g. the archive about to be appended.
+
+    Returns
+    -------
+    list of dict
+        One record per archive, without checksum, method or step. An
+        archive named like a hamma_scrub recovery whose source is not on
+        the drive is marked recovered.
+    """
+    output_path = Path(output_path)
+    skip = set(skip)
+    records = []
+    for hmc_file in sorted(output_path.glob("*/*.hmc")):
+        hour = hmc_file.parent.name
+        output = "{}/{}".format(hour, hmc_file.name)
+        if not DATE_DIR_RE.match(hour) or output in skip:
+            continue
+        bin_file = output_path.parent / hour / (hmc_file.stem + ".bin")
+        try:
+            source_stat = bin_file.stat()
+        except OSError:
+            source_stat = None
+        records.append(make_record(
+            output_path, "{}/{}".format(hour, bin_file.name), output,
+            source_stat, checksum=False,
+            recovered=(source_stat is None
+                       and hmc_file.stem.endswith(RECOVERED_SUFFIX))))
+    return records
+
+
+def append_manifest(output_path, record=None):
+    """
+    Append one record to a drive's manifest and fsync it.
+
+    Runs under an exclusive flock on the manifest. The writer that
+    creates the manifest adopts the archives already on the drive first.
+    A last line left unterminated by a crash is terminated, so the new
+    record is not glued onto it.
+
+    Parameters
+    ----------
+    output_path : str or Path
+        The drive's compressed directory, holding MANIFEST_NAME.
+    record : dict, optional
+        The record to append. None only creates the manifest, adopting
+        the archives already there.
+    """
+    path = os.path.join(str(output_path), MANIFEST_NAME)
+    try:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_APPEND,
+                     0o644)
+        created = True
+    except FileExistsError:
+        fd = os.open(path, os.O_RDWR | os.O_APPEND)
+        created = False
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        size = os.fstat(fd).st_size
+        records = [record] if record is not None else []
+        if created:
+            # Another writer may have got its record in before our lock
+            written = read_manifest(path)[0]
+            skip = {r.get("output") for r in records + written}
+            records = adopt_archives(output_path, skip) + records
+        prefix = b""
+        if size and os.pread(fd, 1, size - 1) != b"\n":
+            prefix = b"\n"
+        data = prefix + b"".join(
+            (json.dumps(r, sort_keys=True) + "\n").encode() for r in records)
+        if data:
+            os.write(fd, data)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
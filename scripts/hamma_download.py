@@ -4,6 +4,11 @@
 Pulls data from remote HAMMA sensors to the local server. Designed to run
 on the meteor server, connecting to sensors via SSH tunnels on hamma.dev.
 
+Compressed pulls transfer exactly the archives listed in each drive's
+compression manifest (compressed/manifest.jsonl, written by the
+CompressData plugin once an archive is complete). Drives without a
+manifest fall back to copying whole date directories.
+
 Usage:
     python hamma_download.py -s 41 -d /rgroup/hammadev/ignis/mj41 --start 2025-11-05
     python hamma_download.py -s 41 -d /rgroup/hammadev/ignis/mj41 --sync --slurm
@@ -20,6 +25,12 @@ import sys
 import tempfile
 from datetime import datetime, timedelta
 
+# Local imports
+try:
+    import compress_manifest
+except ImportError:  # only when started without scripts/ on sys.path
+    compress_manifest = None
+
 logger = logging.getLogger(__name__)
 
 PORT_OFFSET = 10000
@@ -33,6 +44,7 @@ SSH_TIMEOUT = 30
 RSYNC_TIMEOUT = 300
 MEDIA_PATH = "/media/pi"
 COMPRESSED_SUBDIR = "compressed"
+MANIFEST_NAME = "manifest.jsonl"
 DRIVE_PATTERN = "DATA??"
 DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}$")
 
@@ -239,6 +251,103 @@ def _list_remote_dirs(sensor, drive, compressed=True):
     return [e for e in entries if DATE_DIR_RE.match(e)]
 
 
+def _read_remote_manifest(sensor, drive):
+    """Read a drive's compression manifest from a sensor.
+
+    Parameters
+    ----------
+    sensor : int
+        Sensor number.
+    drive : str
+        Drive name (e.g., 'DATA37').
+
+    Returns
+    -------
+    list of dict or None
+        The manifest records, or None if the drive has no manifest or it
+        lists nothing (so the caller falls back to listing directories).
+    """
+    if compress_manifest is None:
+        logger.warning("No compress_manifest.py beside hamma_download.py, "
+                       "ignoring manifests")
+        return None
+    path = "{}/{}/{}/{}".format(MEDIA_PATH, drive, COMPRESSED_SUBDIR,
+                                MANIFEST_NAME)
+    try:
+        text = _ssh_run(sensor, "cat {}".format(path))
+    except RuntimeError:
+        logger.debug("No manifest %s on sensor %d", path, sensor)
+        return None
+    return compress_manifest.parse_records(text.splitlines()) or None
+
+
+def _manifest_files(records, dirs=None):
+    """List the archives in manifest records, optionally only in dirs.
+
+    Parameters
+    ----------
+    records : list of dict
+        Manifest records from _read_remote_manifest().
+    dirs : list of str, optional
+        Date directories to keep. Default is None (all).
+
+    Returns
+    -------
+    list of str
+        Sorted archive paths relative to the compressed directory.
+    """
+    wanted = None if dirs is None else set(dirs)
+    return sorted({
+        r["output"] for r in records
+        if wanted is None or r["output"].split("/")[0] in wanted
+    })
+
+
+def _rsync_files(sensor, drive, files, dest, dry_run=False, cleanup=False):
+    """Rsync a list of archives from a drive's compressed directory.
+
+    Files listed but no longer on the sensor (e.g. removed by an earlier
+    --cleanup sync) are ignored.
+
+    Parameters
+    ----------
+    sensor : int
+        Sensor number.
+    drive : str
+        Drive name (e.g., 'DATA37').
+    files : list of str
+        Paths relative to the compressed directory.
+    dest : str
+        Local destination path; the date directories are kept.
+    dry_run : bool
+        If True, pass --dry-run to rsync.
+    cleanup : bool
+        If True, remove the files from the sensor after transfer.
+
+    Returns
+    -------
+    subprocess.CompletedProcess
+        The finished rsync run.
+    """
+    port = str(PORT_OFFSET + sensor)
+    base = "{}/{}/{}".format(MEDIA_PATH, drive, COMPRESSED_SUBDIR)
+    cmd = (
+        ["rsync", "-avz", "--timeout={}".format(RSYNC_TIMEOUT),
+         "--files-from=-", "--ignore-missing-args"]
+        + (["--dry-run"] if dry_run else [])
+        + (["--remove-source-files"] if cleanup and not dry_run else [])
+        + ["-e", "ssh {} -p {}".format(" ".join(SSH_OPTIONS), port)]
+        + ["{}@{}:{}/".format(SSH_USER, SSH_HOST, base), dest]
+    )
+    logger.debug("Rsync command: %s", " ".join(cmd))
+    return subprocess.run(
+        cmd,
+        input="".join(f + "\n" for f in files),
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+
+
 def download(sensor, dest, start, end=None, compressed=True, dry_run=False):
     """Download data from a HAMMA sensor via rsync.
 
@@ -272,7 +381,13 @@ def download(sensor, dest, start, end=None, compressed=True, dry_run=False):
     last_rc = 0
 
     for drive in drives:
-        remote_dirs = _list_remote_dirs(sensor, drive, compressed=compressed)
+        records = (_read_remote_manifest(sensor, drive)
+                   if compressed else None)
+        if records is not None:
+            remote_dirs = {r["output"].split("/")[0] for r in records}
+        else:
+            remote_dirs = _list_remote_dirs(sensor, drive,
+                                            compressed=compressed)
         matched = _filter_dirs(remote_dirs, start, end)
 
         if not matched:
@@ -282,6 +397,24 @@ def download(sensor, dest, start, end=None, compressed=True, dry_run=False):
             )
             continue
 
+        if records is not None:
+            files = _manifest_files(records, matched)
+            logger.info(
+                "Downloading %d manifest files in %d directories from "
+                "sensor %d drive %s", len(files), len(matched), sensor, drive,
+            )
+            result = _rsync_files(sensor, drive, files, dest,
+                                  dry_run=dry_run)
+            if result.returncode != 0:
+                logger.error(
+                    "Rsync failed (exit %d): %s",
+                    result.returncode, result.stderr.strip(),
+                )
+                last_rc = result.returncode
+            else:
+                logger.info("Download complete for drive %s", drive)
+            continue
+
         # Build rsync source paths
         if compressed:
             base = "{}/{}/{}".format(MEDIA_PATH, drive, COMPRESSED_SUBDIR)
@@ -328,10 +461,13 @@ def download(sensor, dest, start, end=None, compressed=True, dry_run=False):
 def sync(sensor, dest, cleanup=False, dry_run=False):
     """Sync all compressed data from a sensor, optionally cleaning up.
 
-    Downloads everything in compressed/ directories on the sensor,
-    skipping the current hour's directory to avoid partial files.
-    With cleanup=True, successfully transferred files are removed
-    from the sensor via rsync --remove-source-files.
+    Downloads every archive listed in each drive's compression
+    manifest. Only complete archives are listed, so nothing is caught
+    mid-compression. Drives without a manifest have their compressed/
+    date directories copied instead, skipping the current hour's
+    directory to avoid partial files. With cleanup=True, successfully
+    transferred files are removed from the sensor via rsync
+    --remove-source-files.
 
     Parameters
     ----------
@@ -359,6 +495,32 @@ def sync(sensor, dest, cleanup=False, dry_run=False):
     current_dir = now.strftime("%Y-%m-%dT%H")
 
     for drive in drives:
+        records = _read_remote_manifest(sensor, drive)
+        if records is not None:
+            files = _manifest_files(records)
+            if not files:
+                logger.info(
+                    "No compressed files to sync on sensor %d drive %s",
+                    sensor, drive)
+                continue
+            logger.info(
+                "Syncing %d manifest files from sensor %d drive %s%s",
+                len(files), sensor, drive,
+                " (cleanup after)" if cleanup and not dry_run else "",
+            )
+            result = _rsync_files(sensor, drive, files, dest,
+                                  dry_run=dry_run, cleanup=cleanup)
+            if result.returncode != 0:
+                logger.error(
+                    "Rsync failed (exit %d): %s",
+                    result.returncode, result.stderr.strip())
+                last_rc = result.returncode
+            else:
+                logger.info(
+                    "Sync complete for drive %s (%d files)",
+                    drive, len(files))
+            continue
+
         remote_dirs = _list_remote_dirs(sensor, drive, compressed=True)
 
         # Filter out current hour
@@ -9,32 +9,62 @@ Related: https://github.com/hamma-dev/mjolnir-hamma/issues/20
 
 Usage:
     python hamma_scrub.py [--ags-host HOST] [--ags-path PATH] [--verbose]
+    python hamma_scrub.py --daemon --recover --purge [--interval SECONDS]
 """
 
 # Standard library imports
 import argparse
+import concurrent.futures
+import contextlib
+import ctypes
+import ctypes.util
+import fcntl
 import glob
+import hashlib
+import io
 import json
 import logging
 import math
+import mmap
 import os
+import queue
 import re
+import resource
+import select
 import shlex
 import shutil
+import signal
 import socket
 import struct
 import subprocess
 import sys
 import tempfile
+import threading
 import time
+import zlib
+from array import array
 from datetime import datetime, timezone
 
+# Third party imports
+import numpy as np
+
+# Local imports
+try:
+    import io_budget
+except ImportError:  # only when started without scripts/ on sys.path
+    io_budget = None
+try:
+    import compress_manifest
+except ImportError:  # only when started without scripts/ on sys.path
+    compress_manifest = None
+
 logger = logging.getLogger(__name__)
 
 # HAMMA 2.0 packet constants
 SYNC_MARKER = b'\xf5\xff\x50\x5d'
 HEADER_SIZE = 128
 PACKET_PAD = 4
+RESYNC_WINDOW = 16 * 1024 * 1024  # bytes searched per mmap.find during resync
 EXPECTED_DATASIZE = 11000000  # words (x2 = bytes)
 MAX_DATASIZE = 20000000  # words; above this is corruption
 DATASIZE_OFFSET = 10  # byte offset of datasize field in header
@@ -46,11 +76,55 @@ DEFAULT_AGS_PATH = "/ags/data"
 DEFAULT_MJ_PATH = "/media/pi"
 DRIVE_PATTERN = "DATA??"
 DEFAULT_LIMIT = 20  # max missing trigger detail lines in human report (0 = no limit)
+DEFAULT_CACHE_DIR = "~/.cache/hamma_scrub"
+
+# MJ header cache: one file per DATA drive, keyed by (relpath, size, mtime)
+MJ_CACHE_MAGIC = b'HSMJC001'
+MJ_CACHE_RECORD = '<QqH'  # size (uint64), mtime_ns (int64), relpath length
+DISK_BY_UUID = "/dev/disk/by-uuid"  # volume UUIDs identify cached drives
 
 # Recovery constants
 MIN_FREE_SPACE = 104857600  # 100MB minimum free space on target drive
-RECOVER_TIMEOUT = 60  # seconds per dd extraction
+RECOVER_TIMEOUT = 60  # seconds per dd extraction, or per batch stall
+RECOVER_QUEUE_DEPTH = 2  # extracted chunks buffered ahead of the writer
+RECOVER_CHUNK_SIZE = 1048576  # bytes per verified, resumable batch chunk
 ORPHAN_MAX_AGE = 3600  # seconds (1 hour) before orphaned temps are deleted
+PARTIAL_MAX_AGE = 604800  # seconds (7 days) before a stalled .partial goes
+
+# Recovery straight to compressed archives (--recover-compressed)
+COMPRESSED_SUBDIR = "compressed"  # per drive, as CompressData's output_subdir
+RECOVERED_JOURNAL = ".recovered_headers"  # in COMPRESSED_SUBDIR on each drive
+RECOVERED_JOURNAL_RECORD = 13 + 128  # hour directory name, then header
+RECOVER_SPOOL_DIR = os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+    "hamma_recover")
+
+# Recovery scheduling
+RECOVERY_PRIORITIES = ("oldest-file", "newest", "order")
+RECOVERY_CHECKPOINT = "recovery_{host}.json"  # in the cache dir
+
+# Purge constants
+PURGE_TIMEOUT = 15  # seconds per AGS file deletion
+
+# Daemon constants
+SCRUB_LOCK_PATH = "/tmp/hamma_scrub.lock"  # also taken by StateMonitor
+DAEMON_INTERVAL = 900  # seconds between incremental AGS passes
+DAEMON_RECOVER_BATCH = 20  # max triggers recovered per pass
+DAEMON_TICK = 5  # seconds between MJ watcher refreshes
+WATCHED_HOUR_DIRS = 2  # newest hour directories watched per drive
+HOUR_DIR_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}')
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+# Metrics export
+METRICS_PREFIX = "hamma_scrub"
+RECOVERY_LATENCY_BUCKETS = (1, 2.5, 5, 10, 20, 30, 60, 120, 300)  # seconds
 
 # Exit codes
 EXIT_OK = 0
@@ -67,9 +141,217 @@ GPS_ECC_OFFSET = 98         # uint32
 GPS_EPOCH = 315964800        # UTC epoch for GPS week 0
 
 
+class ScrubMetrics:
+    """Per-phase performance figures for one scrub (or one daemon pass).
+
+    Code deep in the scan, recovery and purge paths reports through
+    _count_session() and _observe_recovery(), which write to the
+    collector made current with activate() and do nothing otherwise.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.phases = {}  # phase name -> seconds
+        self.bytes = {}  # source -> bytes transferred or read
+        self.sessions = {}  # purpose -> SSH/scp connections opened
+        self.latencies = []  # seconds per recovered trigger
+        self.drives = []  # per-drive read rates from scan_mj_files()
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def activate(self):
+        """Make this the collector the module-level helpers report to."""
+        global _active_metrics
+        previous, _active_metrics = _active_metrics, self
+        try:
+            yield self
+        finally:
+            _active_metrics = previous
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time the body of a with-block as phase `name`."""
+        t0 = time.time()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.time() - t0)
+
+    def add_phase(self, name, seconds):
+        """Add seconds to phase `name` (e.g. for phases run elsewhere)."""
+        with self._lock:
+            self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def add_bytes(self, source, count):
+        """Add count bytes to the total for source."""
+        with self._lock:
+            self.bytes[source] = self.bytes.get(source, 0) + count
+
+    def count_session(self, purpose):
+        """Count one SSH/scp connection opened for purpose."""
+        with self._lock:
+            self.sessions[purpose] = self.sessions.get(purpose, 0) + 1
+
+    def observe_recovery(self, seconds, nbytes):
+        """Record one trigger's transfer-to-disk latency and size."""
+        with self._lock:
+            self.latencies.append(seconds)
+        self.add_bytes("recovery", nbytes)
+
+    def histogram(self):
+        """Cumulative recovery latency counts per RECOVERY_LATENCY_BUCKETS."""
+        return [(le, sum(1 for t in self.latencies if t <= le))
+                for le in RECOVERY_LATENCY_BUCKETS]
+
+    @staticmethod
+    def peak_rss():
+        """Peak resident set size of this process in bytes."""
+        # ru_maxrss is in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+    def as_dict(self):
+        """Return the figures as a JSON-serializable dict."""
+        return {
+            "phases": dict(self.phases),
+            "bytes": dict(self.bytes),
+            "ssh_sessions": dict(self.sessions),
+            "recovery_latency": {
+                "count": len(self.latencies),
+                "sum": sum(self.latencies),
+                "buckets": {str(le): n for le, n in self.histogram()},
+            },
+            "drives": list(self.drives),
+            "peak_rss_bytes": self.peak_rss(),
+        }
+
+    def to_prometheus(self):
+        """Format the figures for the node_exporter textfile collector."""
+        p = METRICS_PREFIX
+        lines = []
+
+        def metric(name, kind, helptext, samples):
+            lines.append("# HELP {}_{} {}".format(p, name, helptext))
+            lines.append("# TYPE {}_{} {}".format(p, name, kind))
+            for labels, value in samples:
+                label_text = ",".join('{}="{}"'.format(k, v)
+                                      for k, v in labels)
+                lines.append("{}_{}{} {}".format(
+                    p, name, "{" + label_text + "}" if label_text else "",
+                    repr(float(value))))
+
+        metric("phase_seconds", "gauge", "Wall time per scrub phase.",
+               [((("phase", k),), v) for k, v in sorted(self.phases.items())])
+        metric("bytes", "gauge", "Bytes transferred or read per source.",
+               [((("source", k),), v) for k, v in sorted(self.bytes.items())])
+        metric("ssh_sessions", "gauge", "SSH/scp connections per purpose.",
+               [((("purpose", k),), v)
+                for k, v in sorted(self.sessions.items())])
+        metric("drive_read_mb_per_second", "gauge",
+               "MJ scan rate per DATA drive.",
+               [((("drive", d["drive"]),), d["mb_per_sec"])
+                for d in self.drives])
+        metric("drive_files_per_second", "gauge",
+               "MJ .bin files scanned per second per DATA drive.",
+               [((("drive", d["drive"]),), d["files_per_sec"])
+                for d in self.drives])
+
+        name = "{}_recovery_latency_seconds".format(p)
+        lines.append("# HELP {} Transfer-to-disk time per recovered "
+                     "trigger.".format(name))
+        lines.append("# TYPE {} histogram".format(name))
+        for le, count in self.histogram():
+            lines.append('{}_bucket{{le="{}"}} {}'.format(name, le, count))
+        lines.append('{}_bucket{{le="+Inf"}} {}'.format(
+            name, len(self.latencies)))
+        lines.append("{}_sum {}".format(name, repr(float(sum(self.latencies)))))
+        lines.append("{}_count {}".format(name, len(self.latencies)))
+
+        metric("peak_rss_bytes", "gauge", "Peak resident set size.",
+               [((), self.peak_rss())])
+        metric("last_run_timestamp_seconds", "gauge",
+               "Start time of the run these figures describe.",
+               [((), self.started)])
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        """Atomically replace path with to_prometheus() output."""
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp, path)
+
+
+_active_metrics = None
+
+
+def _metric_phase(name):
+    # Time a phase on the active ScrubMetrics, if any
+    if _active_metrics is None:
+        return contextlib.nullcontext()
+    return _active_metrics.phase(name)
+
+
+def _count_session(purpose):
+    # Count an SSH/scp connection on the active ScrubMetrics, if any
+    if _active_metrics is not None:
+        _active_metrics.count_session(purpose)
+
+
+def _observe_recovery(seconds, nbytes):
+    # Record a recovered trigger on the active ScrubMetrics, if any
+    if _active_metrics is not None:
+        _active_metrics.observe_recovery(seconds, nbytes)
+
+
+def _observe_budget_wait(seconds):
+    # Record time spent waiting on the shared I/O budget, if any
+    if _active_metrics is not None and seconds > 0:
+        _active_metrics.add_phase("io_budget_wait", seconds)
+
+
+def _map_file(fileobj, file_size):
+    # Read-only mmap of a real file, or None (e.g. BytesIO, empty file)
+    if file_size <= 0:
+        return None
+    try:
+        mapped = mmap.mmap(fileobj.fileno(), file_size, access=mmap.ACCESS_READ)
+    except (AttributeError, io.UnsupportedOperation, ValueError, OSError):
+        return None
+    # Striding touches one header per trigger; don't read ahead the payload
+    if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_RANDOM"):
+        mapped.madvise(mmap.MADV_RANDOM)
+    return mapped
+
+
+def _find_sync(mapped, start_pos, file_size):
+    """Find the next SYNC_MARKER at or after start_pos in a mapped file.
+
+    Searches RESYNC_WINDOW bytes per mmap.find call, hinting each window
+    for sequential access. Returns the offset, or -1 if not found.
+    """
+    pos = start_pos
+    while pos + 4 <= file_size:
+        stop = min(pos + RESYNC_WINDOW, file_size)
+        if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+            page = pos - pos % mmap.PAGESIZE
+            mapped.madvise(mmap.MADV_SEQUENTIAL, page, stop - page)
+        idx = mapped.find(SYNC_MARKER, pos, stop)
+        if idx >= 0:
+            return idx
+        if stop >= file_size:
+            break
+        # Overlap by 3 bytes to catch sync spanning the window boundary
+        pos = stop - 3
+    return -1
+
+
 def extract_headers(fileobj, file_size, filename):
     """Extract 128-byte headers from a concatenated AGS data file.
 
+    Real files are memory-mapped, so each header is a slice and a
+    resync through a corrupted stretch is a few mmap.find calls. Other
+    file objects are read with seek/read.
+
     Parameters
     ----------
     fileobj : file-like
@@ -84,50 +366,70 @@ def extract_headers(fileobj, file_size, filename):
     list of dict
         Each dict has keys: header (bytes), offset (int), index (int).
     """
+    mapped = _map_file(fileobj, file_size)
+    if mapped is not None:
+        def read_header(pos):
+            return mapped[pos:pos + HEADER_SIZE]
+
+        def resync(pos):
+            return _find_sync(mapped, pos, file_size)
+    else:
+        def read_header(pos):
+            fileobj.seek(pos)
+            return fileobj.read(HEADER_SIZE)
+
+        def resync(pos):
+            return _scan_forward(fileobj, pos, file_size)
+
     results = []
     pos = 0
     index = 0
 
-    while pos + HEADER_SIZE <= file_size:
-        fileobj.seek(pos)
-        header = fileobj.read(HEADER_SIZE)
-        if len(header) < HEADER_SIZE:
-            logger.debug("%s: truncated read at offset %d, stopping", filename, pos)
-            break
-
-        # Verify sync marker
-        if header[:4] != SYNC_MARKER:
-            logger.warning(
-                "%s: bad sync marker at offset %d (trigger %d), scanning forward",
-                filename, pos, index,
-            )
-            pos = _scan_forward(fileobj, pos + 1, file_size)
-            if pos < 0:
+    try:
+        while pos + HEADER_SIZE <= file_size:
+            header = read_header(pos)
+            if len(header) < HEADER_SIZE:
+                logger.debug("%s: truncated read at offset %d, stopping",
+                             filename, pos)
                 break
-            continue
 
-        # Read datasize to compute stride
-        datasize = struct.unpack_from(DATASIZE_FORMAT, header, DATASIZE_OFFSET)[0]
-        if datasize == 0 or datasize > MAX_DATASIZE:
-            logger.warning(
-                "%s: datasize %d out of bounds at offset %d, scanning forward",
-                filename, datasize, pos,
-            )
-            pos = _scan_forward(fileobj, pos + 1, file_size)
-            if pos < 0:
-                break
-            continue
+            # Verify sync marker
+            if header[:4] != SYNC_MARKER:
+                logger.warning(
+                    "%s: bad sync marker at offset %d (trigger %d), "
+                    "scanning forward", filename, pos, index,
+                )
+                pos = resync(pos + 1)
+                if pos < 0:
+                    break
+                continue
 
-        results.append({
-            "header": header,
-            "offset": pos,
-            "index": index,
-        })
+            # Read datasize to compute stride
+            datasize = struct.unpack_from(DATASIZE_FORMAT, header,
+                                          DATASIZE_OFFSET)[0]
+            if datasize == 0 or datasize > MAX_DATASIZE:
+                logger.warning(
+                    "%s: datasize %d out of bounds at offset %d, "
+                    "scanning forward", filename, datasize, pos,
+                )
+                pos = resync(pos + 1)
+                if pos < 0:
+                    break
+                continue
 
-        # Advance past payload + padding to next header
-        stride = HEADER_SIZE + datasize * 2 + PACKET_PAD
-        pos += stride
-        index += 1
+            results.append({
+                "header": header,
+                "offset": pos,
+                "index": index,
+            })
+
+            # Advance past payload + padding to next header
+            stride = HEADER_SIZE + datasize * 2 + PACKET_PAD
+            pos += stride
+            index += 1
+    finally:
+        if mapped is not None:
+            mapped.close()
 
     logger.debug("%s: extracted %d headers", filename, len(results))
     return results
@@ -136,6 +438,7 @@ def extract_headers(fileobj, file_size, filename):
 def _scan_forward(fileobj, start_pos, file_size):
     """Scan forward from start_pos to find the next SYNC_MARKER.
 
+    Fallback for file objects that cannot be memory-mapped.
     Returns the offset of the sync marker, or -1 if not found.
     """
     chunk_size = 4096
@@ -186,9 +489,322 @@ def _parse_since(since_str):
     )
 
 
-def scan_mj_files(base_path, since=None):
+def _since_epoch(since_cutoff):
+    """Return Unix seconds for a cutoff from _parse_since() (UTC hour)."""
+    return datetime.strptime(since_cutoff, "%Y-%m-%dT%H").replace(
+        tzinfo=timezone.utc).timestamp()
+
+
+def _volume_uuid(drive):
+    # Filesystem UUID (the FAT volume serial on DATA drives) of the block
+    # device mounted at drive, or None if /dev/disk/by-uuid has no entry
+    dev = os.stat(drive).st_dev
+    try:
+        names = os.listdir(DISK_BY_UUID)
+    except OSError:
+        return None
+    for name in names:
+        try:
+            if os.stat(os.path.join(DISK_BY_UUID, name)).st_rdev == dev:
+                return name
+        except OSError:
+            continue
+    return None
+
+
+def _drive_identity(drive):
+    """Return a string identifying the filesystem mounted at a drive path.
+
+    A swapped drive mounted under the same DATA?? label gets a different
+    identity, which invalidates its header cache. The identity is the
+    volume UUID plus size, so the same drive keeps it across reboots
+    and USB re-enumeration (device numbers do not survive either, and
+    vfat derives its statvfs fsid from them). Without a UUID, the fsid
+    is used instead.
+    """
+    vfs = os.statvfs(drive)
+    volume = _volume_uuid(drive)
+    if volume is None:
+        volume = "fsid-{:x}".format(getattr(vfs, 'f_fsid', 0))
+    return "{}:{}".format(volume, vfs.f_blocks * vfs.f_frsize)
+
+
+def _mj_cache_path(cache_dir, drive):
+    """Return the header cache file path for a DATA drive."""
+    return os.path.join(
+        cache_dir, "mj_{}.cache".format(os.path.basename(drive)),
+    )
+
+
+def load_mj_cache(cache_path, identity):
+    """Load a per-drive MJ header cache.
+
+    Parameters
+    ----------
+    cache_path : str
+        Cache file written by save_mj_cache().
+    identity : str
+        Current drive identity from _drive_identity().
+
+    Returns
+    -------
+    tuple of (dict, bool)
+        (entries, invalidated). Entries map relative path to
+        (size, mtime_ns, header). invalidated is True when a cache
+        existed but belonged to a different drive or was unreadable.
+    """
+    try:
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return {}, False
+    except OSError as e:
+        logger.warning("Cannot read MJ cache %s: %s", cache_path, e)
+        return {}, True
+
+    entries = {}
+    try:
+        if data[:len(MJ_CACHE_MAGIC)] != MJ_CACHE_MAGIC:
+            raise ValueError("bad magic")
+        pos = len(MJ_CACHE_MAGIC)
+        id_len = struct.unpack_from('<I', data, pos)[0]
+        pos += 4
+        cached_identity = data[pos:pos + id_len].decode('utf-8')
+        pos += id_len
+        if cached_identity != identity:
+            logger.info("MJ cache %s is for a different drive, discarding",
+                        cache_path)
+            return {}, True
+        rec_size = struct.calcsize(MJ_CACHE_RECORD)
+        while pos < len(data):
+            size, mtime_ns, path_len = struct.unpack_from(
+                MJ_CACHE_RECORD, data, pos)
+            pos += rec_size
+            relpath = data[pos:pos + path_len].decode('utf-8')
+            pos += path_len
+            header = data[pos:pos + HEADER_SIZE]
+            pos += HEADER_SIZE
+            if len(header) < HEADER_SIZE:
+                raise ValueError("truncated record")
+            entries[relpath] = (size, mtime_ns, header)
+    except (ValueError, struct.error, UnicodeDecodeError) as e:
+        logger.warning("Corrupt MJ cache %s (%s), discarding", cache_path, e)
+        return {}, True
+    return entries, False
+
+
+def save_mj_cache(cache_path, identity, entries):
+    """Atomically write a per-drive MJ header cache.
+
+    Parameters
+    ----------
+    cache_path : str
+        Destination cache file.
+    identity : str
+        Drive identity from _drive_identity().
+    entries : dict
+        Relative path -> (size, mtime_ns, header).
+    """
+    identity_bytes = identity.encode('utf-8')
+    parts = [MJ_CACHE_MAGIC, struct.pack('<I', len(identity_bytes)),
+             identity_bytes]
+    for relpath in sorted(entries):
+        size, mtime_ns, header = entries[relpath]
+        path_bytes = relpath.encode('utf-8')
+        parts.append(struct.pack(MJ_CACHE_RECORD, size, mtime_ns,
+                                 len(path_bytes)))
+        parts.append(path_bytes)
+        parts.append(header)
+
+    cache_dir = os.path.dirname(cache_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_mj_cache_", dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b''.join(parts))
+        os.replace(tmp_path, cache_path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _list_mj_bin_files(drive, since):
+    # List */*.bin on a drive with os.scandir, sorted like glob would and
+    # skipping hidden names (e.g. .tmp_recover_*). Returns (files,
+    # dirs_skipped) where files are (path, DirEntry) pairs. Raises OSError
+    # if the drive itself cannot be listed.
+    with os.scandir(drive) as it:
+        subdirs = sorted(
+            (e for e in it if not e.name.startswith('.')),
+            key=lambda e: e.name,
+        )
+    files = []
+    dirs_skipped = 0
+    for subdir in subdirs:
+        try:
+            if not subdir.is_dir():
+                continue
+        except OSError:
+            continue
+        if since and subdir.name < since:
+            dirs_skipped += 1
+            continue
+        try:
+            with os.scandir(subdir.path) as it:
+                entries = [e for e in it
+                           if e.name.endswith(".bin")
+                           and not e.name.startswith('.')]
+        except OSError:
+            continue
+        entries.sort(key=lambda e: e.name)
+        files.extend((e.path, e) for e in entries)
+    return files, dirs_skipped
+
+
+def read_recovered_journal(drive, since=None):
+    """Headers of triggers recovered straight to compressed archives.
+
+    Recovery with a CompressedRecovery writes no .bin file, so each
+    recovered header is appended to a journal in the drive's compressed/
+    directory instead; the MJ scan counts these triggers as recorded.
+
+    Parameters
+    ----------
+    drive : str
+        DATA drive path.
+    since : str or None
+        If set, skip records for hour directories before this cutoff.
+
+    Returns
+    -------
+    list of bytes
+        128-byte headers (a torn trailing record is ignored).
+    """
+    path = os.path.join(drive, COMPRESSED_SUBDIR, RECOVERED_JOURNAL)
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    except OSError as e:
+        logger.warning("Cannot read %s: %s", path, e)
+        return []
+    headers = []
+    size = RECOVERED_JOURNAL_RECORD
+    for pos in range(0, len(data) - size + 1, size):
+        hour = data[pos:pos + 13].decode('ascii', errors='replace')
+        if since and hour < since:
+            continue
+        headers.append(data[pos + 13:pos + size])
+    return headers
+
+
+def _scan_mj_drive(drive, since=None, cache_dir=None):
+    # Scan one DATA drive; runs on its own worker thread in scan_mj_files()
+    t0 = time.time()
+    result = {
+        "drive": os.path.basename(drive),
+        "headers": set(),
+        "file_count": 0,
+        "read_count": 0,
+        "skipped": 0,
+        "dirs_skipped": 0,
+        "bytes": 0,
+        "hits": 0,
+        "misses": 0,
+        "invalidated": False,
+        "elapsed": 0.0,
+    }
+    try:
+        bin_files, result["dirs_skipped"] = _list_mj_bin_files(drive, since)
+    except PermissionError:
+        logger.warning("Permission denied scanning %s, skipping", drive)
+        return result
+    except OSError as e:
+        logger.warning("Error scanning %s: %s, skipping", drive, e)
+        return result
+
+    cached = {}
+    fresh = {}
+    identity = None
+    cache_path = None
+    if cache_dir:
+        try:
+            identity = _drive_identity(drive)
+        except OSError as e:
+            logger.warning("Cannot identify %s (%s), not caching", drive, e)
+        else:
+            cache_path = _mj_cache_path(cache_dir, drive)
+            cached, result["invalidated"] = load_mj_cache(cache_path, identity)
+
+    headers = result["headers"]
+    for filepath, entry in bin_files:
+        result["file_count"] += 1
+        try:
+            st = entry.stat()
+            fsize = st.st_size
+            if fsize < HEADER_SIZE:
+                logger.warning("Truncated file (%d bytes): %s", fsize, filepath)
+                result["skipped"] += 1
+                continue
+            header = None
+            relpath = None
+            if cache_path is not None:
+                relpath = os.path.relpath(filepath, drive)
+                hit = cached.get(relpath)
+                if hit is not None and hit[:2] == (fsize, st.st_mtime_ns):
+                    header = hit[2]
+                    result["hits"] += 1
+                else:
+                    result["misses"] += 1
+            if header is None:
+                with open(filepath, 'rb') as f:
+                    header = f.read(HEADER_SIZE)
+                if len(header) < HEADER_SIZE:
+                    result["skipped"] += 1
+                    continue
+            if relpath is not None:
+                fresh[relpath] = (fsize, st.st_mtime_ns, header)
+            result["read_count"] += 1
+            result["bytes"] += fsize
+            headers.add(header)
+        except PermissionError:
+            logger.warning("Permission denied reading %s", filepath)
+            result["skipped"] += 1
+        except OSError as e:
+            logger.warning("Error reading %s: %s", filepath, e)
+            result["skipped"] += 1
+
+    compressed = read_recovered_journal(drive, since)
+    result["file_count"] += len(compressed)
+    result["read_count"] += len(compressed)
+    headers.update(compressed)
+
+    if cache_path is not None:
+        if since:
+            # Directories before the cutoff were not visited this run;
+            # keep their cached headers for the next full scan.
+            for relpath, value in cached.items():
+                if relpath.split(os.sep, 1)[0] < since:
+                    fresh.setdefault(relpath, value)
+        try:
+            save_mj_cache(cache_path, identity, fresh)
+        except OSError as e:
+            logger.warning("Cannot write MJ cache %s: %s", cache_path, e)
+
+    result["elapsed"] = time.time() - t0
+    return result
+
+
+def scan_mj_files(base_path, since=None, cache_dir=None):
     """Scan local mjolnir .bin files and collect headers.
 
+    Each DATA drive is an independent USB device, so drives are scanned
+    concurrently, one worker thread per drive, and merged at the end.
+
     Parameters
     ----------
     base_path : str
@@ -196,22 +812,24 @@ def scan_mj_files(base_path, since=None):
     since : str or None
         If set, skip directories with names before this cutoff
         (format: 'YYYY-MM-DDTHH').
+    cache_dir : str or None
+        If set, keep a per-drive header cache here. Files whose size and
+        mtime match the cache are not opened.
 
     Returns
     -------
     dict
         headers: set of bytes (128-byte raw headers)
-        file_count: int (total .bin files found)
+        file_count: int (total .bin files found, plus triggers recovered
+        straight to compressed archives; see read_recovered_journal())
         duplicate_count: int (files with headers already seen)
         skipped: int (files < 128 bytes)
         dirs_skipped: int (directories before --since cutoff)
+        cache: dict (hits, misses, invalidated drives) or None
+        drives: list of dict (drive, files, bytes, elapsed,
+        files_per_sec, mb_per_sec), one per DATA drive
         elapsed: float (seconds)
     """
-    headers = set()
-    file_count = 0
-    duplicate_count = 0
-    skipped = 0
-    dirs_skipped = 0
     t0 = time.time()
 
     pattern = os.path.join(base_path, DRIVE_PATTERN)
@@ -219,72 +837,69 @@ def scan_mj_files(base_path, since=None):
     if not drives:
         logger.info("No DATA drives found at %s", base_path)
 
-    for drive in drives:
-        try:
-            if since:
-                # Per-directory filtering: only glob .bin in qualifying dirs
-                dir_pattern = os.path.join(drive, "*")
-                subdirs = sorted(glob.glob(dir_pattern))
-                bin_files = []
-                for subdir in subdirs:
-                    if not os.path.isdir(subdir):
-                        continue
-                    dirname = os.path.basename(subdir)
-                    if dirname < since:
-                        dirs_skipped += 1
-                        continue
-                    try:
-                        bin_files.extend(
-                            sorted(glob.glob(os.path.join(subdir, "*.bin")))
-                        )
-                    except OSError:
-                        continue
-            else:
-                # Fast path: single glob for all .bin files
-                bin_files = sorted(glob.glob(os.path.join(drive, "*", "*.bin")))
-        except PermissionError:
-            logger.warning("Permission denied scanning %s, skipping", drive)
-            continue
-        except OSError as e:
-            logger.warning("Error scanning %s: %s, skipping", drive, e)
-            continue
+    per_drive = []
+    if drives:
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(drives),
+                thread_name_prefix="mj-scan") as pool:
+            futures = [pool.submit(_scan_mj_drive, drive, since, cache_dir)
+                       for drive in drives]
+            per_drive = [f.result() for f in futures]
 
-        for filepath in bin_files:
-            file_count += 1
-            try:
-                fsize = os.path.getsize(filepath)
-                if fsize < HEADER_SIZE:
-                    logger.warning("Truncated file (%d bytes): %s", fsize, filepath)
-                    skipped += 1
-                    continue
-                with open(filepath, 'rb') as f:
-                    header = f.read(HEADER_SIZE)
-                if len(header) < HEADER_SIZE:
-                    skipped += 1
-                    continue
-                if header in headers:
-                    duplicate_count += 1
-                else:
-                    headers.add(header)
-            except PermissionError:
-                logger.warning("Permission denied reading %s", filepath)
-                skipped += 1
-            except OSError as e:
-                logger.warning("Error reading %s: %s", filepath, e)
-                skipped += 1
+    headers = set()
+    read_count = 0
+    cache_stats = None
+    if cache_dir:
+        cache_stats = {"hits": 0, "misses": 0, "invalidated": []}
+    drive_stats = []
+    for result in per_drive:
+        headers.update(result["headers"])
+        read_count += result["read_count"]
+        if cache_stats is not None:
+            cache_stats["hits"] += result["hits"]
+            cache_stats["misses"] += result["misses"]
+            if result["invalidated"]:
+                cache_stats["invalidated"].append(result["drive"])
+        elapsed = result["elapsed"]
+        rate = 1.0 / elapsed if elapsed > 0 else 0.0
+        drive_stats.append({
+            "drive": result["drive"],
+            "files": result["file_count"],
+            "bytes": result["bytes"],
+            "elapsed": elapsed,
+            "files_per_sec": result["file_count"] * rate,
+            "mb_per_sec": result["bytes"] / 1e6 * rate,
+        })
+        logger.debug("MJ scan %s: %d files, %.1f MB in %.2fs "
+                     "(%.0f files/s, %.1f MB/s)",
+                     result["drive"], result["file_count"],
+                     result["bytes"] / 1e6, elapsed,
+                     drive_stats[-1]["files_per_sec"],
+                     drive_stats[-1]["mb_per_sec"])
+
+    file_count = sum(r["file_count"] for r in per_drive)
+    skipped = sum(r["skipped"] for r in per_drive)
+    dirs_skipped = sum(r["dirs_skipped"] for r in per_drive)
+    # Every header read but not unique across all drives is a duplicate
+    duplicate_count = read_count - len(headers)
 
     elapsed = time.time() - t0
     if dirs_skipped:
         logger.info("MJ scan: skipped %d directories before --since cutoff",
                      dirs_skipped)
-    logger.info("MJ scan: %d unique headers from %d files (%.1fs)",
-                len(headers), file_count, elapsed)
+    if cache_stats is not None:
+        logger.info("MJ cache: %d hits, %d misses",
+                    cache_stats["hits"], cache_stats["misses"])
+    logger.info("MJ scan: %d unique headers from %d files on %d drives (%.1fs)",
+                len(headers), file_count, len(drives), elapsed)
     return {
         "headers": headers,
         "file_count": file_count,
         "duplicate_count": duplicate_count,
         "skipped": skipped,
         "dirs_skipped": dirs_skipped,
+        "cache": cache_stats,
+        "drives": drive_stats,
         "elapsed": elapsed,
     }
 
@@ -298,14 +913,67 @@ def scan_mj_files(base_path, since=None):
 #   - offset (uint64 LE, 8 bytes)
 #   - index (uint32 LE, 4 bytes)
 #   - header (128 raw bytes)
+#
+# With --checkpoint, each file's triggers are preceded by a file record.
+# Filenames are never empty, so a leading null byte marks it:
+#   - 0x00, filename (null-terminated UTF-8 string)
+#   - inode, size, start offset (uint64 LE each)
+#   - start index (uint32 LE): triggers already reported in earlier runs
+#   - flags (uint8): STRIDER_FLAG_RESET if the walk restarted at offset 0
+#
+# With --probe, the walk is preceded by a prelude giving each file's first
+# trigger with a valid GPS time (so --since auto can pick its cutoff before
+# the walk ends). A second null byte marks these records:
+#   - 0x00 0x00 'P', filename (null-terminated UTF-8 string)
+#   - offset (uint64 LE), header (128 raw bytes)
+#   - 0x00 0x00 'E' once every file has been probed
+#
+# With --index, the strider keeps a per-file index of inode, size, trigger
+# count and first/last valid GPS time (Unix seconds). With --since-epoch T,
+# a file the index shows unchanged and ending before T is not walked; it
+# is reported instead by a skip record:
+#   - 0x00 0x00 'S', filename (null-terminated UTF-8 string)
+#   - size (uint64 LE), trigger count (uint32 LE), last GPS time (float64 LE)
+#
+# With --digest, the whole output is one zlib stream and trigger records
+# are replaced by a compact form. A file's first trigger is preceded by
+#   - 0x00 0x00 'N', filename (null-terminated UTF-8 string)
+# which gives it the next file number (from 0), and each trigger is
+#   - 0x00 0x00 'D', file number (varint), offset minus the previous
+#     trigger's offset in that file, or 0 (varint)
+#   - MD5 of the header (16 bytes), then the header fields scrub reads
+#     without the full header: datasize (bytes 10-13) and GPS (80-101)
+# Trigger indexes are implicit: consecutive from the file record's start
+# index (or 0). Varints are LEB128: 7 bits per byte, low bits first.
+
+# Remote checkpoint (relative to the AGS login directory, never in the data
+# directory so it cannot be mistaken for an AGS file) and local mirror name
+AGS_CHECKPOINT_PATH = ".hamma_strider_checkpoint.json"
+AGS_INDEX_PATH = ".hamma_strider_index.json"
+STRIDER_SKIP_RECORD = '<QId'
+STRIDER_DIGEST_SIZE = 16
+STRIDER_DIGEST_FIELDS = ((DATASIZE_OFFSET, DATASIZE_OFFSET + 4),
+                         (GPS_TIME_WEEK_OFFSET, GPS_ECC_OFFSET + 4))
+AGS_MIRROR_MAGIC = b'HSAGM002'
+STRIDER_FILE_RECORD = '<QQQIB'
+STRIDER_FLAG_RESET = 0x01
+STRIDER_TIMEOUT = 3600  # seconds for a full remote walk
+STRIDER_CHUNK_SIZE = 65536  # bytes read from the SSH pipe at a time
+STRIDER_PROGRESS_INTERVAL = 30  # seconds between streaming progress logs
 
 STRIDER_SCRIPT = r'''
-import glob, os, struct, sys
+import glob, json, math, os, struct, sys, zlib
 SYNC = b'\xf5\xff\x50\x5d'
 HDR_SIZE = 128
 PAD = 4
 MAX_DS = 20000000
 
+WINDOW = 16777216
+try:
+    import mmap
+except ImportError:
+    mmap = None
+
 def scan_fwd(f, start, fsize):
     p = start
     while p + 4 <= fsize:
@@ -319,48 +987,485 @@ def scan_fwd(f, start, fsize):
         p += len(c) - 3
     return -1
 
-data_path = sys.argv[1]
+def map_file(f, fsize):
+    # Read-only mapping, or None to fall back to seek/read
+    if mmap is None:
+        return None
+    try:
+        m = mmap.mmap(f.fileno(), fsize, access=mmap.ACCESS_READ)
+    except (ValueError, OSError, EnvironmentError):
+        return None
+    if hasattr(m, 'madvise') and hasattr(mmap, 'MADV_RANDOM'):
+        m.madvise(mmap.MADV_RANDOM)
+    return m
+
+def find_fwd(m, start, fsize):
+    # mmap.find over large windows, read sequentially
+    p = start
+    while p + 4 <= fsize:
+        stop = min(p + WINDOW, fsize)
+        if hasattr(m, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            page = p - p % mmap.PAGESIZE
+            m.madvise(mmap.MADV_SEQUENTIAL, page, stop - page)
+        i = m.find(SYNC, p, stop)
+        if i >= 0:
+            return i
+        if stop >= fsize:
+            break
+        p = stop - 3
+    return -1
+
+def gps_time(hdr):
+    # Unix seconds, or None if invalid; same arithmetic and year >= 2000
+    # test as decode_gps_time()
+    tow = struct.unpack_from('<f', hdr, 80)[0]
+    week = struct.unpack_from('<h', hdr, 84)[0]
+    utc = struct.unpack_from('<f', hdr, 86)[0]
+    sub = struct.unpack_from('<I', hdr, 94)[0]
+    ecc = struct.unpack_from('<I', hdr, 98)[0] or 1000000000
+    try:
+        ts = 315964800 + week * 604800 + math.floor(tow) + 1 - utc
+    except (ValueError, OverflowError):
+        return None
+    ts += float(sub) / float(ecc)
+    if 946684800 <= ts < 253402300800:
+        return ts
+    return None
+
+def gps_valid(hdr):
+    return gps_time(hdr) is not None
+
+def walk(f, m, pos, fsize, state):
+    # Yield (offset, header) per trigger from pos; state[0] is left at the
+    # offset the next walk of this file resumes from
+    while pos + HDR_SIZE <= fsize:
+        if m is not None:
+            hdr = m[pos:pos + HDR_SIZE]
+        else:
+            f.seek(pos)
+            hdr = f.read(HDR_SIZE)
+        if len(hdr) < HDR_SIZE:
+            break
+        ds = struct.unpack_from('<I', hdr, 10)[0]
+        if hdr[:4] != SYNC or ds == 0 or ds > MAX_DS:
+            if m is not None:
+                p = find_fwd(m, pos + 1, fsize)
+            else:
+                p = scan_fwd(f, pos + 1, fsize)
+            if p < 0:
+                # Resume the sync search here once more bytes land
+                pos = max(pos + 1, fsize - 3)
+                break
+            pos = p
+            continue
+        yield pos, hdr
+        pos += HDR_SIZE + ds * 2 + PAD
+    state[0] = pos
+
+def resume(f, fname, st):
+    # (next, count, last, crc, first) from the checkpoint, or a fresh start
+    # if the file is new or was replaced. first is the offset of the first
+    # valid-GPS trigger, -1 if none before next, None if unknown.
+    c = ckpt.get(fname)
+    if c and c['inode'] == st.st_ino and c['size'] <= st.st_size:
+        ok = True
+        if c['last'] >= 0:
+            # Same inode number can be reused by a replaced file
+            f.seek(c['last'])
+            ok = zlib.crc32(f.read(HDR_SIZE)) == c['crc']
+        if ok:
+            return c['next'], c['count'], c['last'], c['crc'], c.get('first')
+    return 0, 0, -1, 0, -1
+
+args = sys.argv[1:]
+data_path = args[0]
+ckpt_path = None
+if '--checkpoint' in args:
+    ckpt_path = args[args.index('--checkpoint') + 1]
+index_path = None
+if '--index' in args:
+    index_path = args[args.index('--index') + 1]
+since = None
+if '--since-epoch' in args:
+    since = float(args[args.index('--since-epoch') + 1])
+
+def load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save(path, obj):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(obj, f)
+    os.rename(tmp, path)
+
+ckpt = {}
+if ckpt_path and '--reset' not in args:
+    ckpt = load(ckpt_path)
+index = load(index_path) if index_path else {}
+new_ckpt = {}
+new_index = {}
 out = sys.stdout.buffer
+digest = '--digest' in args
+if digest:
+    import hashlib
+
+    class Deflate(object):
+        # zlib stream on stdout; flush() pushes out everything so far
+        def __init__(self, raw):
+            self.raw = raw
+            self.z = zlib.compressobj(6)
+        def write(self, data):
+            self.raw.write(self.z.compress(data))
+        def flush(self):
+            self.raw.write(self.z.flush(zlib.Z_SYNC_FLUSH))
+            self.raw.flush()
+        def close(self):
+            self.raw.write(self.z.flush())
+            self.raw.flush()
+
+    out = Deflate(out)
+
+def varint(n):
+    b = bytearray()
+    while n >= 0x80:
+        b.append(n & 0x7f | 0x80)
+        n >>= 7
+    b.append(n)
+    return bytes(b)
+
+files = []
 for fpath in sorted(glob.glob(os.path.join(data_path, '*'))):
-    fname = os.path.basename(fpath)
     try:
-        fsize = os.path.getsize(fpath)
+        st = os.stat(fpath)
     except OSError:
         continue
-    if fsize < HDR_SIZE:
+    if st.st_size < HDR_SIZE:
         continue
+    fname = os.path.basename(fpath)
+    x = index.get(fname)
+    if (since is not None and x and x['inode'] == st.st_ino
+            and x['size'] == st.st_size and x['tmax'] is not None
+            and x['tmax'] < since):
+        # Unchanged since indexed and over before the cutoff: not walked,
+        # its index and checkpoint entries carry over
+        new_index[fname] = x
+        if fname in ckpt:
+            new_ckpt[fname] = ckpt[fname]
+        out.write(b'\x00\x00S' + fname.encode('utf-8') + b'\x00')
+        out.write(struct.pack('<QId', st.st_size, x['count'], x['tmax']))
+        continue
+    files.append((fpath, fname, st))
+probed = {}
+if '--probe' in args:
+    # Prelude: each file's first valid-GPS header, then an end marker
+    for fpath, fname, st in files:
+        try:
+            with open(fpath, 'rb') as f:
+                pos, idx, last, crc, first = resume(f, fname, st)
+                if first is None:
+                    pos = 0
+                elif first >= 0:
+                    pos = first
+                m = map_file(f, st.st_size)
+                probed[fname] = -1
+                for p, hdr in walk(f, m, pos, st.st_size, [pos]):
+                    if gps_valid(hdr):
+                        probed[fname] = p
+                        out.write(b'\x00\x00P' + fname.encode('utf-8') + b'\x00')
+                        out.write(struct.pack('<Q', p))
+                        out.write(hdr)
+                        break
+                if m is not None:
+                    m.close()
+        except OSError:
+            continue
+    out.write(b'\x00\x00E')
+    out.flush()
+nfiles = [0]
+for fpath, fname, st in files:
+    fsize = st.st_size
     try:
         with open(fpath, 'rb') as f:
-            pos = 0
-            idx = 0
-            while pos + HDR_SIZE <= fsize:
-                f.seek(pos)
-                hdr = f.read(HDR_SIZE)
-                if len(hdr) < HDR_SIZE:
-                    break
-                if hdr[:4] != SYNC:
-                    pos = scan_fwd(f, pos + 1, fsize)
-                    if pos < 0:
-                        break
-                    continue
-                ds = struct.unpack_from('<I', hdr, 10)[0]
-                if ds == 0 or ds > MAX_DS:
-                    pos = scan_fwd(f, pos + 1, fsize)
-                    if pos < 0:
-                        break
-                    continue
-                out.write(fname.encode('utf-8') + b'\x00')
-                out.write(struct.pack('<Q', pos))
-                out.write(struct.pack('<I', idx))
-                out.write(hdr)
-                pos += HDR_SIZE + ds * 2 + PAD
+            pos, idx, last, crc, first = resume(f, fname, st)
+            if first is None:
+                first = probed.get(fname)
+            if ckpt_path:
+                out.write(b'\x00' + fname.encode('utf-8') + b'\x00')
+                out.write(struct.pack('<QQQIB', st.st_ino, fsize, pos, idx,
+                                      0 if idx else 1))
+            # GPS range so far: known only if the walk starts at 0 or the
+            # index covers the part already walked
+            tmin = tmax = None
+            known = pos == 0
+            x = index.get(fname)
+            if not known and x and x['inode'] == st.st_ino \
+                    and x['count'] == idx:
+                tmin, tmax, known = x['tmin'], x['tmax'], True
+            m = map_file(f, fsize)
+            state = [pos]
+            fid = None
+            prev = 0
+            for pos, hdr in walk(f, m, pos, fsize, state):
+                if digest:
+                    if fid is None:
+                        fid = nfiles[0]
+                        nfiles[0] += 1
+                        out.write(b'\x00\x00N' + fname.encode('utf-8')
+                                  + b'\x00')
+                    out.write(b'\x00\x00D' + varint(fid) + varint(pos - prev)
+                              + hashlib.md5(hdr).digest() + hdr[10:14]
+                              + hdr[80:102])
+                    prev = pos
+                else:
+                    out.write(fname.encode('utf-8') + b'\x00')
+                    out.write(struct.pack('<Q', pos))
+                    out.write(struct.pack('<I', idx))
+                    out.write(hdr)
+                last = pos
+                crc = zlib.crc32(hdr)
                 idx += 1
+                ts = gps_time(hdr)
+                if ts is not None:
+                    if first == -1:
+                        first = pos
+                    if tmin is None or ts < tmin:
+                        tmin = ts
+                    if tmax is None or ts > tmax:
+                        tmax = ts
+            pos = state[0]
+            if m is not None:
+                m.close()
+            new_ckpt[fname] = {'inode': st.st_ino, 'size': fsize,
+                               'next': pos, 'last': last, 'crc': crc,
+                               'count': idx, 'first': first}
+            if known:
+                new_index[fname] = {'inode': st.st_ino, 'size': fsize,
+                                    'count': idx, 'tmin': tmin, 'tmax': tmax}
     except OSError:
         continue
 out.flush()
+if digest:
+    out.close()
+if ckpt_path:
+    save(ckpt_path, new_ckpt)
+if index_path:
+    save(index_path, new_index)
 '''
 
 
+def _read_varint(buf, pos, end):
+    # LEB128 varint at buf[pos:end]; (value, next pos), or (None, pos) if
+    # it runs past end
+    value = 0
+    shift = 0
+    while pos < end:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+    return None, pos
+
+
+def _digest_fields(header):
+    # The header fields sent with each digest in --digest mode
+    return b''.join(header[a:b] for a, b in STRIDER_DIGEST_FIELDS)
+
+
+class StriderStreamDecoder:
+    """Incrementally decode strider output as it arrives.
+
+    Bytes are fed in arbitrary chunks; only the trailing partial record is
+    buffered between calls, so memory stays bounded by the chunk size.
+
+    Parameters
+    ----------
+    compressed : bool
+        If True, the output is the zlib stream of a --digest run.
+    """
+
+    _FILE_REC_SIZE = struct.calcsize(STRIDER_FILE_RECORD)
+    _SKIP_REC_SIZE = struct.calcsize(STRIDER_SKIP_RECORD)
+    _TRIGGER_TAIL = 8 + 4 + HEADER_SIZE  # offset + index + header
+    _DIGEST_TAIL = STRIDER_DIGEST_SIZE + sum(b - a
+                                             for a, b in STRIDER_DIGEST_FIELDS)
+
+    def __init__(self, compressed=False):
+        self._buf = bytearray()
+        self._inflate = zlib.decompressobj() if compressed else None
+        self._names = []  # digest mode file numbers
+        self._last_offset = []
+        self._next_index = {}
+        self.bytes_fed = 0
+        self.records = 0
+
+    @property
+    def pending(self):
+        """Number of buffered bytes not yet forming a complete record."""
+        return len(self._buf)
+
+    def feed(self, chunk):
+        """Decode as many complete records as possible.
+
+        Parameters
+        ----------
+        chunk : bytes
+            Next piece of strider output.
+
+        Returns
+        -------
+        list of tuple
+            ('file', dict), ('trigger', dict), ('probe', dict),
+            ('prelude_end', {}), ('skip', dict) and, in digest mode,
+            ('digest', dict) records, in stream order. Digest records
+            carry filename, offset, index, digest (MD5 of the header)
+            and fields (see _digest_fields()) instead of the header.
+
+        Raises
+        ------
+        RuntimeError
+            If a control record of unknown type is received.
+        """
+        buf = self._buf
+        self.bytes_fed += len(chunk)
+        if self._inflate is not None:
+            chunk = self._inflate.decompress(chunk)
+        buf += chunk
+        records = []
+        pos = 0
+        size = len(buf)
+        while pos < size:
+            if buf[pos] == 0 and pos + 1 < size and buf[pos + 1] == 0:
+                # Probe prelude record
+                if pos + 2 >= size:
+                    break
+                kind = buf[pos + 2]
+                if kind == ord('E'):
+                    pos += 3
+                    records.append(("prelude_end", {}))
+                    continue
+                if kind == ord('N'):
+                    # Next file number in digest mode
+                    null_pos = buf.find(b'\x00', pos + 3)
+                    if null_pos < 0:
+                        break
+                    self._names.append(buf[pos + 3:null_pos].decode('utf-8'))
+                    self._last_offset.append(0)
+                    pos = null_pos + 1
+                    continue
+                if kind == ord('D'):
+                    fid, p = _read_varint(buf, pos + 3, size)
+                    if fid is None:
+                        break
+                    delta, p = _read_varint(buf, p, size)
+                    if delta is None or p + self._DIGEST_TAIL > size:
+                        break
+                    filename = self._names[fid]
+                    offset = self._last_offset[fid] + delta
+                    self._last_offset[fid] = offset
+                    index = self._next_index.get(filename, 0)
+                    self._next_index[filename] = index + 1
+                    p_fields = p + STRIDER_DIGEST_SIZE
+                    records.append(("digest", {
+                        "filename": filename,
+                        "offset": offset,
+                        "index": index,
+                        "digest": bytes(buf[p:p_fields]),
+                        "fields": bytes(buf[p_fields:p + self._DIGEST_TAIL]),
+                    }))
+                    pos = p + self._DIGEST_TAIL
+                    continue
+                if kind == ord('S'):
+                    # File skipped by --since-epoch
+                    null_pos = buf.find(b'\x00', pos + 3)
+                    if null_pos < 0 or (null_pos + 1 + self._SKIP_REC_SIZE
+                                        > size):
+                        break
+                    filename = buf[pos + 3:null_pos].decode('utf-8')
+                    fsize, count, last_time = struct.unpack_from(
+                        STRIDER_SKIP_RECORD, buf, null_pos + 1)
+                    pos = null_pos + 1 + self._SKIP_REC_SIZE
+                    records.append(("skip", {
+                        "filename": filename,
+                        "size": fsize,
+                        "count": count,
+                        "last_time": last_time,
+                    }))
+                    continue
+                if kind != ord('P'):
+                    raise RuntimeError(
+                        "Unknown strider record type 0x{:02x}".format(kind))
+                null_pos = buf.find(b'\x00', pos + 3)
+                if null_pos < 0 or null_pos + 9 + HEADER_SIZE > size:
+                    break
+                filename = buf[pos + 3:null_pos].decode('utf-8')
+                offset, = struct.unpack_from('<Q', buf, null_pos + 1)
+                pos = null_pos + 9
+                records.append(("probe", {
+                    "filename": filename,
+                    "offset": offset,
+                    "index": 0,
+                    "header": bytes(buf[pos:pos + HEADER_SIZE]),
+                }))
+                pos += HEADER_SIZE
+                continue
+            if buf[pos] == 0:
+                if pos + 1 >= size:
+                    break
+                # File record (checkpoint mode)
+                null_pos = buf.find(b'\x00', pos + 1)
+                if null_pos < 0 or null_pos + 1 + self._FILE_REC_SIZE > size:
+                    break
+                filename = buf[pos + 1:null_pos].decode('utf-8')
+                (inode, fsize, start_offset, start_index,
+                 flags) = struct.unpack_from(STRIDER_FILE_RECORD, buf,
+                                             null_pos + 1)
+                pos = null_pos + 1 + self._FILE_REC_SIZE
+                self._next_index[filename] = start_index
+                records.append(("file", {
+                    "filename": filename,
+                    "inode": inode,
+                    "size": fsize,
+                    "start_offset": start_offset,
+                    "start_index": start_index,
+                    "reset": bool(flags & STRIDER_FLAG_RESET),
+                }))
+                continue
+            # Null-terminated filename, offset (uint64), index (uint32), header
+            null_pos = buf.find(b'\x00', pos)
+            if null_pos < 0 or null_pos + 1 + self._TRIGGER_TAIL > size:
+                break
+            filename = buf[pos:null_pos].decode('utf-8')
+            pos = null_pos + 1
+            offset, index = struct.unpack_from('<QI', buf, pos)
+            pos += 12
+            records.append(("trigger", {
+                "filename": filename,
+                "offset": offset,
+                "index": index,
+                "header": bytes(buf[pos:pos + HEADER_SIZE]),
+            }))
+            pos += HEADER_SIZE
+        del buf[:pos]
+        self.records += len(records)
+        return records
+
+
+def _iter_strider_records(data, compressed=False):
+    # Yield decoded (kind, dict) records from strider output
+    decoder = StriderStreamDecoder(compressed=compressed)
+    for record in decoder.feed(data):
+        yield record
+    if decoder.pending:
+        logger.warning("Strider output ends with %d bytes of a partial record",
+                       decoder.pending)
+
+
 def decode_strider_output(data):
     """Decode binary output from the remote strider script.
 
@@ -373,70 +1478,249 @@ def decode_strider_output(data):
     -------
     list of dict
         Each dict has: filename (str), offset (int), index (int),
-        header (bytes).
+        header (bytes). Checkpoint file and probe records are not
+        included.
     """
-    entries = []
-    pos = 0
-    while pos < len(data):
-        # Read null-terminated filename
-        null_pos = data.index(b'\x00', pos)
-        filename = data[pos:null_pos].decode('utf-8')
-        pos = null_pos + 1
-        # Read offset (uint64) and index (uint32)
-        offset = struct.unpack_from('<Q', data, pos)[0]
-        pos += 8
-        index = struct.unpack_from('<I', data, pos)[0]
-        pos += 4
-        # Read header
-        header = data[pos:pos + HEADER_SIZE]
-        pos += HEADER_SIZE
-        entries.append({
-            "filename": filename,
-            "offset": offset,
-            "index": index,
-            "header": header,
-        })
-    return entries
+    return [rec for kind, rec in _iter_strider_records(data)
+            if kind == "trigger"]
 
 
-def scan_ags_files(ags_host, ags_path):
-    """Run remote strider on AGS sensor and collect headers.
+def _ags_mirror_path(cache_dir, ags_host):
+    """Return the local AGS entry mirror path for a host."""
+    safe_host = re.sub(r'[^A-Za-z0-9._-]', '_', ags_host)
+    return os.path.join(cache_dir, "ags_{}.mirror".format(safe_host))
+
+
+def _empty_entry_table():
+    # An AgsEntryTable with no files and no rows
+    return AgsEntryTable([], np.zeros(0, dtype=AGS_ENTRY_DTYPE))
+
+
+def load_ags_mirror(mirror_path):
+    """Load the local mirror of AGS entries from previous strider runs.
 
     Parameters
     ----------
-    ags_host : str
-        SSH host for AGS sensor.
-    ags_path : str
-        Path to AGS data directory on sensor.
+    mirror_path : str
+        Mirror file written by save_ags_mirror().
 
     Returns
     -------
-    dict
-        entries: list of dict (filename, offset, index, header)
-        headers: set of bytes (unique 128-byte headers)
-        duplicate_count: int
-        elapsed: float (seconds)
-
-    Raises
-    ------
-    RuntimeError
-        If SSH connection fails.
+    AgsEntryTable
+        Every file the last run listed (filenames may include files with
+        no triggers), each file's rows in trigger order. Empty if the
+        mirror is missing or unreadable.
     """
-    t0 = time.time()
-
-    # Deploy strider to AGS as a temp file, then run it. We avoid piping
-    # the script via stdin (ssh host "python3 -") because that crashes
-    # the AGS SSH daemon.
-    remote_script = "/tmp/hamma_strider.py"
-    local_tmp = None
     try:
-        fd, local_tmp = tempfile.mkstemp(suffix='.py', prefix='hamma_strider_')
-        os.write(fd, STRIDER_SCRIPT.encode('utf-8'))
-        os.close(fd)
+        with open(mirror_path, 'rb') as f:
+            magic = f.read(len(AGS_MIRROR_MAGIC))
+            if magic != AGS_MIRROR_MAGIC:
+                raise ValueError("bad magic")
+            count, names_len = struct.unpack('<II', f.read(8))
+            names = f.read(names_len).decode('utf-8')
+            filenames = names.split('\x00') if count else []
+            if len(filenames) != count:
+                raise ValueError("bad filename list")
+            rest = os.fstat(f.fileno()).st_size - f.tell()
+            if rest % AGS_ENTRY_DTYPE.itemsize:
+                raise ValueError("truncated rows")
+            rows = np.fromfile(f, dtype=AGS_ENTRY_DTYPE)
+        if len(rows) and int(rows["file_id"].max()) >= count:
+            raise ValueError("bad file id")
+    except FileNotFoundError:
+        return _empty_entry_table()
+    except OSError as e:
+        logger.warning("Cannot read AGS mirror %s: %s", mirror_path, e)
+        return _empty_entry_table()
+    except (ValueError, struct.error, UnicodeDecodeError) as e:
+        logger.warning("Corrupt AGS mirror %s (%s), discarding",
+                       mirror_path, e)
+        return _empty_entry_table()
+    return AgsEntryTable(filenames, rows)
 
-        scp_cmd = ["scp", "-q", local_tmp,
+
+def save_ags_mirror(mirror_path, table):
+    """Atomically write the local AGS entry mirror.
+
+    The mirror is the table as is: its filename list, then its rows as
+    raw AGS_ENTRY_DTYPE records.
+
+    Parameters
+    ----------
+    mirror_path : str
+        Destination mirror file.
+    table : AgsEntryTable
+        Entries of every file to remember, including files without
+        triggers.
+    """
+    names = '\x00'.join(table.filenames).encode('utf-8')
+    mirror_dir = os.path.dirname(mirror_path)
+    os.makedirs(mirror_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_ags_mirror_", dir=mirror_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(AGS_MIRROR_MAGIC)
+            f.write(struct.pack('<II', len(table.filenames), len(names)))
+            f.write(names)
+            np.ascontiguousarray(table.rows).tofile(f)
+        os.replace(tmp_path, mirror_path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _join_entry_tables(filenames, tables):
+    # One table over sorted `filenames` from tables whose names are all in
+    # it; rows stay grouped by file, in table order within each file
+    lookup = np.array(filenames, dtype=object)
+    parts = []
+    for table in tables:
+        if not len(table):
+            continue
+        remap = np.searchsorted(lookup, np.array(table.filenames,
+                                                 dtype=object))
+        rows = table.rows.copy()
+        rows["file_id"] = remap[rows["file_id"]]
+        parts.append(rows)
+    if not parts:
+        return AgsEntryTable(filenames, np.zeros(0, dtype=AGS_ENTRY_DTYPE))
+    rows = np.concatenate(parts)
+    rows = rows[np.argsort(rows["file_id"], kind='stable')]
+    return AgsEntryTable(filenames, rows)
+
+
+def merge_strider_checkpoint(records, mirror):
+    """Merge checkpoint-mode strider output with the local mirror.
+
+    Parameters
+    ----------
+    records : bytes or iterable
+        Raw stdout from a strider run with --checkpoint, or the records
+        already decoded from it.
+    mirror : AgsEntryTable
+        Entries from earlier runs, as load_ags_mirror() returns them.
+
+    Returns
+    -------
+    dict or None
+        entries: AgsEntryTable of every file listed (files absent from
+        the output were deleted on the AGS and are dropped), cached rows
+        first and newly walked ones after them within each file
+        skipped: list of skip record dicts for files the strider did not
+        walk (--since-epoch); their cached entries stay in entries
+        resumed: int (files continued from their checkpoint)
+        new_entries: int (triggers walked this run)
+        None if the mirror does not match the remote checkpoint and a
+        full walk (--reset) is needed.
+    """
+    if isinstance(records, (bytes, bytearray)):
+        records = _iter_strider_records(records)
+    counts = np.bincount(mirror.rows["file_id"],
+                         minlength=len(mirror.filenames))
+    listed = set()
+    kept = []  # mirror file ids whose cached rows carry over
+    skipped = []
+    resumed = [0]
+    in_sync = [True]
+
+    def new_triggers():
+        # Settle file and skip records; pass only new triggers on
+        for kind, rec in records:
+            if kind == "trigger":
+                yield rec
+                continue
+            if kind not in ("file", "skip"):
+                continue
+            fname = rec["filename"]
+            listed.add(fname)
+            file_id = mirror.filename_id(fname)
+            if kind == "skip":
+                skipped.append(rec)
+                if file_id is not None:
+                    kept.append(file_id)
+            elif not rec["reset"]:
+                have = None if file_id is None else int(counts[file_id])
+                if have != rec["start_index"]:
+                    logger.warning(
+                        "AGS mirror out of sync for %s (%s cached, "
+                        "checkpoint at %d), full walk needed", fname,
+                        "none" if have is None else have,
+                        rec["start_index"],
+                    )
+                    in_sync[0] = False
+                    return
+                kept.append(file_id)
+                resumed[0] += 1
+
+    new = AgsEntryTable.from_entries(new_triggers())
+    if not in_sync[0]:
+        return None
+    cached = mirror[np.isin(mirror.rows["file_id"], kept)]
+    filenames = sorted(listed.union(new.filenames))
+    return {"entries": _join_entry_tables(filenames, [cached, new]),
+            "skipped": skipped, "resumed": resumed[0],
+            "new_entries": len(new)}
+
+
+def _remote_mkdtemp(ags_host):
+    # Create a private directory on the AGS for one run's deployed files,
+    # so concurrent runs never run or remove each other's copies
+    cmd = ["ssh", ags_host, "mktemp -d /tmp/hamma_scrub.XXXXXXXX"]
+    _count_session("deploy")
+    result = subprocess.run(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=30,
+    )
+    remote_dir = result.stdout.decode('utf-8', errors='replace').strip()
+    if (result.returncode != 0 or not remote_dir.startswith("/")
+            or len(remote_dir.split()) != 1):
+        stderr = result.stderr.decode('utf-8', errors='replace').strip()
+        raise RuntimeError(
+            "Failed to create a temp directory on {host}: {err}".format(
+                host=ags_host, err=stderr or remote_dir,
+            )
+        )
+    return remote_dir
+
+
+def _remote_rmtree(ags_host, remote_dir):
+    # Best-effort removal of a deploy directory whose command never ran
+    try:
+        subprocess.run(["ssh", ags_host, "rm -rf {}".format(remote_dir)],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       timeout=30)
+    except (OSError, subprocess.SubprocessError) as e:
+        logger.debug("Could not remove %s on %s: %s", remote_dir, ags_host, e)
+
+
+def _run_and_clean(command, remote_dir):
+    # Remote shell line that runs command, removes remote_dir and exits
+    # with the command's status rather than rm's
+    return "{cmd}; rc=$?; rm -rf {d}; exit $rc".format(cmd=command,
+                                                       d=remote_dir)
+
+
+def _deploy_strider(ags_host):
+    # Deploy strider to a new temp directory on the AGS and return that
+    # directory. We avoid piping the script via stdin (ssh host
+    # "python3 -") because that crashes the AGS SSH daemon.
+    remote_dir = _remote_mkdtemp(ags_host)
+    remote_script = "{}/hamma_strider.py".format(remote_dir)
+    local_tmp = None
+    try:
+        fd, local_tmp = tempfile.mkstemp(suffix='.py', prefix='hamma_strider_')
+        os.write(fd, STRIDER_SCRIPT.encode('utf-8'))
+        os.close(fd)
+
+        scp_cmd = ["scp", "-q", local_tmp,
                    "{host}:{path}".format(host=ags_host, path=remote_script)]
         logger.debug("Deploying strider: %s", " ".join(scp_cmd))
+        _count_session("deploy")
         deploy = subprocess.run(
             scp_cmd,
             stdout=subprocess.PIPE,
@@ -445,6 +1729,7 @@ def scan_ags_files(ags_host, ags_path):
         )
         if deploy.returncode != 0:
             stderr = deploy.stderr.decode('utf-8', errors='replace').strip()
+            _remote_rmtree(ags_host, remote_dir)
             raise RuntimeError(
                 "Failed to deploy strider to {host}: {err}".format(
                     host=ags_host, err=stderr,
@@ -453,17 +1738,29 @@ def scan_ags_files(ags_host, ags_path):
     finally:
         if local_tmp is not None and os.path.exists(local_tmp):
             os.unlink(local_tmp)
+    return remote_dir
+
+
+def _strider_command(ags_host, ags_path, remote_dir, extra_args=""):
+    # SSH command that runs the deployed strider and removes its directory
+    return ["ssh", ags_host, _run_and_clean(
+        "python3 {d}/hamma_strider.py {path}{extra}".format(
+            d=remote_dir, path=ags_path, extra=extra_args), remote_dir)]
 
-    run_cmd = ["ssh", ags_host,
-               "python3 {script} {path}; rm -f {script}".format(
-                   script=remote_script, path=ags_path)]
+
+def _run_strider(ags_host, ags_path, extra_args=""):
+    # Deploy and run the strider once; returns raw stdout bytes
+    remote_dir = _deploy_strider(ags_host)
+
+    run_cmd = _strider_command(ags_host, ags_path, remote_dir, extra_args)
     logger.debug("Running: %s", " ".join(run_cmd))
 
+    _count_session("strider")
     result = subprocess.run(
         run_cmd,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
-        timeout=3600,
+        timeout=STRIDER_TIMEOUT,
     )
 
     if result.returncode != 0:
@@ -473,21 +1770,355 @@ def scan_ags_files(ags_host, ags_path):
                 host=ags_host, rc=result.returncode, err=stderr,
             )
         )
+    return result.stdout
+
+
+@contextlib.contextmanager
+def _ssh_process(cmd, host, timeout, idle=False):
+    # Popen an SSH command with stdout piped and a kill watchdog. Raises
+    # RuntimeError on timeout or non-zero exit once the body is done; the
+    # process is killed if the body exits early. With idle, timeout is the
+    # longest stall allowed: the body calls proc.kick() on progress.
+    timed_out = threading.Event()
+    done = threading.Event()
+    with tempfile.TemporaryFile() as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err)
+        deadline = [time.monotonic() + timeout]
+
+        def _kick():
+            deadline[0] = time.monotonic() + timeout
+
+        def _watch():
+            while True:
+                remaining = deadline[0] - time.monotonic()
+                if remaining <= 0:
+                    timed_out.set()
+                    proc.kill()
+                    return
+                if done.wait(remaining):
+                    return
+
+        if idle:
+            proc.kick = _kick
+        watchdog = threading.Thread(target=_watch, name="ssh-watchdog")
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            yield proc
+            rc = proc.wait()
+        finally:
+            done.set()
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+
+        if timed_out.is_set():
+            raise RuntimeError(
+                "SSH to {host} timed out after {t}s".format(
+                    host=host, t=timeout,
+                )
+            )
+        if rc != 0:
+            err.seek(0)
+            stderr = err.read().decode('utf-8', errors='replace').strip()
+            raise RuntimeError(
+                "SSH to {host} failed (rc={rc}): {err}".format(
+                    host=host, rc=rc, err=stderr,
+                )
+            )
 
-    entries = decode_strider_output(result.stdout)
 
-    headers = set()
-    duplicate_count = 0
-    for entry in entries:
-        if entry["header"] in headers:
-            duplicate_count += 1
+def _stream_strider(ags_host, ags_path, extra_args="", stats=None,
+                    compressed=False):
+    # Deploy and run the strider, yielding records as they arrive on the pipe.
+    # Closing the generator early kills the remote walk.
+    remote_dir = _deploy_strider(ags_host)
+
+    run_cmd = _strider_command(ags_host, ags_path, remote_dir, extra_args)
+    logger.debug("Streaming: %s", " ".join(run_cmd))
+
+    decoder = StriderStreamDecoder(compressed=compressed)
+    _count_session("strider")
+    with _ssh_process(run_cmd, ags_host, STRIDER_TIMEOUT) as proc:
+        last_log = time.time()
+        try:
+            while True:
+                chunk = proc.stdout.read1(STRIDER_CHUNK_SIZE)
+                if not chunk:
+                    break
+                for record in decoder.feed(chunk):
+                    yield record
+                now = time.time()
+                if now - last_log >= STRIDER_PROGRESS_INTERVAL:
+                    logger.info("AGS scan: %d records (%.1f MB) received so far",
+                                decoder.records, decoder.bytes_fed / 1e6)
+                    last_log = now
+        finally:
+            if stats is not None:
+                stats["bytes"] = stats.get("bytes", 0) + decoder.bytes_fed
+    if decoder.pending:
+        logger.warning("Strider output ends with %d bytes of a partial record",
+                       decoder.pending)
+
+
+def resolve_digest_records(records, ags_host, ags_path, mj_headers):
+    """Turn digest-mode strider records back into trigger records.
+
+    Records stream through as they arrive. Each digest is matched
+    against the MD5s of the MJ headers; the unmatched ones, i.e. the
+    triggers that are missing on MJ, are held back and their full
+    headers fetched from the AGS in one batch session once the walk
+    ends, so they follow all other records.
+
+    Parameters
+    ----------
+    records : iterable of tuple
+        Decoded (kind, dict) records from a --digest strider run.
+    ags_host : str
+        SSH host for AGS sensor.
+    ags_path : str
+        AGS data directory on sensor.
+    mj_headers : callable or iterable of bytes
+        MJ headers, or a callable returning them once they are scanned
+        (called at the first digest record).
+
+    Yields
+    ------
+    tuple
+        (kind, dict) records with each 'digest' record replaced by a
+        'trigger' record carrying the full header.
+
+    Raises
+    ------
+    RuntimeError
+        If a missing header cannot be fetched from the AGS.
+    """
+    known = None
+    matched = 0
+    fetch = []
+    for kind, rec in records:
+        if kind != "digest":
+            yield kind, rec
+            continue
+        if known is None:
+            if callable(mj_headers):
+                mj_headers = mj_headers()
+            known = {hashlib.md5(header).digest(): header
+                     for header in mj_headers}
+        header = known.get(rec["digest"])
+        # The fields guard against a digest resolving to another header
+        if header is not None and _digest_fields(header) == rec["fields"]:
+            matched += 1
+            yield "trigger", _digest_trigger(rec, header)
+        else:
+            fetch.append(rec)
+    if known is None:
+        return
+    logger.info("AGS digests: %d of %d matched on MJ, fetching %d headers",
+                matched, matched + len(fetch), len(fetch))
+    if not fetch:
+        return
+    extents = [(rec["filename"], rec["offset"], HEADER_SIZE)
+               for rec in fetch]
+    headers = [None] * len(fetch)
+    for seq, data, error in extract_triggers_batch(
+            ags_host, ags_path, extents):
+        rec = fetch[seq]
+        if data is not None and hashlib.md5(data).digest() != rec["digest"]:
+            error = "header changed since the walk"
+        if error is not None or data is None:
+            raise RuntimeError("Cannot fetch AGS header {}@{}: {}".format(
+                rec["filename"], rec["offset"], error))
+        headers[seq] = data
+    unresolved = headers.count(None)
+    if unresolved:
+        raise RuntimeError("Cannot fetch {} AGS headers".format(unresolved))
+    for rec, header in zip(fetch, headers):
+        yield "trigger", _digest_trigger(rec, header)
+
+
+def _digest_trigger(rec, header):
+    # The trigger record a resolved digest record stands for
+    return {
+        "filename": rec["filename"],
+        "offset": rec["offset"],
+        "index": rec["index"],
+        "header": header,
+    }
+
+
+def scan_ags_files(ags_host, ags_path, cache_dir=None, stream=False,
+                   as_table=False, on_probe=None,
+                   since_epoch=None, digest_headers=None):
+    """Run remote strider on AGS sensor and collect headers.
+
+    Parameters
+    ----------
+    ags_host : str
+        SSH host for AGS sensor.
+    ags_path : str
+        Path to AGS data directory on sensor.
+    cache_dir : str or None
+        If set, keep a local mirror of decoded entries here and have the
+        strider resume each file from its remote checkpoint, so only
+        bytes appended since the last run are walked.
+    stream : bool
+        If True, decode the strider output as it arrives instead of
+        buffering all of it, logging progress along the way.
+    as_table : bool
+        If True, return entries as an AgsEntryTable instead of a list
+        of dicts.
+    on_probe : callable or None
+        If set, the strider first reports each file's first trigger with
+        a valid GPS time, and on_probe is called once with that list of
+        entry dicts before the main walk starts (in stream mode, while
+        the walk is still running).
+    since_epoch : float or None
+        Unix time cutoff. Files the remote index shows unchanged and
+        whose last valid GPS time is before it are not walked; they are
+        left out of entries (so never purged) and listed in
+        skipped_files.
+    digest_headers : callable or iterable of bytes, or None
+        If set, use the compact --digest transport: the strider sends a
+        zlib stream of header MD5s, which resolve_digest_records() maps
+        to these MJ headers (a callable is called at the first digest),
+        fetching only the unmatched headers from the AGS.
+
+    Returns
+    -------
+    dict
+        entries: list of dict (filename, offset, index, header), or
+        AgsEntryTable if as_table
+        headers: set of bytes (unique 128-byte headers), or HeaderIndex
+        if as_table
+        duplicate_count: int
+        skipped_files: list of dict (filename, size, count, last_time)
+        checkpoint: dict (files_resumed, new_entries, cached_entries) or None
+        bytes_received: int (strider output size)
+        elapsed: float (seconds)
+
+    Raises
+    ------
+    RuntimeError
+        If SSH connection fails.
+    """
+    t0 = time.time()
+    stats = {"bytes": 0}
+    probe_done = [on_probe is None]
+
+    def with_probe(walk):
+        # Pass the prelude to on_probe (once, even if the walk is rerun)
+        found = []
+        try:
+            for kind, rec in walk:
+                if kind == "probe":
+                    found.append(rec)
+                elif kind == "prelude_end":
+                    if not probe_done[0]:
+                        probe_done[0] = True
+                        on_probe(found)
+                else:
+                    yield kind, rec
+        finally:
+            if hasattr(walk, "close"):
+                walk.close()
+
+    skipped = []
+
+    def records(extra_args=""):
+        compressed = digest_headers is not None
+        extra_args += " --index {}".format(AGS_INDEX_PATH)
+        if since_epoch is not None:
+            extra_args += " --since-epoch {:.0f}".format(since_epoch)
+        if on_probe is not None:
+            extra_args += " --probe"
+        if compressed:
+            extra_args += " --digest"
+        if stream:
+            walk = _stream_strider(ags_host, ags_path, extra_args, stats=stats,
+                                   compressed=compressed)
         else:
-            headers.add(entry["header"])
+            data = _run_strider(ags_host, ags_path, extra_args)
+            stats["bytes"] += len(data)
+            walk = _iter_strider_records(data, compressed=compressed)
+        walk = with_probe(walk)
+        if compressed:
+            # Probes pass on_probe first, so the MJ scan can be under way
+            walk = resolve_digest_records(walk, ags_host, ags_path,
+                                          digest_headers)
+        return walk
+
+    checkpoint_stats = None
+    if cache_dir:
+        mirror_path = _ags_mirror_path(cache_dir, ags_host)
+        mirror = load_ags_mirror(mirror_path)
+        ckpt_args = " --checkpoint {}".format(AGS_CHECKPOINT_PATH)
+        # Without a mirror the remote checkpoint is useless: walk everything
+        reset_args = ckpt_args + " --reset"
+
+        merged = None
+        if mirror.filenames:
+            walk = records(ckpt_args)
+            merged = merge_strider_checkpoint(walk, mirror)
+            if merged is None and hasattr(walk, "close"):
+                walk.close()
+        if merged is None:
+            merged = merge_strider_checkpoint(records(reset_args),
+                                              _empty_entry_table())
+        table = merged["entries"]
+        skipped = merged["skipped"]
+        skipped_ids = [table.filename_id(r["filename"]) for r in skipped]
+        entries = table[~np.isin(table.rows["file_id"], skipped_ids)]
+        if not as_table:
+            entries = list(entries)
+        try:
+            save_ags_mirror(mirror_path, table)
+        except OSError as e:
+            logger.warning("Cannot write AGS mirror %s: %s", mirror_path, e)
+        checkpoint_stats = {
+            "files_resumed": merged["resumed"],
+            "new_entries": merged["new_entries"],
+            "cached_entries": len(entries) - merged["new_entries"],
+        }
+        logger.info("AGS checkpoint: %d files resumed, %d new triggers walked",
+                    merged["resumed"], merged["new_entries"])
+    else:
+        def triggers():
+            for kind, rec in records():
+                if kind == "skip":
+                    skipped.append(rec)
+                elif kind == "trigger":
+                    yield rec
+
+        # The table consumes the stream directly, never holding the dicts
+        if as_table:
+            entries = AgsEntryTable.from_entries(triggers())
+        else:
+            entries = list(triggers())
+
+    if as_table:
+        entries = _as_entry_table(entries)
+        unique = np.unique(entries.rows["header"])
+        headers = HeaderIndex.from_unique(unique)
+        duplicate_count = len(entries) - len(unique)
+        file_count = entries.file_count
+    else:
+        headers = set()
+        duplicate_count = 0
+        for entry in entries:
+            if entry["header"] in headers:
+                duplicate_count += 1
+            else:
+                headers.add(entry["header"])
+        file_count = len(set(e["filename"] for e in entries))
 
     elapsed = time.time() - t0
-    file_count = len(set(e["filename"] for e in entries))
     logger.info("AGS scan: %d unique headers from %d entries in %d files (%.1fs)",
                 len(headers), len(entries), file_count, elapsed)
+    if skipped:
+        logger.info("AGS index: %d files ending before the cutoff skipped",
+                    len(skipped))
 
     if duplicate_count > 0:
         logger.warning(
@@ -498,44 +2129,54 @@ def scan_ags_files(ags_host, ags_path):
         "entries": entries,
         "headers": headers,
         "duplicate_count": duplicate_count,
+        "skipped_files": skipped,
+        "checkpoint": checkpoint_stats,
+        "bytes_received": stats["bytes"],
         "elapsed": elapsed,
     }
 
 
-def compare_headers(ags_entries, mj_headers):
+def compare_headers(ags_entries, mj_headers, ags_headers=None):
     """Compare AGS entries against mjolnir header set.
 
     Parameters
     ----------
-    ags_entries : list of dict
+    ags_entries : AgsEntryTable or list of dict
         From scan_ags_files, each with 'header', 'filename', 'offset', 'index'.
-    mj_headers : set of bytes
+    mj_headers : HeaderIndex or set of bytes
         From scan_mj_files.
+    ags_headers : HeaderIndex or None
+        The unique headers of ags_entries, as scan_ags_files(as_table=True)
+        returns them; worked out from ags_entries if None.
 
     Returns
     -------
     dict
         matched: int
-        missing_on_mj: list of dict (entries not found on mj)
+        missing_on_mj: entries not found on mj, of the same type as
+        ags_entries (AgsEntryTable or list of dict)
         mj_only_count: int
     """
-    ags_header_set = set()
-    missing_on_mj = []
-    matched = 0
-
-    for entry in ags_entries:
-        hdr = entry["header"]
-        ags_header_set.add(hdr)
-        if hdr in mj_headers:
-            matched += 1
-        else:
-            missing_on_mj.append(entry)
-
-    mj_only_count = len(mj_headers - ags_header_set)
+    is_table = isinstance(ags_entries, AgsEntryTable)
+    if not is_table:
+        ags_entries = list(ags_entries)
+    table = _as_entry_table(ags_entries)
+
+    mj_index = _as_header_index(mj_headers)
+    found = table.header_mask(mj_index)
+    if isinstance(ags_headers, HeaderIndex):
+        unique = ags_headers.headers
+    else:
+        unique = np.unique(table.rows["header"])
+    mj_only_count = len(mj_index) - int(mj_index.contains(unique).sum())
 
+    if is_table:
+        missing = table[~found]
+    else:
+        missing = [ags_entries[i] for i in np.flatnonzero(~found)]
     return {
-        "matched": matched,
-        "missing_on_mj": missing_on_mj,
+        "matched": int(found.sum()),
+        "missing_on_mj": missing,
         "mj_only_count": mj_only_count,
     }
 
@@ -586,6 +2227,377 @@ def decode_gps_time(header):
         return None
 
 
+def _header_field(raw, offset, dtype):
+    # Column of a little-endian field from an (n, 128) uint8 header matrix
+    dtype = np.dtype(dtype)
+    return raw[:, offset:offset + dtype.itemsize].copy().view(dtype).ravel()
+
+
+# GPS fields of a raw header, for reading N headers with np.frombuffer
+GPS_HEADER_DTYPE = np.dtype({
+    "names": ["time_of_week", "week", "utc_offset", "subsecond", "ecc"],
+    "formats": ["<f4", "<i2", "<f4", "<u4", "<u4"],
+    "offsets": [GPS_TIME_WEEK_OFFSET, GPS_WEEK_OFFSET, GPS_UTC_OFFSET_OFFSET,
+                GPS_SUBSECOND_OFFSET, GPS_ECC_OFFSET],
+    "itemsize": HEADER_SIZE,
+})
+
+
+def _header_buffer(headers):
+    # Contiguous N*128-byte buffer from bytes, an array, or an iterable of
+    # header bytes (short headers are zero-padded, like a missing field)
+    if isinstance(headers, (bytes, bytearray, memoryview)):
+        return headers
+    if isinstance(headers, np.ndarray):
+        return np.ascontiguousarray(headers).view(np.uint8)
+    return b''.join(bytes(h[:HEADER_SIZE]).ljust(HEADER_SIZE, b'\x00')
+                    for h in headers)
+
+
+def decode_gps_times(headers):
+    """Decode GPS trigger times for many raw headers at once.
+
+    Vectorized decode_gps_time(): same arithmetic, same millisecond
+    result, with the GPS fields read through np.frombuffer.
+
+    Parameters
+    ----------
+    headers : bytes-like, numpy.ndarray or iterable of bytes
+        N concatenated 128-byte headers, an (N, 128) uint8 or S128
+        array, or a sequence of header bytes.
+
+    Returns
+    -------
+    tuple of (numpy.ndarray, numpy.ndarray)
+        (times, valid): datetime64[ms] trigger times (NaT where invalid)
+        and a boolean mask of headers with a usable GPS time.
+    """
+    fields = np.frombuffer(_header_buffer(headers), dtype=GPS_HEADER_DTYPE)
+    tow = fields["time_of_week"].astype(np.float64)
+    week = fields["week"].astype(np.int64)
+    utc = fields["utc_offset"].astype(np.float64)
+    subsecond = fields["subsecond"].astype(np.float64)
+    ecc = fields["ecc"].astype(np.float64)
+    ecc[ecc == 0] = 1000000000  # zero ECC: 1GHz default like hamma package
+
+    # datetime.fromtimestamp() rounds to the microsecond (half-even) before
+    # the string is truncated to milliseconds; do the same here
+    with np.errstate(invalid='ignore', over='ignore'):
+        base_time = (GPS_EPOCH + week * 604800) + np.floor(tow) + 1 - utc
+        ts = base_time + subsecond / ecc
+        valid = np.isfinite(ts) & (ts >= 946684800) & (ts < 253402300800)
+        ts = np.where(valid, ts, 0.0)
+        whole = np.floor(ts)
+        micros = np.round((ts - whole) * 1e6)
+    carry = micros >= 1000000
+    whole = whole.astype(np.int64) + carry
+    micros = np.where(carry, 0, micros).astype(np.int64)
+
+    times = (whole * 1000 + micros // 1000).astype('datetime64[ms]')
+    times[~valid] = np.datetime64('NaT')
+    return times, valid
+
+
+def _header_array(headers):
+    # S128 array from a set/list of header bytes (or an existing array/index)
+    if isinstance(headers, np.ndarray):
+        return headers
+    if isinstance(headers, HeaderIndex):
+        return headers.headers
+    return np.array(list(headers), dtype='S{}'.format(HEADER_SIZE))
+
+
+_DIGEST_MULT = np.uint64(0x9E3779B97F4A7C15)
+_DIGEST_SHIFT = np.uint64(29)
+
+
+def _header_digests(headers):
+    # 64-bit multiply-xorshift digest over the 16 words of each S128 header
+    words = np.ascontiguousarray(headers).view(np.uint8).reshape(
+        -1, HEADER_SIZE).view('<u8')
+    digests = np.zeros(len(words), dtype=np.uint64)
+    for i in range(words.shape[1]):
+        digests ^= words[:, i]
+        digests *= _DIGEST_MULT
+        digests ^= digests >> _DIGEST_SHIFT
+    return digests
+
+
+class HeaderIndex:
+    """Compact membership index over 128-byte headers.
+
+    Headers are kept in a single S128 array ordered by a 64-bit digest.
+    Lookups binary-search the digests with searchsorted and compare the
+    full header only on a digest hit. That is about 136 bytes per header,
+    against roughly twice that for a set of bytes objects.
+
+    Parameters
+    ----------
+    headers : iterable of bytes or numpy.ndarray
+        Initial headers; duplicates are dropped.
+    """
+
+    def __init__(self, headers=()):
+        self._build(np.unique(_header_array(headers)))
+
+    @classmethod
+    def from_unique(cls, unique):
+        """Index an S128 array already deduplicated by np.unique."""
+        index = cls.__new__(cls)
+        index._build(unique)
+        return index
+
+    def _build(self, unique):
+        digests = _header_digests(unique)
+        order = np.argsort(digests, kind='stable')
+        self.digests = digests[order]
+        self.headers = unique[order]
+
+    def __len__(self):
+        return len(self.digests)
+
+    def __contains__(self, header):
+        return bool(self.contains([header])[0])
+
+    def __iter__(self):
+        for header in self.headers.tolist():
+            yield header.ljust(HEADER_SIZE, b'\x00')
+
+    def contains(self, headers):
+        """Return a boolean mask of which `headers` are in the index."""
+        query = _header_array(headers)
+        found = np.zeros(len(query), dtype=bool)
+        size = len(self.digests)
+        if not size or not len(query):
+            return found
+        digests = _header_digests(query)
+        pos = np.minimum(np.searchsorted(self.digests, digests), size - 1)
+        hits = np.flatnonzero(self.digests[pos] == digests)
+        found[hits] = self.headers[pos[hits]] == query[hits]
+        # Two indexed headers sharing a digest: check the rest of the run
+        for i in hits[~found[hits]]:
+            j = pos[i] + 1
+            while j < size and self.digests[j] == digests[i]:
+                if self.headers[j] == query[i]:
+                    found[i] = True
+                    break
+                j += 1
+        return found
+
+    def add(self, headers):
+        """Add headers to the index (one rebuild per call, so batch them)."""
+        new = np.unique(_header_array(headers))
+        new = new[~self.contains(new)]
+        if len(new):
+            self._build(np.concatenate([self.headers, new]))
+
+
+def _as_header_index(headers):
+    # Adapter: accept either a HeaderIndex or a set of header bytes
+    if isinstance(headers, HeaderIndex):
+        return headers
+    return HeaderIndex(headers)
+
+
+AGS_ENTRY_DTYPE = np.dtype([
+    ("file_id", "<u4"),
+    ("offset", "<u8"),
+    ("index", "<u4"),
+    ("header", "S{}".format(HEADER_SIZE)),
+    ("datasize", "<u4"),
+    ("gps_seconds", "<f8"),
+])
+
+
+class AgsEntryTable:
+    """Compact columnar store for AGS trigger entries.
+
+    One structured NumPy row (156 bytes) per trigger instead of a dict
+    holding a separate bytes object. Filenames are interned in sorted
+    order, so comparing file ids compares names lexicographically.
+
+    Parameters
+    ----------
+    filenames : list of str
+        Sorted filenames; row file_id indexes into this list.
+    rows : numpy.ndarray
+        Structured array of AGS_ENTRY_DTYPE. gps_seconds is NaN where
+        decode_gps_time() would return None.
+
+    Notes
+    -----
+    Iterating yields the same dicts scan_ags_files() produces (filename,
+    offset, index, header), so a table can be passed anywhere a list of
+    entries is expected. Integer indexing returns one such dict; slices,
+    masks and index arrays return a new table sharing the filename list.
+    """
+
+    def __init__(self, filenames, rows):
+        self.filenames = filenames
+        self.rows = rows
+        self._ids = None
+
+    @classmethod
+    def from_entries(cls, entries):
+        """Build a table from an iterable of entry dicts.
+
+        The iterable is consumed once, so a generator of streamed records
+        never needs to be held in memory as dicts.
+        """
+        names = {}
+        file_ids = array('I')
+        offsets = array('Q')
+        indexes = array('I')
+        headers = bytearray()
+        for entry in entries:
+            file_ids.append(names.setdefault(entry["filename"], len(names)))
+            offsets.append(entry["offset"])
+            indexes.append(entry["index"])
+            hdr = entry["header"]
+            if len(hdr) != HEADER_SIZE:
+                hdr = bytes(hdr[:HEADER_SIZE]).ljust(HEADER_SIZE, b'\x00')
+            headers += hdr
+
+        filenames = sorted(names)
+        remap = np.empty(len(filenames), dtype=np.uint32)
+        for sorted_id, name in enumerate(filenames):
+            remap[names[name]] = sorted_id
+
+        rows = np.zeros(len(offsets), dtype=AGS_ENTRY_DTYPE)
+        if len(rows):
+            raw = np.frombuffer(bytes(headers), dtype=np.uint8).reshape(
+                -1, HEADER_SIZE)
+            rows["file_id"] = remap[np.frombuffer(file_ids, dtype=np.uint32)]
+            rows["offset"] = np.frombuffer(offsets, dtype=np.uint64)
+            rows["index"] = np.frombuffer(indexes, dtype=np.uint32)
+            rows["header"] = raw.view('S{}'.format(HEADER_SIZE)).ravel()
+            rows["datasize"] = _header_field(raw, DATASIZE_OFFSET, '<u4')
+            times, valid = decode_gps_times(raw)
+            rows["gps_seconds"] = np.where(
+                valid, times.astype(np.int64) / 1000.0, np.nan)
+        return cls(filenames, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._entry(self.rows[key])
+        return AgsEntryTable(self.filenames, self.rows[key])
+
+    def __iter__(self):
+        for row in self.rows:
+            yield self._entry(row)
+
+    def _entry(self, row):
+        return {
+            "filename": self.filenames[row["file_id"]],
+            "offset": int(row["offset"]),
+            "index": int(row["index"]),
+            "header": row["header"].ljust(HEADER_SIZE, b'\x00'),
+        }
+
+    def filename_id(self, filename):
+        """Return the file id for a filename, or None if not interned."""
+        if self._ids is None:
+            self._ids = {name: i for i, name in enumerate(self.filenames)}
+        return self._ids.get(filename)
+
+    @property
+    def file_count(self):
+        """Number of distinct files with at least one row."""
+        return int(np.unique(self.rows["file_id"]).size)
+
+    def file_bytes(self, filenames):
+        """Bytes spanned by the walked triggers of each named file.
+
+        A file spans up to the end (header, payload and pad) of its last
+        trigger, so a corrupt or partial tail past it is not counted.
+        Returns a dict of filename -> int; unknown names map to 0.
+        """
+        ends = (self.rows["offset"] + np.uint64(HEADER_SIZE + PACKET_PAD)
+                + self.rows["datasize"].astype(np.uint64) * np.uint64(2))
+        spans = np.zeros(len(self.filenames), dtype=np.uint64)
+        np.maximum.at(spans, self.rows["file_id"], ends)
+        result = {}
+        for name in filenames:
+            file_id = self.filename_id(name)
+            result[name] = 0 if file_id is None else int(spans[file_id])
+        return result
+
+    def header_mask(self, headers):
+        """Boolean mask of rows whose header is in `headers`.
+
+        `headers` is a HeaderIndex or anything HeaderIndex accepts.
+        """
+        return _as_header_index(headers).contains(self.rows["header"])
+
+    def gps_hours(self):
+        """GPS time of each row as datetime64[h] (NaT where invalid)."""
+        ms = np.round(np.nan_to_num(self.rows["gps_seconds"]) * 1000)
+        hours = ms.astype(np.int64).astype('datetime64[ms]').astype(
+            'datetime64[h]')
+        hours[np.isnan(self.rows["gps_seconds"])] = np.datetime64('NaT')
+        return hours
+
+
+def _as_entry_table(entries):
+    # Adapter: accept either a table or a list of entry dicts
+    if isinstance(entries, AgsEntryTable):
+        return entries
+    return AgsEntryTable.from_entries(entries)
+
+
+# skip_status codes of RecoveryCandidates, with the reason reported for each
+SKIP_STATUSES = (None, "skipped", "skipped_before_since")
+SKIP_REASONS = (None, "last trigger in active file", "before --since cutoff")
+
+
+class RecoveryCandidates(AgsEntryTable):
+    """AGS entries to recover, with a skip_status column.
+
+    Parameters
+    ----------
+    filenames : list of str
+        Sorted filenames, as for AgsEntryTable.
+    rows : numpy.ndarray
+        Structured array of AGS_ENTRY_DTYPE.
+    skip_status : numpy.ndarray
+        uint8 code per row into SKIP_STATUSES (and SKIP_REASONS); 0 for
+        a trigger to recover.
+
+    Notes
+    -----
+    Iterating or integer indexing yields the entry dicts with
+    'skip_reason' and 'skip_status' added, as recover_triggers() takes
+    them; slices, masks and index arrays keep the column.
+    """
+
+    def __init__(self, filenames, rows, skip_status):
+        super().__init__(filenames, rows)
+        self.skip_status = skip_status
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return self._candidate(self.rows[key], self.skip_status[key])
+        return RecoveryCandidates(self.filenames, self.rows[key],
+                                  self.skip_status[key])
+
+    def __iter__(self):
+        for row, code in zip(self.rows, self.skip_status):
+            yield self._candidate(row, code)
+
+    def _candidate(self, row, code):
+        entry = self._entry(row)
+        entry["skip_reason"] = SKIP_REASONS[code]
+        entry["skip_status"] = SKIP_STATUSES[code]
+        return entry
+
+    def recoverable(self):
+        """The rows not skipped, as a new RecoveryCandidates."""
+        return self[self.skip_status == 0]
+
+
 def earliest_ags_timestamp(ags_entries):
     """Find the earliest valid GPS timestamp across all AGS entries.
 
@@ -595,7 +2607,7 @@ def earliest_ags_timestamp(ags_entries):
 
     Parameters
     ----------
-    ags_entries : list of dict
+    ags_entries : AgsEntryTable or list of dict
         From scan_ags_files(), each with 'header', 'filename', 'offset',
         'index'.
 
@@ -604,30 +2616,25 @@ def earliest_ags_timestamp(ags_entries):
     str or None
         'YYYY-MM-DDTHH' cutoff, or None if no valid GPS found.
     """
-    if not ags_entries:
+    if not len(ags_entries):
+        return None
+    table = _as_entry_table(ags_entries)
+
+    rows = table.rows[~np.isnan(table.rows["gps_seconds"])]
+    if not len(rows):
         return None
 
-    # Group entries by filename
-    files = {}
-    for entry in ags_entries:
-        files.setdefault(entry["filename"], []).append(entry)
-
-    earliest = None
-    for filename in sorted(files):
-        # Sort by index within file (triggers are sequential)
-        triggers = sorted(files[filename], key=lambda e: e["index"])
-        for trigger in triggers:
-            timestamp = decode_gps_time(trigger["header"])
-            if timestamp is not None:
-                cutoff = timestamp[:13]  # YYYY-MM-DDTHH
-                if earliest is None or cutoff < earliest:
-                    earliest = cutoff
-                logger.debug("Auto-detect: %s first valid GPS at %s",
-                             filename, cutoff)
-                break  # First valid in file = earliest in file
-
-    if earliest:
-        logger.info("Auto-detect: earliest AGS trigger at %s", earliest)
+    # First valid trigger per file (triggers are sequential by index)
+    rows = rows[np.lexsort((rows["index"], rows["file_id"]))]
+    _, first = np.unique(rows["file_id"], return_index=True)
+    firsts = AgsEntryTable(table.filenames, rows[first])
+    cutoffs = np.datetime_as_string(firsts.gps_hours(), unit='h')
+    for file_id, cutoff in zip(firsts.rows["file_id"], cutoffs):
+        logger.debug("Auto-detect: %s first valid GPS at %s",
+                     table.filenames[file_id], cutoff)
+
+    earliest = min(cutoffs.tolist())
+    logger.info("Auto-detect: earliest AGS trigger at %s", earliest)
     return earliest
 
 
@@ -652,6 +2659,48 @@ def detect_unit_name(hostname=None):
     return ("recovered", "")
 
 
+def compute_target_paths(headers, offsets, prefix, unit):
+    """Compute target directories and filenames for many recovered triggers.
+
+    Parameters
+    ----------
+    headers : bytes-like, numpy.ndarray or iterable of bytes
+        128-byte raw headers, as accepted by decode_gps_times().
+    offsets : sequence of int
+        Byte offset of each trigger in its source AGS file
+        (discriminator for bad GPS filenames).
+    prefix : str
+        Unit prefix (e.g., "mj").
+    unit : str
+        Unit number string (e.g., "41").
+
+    Returns
+    -------
+    list of tuple of (str, str)
+        (subdirectory, filename) per header. Subdirectory is
+        'YYYY-MM-DDTHH' or 'unknown'.
+    """
+    times, valid = decode_gps_times(headers)
+    if not len(times):
+        return []
+    unit_tag = "{}{}".format(prefix, unit) if unit else prefix
+
+    # "YYYY-MM-DDTHH:MM:SS.mmm" -> "YYYY-MM-DD_HH-MM-SS-mmm"
+    stamps = np.datetime_as_string(times, unit='ms')
+    stamps = np.char.replace(np.char.replace(np.char.replace(
+        stamps, 'T', '_'), ':', '-'), '.', '-')
+    good_names = np.char.add(np.char.add(unit_tag + "_", stamps),
+                             "_recovered.bin")
+    bad_names = np.char.mod(
+        unit_tag + "_0000-00-00_00-00-00-000_off%d_recovered.bin",
+        np.asarray(offsets, dtype=np.uint64))
+
+    subdirs = np.where(valid, np.datetime_as_string(times, unit='h'),
+                       "unknown")
+    filenames = np.where(valid, good_names, bad_names)
+    return list(zip(subdirs.tolist(), filenames.tolist()))
+
+
 def compute_target_path(header, offset, prefix, unit):
     """Compute target directory and filename for a recovered trigger.
 
@@ -671,22 +2720,7 @@ def compute_target_path(header, offset, prefix, unit):
     tuple of (str, str)
         (subdirectory, filename). Subdirectory is 'YYYY-MM-DDTHH' or 'unknown'.
     """
-    gps_str = decode_gps_time(header)
-    unit_tag = "{}{}".format(prefix, unit) if unit else prefix
-
-    if gps_str is None:
-        subdir = "unknown"
-        filename = "{}_0000-00-00_00-00-00-000_off{}_recovered.bin".format(
-            unit_tag, offset,
-        )
-    else:
-        # gps_str is "YYYY-MM-DDTHH:MM:SS.mmm"
-        subdir = gps_str[:13]  # "YYYY-MM-DDTHH"
-        # Convert to filename: "YYYY-MM-DD_HH-MM-SS-mmm"
-        ts = gps_str[0:10] + '_' + gps_str[11:].replace(':', '-').replace('.', '-')
-        filename = "{}_{}_recovered.bin".format(unit_tag, ts)
-
-    return (subdir, filename)
+    return compute_target_paths([header], [offset], prefix, unit)[0]
 
 
 def select_target_drive(mj_path, min_free=MIN_FREE_SPACE):
@@ -707,13 +2741,13 @@ def select_target_drive(mj_path, min_free=MIN_FREE_SPACE):
     str or None
         Full path to selected DATA drive, or None if no suitable drive.
     """
-    pattern = os.path.join(mj_path, DRIVE_PATTERN)
-    drives = sorted(glob.glob(pattern))
-    if not drives:
-        return None
+    return DriveSelector(mj_path, min_free=min_free).select()
+
 
+def _rank_drives(mj_path):
+    # DATA drives ordered by their most recent hourly directory, newest first
     drive_info = []
-    for drive in drives:
+    for drive in sorted(glob.glob(os.path.join(mj_path, DRIVE_PATTERN))):
         most_recent = ""
         try:
             for entry in os.listdir(drive):
@@ -728,16 +2762,229 @@ def select_target_drive(mj_path, min_free=MIN_FREE_SPACE):
 
     # Sort by most recent directory descending
     drive_info.sort(key=lambda x: x[1], reverse=True)
+    return [drive for drive, _ in drive_info]
 
-    for drive, _ in drive_info:
-        try:
-            usage = shutil.disk_usage(drive)
-            if usage.free >= min_free:
+
+class DriveSelector:
+    """Cached DATA drive choice for a run of recovery writes.
+
+    Drives are ranked (as in select_target_drive()) and their free space
+    read once; reserve() debits the cached figure for each trigger
+    queued, so nothing is listed or statted again per trigger.
+
+    Parameters
+    ----------
+    mj_path : str
+        Base path (e.g., /media/pi).
+    min_free : int
+        Minimum free bytes required (default: MIN_FREE_SPACE).
+    """
+
+    def __init__(self, mj_path, min_free=MIN_FREE_SPACE):
+        self.min_free = min_free
+        self.drives = _rank_drives(mj_path)
+        self.free = {}
+        for drive in self.drives:
+            try:
+                self.free[drive] = shutil.disk_usage(drive).free
+            except OSError:
+                continue
+
+    def select(self):
+        """Return the preferred drive with min_free bytes left, or None."""
+        for drive in self.drives:
+            if drive in self.free and self.free[drive] >= self.min_free:
                 return drive
-        except OSError:
-            continue
+        return None
 
-    return None
+    def reserve(self, drive, size):
+        """Debit size bytes from drive's cached free space."""
+        if drive in self.free:
+            self.free[drive] -= size
+
+
+class RecoveryScheduler:
+    """Order and budget the transfers of one recover_triggers() call.
+
+    Parameters
+    ----------
+    priority : str
+        'oldest-file' (oldest AGS file first, so whole files become
+        purgeable soonest), 'newest' (latest GPS time first, bad GPS
+        last) or 'order' (as given). See RECOVERY_PRIORITIES.
+    deadline : float or None
+        Seconds after start() past which no further transfer begins.
+    rate : float or None
+        Cap on recovered bytes per second. Reads are paced to it, so SSH
+        flow control holds the link to the same rate.
+    checkpoint_path : str or None
+        JSON file naming the triggers an earlier run deferred. They are
+        scheduled ahead of everything else, so a steady stream of newer
+        triggers cannot starve them; save() records this run's.
+    budget : io_budget.IOBudget or None
+        Shared I/O budget for the DATA drives. Recovered bytes are taken
+        from it as 'scrub', so recovery yields to live writes and shares
+        one rate with compression.
+
+    Raises
+    ------
+    ValueError
+        If priority is not one of RECOVERY_PRIORITIES.
+    """
+
+    def __init__(self, priority="oldest-file", deadline=None, rate=None,
+                 checkpoint_path=None, budget=None):
+        if priority not in RECOVERY_PRIORITIES:
+            raise ValueError("Unknown recovery priority '{}' (expected one "
+                             "of {})".format(priority,
+                                             ", ".join(RECOVERY_PRIORITIES)))
+        self.priority = priority
+        self.deadline = deadline
+        self.rate = rate
+        self.checkpoint_path = checkpoint_path
+        self.budget = budget
+        self.resumed = self._load()
+        self._t0 = time.time()
+        self._sent = 0
+        self._planned = 0
+
+    def _load(self):
+        if not self.checkpoint_path:
+            return set()
+        try:
+            with open(self.checkpoint_path) as f:
+                saved = json.load(f)
+            return set((fname, offset) for fname, offset in saved["deferred"])
+        except FileNotFoundError:
+            return set()
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring recovery checkpoint %s: %s",
+                           self.checkpoint_path, e)
+            return set()
+
+    def start(self):
+        """Start the deadline and rate clocks."""
+        self._t0 = time.time()
+        self._sent = 0
+        self._planned = 0
+
+    def order(self, candidates):
+        """Return candidate positions in the order they should be fetched."""
+        n = len(candidates)
+        if self.priority == "newest" and n:
+            times, valid = decode_gps_times([c["header"] for c in candidates])
+            ms = times.astype("int64")
+            rank = sorted(range(n), key=lambda i: (not valid[i],
+                                                   -ms[i] if valid[i] else 0,
+                                                   i))
+        elif self.priority == "oldest-file":
+            rank = sorted(range(n), key=lambda i: (candidates[i]["filename"],
+                                                   candidates[i]["index"], i))
+        else:
+            rank = list(range(n))
+        resumed = [i for i in rank
+                   if (candidates[i]["filename"], candidates[i]["offset"])
+                   in self.resumed]
+        if resumed:
+            logger.info("Recovery: %d triggers resumed from the last run",
+                        len(resumed))
+            first = set(resumed)
+            rank = resumed + [i for i in rank if i not in first]
+        return rank
+
+    def fits(self, size):
+        """True if a transfer of size bytes can finish within the budget.
+
+        Without both a deadline and a rate cap nothing is excluded up
+        front; the deadline is still enforced by expired().
+        """
+        if self.deadline is None or self.rate is None:
+            return True
+        if (self._planned + size) / self.rate > self.deadline:
+            return False
+        self._planned += size
+        return True
+
+    def expired(self):
+        """True once the deadline has passed."""
+        return (self.deadline is not None
+                and time.time() - self._t0 >= self.deadline)
+
+    def pace(self, nbytes):
+        """Account nbytes about to be written, sleeping to hold the rate cap.
+
+        With a shared budget the bytes are also taken from it, which
+        waits out live writes and other background I/O (never past the
+        deadline).
+
+        Returns
+        -------
+        bool
+            False if the deadline passed before the budget allowed the
+            bytes; they are not accounted and must not be written.
+        """
+        if self.budget is not None and nbytes:
+            timeout = None
+            if self.deadline is not None:
+                timeout = max(0.0, self._t0 + self.deadline - time.time())
+            waited = self.budget.take(nbytes, "scrub", timeout=timeout)
+            if waited is None:
+                return False
+            _observe_budget_wait(waited)
+        self._sent += nbytes
+        if not self.rate:
+            return True
+        delay = self._t0 + self._sent / self.rate - time.time()
+        if self.deadline is not None:
+            delay = min(delay, self._t0 + self.deadline - time.time())
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+    def save(self, deferred):
+        """Record deferred candidates for the next run (or clear them)."""
+        if not self.checkpoint_path:
+            return
+        self.resumed = set((c["filename"], c["offset"]) for c in deferred)
+        try:
+            if not deferred:
+                if os.path.exists(self.checkpoint_path):
+                    os.unlink(self.checkpoint_path)
+                return
+            os.makedirs(os.path.dirname(self.checkpoint_path) or ".",
+                        exist_ok=True)
+            tmp = self.checkpoint_path + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump({"deferred": [[c["filename"], c["offset"]]
+                                        for c in deferred]}, f)
+            os.replace(tmp, self.checkpoint_path)
+        except OSError as e:
+            logger.warning("Cannot write recovery checkpoint %s: %s",
+                           self.checkpoint_path, e)
+
+
+def _parse_rate(value):
+    """Parse a bytes/s figure with optional K/M/G suffix (e.g. '500K').
+
+    Uses io_budget.parse_size(), so rates and budget sizes read alike.
+
+    Raises
+    ------
+    ValueError
+        If value is not a positive number with an optional suffix, or
+        io_budget.py is not available to parse it.
+    """
+    if io_budget is None:
+        raise ValueError("Cannot parse rate '{}': no io_budget.py beside "
+                         "hamma_scrub.py".format(value))
+    try:
+        rate = io_budget.parse_size(value)
+    except ValueError:
+        rate = 0
+    if rate <= 0:
+        raise ValueError("Invalid rate '{}' (expected e.g. 250000, 500K "
+                         "or 2M)".format(value))
+    return rate
 
 
 def extract_trigger(ags_host, ags_path, filename, offset, size):
@@ -768,6 +3015,7 @@ def extract_trigger(ags_host, ags_path, filename, offset, size):
     ).format(filepath, offset, size)
     cmd = ["ssh", ags_host, dd_cmd]
     logger.debug("Extracting: %s", " ".join(cmd))
+    _count_session("extract")
     try:
         result = subprocess.run(
             cmd,
@@ -794,26 +3042,177 @@ def extract_trigger(ags_host, ags_path, filename, offset, size):
         return None
 
 
-def verify_trigger(data, expected_size):
-    """Verify extracted trigger data integrity.
+# Remote extractor script: reads a deployed extent list and streams each
+# extent back over one SSH session as a framed record.
+EXTRACTOR_SCRIPT = r"""
+import os, struct, sys, zlib
 
-    Parameters
-    ----------
-    data : bytes
-        Extracted trigger data.
-    expected_size : int
-        Expected byte count.
+# argv: data_path extent_list
+# Each extent list line is "offset size filename". For every extent, in
+# order, writes seq (uint32), status (uint8, 0 = ok), length (uint64),
+# CRC-32 of the payload (uint32) and then `length` bytes of trigger data,
+# or a UTF-8 error message.
 
-    Returns
-    -------
-    tuple of (bool, str)
-        (success, error_message). Error message is empty on success.
-    """
-    if len(data) != expected_size:
-        return (False, "size mismatch: got {} expected {}".format(
-            len(data), expected_size,
-        ))
-    if data[:4] != SYNC_MARKER:
+def frame(out, seq, status, payload):
+    crc = zlib.crc32(payload) & 0xffffffff
+    out.write(struct.pack('<IBQI', seq, status, len(payload), crc))
+    out.write(payload)
+    out.flush()
+
+def main():
+    data_path, extent_list = sys.argv[1], sys.argv[2]
+    out = sys.stdout.buffer if hasattr(sys.stdout, 'buffer') else sys.stdout
+    with open(extent_list) as f:
+        extents = [line.split(None, 2) for line in f if line.strip()]
+    for seq, (offset, size, fname) in enumerate(extents):
+        path = os.path.join(data_path, fname.rstrip('\n'))
+        try:
+            with open(path, 'rb') as src:
+                src.seek(int(offset))
+                data = src.read(int(size))
+        except (IOError, OSError) as e:
+            frame(out, seq, 1, str(e).encode('utf-8'))
+            continue
+        frame(out, seq, 0, data)
+
+main()
+"""
+
+EXTRACT_FRAME = '<IBQI'
+
+
+def _deploy_files(ags_host, files):
+    # Copy several generated files into a new temp directory on the AGS in
+    # a single scp and return that directory. `files` maps remote basename
+    # -> bytes content.
+    remote_dir = _remote_mkdtemp(ags_host)
+    local_dir = tempfile.mkdtemp(prefix='hamma_deploy_')
+    try:
+        local_paths = []
+        for name, content in sorted(files.items()):
+            path = os.path.join(local_dir, name)
+            with open(path, 'wb') as f:
+                f.write(content)
+            local_paths.append(path)
+
+        scp_cmd = (["scp", "-q"] + local_paths
+                   + ["{host}:{path}/".format(host=ags_host, path=remote_dir)])
+        logger.debug("Deploying: %s", " ".join(scp_cmd))
+        _count_session("deploy")
+        deploy = subprocess.run(
+            scp_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=30,
+        )
+        if deploy.returncode != 0:
+            stderr = deploy.stderr.decode('utf-8', errors='replace').strip()
+            _remote_rmtree(ags_host, remote_dir)
+            raise RuntimeError(
+                "Failed to deploy {names} to {host}: {err}".format(
+                    names=", ".join(sorted(files)), host=ags_host, err=stderr,
+                )
+            )
+    finally:
+        shutil.rmtree(local_dir, ignore_errors=True)
+    return remote_dir
+
+
+def _extractor_command(ags_host, ags_path, remote_dir):
+    # SSH command that runs the deployed extractor and removes its directory
+    return ["ssh", ags_host, _run_and_clean(
+        "python3 {d}/hamma_extractor.py {path} {d}/hamma_extents.txt".format(
+            d=remote_dir, path=shlex.quote(ags_path)), remote_dir)]
+
+
+def extract_triggers_batch(ags_host, ags_path, extents):
+    """Extract many triggers from AGS over a single SSH session.
+
+    Deploys the extractor script and an extent list with one scp, then
+    streams the extents back as framed records, one extent in memory
+    at a time. Each extent is checked against the CRC-32 sent with it,
+    and the session is killed once no extent has arrived for
+    RECOVER_TIMEOUT seconds.
+
+    Parameters
+    ----------
+    ags_host : str
+        SSH host for AGS sensor.
+    ags_path : str
+        AGS data directory on sensor.
+    extents : list of tuple
+        (filename, offset, size) for each trigger.
+
+    Yields
+    ------
+    tuple of (int, bytes or None, str or None)
+        (position in extents, data, error). Every extent is yielded
+        exactly once, in order; data is None on failure.
+    """
+    extent_list = "".join(
+        "{} {} {}\n".format(offset, size, filename)
+        for filename, offset, size in extents
+    )
+
+    frame_size = struct.calcsize(EXTRACT_FRAME)
+    received = 0
+    error = "batch extraction ended early"
+    try:
+        remote_dir = _deploy_files(ags_host, {
+            "hamma_extractor.py": EXTRACTOR_SCRIPT.encode('utf-8'),
+            "hamma_extents.txt": extent_list.encode('utf-8'),
+        })
+        cmd = _extractor_command(ags_host, ags_path, remote_dir)
+        logger.debug("Extracting %d extents: %s", len(extents), " ".join(cmd))
+        _count_session("extract")
+        with _ssh_process(cmd, ags_host, RECOVER_TIMEOUT, idle=True) as proc:
+            while received < len(extents):
+                frame = proc.stdout.read(frame_size)
+                if len(frame) < frame_size:
+                    break
+                seq, status, length, crc = struct.unpack(EXTRACT_FRAME, frame)
+                payload = proc.stdout.read(length)
+                if seq != received or len(payload) < length:
+                    # Out of step with the remote: stop it rather than
+                    # wait for it to finish writing into a full pipe
+                    proc.kill()
+                    break
+                proc.kick()
+                received += 1
+                if status:
+                    yield seq, None, payload.decode('utf-8', errors='replace')
+                elif zlib.crc32(payload) & 0xffffffff != crc:
+                    yield seq, None, "CRC mismatch"
+                else:
+                    yield seq, payload, None
+    except RuntimeError as e:
+        logger.warning("Batch extraction from %s failed: %s", ags_host, e)
+        error = str(e)
+
+    for seq in range(received, len(extents)):
+        yield seq, None, error
+
+
+def verify_trigger(data, expected_size):
+    """Verify extracted trigger data integrity.
+
+    Parameters
+    ----------
+    data : bytes
+        Extracted trigger data.
+    expected_size : int
+        Expected byte count.
+
+    Returns
+    -------
+    tuple of (bool, str)
+        (success, error_message). Error message is empty on success.
+    """
+    if len(data) != expected_size:
+        return (False, "size mismatch: got {} expected {}".format(
+            len(data), expected_size,
+        ))
+    if data[:4] != SYNC_MARKER:
         return (False, "sync marker mismatch: got {}".format(data[:4].hex()))
     return (True, "")
 
@@ -827,55 +3226,43 @@ def filter_recovery_candidates(missing_entries, ags_entries, since_cutoff=None):
 
     Parameters
     ----------
-    missing_entries : list of dict
+    missing_entries : AgsEntryTable or list of dict
         Missing entries from compare_headers().
-    ags_entries : list of dict
+    ags_entries : AgsEntryTable or list of dict
         All AGS entries (to identify active file).
     since_cutoff : str or None
         Normalized since cutoff ('YYYY-MM-DDTHH').
 
     Returns
     -------
-    list of dict
-        Each dict is a copy of the missing entry with added keys:
-        'skip_reason' (None or string), 'skip_status' (None, 'skipped',
-        or 'skipped_before_since').
+    RecoveryCandidates
+        The missing entries with a skip_status column; as dicts, each
+        has 'skip_reason' (None or string) and 'skip_status' (None,
+        'skipped', or 'skipped_before_since') added.
     """
-    # Identify last trigger in newest AGS file
-    active_trigger = None
-    if ags_entries:
-        newest_file = max(e["filename"] for e in ags_entries)
-        newest_entries = [e for e in ags_entries if e["filename"] == newest_file]
-        if newest_entries:
-            last = max(newest_entries, key=lambda e: e["offset"])
-            active_trigger = (last["filename"], last["offset"])
-
-    results = []
-    for entry in missing_entries:
-        entry_copy = dict(entry)
-        key = (entry["filename"], entry["offset"])
-
-        if active_trigger and key == active_trigger:
-            entry_copy["skip_reason"] = "last trigger in active file"
-            entry_copy["skip_status"] = "skipped"
-            results.append(entry_copy)
-            continue
-
-        if since_cutoff:
-            gps_str = decode_gps_time(entry["header"])
-            if gps_str is not None:
-                gps_dir = gps_str[:13]
-                if gps_dir < since_cutoff:
-                    entry_copy["skip_reason"] = "before --since cutoff"
-                    entry_copy["skip_status"] = "skipped_before_since"
-                    results.append(entry_copy)
-                    continue
+    missing = _as_entry_table(missing_entries)
+    rows = missing.rows
 
-        entry_copy["skip_reason"] = None
-        entry_copy["skip_status"] = None
-        results.append(entry_copy)
-
-    return results
+    # Identify last trigger in newest AGS file
+    active = np.zeros(len(rows), dtype=bool)
+    if len(ags_entries):
+        ags = _as_entry_table(ags_entries)
+        newest_id = ags.rows["file_id"].max()
+        last_offset = ags.rows["offset"][ags.rows["file_id"] == newest_id].max()
+        file_id = missing.filename_id(ags.filenames[newest_id])
+        if file_id is not None:
+            active = (rows["file_id"] == file_id) & (rows["offset"] == last_offset)
+
+    # Bad GPS (NaT) never compares as before the cutoff
+    before_since = np.zeros(len(rows), dtype=bool)
+    if since_cutoff:
+        before_since = missing.gps_hours() < np.datetime64(since_cutoff, 'h')
+
+    skip_status = np.where(
+        active, SKIP_STATUSES.index("skipped"),
+        np.where(before_since, SKIP_STATUSES.index("skipped_before_since"),
+                 0)).astype(np.uint8)
+    return RecoveryCandidates(missing.filenames, rows, skip_status)
 
 
 def identify_purgeable_files(ags_entries, mj_headers, recovery_results=None):
@@ -887,9 +3274,9 @@ def identify_purgeable_files(ags_entries, mj_headers, recovery_results=None):
 
     Parameters
     ----------
-    ags_entries : list of dict
+    ags_entries : AgsEntryTable or list of dict
         From scan_ags_files(), each with filename, offset, index, header.
-    mj_headers : set of bytes
+    mj_headers : HeaderIndex or set of bytes
         128-byte headers confirmed on MJ (already updated post-recovery).
     recovery_results : list of dict or None
         From recover_triggers(), each with status, source_file,
@@ -901,69 +3288,60 @@ def identify_purgeable_files(ags_entries, mj_headers, recovery_results=None):
         purgeable: sorted list of filenames safe to delete.
         retained: list of dict with filename and reason.
     """
-    if not ags_entries:
+    if not len(ags_entries):
         return {"purgeable": [], "retained": []}
+    table = _as_entry_table(ags_entries)
+    file_ids = table.rows["file_id"]
 
-    # Group entries by filename
-    files = {}
-    for entry in ags_entries:
-        fname = entry["filename"]
-        if fname not in files:
-            files[fname] = []
-        files[fname].append(entry)
+    confirmed = table.header_mask(mj_headers)
+    failed = np.zeros(len(table), dtype=bool)
 
-    # Build recovery result lookup: (source_file, source_offset) -> result
-    recovery_lookup = {}
+    # Only triggers whose header is not on MJ need the recovery lookup
     if recovery_results:
+        recovery_lookup = {}
         for r in recovery_results:
             key = (r["source_file"], r["source_offset"])
             recovery_lookup[key] = r
+        for i in np.flatnonzero(~confirmed):
+            key = (table.filenames[file_ids[i]], int(table.rows["offset"][i]))
+            r = recovery_lookup.get(key)
+            if r is None:
+                continue
+            if r["status"] == "recovered":
+                confirmed[i] = True
+            elif (r["status"] == "skipped"
+                    and r.get("error") == "file already exists"):
+                confirmed[i] = True
+            elif r["status"] == "failed":
+                failed[i] = True
+
+    n_files = len(table.filenames)
+    totals = np.bincount(file_ids, minlength=n_files)
+    unconfirmed = np.bincount(file_ids[~confirmed & ~failed], minlength=n_files)
+    failures = np.bincount(file_ids[failed], minlength=n_files)
 
     # Newest file (lexicographically) is never purgeable
-    newest = sorted(files.keys())[-1]
+    present = np.flatnonzero(totals)
+    newest = present[-1]
 
     purgeable = []
     retained = []
 
-    for fname in sorted(files.keys()):
-        if fname == newest:
+    for file_id in present:
+        fname = table.filenames[file_id]
+        if file_id == newest:
             retained.append({"filename": fname, "reason": "active file"})
             continue
 
-        triggers = files[fname]
-        total = len(triggers)
-        unconfirmed = 0
-        failed_count = 0
-
-        for entry in triggers:
-            if entry["header"] in mj_headers:
-                continue
-            # Header not in mj_headers — check recovery result
-            key = (fname, entry["offset"])
-            r = recovery_lookup.get(key)
-            if r is not None:
-                if r["status"] == "recovered":
-                    continue
-                if (r["status"] == "skipped"
-                        and r.get("error") == "file already exists"):
-                    continue
-                # Unsafe status
-                if r["status"] == "failed":
-                    failed_count += 1
-                else:
-                    unconfirmed += 1
-            else:
-                unconfirmed += 1
-
-        if unconfirmed == 0 and failed_count == 0:
+        if unconfirmed[file_id] == 0 and failures[file_id] == 0:
             purgeable.append(fname)
         else:
             parts = []
-            if unconfirmed > 0:
+            if unconfirmed[file_id] > 0:
                 parts.append("{}/{} triggers not on MJ".format(
-                    unconfirmed, total))
-            if failed_count > 0:
-                parts.append("{} recovery failed".format(failed_count))
+                    unconfirmed[file_id], totals[file_id]))
+            if failures[file_id] > 0:
+                parts.append("{} recovery failed".format(failures[file_id]))
             retained.append({
                 "filename": fname,
                 "reason": ", ".join(parts),
@@ -972,7 +3350,132 @@ def identify_purgeable_files(ags_entries, mj_headers, recovery_results=None):
     return {"purgeable": purgeable, "retained": retained}
 
 
-def purge_ags_files(ags_host, ags_path, filenames, dry_run=False):
+# The purger runs on the AGS like the extractor. It unlinks each listed
+# file by its own explicit path (no globbing, no shell) and prints one JSON
+# line per file as soon as that file is done.
+PURGER_SCRIPT = r"""
+import json, os, sys
+
+# argv: data_path file_list
+# For every name in file_list, in order, writes {"seq": n} on success or
+# {"seq": n, "error": "..."} on failure.
+
+def main():
+    data_path, file_list = sys.argv[1], sys.argv[2]
+    with open(file_list) as f:
+        names = [line.rstrip('\n') for line in f if line.strip()]
+    for seq, name in enumerate(names):
+        result = {'seq': seq}
+        if name in ('.', '..') or os.path.basename(name) != name:
+            result['error'] = 'refusing to delete non-basename %r' % name
+        else:
+            try:
+                os.remove(os.path.join(data_path, name))
+            except (IOError, OSError) as e:
+                result['error'] = str(e)
+        sys.stdout.write(json.dumps(result) + '\n')
+        sys.stdout.flush()
+
+main()
+"""
+
+
+def _purger_command(ags_host, ags_path, remote_dir):
+    # SSH command that runs the deployed purger and removes its directory
+    return ["ssh", ags_host, _run_and_clean(
+        "python3 {d}/hamma_purger.py {path} {d}/hamma_purge.txt".format(
+            d=remote_dir, path=shlex.quote(ags_path)), remote_dir)]
+
+
+def purge_ags_files_batch(ags_host, ags_path, filenames):
+    """Delete many AGS files over a single SSH session.
+
+    Deploys the purger script and the file list with one scp, then reads
+    back one result line per file as each deletion completes.
+
+    Parameters
+    ----------
+    ags_host : str
+        SSH host for AGS sensor.
+    ags_path : str
+        Path to AGS data directory on sensor.
+    filenames : list of str
+        Filenames (basenames within ags_path) to delete.
+
+    Yields
+    ------
+    tuple of (int, str or None)
+        (position in filenames, error). Every file is yielded exactly
+        once; error is None if the file was deleted.
+    """
+    # A newline would split a name across two list lines
+    bad = set(i for i, fname in enumerate(filenames) if "\n" in fname)
+    listed = [i for i in range(len(filenames)) if i not in bad]
+    file_list = "".join(filenames[i] + "\n" for i in listed)
+
+    received = 0
+    error = "batch purge ended early"
+    if listed:
+        try:
+            remote_dir = _deploy_files(ags_host, {
+                "hamma_purger.py": PURGER_SCRIPT.encode('utf-8'),
+                "hamma_purge.txt": file_list.encode('utf-8'),
+            })
+            cmd = _purger_command(ags_host, ags_path, remote_dir)
+            logger.debug("Purging %d files: %s", len(listed), " ".join(cmd))
+            _count_session("purge")
+            # Each deletion gets PURGE_TIMEOUT, however long the list
+            with _ssh_process(cmd, ags_host, PURGE_TIMEOUT,
+                              idle=True) as proc:
+                while received < len(listed):
+                    line = proc.stdout.readline()
+                    if not line:
+                        break
+                    try:
+                        result = json.loads(line.decode('utf-8'))
+                    except ValueError:
+                        result = None
+                    if not isinstance(result, dict) or \
+                            result.get("seq") != received:
+                        # Out of step with the remote: stop it
+                        proc.kill()
+                        break
+                    proc.kick()
+                    received += 1
+                    yield listed[result["seq"]], result.get("error")
+        except RuntimeError as e:
+            logger.warning("Batch purge on %s failed: %s", ags_host, e)
+            error = str(e)
+
+    for i in listed[received:]:
+        yield i, error
+    for i in sorted(bad):
+        yield i, "invalid filename"
+
+
+class _ResultSlots(list):
+    # Result list that passes each record to on_result as it is stored,
+    # whether its slot is filled (from whichever thread) or appended
+
+    def __init__(self, size, on_result=None):
+        super().__init__([None] * size)
+        self.on_result = on_result
+
+    def _notify(self, value):
+        if value is not None and self.on_result is not None:
+            self.on_result(value)
+
+    def __setitem__(self, index, value):
+        super().__setitem__(index, value)
+        self._notify(value)
+
+    def append(self, value):
+        super().append(value)
+        self._notify(value)
+
+
+def purge_ags_files(ags_host, ags_path, filenames, dry_run=False,
+                    batch=False, on_result=None):
     """Delete AGS files via SSH.
 
     Parameters
@@ -985,14 +3488,33 @@ def purge_ags_files(ags_host, ags_path, filenames, dry_run=False):
         Filenames to delete.
     dry_run : bool
         If True, log what would be deleted but take no action.
+    batch : bool
+        If True, delete all files over one SSH session with
+        purge_ags_files_batch() instead of one ssh rm per file.
+    on_result : callable or None
+        Called with each result record as soon as it is known.
 
     Returns
     -------
     list of dict
         Each with filename, status ('deleted', 'failed', 'dry_run'),
-        and optional error.
+        and optional error, in the order of filenames.
     """
-    results = []
+    if batch and not dry_run:
+        results = _ResultSlots(len(filenames), on_result)
+        for i, err in purge_ags_files_batch(ags_host, ags_path, filenames):
+            fname = filenames[i]
+            if err is None:
+                logger.info("Deleted: %s:%s/%s", ags_host, ags_path, fname)
+                results[i] = {"filename": fname, "status": "deleted",
+                              "error": None}
+            else:
+                logger.warning("Failed to delete %s: %s", fname, err)
+                results[i] = {"filename": fname, "status": "failed",
+                              "error": err}
+        return results
+
+    results = _ResultSlots(0, on_result)
     for fname in filenames:
         remote_path = "{}/{}".format(ags_path, fname)
 
@@ -1007,19 +3529,20 @@ def purge_ags_files(ags_host, ags_path, filenames, dry_run=False):
 
         cmd = ["ssh", ags_host, "rm " + shlex.quote(remote_path)]
         logger.info("Deleting: %s:%s", ags_host, remote_path)
+        _count_session("purge")
         try:
             result = subprocess.run(
                 cmd,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                timeout=15,
+                timeout=PURGE_TIMEOUT,
             )
         except subprocess.TimeoutExpired:
             logger.warning("Timeout deleting %s on %s", fname, ags_host)
             results.append({
                 "filename": fname,
                 "status": "failed",
-                "error": "SSH timeout (15s)",
+                "error": "SSH timeout ({}s)".format(PURGE_TIMEOUT),
             })
             continue
 
@@ -1041,8 +3564,14 @@ def purge_ags_files(ags_host, ags_path, filenames, dry_run=False):
     return results
 
 
-def cleanup_orphaned_temps(mj_path, max_age=ORPHAN_MAX_AGE):
-    """Delete orphaned .tmp_recover_*.bin files older than max_age.
+def cleanup_orphaned_temps(mj_path, max_age=ORPHAN_MAX_AGE,
+                           partial_max_age=PARTIAL_MAX_AGE):
+    """Delete orphaned recovery temp files.
+
+    Partial chunked transfers (.tmp_recover_*.partial) are progress that
+    a later run resumes, so they are kept much longer than the
+    .tmp_recover_*.bin files of single-shot transfers and the
+    .tmp_recover_*.d directories of compressed recovery.
 
     Parameters
     ----------
@@ -1050,6 +3579,9 @@ def cleanup_orphaned_temps(mj_path, max_age=ORPHAN_MAX_AGE):
         Base path containing DATA drives.
     max_age : int
         Maximum age in seconds before deletion (default: 1 hour).
+    partial_max_age : int
+        Maximum age in seconds of an untouched partial transfer
+        (default: 7 days).
 
     Returns
     -------
@@ -1059,24 +3591,419 @@ def cleanup_orphaned_temps(mj_path, max_age=ORPHAN_MAX_AGE):
     count = 0
     now = time.time()
     for drive in glob.glob(os.path.join(mj_path, DRIVE_PATTERN)):
-        for tmp_file in glob.glob(os.path.join(drive, ".tmp_recover_*.bin")):
-            try:
-                mtime = os.path.getmtime(tmp_file)
-                if now - mtime > max_age:
-                    os.unlink(tmp_file)
-                    logger.info("Cleaned orphaned temp: %s", tmp_file)
-                    count += 1
-            except OSError:
-                continue
+        for pattern, limit in ((".tmp_recover_*.bin", max_age),
+                               (".tmp_recover_*.d", max_age),
+                               (".tmp_recover_*.partial", partial_max_age)):
+            for tmp_file in glob.glob(os.path.join(drive, pattern)):
+                try:
+                    mtime = os.path.getmtime(tmp_file)
+                    if now - mtime > limit:
+                        if os.path.isdir(tmp_file):
+                            shutil.rmtree(tmp_file)
+                        else:
+                            os.unlink(tmp_file)
+                        logger.info("Cleaned orphaned temp: %s", tmp_file)
+                        count += 1
+                except OSError:
+                    continue
     return count
 
 
-def recover_triggers(candidates, ags_host, ags_path, mj_path, dry_run=False):
+class CompressedRecovery:
+    """Write recovered triggers straight to compressed .hmc archives.
+
+    For drives short of space: instead of keeping a raw ~22 MB .bin file
+    that CompressData would later read back and compress, each trigger
+    is compressed with hamma.compression into the drive's
+    compressed/<hour>/ tree (named like CompressData's output,
+    <stem>.hmc). A single-shot transfer is spooled in RAM, so only the
+    archive is written to the drive; a batch transfer is compressed
+    from the resumable .partial file it was assembled in. Its header
+    is appended to the drive's recovered-headers journal, which
+    scan_mj_files() reads. The archive is also added to the drive's
+    compression manifest, as CompressData does, marked "recovered", so
+    transfers pick it up.
+
+    Parameters
+    ----------
+    method : str
+        hamma.compression method, 'quantize' or 'lossless'.
+    step : int
+        Quantization step for method 'quantize'.
+    spool_dir : str
+        Where each raw trigger is written for hamma.compression to read.
+        Default RECOVER_SPOOL_DIR (tmpfs where available).
+
+    Raises
+    ------
+    ImportError
+        If hamma.compression or compress_manifest.py is not available.
+    """
+
+    def __init__(self, method="quantize", step=8,
+                 spool_dir=RECOVER_SPOOL_DIR):
+        if compress_manifest is None:
+            raise ImportError("no compress_manifest.py beside hamma_scrub.py")
+        from hamma.compression import compress_file
+        self._compress_file = compress_file
+        self.method = method
+        self.step = step
+        self.spool_dir = spool_dir
+        self._journal_lock = threading.Lock()
+
+    def target_path(self, drive, subdir, filename):
+        """Archive path for a trigger that would be drive/subdir/filename."""
+        stem = os.path.splitext(filename)[0]
+        return os.path.join(drive, COMPRESSED_SUBDIR, subdir, stem + ".hmc")
+
+    def commit(self, source, target_path, header):
+        """Compress a verified trigger into target_path.
+
+        source is either the trigger's bytes, spooled in spool_dir, or
+        the path of a file on the target's drive (a resumed partial
+        transfer), which is consumed. Returns False (and discards the
+        archive) if target_path appeared meanwhile, True once the archive
+        is in place. Raises OSError or the compressor's error.
+        """
+        stem = os.path.splitext(os.path.basename(target_path))[0]
+        out_dir = os.path.dirname(target_path)
+        drive = os.path.dirname(os.path.dirname(out_dir))
+        # hamma.compression writes the archive here, on the target's
+        # drive, so it is renamed into place rather than copied
+        work_dir = tempfile.mkdtemp(prefix=".tmp_recover_", suffix=".d",
+                                    dir=drive)
+        spool = None
+        try:
+            # Named like the .bin it stands for, so the archive is too
+            if isinstance(source, str):
+                raw_path = os.path.join(work_dir, stem + ".bin")
+                os.rename(source, raw_path)
+            else:
+                os.makedirs(self.spool_dir, exist_ok=True)
+                spool = tempfile.mkdtemp(prefix=".tmp_recover_",
+                                         dir=self.spool_dir)
+                raw_path = os.path.join(spool, stem + ".bin")
+                with open(raw_path, 'wb') as f:
+                    f.write(source)
+            source_stat = os.stat(raw_path)
+            t0 = time.monotonic()
+            results = self._compress_file(raw_path, output_dir=work_dir,
+                                          method=self.method, step=self.step)
+            duration = time.monotonic() - t0
+            archives = glob.glob(os.path.join(work_dir, "*.hmc"))
+            if not results or len(archives) != 1:
+                raise OSError("compression produced {} archives".format(
+                    len(archives)))
+            # Race check: another process may have created the file
+            if os.path.exists(target_path):
+                return False
+            os.makedirs(out_dir, exist_ok=True)
+            os.rename(archives[0], target_path)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+            if spool is not None:
+                shutil.rmtree(spool, ignore_errors=True)
+        try:
+            self._journal(target_path, header)
+        except OSError as e:
+            # The trigger is on MJ; only later scans will not count it
+            logger.error("Recovered %s but could not journal its header: %s",
+                         target_path, e)
+        self._add_to_manifest(target_path, source_stat, duration)
+        return True
+
+    def _add_to_manifest(self, target_path, source_stat, duration):
+        # Record the archive in the drive's manifest, as CompressData does
+        hour_dir = os.path.dirname(target_path)
+        output_path = os.path.dirname(hour_dir)
+        hour = os.path.basename(hour_dir)
+        stem = os.path.splitext(os.path.basename(target_path))[0]
+        try:
+            record = compress_manifest.make_record(
+                output_path, "{}/{}.bin".format(hour, stem),
+                "{}/{}.hmc".format(hour, stem), source_stat,
+                method=self.method, step=self.step, duration=duration,
+                recovered=True)
+            with self._journal_lock:
+                compress_manifest.append_manifest(output_path, record)
+        except OSError as e:
+            # The archive and journal are in place; only transfers miss it
+            logger.warning("Could not add %s to the manifest in %s: %s",
+                           target_path, output_path, e)
+
+    def _journal(self, target_path, header):
+        # Append (hour directory, header) to the drive's journal, durably
+        hour_dir = os.path.dirname(target_path)
+        journal = os.path.join(os.path.dirname(hour_dir), RECOVERED_JOURNAL)
+        record = os.path.basename(hour_dir).encode('ascii')[:13].ljust(13)
+        with self._journal_lock:
+            fd = os.open(journal, os.O_WRONLY | os.O_CREAT | os.O_APPEND,
+                         0o644)
+            try:
+                os.write(fd, record + header)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+def _recovery_result(candidate, target_path, size, status, error):
+    # One recover_triggers() result record
+    return {
+        "source_file": candidate["filename"],
+        "source_offset": candidate["offset"],
+        "trigger_index": candidate["index"],
+        "target_path": target_path,
+        "size": size,
+        "status": status,
+        "error": error,
+        "header": candidate["header"],
+    }
+
+
+def _commit_recovery(job, data, error):
+    # Verify one extracted trigger and write it atomically to its target
+    candidate = job["candidate"]
+    rel_target = job["rel_target"]
+    size = job["size"]
+    if data is None:
+        return _recovery_result(candidate, rel_target, size, "failed", error)
+
+    ok, err = verify_trigger(data, size)
+    if not ok:
+        return _recovery_result(candidate, rel_target, size, "failed", err)
+
+    target_path = job["target_path"]
+    compressor = job.get("compressor")
+    try:
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        if compressor is not None:
+            # Compressed from memory; the raw trigger never hits the drive
+            if (os.path.exists(target_path)
+                    or not compressor.commit(data, target_path,
+                                             candidate["header"])):
+                return _recovery_result(candidate, rel_target, size,
+                                        "skipped", "file already exists")
+        else:
+            fd, tmp_path = tempfile.mkstemp(
+                prefix=".tmp_recover_", suffix=".bin", dir=job["drive"],
+            )
+            try:
+                os.write(fd, data)
+                os.close(fd)
+                fd = None
+                # Race check: another process may have created the file
+                if os.path.exists(target_path):
+                    os.unlink(tmp_path)
+                    return _recovery_result(candidate, rel_target, size,
+                                            "skipped", "file already exists")
+                os.rename(tmp_path, target_path)
+            except Exception:
+                if fd is not None:
+                    os.close(fd)
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+                raise
+    except OSError as e:
+        return _recovery_result(candidate, rel_target, size, "failed", str(e))
+    except Exception as e:
+        # hamma.compression errors fail this trigger, not the whole run
+        if compressor is None:
+            raise
+        return _recovery_result(candidate, rel_target, size, "failed",
+                                "compression failed: {}".format(e))
+
+    logger.info("Recovered: %s", rel_target)
+    if "started" in job:
+        _observe_recovery(time.time() - job["started"], len(data))
+    return _recovery_result(candidate, rel_target, size, "recovered", None)
+
+
+def _partial_name(candidate, size):
+    # Stable temp name for a trigger's chunked transfer, so a later run
+    # finds and resumes it
+    key = hashlib.md5("{}:{}:{}:".format(
+        candidate["filename"], candidate["offset"], size,
+    ).encode('utf-8') + candidate["header"]).hexdigest()[:16]
+    return ".tmp_recover_{}.partial".format(key)
+
+
+def _find_partials(mj_path):
+    # Partial transfers on every DATA drive, by basename
+    return {os.path.basename(path): path
+            for drive in glob.glob(os.path.join(mj_path, DRIVE_PATTERN))
+            for path in glob.glob(os.path.join(drive,
+                                               ".tmp_recover_*.partial"))}
+
+
+def _resume_partial(path, header, size):
+    # Bytes of an earlier transfer worth keeping: whole chunks, starting
+    # with the expected header. The rest is cut off (or the file removed).
+    try:
+        have = os.path.getsize(path)
+        keep = min(have, size)
+        if keep < size:
+            keep -= keep % RECOVER_CHUNK_SIZE
+        if keep:
+            with open(path, 'rb') as f:
+                if f.read(HEADER_SIZE) != header:
+                    keep = 0
+        if not keep:
+            os.unlink(path)
+        elif keep != have:
+            os.truncate(path, keep)
+    except OSError as e:
+        logger.warning("Cannot resume %s: %s", path, e)
+        return 0
+    return keep
+
+
+def _close_partial(job):
+    # Close the job's partial file if it is open
+    fd = job.pop("fd", None)
+    if fd is not None:
+        os.close(fd)
+
+
+def _finish_partial(job):
+    # Verify a complete partial file and rename it to its target
+    candidate = job["candidate"]
+    rel_target = job["rel_target"]
+    size = job["size"]
+    path = job["partial"]
+    target_path = job["target_path"]
+    try:
+        with open(path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                ok, err = verify_trigger(m, size)
+        if not ok:
+            os.unlink(path)
+            return _recovery_result(candidate, rel_target, size, "failed", err)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        # Race check: another process may have created the file
+        if os.path.exists(target_path):
+            os.unlink(path)
+            return _recovery_result(candidate, rel_target, size,
+                                    "skipped", "file already exists")
+        compressor = job.get("compressor")
+        if compressor is None:
+            os.rename(path, target_path)
+        elif not compressor.commit(path, target_path, candidate["header"]):
+            return _recovery_result(candidate, rel_target, size,
+                                    "skipped", "file already exists")
+    except (OSError, ValueError) as e:
+        return _recovery_result(candidate, rel_target, size, "failed", str(e))
+    except Exception as e:
+        # hamma.compression errors fail this trigger, not the whole batch
+        if job.get("compressor") is None:
+            raise
+        return _recovery_result(candidate, rel_target, size, "failed",
+                                "compression failed: {}".format(e))
+
+    logger.info("Recovered: %s", rel_target)
+    if "started" in job:
+        _observe_recovery(time.time() - job["started"],
+                          size - job["resumed"])
+    return _recovery_result(candidate, rel_target, size, "recovered", None)
+
+
+def _commit_chunk(job, pos, data, error):
+    # Append one verified chunk to the job's partial file. Returns the
+    # job's result once it is settled, else None; a failed job keeps its
+    # whole chunks on disk for the next run.
+    if job.get("done"):
+        return None
+    size = job["size"]
+    if data is not None:
+        expected = min(RECOVER_CHUNK_SIZE, size - pos)
+        if len(data) != expected:
+            error = "size mismatch: got {} expected {} at byte {}".format(
+                len(data), expected, pos)
+        elif pos == 0 and data[:HEADER_SIZE] != job["candidate"]["header"]:
+            error = "header mismatch (AGS file changed since the scan)"
+        else:
+            try:
+                if "fd" not in job:
+                    job["fd"] = os.open(job["partial"], os.O_WRONLY
+                                        | os.O_CREAT | os.O_APPEND, 0o644)
+                os.write(job["fd"], data)
+                job["have"] = pos + len(data)
+            except OSError as e:
+                error = str(e)
+    if error is None and job["have"] < size:
+        return None
+
+    job["done"] = True
+    _close_partial(job)
+    if error is None:
+        return _finish_partial(job)
+    if job["have"]:
+        error += " ({:,} of {:,} bytes kept to resume)".format(
+            job["have"], size)
+    return _recovery_result(job["candidate"], job["rel_target"], size,
+                            "failed", error)
+
+
+def _commit_batch(chunks, stream, results, scheduler=None):
+    # Write chunks from the extraction stream on a worker thread, so the
+    # next ones keep arriving over SSH while the previous one hits disk.
+    # chunks[seq] is the (job, byte position) of extent seq. With a
+    # scheduler, writes are paced and stop at its deadline.
+    work = queue.Queue(maxsize=RECOVER_QUEUE_DEPTH)
+    errors = []
+
+    def writer():
+        while True:
+            item = work.get()
+            if item is None:
+                return
+            job, pos, data, error = item
+            if errors:
+                continue  # drain after a failure so the reader never blocks
+            try:
+                result = _commit_chunk(job, pos, data, error)
+                if result is not None:
+                    results[job["slot"]] = result
+            except Exception as e:
+                errors.append(e)
+
+    thread = threading.Thread(target=writer, name="recover-writer")
+    thread.start()
+    # A trigger's transfer starts once the previous chunk has arrived
+    started = time.time()
+    try:
+        for seq, data, error in stream:
+            job, pos = chunks[seq]
+            job.setdefault("started", started)
+            started = time.time()
+            if scheduler is not None and \
+                    not scheduler.pace(len(data) if data else 0):
+                break
+            work.put((job, pos, data, error))
+            if errors:
+                break
+            if scheduler is not None and scheduler.expired():
+                break
+    finally:
+        work.put(None)
+        thread.join()
+        for job, _ in chunks:
+            _close_partial(job)
+        if hasattr(stream, "close"):
+            stream.close()
+    if errors:
+        raise errors[0]
+
+
+def recover_triggers(candidates, ags_host, ags_path, mj_path, dry_run=False,
+                     batch=False, scheduler=None, on_result=None,
+                     compressor=None):
     """Recover missing triggers from AGS to MJ DATA drives.
 
     Parameters
     ----------
-    candidates : list of dict
+    candidates : RecoveryCandidates or list of dict
         From filter_recovery_candidates(), each with 'skip_reason' and
         'skip_status' keys.
     ags_host : str
@@ -1087,6 +4014,23 @@ def recover_triggers(candidates, ags_host, ags_path, mj_path, dry_run=False):
         Base path for DATA drives.
     dry_run : bool
         If True, report what would be recovered without transferring.
+    batch : bool
+        If True, fetch all triggers over one SSH session with
+        extract_triggers_batch() instead of one dd per trigger. Each
+        trigger then comes in RECOVER_CHUNK_SIZE chunks appended to a
+        .tmp_recover_*.partial file on the target drive, renamed only
+        once complete and verified; a transfer that stalls, fails or
+        hits the deadline keeps its whole chunks for the next run.
+    scheduler : RecoveryScheduler or None
+        Transfer order, deadline and rate cap. Triggers it leaves
+        unfetched get status 'deferred' and are saved to its checkpoint.
+    on_result : callable or None
+        Called with each result record as soon as it is settled (in
+        completion order, possibly from the writer thread).
+    compressor : CompressedRecovery or None
+        If set, triggers are recovered straight to compressed archives
+        in each drive's compressed/<hour>/ tree instead of raw .bin
+        files; target_path then names the .hmc archive.
 
     Returns
     -------
@@ -1095,25 +4039,36 @@ def recover_triggers(candidates, ags_host, ags_path, mj_path, dry_run=False):
         target_path, size, status, error.
     """
     prefix, unit = detect_unit_name()
-    results = []
-
-    for candidate in candidates:
-        src_file = candidate["filename"]
-        src_offset = candidate["offset"]
-        trig_idx = candidate["index"]
+    results = _ResultSlots(len(candidates), on_result)
+    jobs = []
+    # Batch drive choice: ranked once, free space debited per queued trigger
+    selector = DriveSelector(mj_path) if batch else None
+    partials = _find_partials(mj_path) if batch and not dry_run else {}
+
+    # Target paths for every candidate that may be transferred, in one pass
+    active = [slot for slot, c in enumerate(candidates)
+              if not c["skip_reason"]]
+    targets = dict(zip(active, compute_target_paths(
+        [candidates[slot]["header"] for slot in active],
+        [candidates[slot]["offset"] for slot in active],
+        prefix, unit,
+    )))
+
+    if scheduler is not None:
+        scheduler.start()
+        order = scheduler.order(candidates)
+    else:
+        order = range(len(candidates))
 
+    # Plan: resolve target paths and settle everything that needs no transfer
+    for slot in order:
+        candidate = candidates[slot]
         # Handle skipped candidates
         if candidate["skip_reason"]:
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": None,
-                "size": 0,
-                "status": candidate["skip_status"],
-                "error": candidate["skip_reason"],
-                "header": candidate["header"],
-            })
+            results[slot] = _recovery_result(
+                candidate, None, 0,
+                candidate["skip_status"], candidate["skip_reason"],
+            )
             continue
 
         # Compute extraction size from header
@@ -1122,146 +4077,118 @@ def recover_triggers(candidates, ags_host, ags_path, mj_path, dry_run=False):
         )[0]
         size = HEADER_SIZE + datasize * 2 + PACKET_PAD
 
-        # Compute target path
-        subdir, filename = compute_target_path(
-            candidate["header"], src_offset, prefix, unit,
-        )
+        subdir, filename = targets[slot]
+
+        # An earlier run's partial transfer fixes the drive
+        partial = partials.get(_partial_name(candidate, size))
+        have = _resume_partial(partial, candidate["header"], size) \
+            if partial else 0
+        if not have:
+            partial = None
+
+        if scheduler is not None and not dry_run and \
+                not scheduler.fits(size - have):
+            results[slot] = _recovery_result(
+                candidate, None, size, "deferred", "recovery budget exceeded")
+            continue
 
         # Select drive (re-check free space per trigger)
-        drive = select_target_drive(mj_path)
+        if partial:
+            drive = os.path.dirname(partial)
+        elif batch:
+            drive = selector.select()
+        else:
+            drive = select_target_drive(mj_path)
         if drive is None:
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": None,
-                "size": size,
-                "status": "failed",
-                "error": "no drive with sufficient free space",
-                "header": candidate["header"],
-            })
+            results[slot] = _recovery_result(
+                candidate, None, size,
+                "failed", "no drive with sufficient free space",
+            )
             continue
 
-        target_dir = os.path.join(drive, subdir)
-        target_path = os.path.join(target_dir, filename)
+        if compressor is None:
+            target_path = os.path.join(drive, subdir, filename)
+        else:
+            target_path = compressor.target_path(drive, subdir, filename)
         rel_target = os.path.relpath(target_path, mj_path)
 
         if dry_run:
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": rel_target,
-                "size": size,
-                "status": "dry_run",
-                "error": None,
-                "header": candidate["header"],
-            })
+            results[slot] = _recovery_result(
+                candidate, rel_target, size, "dry_run", None)
             continue
 
         # Check if already exists (idempotent)
         if os.path.exists(target_path):
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": rel_target,
-                "size": size,
-                "status": "skipped",
-                "error": "file already exists",
-                "header": candidate["header"],
-            })
+            results[slot] = _recovery_result(
+                candidate, rel_target, size, "skipped", "file already exists")
             continue
 
-        # Extract trigger via SSH dd
-        data = extract_trigger(ags_host, ags_path, src_file, src_offset, size)
-        if data is None:
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": rel_target,
-                "size": size,
-                "status": "failed",
-                "error": "dd extraction failed",
-                "header": candidate["header"],
-            })
-            continue
+        jobs.append({
+            "slot": slot,
+            "candidate": candidate,
+            "size": size,
+            "drive": drive,
+            "target_path": target_path,
+            "rel_target": rel_target,
+            "partial": partial or os.path.join(
+                drive, _partial_name(candidate, size)),
+            "have": have,
+            "resumed": have,
+            "compressor": compressor,
+        })
+        if batch:
+            selector.reserve(drive, size - have)
+
+    # Fetch and commit
+    if batch and jobs:
+        extents = []
+        chunks = []
+        for job in jobs:
+            candidate = job["candidate"]
+            if job["have"] == job["size"]:
+                # Complete before an earlier run could rename it
+                results[job["slot"]] = _finish_partial(job)
+            for pos in range(job["have"], job["size"], RECOVER_CHUNK_SIZE):
+                extents.append((candidate["filename"],
+                                candidate["offset"] + pos,
+                                min(RECOVER_CHUNK_SIZE, job["size"] - pos)))
+                chunks.append((job, pos))
+        logger.info("Recovering %d triggers (%d resumed) in %d chunks over "
+                    "one SSH session", len(jobs),
+                    len([job for job in jobs if job["resumed"]]), len(chunks))
+        if chunks:
+            _commit_batch(chunks,
+                          extract_triggers_batch(ags_host, ags_path, extents),
+                          results, scheduler)
+    else:
+        for job in jobs:
+            if scheduler is not None and scheduler.expired():
+                break
+            candidate = job["candidate"]
+            job["started"] = time.time()
+            data = extract_trigger(ags_host, ags_path, candidate["filename"],
+                                   candidate["offset"], job["size"])
+            if scheduler is not None and \
+                    not scheduler.pace(len(data) if data else 0):
+                break
+            results[job["slot"]] = _commit_recovery(
+                job, data, "dd extraction failed")
+
+    # Anything the deadline cut off waits for the next run
+    for job in jobs:
+        if results[job["slot"]] is None:
+            results[job["slot"]] = _recovery_result(
+                job["candidate"], job["rel_target"], job["size"],
+                "deferred", "recovery deadline reached")
+    if scheduler is not None and not dry_run:
+        deferred = [candidates[slot] for slot, r in enumerate(results)
+                    if r["status"] == "deferred"]
+        if deferred:
+            logger.warning("Recovery: %d triggers deferred to the next run",
+                           len(deferred))
+        scheduler.save(deferred)
 
-        # Verify extracted data
-        ok, err = verify_trigger(data, size)
-        if not ok:
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": rel_target,
-                "size": size,
-                "status": "failed",
-                "error": err,
-                "header": candidate["header"],
-            })
-            continue
-
-        # Atomic write: temp file on target drive, then rename
-        try:
-            os.makedirs(target_dir, exist_ok=True)
-            fd, tmp_path = tempfile.mkstemp(
-                prefix=".tmp_recover_", suffix=".bin", dir=drive,
-            )
-            try:
-                os.write(fd, data)
-                os.close(fd)
-                fd = None
-                # Race check: another process may have created the file
-                if os.path.exists(target_path):
-                    os.unlink(tmp_path)
-                    results.append({
-                        "source_file": src_file,
-                        "source_offset": src_offset,
-                        "trigger_index": trig_idx,
-                        "target_path": rel_target,
-                        "size": size,
-                        "status": "skipped",
-                        "error": "file already exists",
-                        "header": candidate["header"],
-                    })
-                    continue
-                os.rename(tmp_path, target_path)
-            except Exception:
-                if fd is not None:
-                    os.close(fd)
-                try:
-                    os.unlink(tmp_path)
-                except OSError:
-                    pass
-                raise
-
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": rel_target,
-                "size": size,
-                "status": "recovered",
-                "error": None,
-                "header": candidate["header"],
-            })
-            logger.info("Recovered: %s", rel_target)
-
-        except OSError as e:
-            results.append({
-                "source_file": src_file,
-                "source_offset": src_offset,
-                "trigger_index": trig_idx,
-                "target_path": rel_target,
-                "size": size,
-                "status": "failed",
-                "error": str(e),
-                "header": candidate["header"],
-            })
-
-    return results
+    return results
 
 
 def format_human_report(results, limit=DEFAULT_LIMIT, recovery=None, purge=None):
@@ -1294,10 +4221,22 @@ def format_human_report(results, limit=DEFAULT_LIMIT, recovery=None, purge=None)
         results["mj_triggers"], results["mj_files_scanned"],
         results["mj_elapsed"],
     ))
+    if results.get("ags_duplicate_count", 0) > 0:
+        lines.append("AGS duplicate headers: {:,} ({:,} unique)".format(
+            results["ags_duplicate_count"], results["ags_unique_triggers"],
+        ))
     if results["mj_duplicate_count"] > 0:
         lines.append("MJ duplicate headers: {:,}".format(
             results["mj_duplicate_count"],
         ))
+    if results.get("ags_skipped_files"):
+        lines.append("AGS index: {:,} files ending before --since not "
+                     "walked".format(len(results["ags_skipped_files"])))
+    mj_cache = results.get("mj_cache")
+    if mj_cache:
+        lines.append("MJ cache: {:,} hits, {:,} misses".format(
+            mj_cache["hits"], mj_cache["misses"],
+        ))
     lines.append("Matched:  {:,}".format(results["matched"]))
     lines.append("")
 
@@ -1338,12 +4277,17 @@ def format_human_report(results, limit=DEFAULT_LIMIT, recovery=None, purge=None)
                     lines.append("  Would recover: {}".format(r["target_path"]))
         else:
             attempted = len([r for r in recovery
-                             if r["status"] not in ("skipped", "skipped_before_since")])
+                             if r["status"] not in ("skipped", "skipped_before_since",
+                                                    "deferred")])
             succeeded = len([r for r in recovery if r["status"] == "recovered"])
             failed = len([r for r in recovery if r["status"] == "failed"])
+            deferred = len([r for r in recovery if r["status"] == "deferred"])
             lines.append("Recovery: {} attempted, {} succeeded, {} failed".format(
                 attempted, succeeded, failed,
             ))
+            if deferred:
+                lines.append("  Deferred to next run: {} triggers".format(
+                    deferred))
             for r in recovery:
                 if r["status"] == "recovered":
                     lines.append("  Recovered: {}".format(r["target_path"]))
@@ -1358,12 +4302,15 @@ def format_human_report(results, limit=DEFAULT_LIMIT, recovery=None, purge=None)
     if purge is not None:
         lines.append("")
         lines.append("=== Purge ===")
+        size = ""
+        if purge.get("bytes"):
+            size = " ({:.1f} MB)".format(purge["bytes"] / 1e6)
         if purge.get("dry_run"):
-            lines.append("Would delete: {} AGS files".format(
-                len(purge["deleted"])))
+            lines.append("Would delete: {} AGS files{}".format(
+                len(purge["deleted"]), size))
         else:
-            lines.append("Deleted: {} AGS files".format(
-                len(purge["deleted"])))
+            lines.append("Deleted: {} AGS files{}".format(
+                len(purge["deleted"]), size))
         if purge["retained"]:
             lines.append("Retained: {} AGS files".format(
                 len(purge["retained"])))
@@ -1374,6 +4321,51 @@ def format_human_report(results, limit=DEFAULT_LIMIT, recovery=None, purge=None)
     return "\n".join(lines)
 
 
+def _missing_record(entry):
+    # JSON form of one missing_on_mj entry
+    return {
+        "ags_file": entry["filename"],
+        "ags_offset": entry["offset"],
+        "trigger_index": entry["index"],
+        "gps_time": decode_gps_time(entry["header"]),
+    }
+
+
+def _report_fields(results, ags_host, missing_on_mj):
+    # Top-level report fields shared by the JSON report and the NDJSON
+    # summary record; missing_on_mj is the value reported under that key
+    report = {
+        "scan_time": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        "ags_host": ags_host,
+        "ags_triggers": results["ags_triggers"],
+        "ags_files": results["ags_files"],
+        "ags_unique_triggers": results.get("ags_unique_triggers"),
+        "mj_triggers": results["mj_triggers"],
+        "mj_files_scanned": results["mj_files_scanned"],
+        "mj_duplicate_headers": results["mj_duplicate_count"],
+        "matched": results["matched"],
+        "missing_on_mj": missing_on_mj,
+        "mj_only_count": results["mj_only_count"],
+        "warnings": results.get("warnings", []),
+    }
+    if results.get("mj_cache") is not None:
+        report["mj_cache"] = results["mj_cache"]
+    if results.get("ags_checkpoint") is not None:
+        report["ags_checkpoint"] = results["ags_checkpoint"]
+    if results.get("ags_skipped_files"):
+        report["ags_skipped_files"] = results["ags_skipped_files"]
+    if results.get("mj_drives"):
+        report["mj_drives"] = results["mj_drives"]
+    if results.get("metrics") is not None:
+        report["metrics"] = results["metrics"]
+    return report
+
+
+def _recovery_record(result):
+    # Recovery result without its binary header (not JSON-serializable)
+    return {k: v for k, v in result.items() if k != "header"}
+
+
 def format_json_report(results, ags_host, recovery=None, purge=None):
     """Format results as JSON string.
 
@@ -1395,40 +4387,80 @@ def format_json_report(results, ags_host, recovery=None, purge=None):
     str
         JSON string.
     """
-    missing_entries = []
-    for entry in results["missing_on_mj"]:
-        gps = decode_gps_time(entry["header"])
-        missing_entries.append({
-            "ags_file": entry["filename"],
-            "ags_offset": entry["offset"],
-            "trigger_index": entry["index"],
-            "gps_time": gps,
-        })
-
-    report = {
-        "scan_time": datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
-        "ags_host": ags_host,
-        "ags_triggers": results["ags_triggers"],
-        "ags_files": results["ags_files"],
-        "mj_triggers": results["mj_triggers"],
-        "mj_files_scanned": results["mj_files_scanned"],
-        "mj_duplicate_headers": results["mj_duplicate_count"],
-        "matched": results["matched"],
-        "missing_on_mj": missing_entries,
-        "mj_only_count": results["mj_only_count"],
-        "warnings": results.get("warnings", []),
-    }
+    report = _report_fields(results, ags_host, [
+        _missing_record(entry) for entry in results["missing_on_mj"]])
     if recovery is not None:
-        # Strip binary header bytes — not JSON-serializable
-        report["recovery"] = [
-            {k: v for k, v in r.items() if k != "header"}
-            for r in recovery
-        ]
+        report["recovery"] = [_recovery_record(r) for r in recovery]
     if purge is not None:
         report["purge"] = purge
     return json.dumps(report, indent=2)
 
 
+class NdjsonReporter:
+    """Stream the report as newline-delimited JSON while the scrub runs.
+
+    Each line is one object with a "type" field:
+
+    - 'missing': a trigger the comparison found absent from MJ (the
+      fields of a format_json_report() missing_on_mj entry)
+    - 'recovery': one recover_triggers() result, as it settles
+    - 'purge': one purge_ags_files() result, as it is known
+    - 'summary': last line; the format_json_report() fields, with
+      missing_on_mj the count still missing after recovery, recovery a
+      count per status and purge's file lists replaced by counts
+
+    Lines are flushed as they are written, so a reader tailing the
+    stream (e.g. over ssh) sees progress live, and no record list is
+    built up for the report.
+
+    Parameters
+    ----------
+    streams : list of file
+        Text streams every line is written to (e.g. stdout and -o FILE).
+    """
+
+    def __init__(self, streams):
+        self.streams = list(streams)
+        self._lock = threading.Lock()
+
+    def write(self, record_type, fields):
+        """Write one record of record_type with the given fields."""
+        line = json.dumps(dict(fields, type=record_type)) + "\n"
+        with self._lock:
+            for stream in self.streams:
+                stream.write(line)
+                stream.flush()
+
+    def missing(self, entries):
+        """Write a 'missing' record per missing_on_mj entry."""
+        for entry in entries:
+            self.write("missing", _missing_record(entry))
+
+    def recovery(self, result):
+        """Write a 'recovery' record (usable as on_result)."""
+        self.write("recovery", _recovery_record(result))
+
+    def purge(self, result):
+        """Write a 'purge' record (usable as on_result)."""
+        self.write("purge", result)
+
+    def summary(self, results, ags_host, recovery=None, purge=None):
+        """Write the closing 'summary' record."""
+        report = _report_fields(results, ags_host,
+                                len(results["missing_on_mj"]))
+        if recovery is not None:
+            counts = {}
+            for r in recovery:
+                counts[r["status"]] = counts.get(r["status"], 0) + 1
+            report["recovery"] = counts
+        if purge is not None:
+            report["purge"] = dict(
+                purge, deleted=len(purge["deleted"]),
+                failed=len(purge["failed"]),
+                retained=len(purge["retained"]))
+        self.write("summary", report)
+
+
 def _build_parser():
     """Build argument parser."""
     parser = argparse.ArgumentParser(
@@ -1450,10 +4482,17 @@ def _build_parser():
         "-o", "--output",
         help="Write JSON report to file",
     )
-    parser.add_argument(
+    output_format = parser.add_mutually_exclusive_group()
+    output_format.add_argument(
         "--json", action="store_true",
         help="Write JSON to stdout instead of human report",
     )
+    output_format.add_argument(
+        "--ndjson", action="store_true",
+        help="Stream one JSON record per line to stdout (and -o) as "
+             "missing, recovered and purged triggers are found, ending "
+             "with a summary record",
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true",
         help="Debug logging",
@@ -1479,12 +4518,220 @@ def _build_parser():
         "--purge", action="store_true",
         help="After recovery, delete AGS files fully confirmed on MJ (requires --recover)",
     )
+    parser.add_argument(
+        "--cache-dir", default=DEFAULT_CACHE_DIR,
+        help="Directory for the MJ header cache and AGS entry mirror "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Read every MJ header and re-walk every AGS file from the start",
+    )
+    parser.add_argument(
+        "--metrics-file",
+        help="Write per-phase metrics here in Prometheus textfile format "
+             "(e.g. for node_exporter's textfile collector)",
+    )
+    parser.add_argument(
+        "--digest", action="store_true",
+        help="Compact AGS transport for slow links: the strider sends "
+             "compressed header digests and only missing headers are fetched",
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="Run continuously: watch the DATA drives and reconcile with the "
+             "AGS every --interval seconds",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=DAEMON_INTERVAL,
+        help="Seconds between AGS passes in --daemon mode "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--recover-batch", type=int, default=DAEMON_RECOVER_BATCH,
+        help="Max triggers recovered per --daemon pass (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--recover-priority", choices=RECOVERY_PRIORITIES,
+        default="oldest-file",
+        help="Recovery order: oldest AGS file first (frees files for "
+             "--purge soonest), newest GPS time first, or scan order "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--recover-deadline", type=float, metavar="SECONDS",
+        help="Start no recovery transfer after this many seconds; the rest "
+             "are deferred to the next run",
+    )
+    parser.add_argument(
+        "--recover-rate", metavar="BYTES_PER_SEC",
+        help="Cap recovery bandwidth (e.g. 500K, 2M); with --recover-deadline "
+             "triggers that cannot fit are deferred up front",
+    )
+    parser.add_argument(
+        "--recover-compressed", action="store_true",
+        help="Recover straight to .hmc archives in each drive's "
+             "compressed/<hour>/ tree instead of raw .bin files (for "
+             "drives short of space; needs hamma.compression)",
+    )
+    parser.add_argument(
+        "--compress-method", choices=("quantize", "lossless"),
+        default="quantize",
+        help="hamma.compression method for --recover-compressed "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--compress-step", type=int, default=8,
+        help="Quantization step for --recover-compressed "
+             "(default: %(default)s)",
+    )
+    parser.add_argument(
+        "--io-budget", nargs="?", const="", metavar="PATH",
+        help="Take recovery writes from the shared DATA drive I/O budget "
+             "(io_budget.py), yielding to live writes; PATH overrides the "
+             "bucket file",
+    )
     return parser
 
 
+def _record_scans(metrics, ags, mj):
+    # Scan figures for ScrubMetrics; the MJ scan runs on its own thread
+    metrics.add_phase("ags_scan", ags.get("elapsed", 0.0))
+    metrics.add_phase("mj_scan", mj.get("elapsed", 0.0))
+    metrics.add_bytes("ags_walk", ags.get("bytes_received", 0))
+    metrics.drives = list(mj.get("drives") or [])
+    metrics.add_bytes("mj_scanned", sum(d["bytes"] for d in metrics.drives))
+
+
+def _reconcile(ags, ags_entries, mj, mj_headers, ags_host, ags_path, mj_path,
+               since_cutoff=None, recover=False, dry_run=False, purge=False,
+               recover_limit=None, scheduler=None, reporter=None,
+               compressor=None):
+    # Compare, recover and purge once both scans are in. Shared by run()
+    # and each run_daemon() pass; mj_headers is updated in place with
+    # recovered triggers and scheduler (a RecoveryScheduler) orders and
+    # budgets the transfers; a compressor (CompressedRecovery) sends them
+    # straight to compressed archives. A reporter (NdjsonReporter) gets each
+    # missing, recovery and purge record as it is produced. Returns
+    # (results, recovery_results, purge_results) for the report
+    # formatters.
+    with _metric_phase("compare"):
+        comparison = compare_headers(ags_entries, mj_headers,
+                                     ags_headers=ags.get("headers"))
+    if reporter is not None:
+        reporter.missing(comparison["missing_on_mj"])
+
+    results = {
+        "ags_triggers": len(ags_entries),
+        "ags_files": ags_entries.file_count,
+        "ags_elapsed": ags["elapsed"],
+        "ags_duplicate_count": ags["duplicate_count"],
+        "ags_unique_triggers": len(ags["headers"]),
+        "ags_checkpoint": ags.get("checkpoint"),
+        "ags_skipped_files": [r["filename"]
+                              for r in ags.get("skipped_files") or []],
+        "mj_triggers": len(mj_headers),
+        "mj_files_scanned": mj["file_count"],
+        "mj_duplicate_count": mj["duplicate_count"],
+        "mj_elapsed": mj["elapsed"],
+        "mj_cache": mj.get("cache"),
+        "mj_drives": mj.get("drives"),
+        "matched": comparison["matched"],
+        "missing_on_mj": comparison["missing_on_mj"],
+        "mj_only_count": comparison["mj_only_count"],
+        "warnings": [],
+    }
+
+    # Recovery flow
+    recovery_results = None
+    if recover and len(comparison["missing_on_mj"]):
+        cleanup_orphaned_temps(mj_path)
+        candidates = filter_recovery_candidates(
+            comparison["missing_on_mj"], ags_entries,
+            since_cutoff=since_cutoff,
+        )
+        if recover_limit is not None:
+            # The rest wait for a later pass rather than being reported
+            if scheduler is not None:
+                candidates = candidates[
+                    np.asarray(scheduler.order(candidates), dtype=np.intp)]
+            candidates = candidates.recoverable()[:recover_limit]
+        with _metric_phase("recovery"):
+            recovery_results = recover_triggers(
+                candidates, ags_host, ags_path, mj_path, dry_run=dry_run,
+                batch=True, scheduler=scheduler,
+                on_result=reporter.recovery if reporter else None,
+                compressor=compressor,
+            )
+        recovered_count = len([r for r in recovery_results
+                               if r["status"] == "recovered"])
+        failed_count = len([r for r in recovery_results
+                            if r["status"] == "failed"])
+        if recovered_count:
+            logger.info("Recovery: %d succeeded", recovered_count)
+        if failed_count:
+            logger.warning("Recovery: %d failed", failed_count)
+
+    # Update mj_headers and missing list with recovered triggers
+    if recovery_results:
+        recovered_headers = set()
+        for r in recovery_results:
+            if r["status"] == "recovered":
+                recovered_headers.add(r["header"])
+        if recovered_headers:
+            mj_headers.add(recovered_headers)
+            missing = comparison["missing_on_mj"]
+            comparison["missing_on_mj"] = missing[
+                ~missing.header_mask(recovered_headers)]
+            results["missing_on_mj"] = comparison["missing_on_mj"]
+            results["matched"] += len(recovered_headers)
+
+    # Purge flow
+    purge_results = None
+    if purge:
+        eligibility = identify_purgeable_files(
+            ags_entries, mj_headers, recovery_results,
+        )
+        if eligibility["purgeable"]:
+            with _metric_phase("purge"):
+                purge_deletions = purge_ags_files(
+                    ags_host, ags_path, eligibility["purgeable"],
+                    dry_run=dry_run, batch=True,
+                    on_result=reporter.purge if reporter else None,
+                )
+        else:
+            purge_deletions = []
+
+        deleted_names = [d["filename"] for d in purge_deletions
+                         if d["status"] == "deleted"]
+        failed_purge = [d for d in purge_deletions
+                        if d["status"] == "failed"]
+
+        if deleted_names:
+            logger.info("Purge: deleted %d AGS files", len(deleted_names))
+        if failed_purge:
+            logger.warning("Purge: %d deletions failed", len(failed_purge))
+
+        # Normalize to flat filename lists for reports (matching spec JSON shape)
+        deleted = [d["filename"] for d in purge_deletions
+                   if d["status"] in ("deleted", "dry_run")]
+        purge_results = {
+            "deleted": deleted,
+            "bytes": sum(_as_entry_table(ags_entries).file_bytes(
+                deleted).values()),
+            "failed": [{"filename": d["filename"], "error": d["error"]}
+                       for d in purge_deletions if d["status"] == "failed"],
+            "retained": eligibility["retained"],
+            "dry_run": dry_run,
+        }
+
+    return results, recovery_results, purge_results
+
+
 def run(ags_host, ags_path, mj_path, json_output=False, output_file=None,
         limit=DEFAULT_LIMIT, since=None, recover=False, dry_run=False,
-        purge=False):
+        purge=False, cache_dir=None, metrics_file=None, scheduler=None,
+        digest=False, ndjson_output=False, compressor=None):
     """Run the scrubber and return exit code.
 
     Parameters
@@ -1495,7 +4742,7 @@ def run(ags_host, ags_path, mj_path, json_output=False, output_file=None,
     json_output : bool
         If True, print JSON to stdout.
     output_file : str or None
-        Path to write JSON report.
+        Path to write JSON report (the NDJSON stream with ndjson_output).
     limit : int
         Max missing trigger detail lines in human report (0 = no limit).
     since : str or None
@@ -1506,12 +4753,53 @@ def run(ags_host, ags_path, mj_path, json_output=False, output_file=None,
         If True, show what would be recovered without transferring.
     purge : bool
         If True, delete AGS files fully confirmed on MJ after recovery.
+    cache_dir : str or None
+        Directory for the per-drive MJ header cache and the AGS entry
+        mirror used by the checkpointed strider. None disables both.
+    metrics_file : str or None
+        Path to rewrite with per-phase metrics in Prometheus textfile
+        format (the same figures are always in the JSON report).
+    scheduler : RecoveryScheduler or None
+        Priority, deadline and rate cap for recovery (None = fetch every
+        missing trigger, oldest AGS file first, without limits).
+    digest : bool
+        If True, walk the AGS with the compact --digest transport, which
+        sends header digests and fetches only the missing headers.
+    ndjson_output : bool
+        If True, stream the report to stdout as NDJSON records while the
+        scrub runs, ending with a summary record (see NdjsonReporter).
+    compressor : CompressedRecovery or None
+        Recover straight to compressed .hmc archives instead of .bin
+        files (for drives short of space).
 
     Returns
     -------
     int
         Exit code.
     """
+    metrics = ScrubMetrics()
+    with metrics.activate():
+        rc = _run_once(ags_host, ags_path, mj_path, metrics,
+                       json_output=json_output, output_file=output_file,
+                       limit=limit, since=since, recover=recover,
+                       dry_run=dry_run, purge=purge, cache_dir=cache_dir,
+                       scheduler=scheduler, digest=digest,
+                       ndjson_output=ndjson_output, compressor=compressor)
+    if "total" not in metrics.phases:
+        metrics.add_phase("total", time.time() - metrics.started)
+    if metrics_file:
+        try:
+            metrics.write_prometheus(metrics_file)
+        except OSError as e:
+            logger.warning("Cannot write metrics file %s: %s", metrics_file, e)
+    return rc
+
+
+def _run_once(ags_host, ags_path, mj_path, metrics, json_output=False,
+              output_file=None, limit=DEFAULT_LIMIT, since=None, recover=False,
+              dry_run=False, purge=False, cache_dir=None, scheduler=None,
+              digest=False, ndjson_output=False, compressor=None):
+    # Body of run(), reporting into metrics
     if dry_run and not recover:
         logger.warning("--dry-run has no effect without --recover")
 
@@ -1535,25 +4823,72 @@ def run(ags_host, ags_path, mj_path, json_output=False, output_file=None,
             since_cutoff = parsed
             logger.info("Filtering MJ directories to >= %s", since_cutoff)
 
-    # AGS scan runs first (needed for auto-detect and comparison)
+    # The MJ scan runs in the background while the AGS walk streams in.
+    # With --since auto it starts as soon as the strider's probe prelude
+    # gives the cutoff, which is rechecked against the full walk below.
+    mj_kwargs = {}
+    if cache_dir:
+        mj_kwargs["cache_dir"] = cache_dir
+    mj_scans = []
+    mj_pool = concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="mj-scan")
+
+    def start_mj_scan(cutoff):
+        mj_scans.append((cutoff, mj_pool.submit(
+            scan_mj_files, mj_path, since=cutoff, **mj_kwargs)))
+
+    def on_probe(probes):
+        cutoff = earliest_ags_timestamp(probes)
+        logger.info("AGS probe: starting MJ scan at cutoff %s", cutoff)
+        start_mj_scan(cutoff)
+
+    ags_kwargs = {}
+    if cache_dir:
+        ags_kwargs["cache_dir"] = cache_dir
+    if since_cutoff:
+        ags_kwargs["since_epoch"] = _since_epoch(since_cutoff)
+    if digest:
+        # Digests resolve against whichever MJ scan is latest by then
+        ags_kwargs["digest_headers"] = lambda: (
+            mj_scans[-1][1].result()["headers"] if mj_scans else ())
+    if auto_detect:
+        ags_kwargs["on_probe"] = on_probe
+    else:
+        start_mj_scan(since_cutoff)
     try:
-        ags = scan_ags_files(ags_host, ags_path)
+        ags = scan_ags_files(ags_host, ags_path, stream=True, as_table=True,
+                             **ags_kwargs)
     except RuntimeError as e:
         logger.error("AGS scan failed: %s", e)
+        mj_pool.shutdown(wait=False)
         return EXIT_SSH_ERROR
+    ags_entries = _as_entry_table(ags["entries"])
 
     # Auto-detect: derive cutoff from the scanned AGS entries
     if auto_detect:
-        since_cutoff = earliest_ags_timestamp(ags["entries"])
+        since_cutoff = earliest_ags_timestamp(ags_entries)
         if since_cutoff:
             logger.info("Auto-detected --since cutoff: %s", since_cutoff)
         else:
             logger.info(
                 "Auto-detect found no valid GPS data; scanning all MJ dirs")
+        # An early scan from a later cutoff would miss MJ directories
+        if mj_scans:
+            probe_cutoff = mj_scans[-1][0]
+            if probe_cutoff is not None and (since_cutoff is None
+                                             or since_cutoff < probe_cutoff):
+                logger.warning("AGS probe cutoff %s is later than %s; "
+                               "rescanning MJ", probe_cutoff, since_cutoff)
+                start_mj_scan(since_cutoff)
+        else:
+            start_mj_scan(since_cutoff)
+    try:
+        mj = mj_scans[-1][1].result()
+    finally:
+        mj_pool.shutdown(wait=True)
+    _record_scans(metrics, ags, mj)
 
-    mj = scan_mj_files(mj_path, since=since_cutoff)
-
-    if not ags["entries"]:
+    if not len(ags_entries):
         logger.info("No AGS data found — nothing to compare")
         return EXIT_OK
 
@@ -1561,92 +4896,40 @@ def run(ags_host, ags_path, mj_path, json_output=False, output_file=None,
         logger.error("No DATA drives or .bin files found at %s", mj_path)
         return EXIT_NO_DATA
 
-    comparison = compare_headers(ags["entries"], mj["headers"])
-
-    ags_file_count = len(set(e["filename"] for e in ags["entries"]))
-    results = {
-        "ags_triggers": len(ags["entries"]),
-        "ags_files": ags_file_count,
-        "ags_elapsed": ags["elapsed"],
-        "ags_duplicate_count": ags["duplicate_count"],
-        "mj_triggers": len(mj["headers"]),
-        "mj_files_scanned": mj["file_count"],
-        "mj_duplicate_count": mj["duplicate_count"],
-        "mj_elapsed": mj["elapsed"],
-        "matched": comparison["matched"],
-        "missing_on_mj": comparison["missing_on_mj"],
-        "mj_only_count": comparison["mj_only_count"],
-        "warnings": [],
-    }
-
-    # Recovery flow
-    recovery_results = None
-    if recover and comparison["missing_on_mj"]:
-        cleanup_orphaned_temps(mj_path)
-        candidates = filter_recovery_candidates(
-            comparison["missing_on_mj"], ags["entries"],
-            since_cutoff=since_cutoff,
-        )
-        recovery_results = recover_triggers(
-            candidates, ags_host, ags_path, mj_path, dry_run=dry_run,
-        )
-        recovered_count = len([r for r in recovery_results
-                               if r["status"] == "recovered"])
-        failed_count = len([r for r in recovery_results
-                            if r["status"] == "failed"])
-        if recovered_count:
-            logger.info("Recovery: %d succeeded", recovered_count)
-        if failed_count:
-            logger.warning("Recovery: %d failed", failed_count)
-
-    # Update mj_headers and missing list with recovered triggers
-    if recovery_results:
-        recovered_headers = set()
-        for r in recovery_results:
-            if r["status"] == "recovered":
-                mj["headers"].add(r["header"])
-                recovered_headers.add(r["header"])
-        if recovered_headers:
-            comparison["missing_on_mj"] = [
-                e for e in comparison["missing_on_mj"]
-                if e["header"] not in recovered_headers
-            ]
-            results["missing_on_mj"] = comparison["missing_on_mj"]
-            results["matched"] += len(recovered_headers)
-
-    # Purge flow
-    purge_results = None
-    if purge:
-        eligibility = identify_purgeable_files(
-            ags["entries"], mj["headers"], recovery_results,
-        )
-        if eligibility["purgeable"]:
-            purge_deletions = purge_ags_files(
-                ags_host, ags_path, eligibility["purgeable"],
-                dry_run=dry_run,
+    # Swap the header set for the compact index before the later phases
+    mj["headers"] = mj_headers = HeaderIndex(mj["headers"])
+    if ndjson_output:
+        with contextlib.ExitStack() as stack:
+            streams = [sys.stdout]
+            if output_file:
+                streams.append(stack.enter_context(open(output_file, 'w')))
+            reporter = NdjsonReporter(streams)
+            results, recovery_results, purge_results = _reconcile(
+                ags, ags_entries, mj, mj_headers, ags_host, ags_path,
+                mj_path, since_cutoff=since_cutoff, recover=recover,
+                dry_run=dry_run, purge=purge, scheduler=scheduler,
+                reporter=reporter, compressor=compressor,
             )
-        else:
-            purge_deletions = []
-
-        deleted_names = [d["filename"] for d in purge_deletions
-                         if d["status"] == "deleted"]
-        failed_purge = [d for d in purge_deletions
-                        if d["status"] == "failed"]
-
-        if deleted_names:
-            logger.info("Purge: deleted %d AGS files", len(deleted_names))
-        if failed_purge:
-            logger.warning("Purge: %d deletions failed", len(failed_purge))
-
-        # Normalize to flat filename lists for reports (matching spec JSON shape)
-        purge_results = {
-            "deleted": [d["filename"] for d in purge_deletions
-                        if d["status"] in ("deleted", "dry_run")],
-            "failed": [{"filename": d["filename"], "error": d["error"]}
-                       for d in purge_deletions if d["status"] == "failed"],
-            "retained": eligibility["retained"],
-            "dry_run": dry_run,
-        }
+            metrics.add_phase("total", time.time() - metrics.started)
+            results["metrics"] = metrics.as_dict()
+            reporter.summary(results, ags_host, recovery=recovery_results,
+                             purge=purge_results)
+        logger.info("Phases: %s", ", ".join(
+            "{} {:.1f}s".format(k, v)
+            for k, v in sorted(metrics.phases.items())))
+        if output_file:
+            logger.info("NDJSON report written to %s", output_file)
+        return EXIT_MISSING if len(results["missing_on_mj"]) else EXIT_OK
+
+    results, recovery_results, purge_results = _reconcile(
+        ags, ags_entries, mj, mj_headers, ags_host, ags_path, mj_path,
+        since_cutoff=since_cutoff, recover=recover, dry_run=dry_run,
+        purge=purge, scheduler=scheduler, compressor=compressor,
+    )
+    metrics.add_phase("total", time.time() - metrics.started)
+    results["metrics"] = metrics.as_dict()
+    logger.info("Phases: %s", ", ".join(
+        "{} {:.1f}s".format(k, v) for k, v in sorted(metrics.phases.items())))
 
     if json_output:
         print(format_json_report(results, ags_host,
@@ -1664,11 +4947,499 @@ def run(ags_host, ags_path, mj_path, json_output=False, output_file=None,
                                        purge=purge_results))
         logger.info("JSON report written to %s", output_file)
 
-    if comparison["missing_on_mj"]:
+    if len(results["missing_on_mj"]):
         return EXIT_MISSING
     return EXIT_OK
 
 
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API.
+
+    Raises OSError on construction if inotify is not available.
+    """
+
+    _EVENT = struct.Struct('iIII')  # wd, mask, cookie, name length
+
+    def __init__(self):
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6",
+                               use_errno=True)
+            init1 = libc.inotify_init1
+        except (OSError, AttributeError) as e:
+            raise OSError("inotify not available: {}".format(e))
+        fd = init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, "inotify_init1: " + os.strerror(err))
+        self._libc = libc
+        self.fd = fd
+
+    def add_watch(self, path, mask):
+        """Watch path for mask events; returns the watch descriptor."""
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path),
+                                          ctypes.c_uint32(mask))
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), path)
+        return wd
+
+    def rm_watch(self, wd):
+        """Stop watching wd (errors ignored; the kernel may have dropped it)."""
+        self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read(self, timeout):
+        """Return queued (wd, mask, name) events, waiting up to timeout."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        events = []
+        while ready:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            pos = 0
+            while pos + self._EVENT.size <= len(data):
+                wd, mask, _, length = self._EVENT.unpack_from(data, pos)
+                pos += self._EVENT.size
+                name = data[pos:pos + length].rstrip(b'\x00')
+                pos += length
+                events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        """Close the inotify descriptor and all its watches."""
+        os.close(self.fd)
+
+
+class MjWatcher:
+    """Keep an MJ HeaderIndex current as mjolnir writes new .bin files.
+
+    Watches each DATA drive for new hour directories and the newest
+    WATCHED_HOUR_DIRS hour directories for finished .bin files, through
+    inotify where available and by relisting them otherwise. Older hour
+    directories only change through recovery, whose headers the caller
+    adds to the index itself. Drives mounted later are scanned in full;
+    when a drive goes away the index is rebuilt from the drives left, so
+    its triggers no longer count as on MJ.
+
+    Parameters
+    ----------
+    mj_path : str
+        Base path containing DATA?? drives.
+    headers : HeaderIndex or set of bytes
+        Headers already on MJ, e.g. from scan_mj_files().
+    since : str or None
+        Directory cutoff for drives mounted later, as in scan_mj_files().
+    use_inotify : bool
+        If False, always poll.
+    cache_dir : str or None
+        Header cache used when rescanning drives, as in scan_mj_files().
+    """
+
+    _DRIVE_MASK = IN_CREATE | IN_MOVED_TO
+    _DIR_MASK = IN_CLOSE_WRITE | IN_MOVED_TO
+
+    def __init__(self, mj_path, headers, since=None, use_inotify=True,
+                 cache_dir=None):
+        self.mj_path = mj_path
+        self.headers = _as_header_index(headers)
+        self.since = since
+        self.cache_dir = cache_dir
+        self.headers_added = 0
+        self._inotify = None
+        if use_inotify:
+            try:
+                self._inotify = _Inotify()
+            except OSError as e:
+                logger.warning("inotify unavailable (%s), polling MJ drives", e)
+        self._dirs = {}  # drive -> watched hour dirs, oldest first
+        self._wds = {}  # watch descriptor -> (drive, hour dir or None)
+        self._seen = set()  # .bin paths in watched dirs already read
+        self._pending = []
+        self._sync_drives(initial=True)
+        self._flush()
+
+    @property
+    def inotify(self):
+        """True if changes arrive through inotify rather than polling."""
+        return self._inotify is not None
+
+    def close(self):
+        """Release the inotify descriptor."""
+        if self._inotify is not None:
+            self._inotify.close()
+            self._inotify = None
+            self._wds.clear()
+
+    def refresh(self, timeout=0.0):
+        """Index .bin files finished since the last call.
+
+        Parameters
+        ----------
+        timeout : float
+            Seconds to wait for inotify events (or to sleep before
+            relisting, when polling).
+
+        Returns
+        -------
+        int
+            Headers added to self.headers (in a single rebuild).
+        """
+        if self._inotify is not None:
+            for wd, mask, name in self._inotify.read(timeout):
+                self._handle(wd, mask, name)
+        else:
+            if timeout > 0:
+                time.sleep(timeout)
+            self._relist()
+        self._sync_drives()
+        return self._flush()
+
+    def _handle(self, wd, mask, name):
+        # Apply one inotify event
+        if mask & IN_Q_OVERFLOW:
+            logger.warning("inotify queue overflowed, relisting MJ dirs")
+            self._relist()
+            return
+        target = self._wds.get(wd)
+        if target is None:
+            return
+        if mask & IN_IGNORED:
+            del self._wds[wd]
+            return
+        drive, hour_dir = target
+        if name.startswith('.'):
+            return
+        if hour_dir is None:
+            if mask & IN_ISDIR:
+                self._update_dirs(drive)
+        elif name.endswith(".bin"):
+            self._read(os.path.join(hour_dir, name))
+
+    def _relist(self):
+        # Catch up by listing every watched directory
+        for drive in list(self._dirs):
+            self._update_dirs(drive)
+            for hour_dir in self._dirs.get(drive, []):
+                self._rescan(hour_dir)
+
+    def _watch(self, path, mask, drive, hour_dir):
+        if self._inotify is None:
+            return
+        try:
+            wd = self._inotify.add_watch(path, mask)
+        except OSError as e:
+            logger.warning("Cannot watch %s: %s", path, e)
+            return
+        self._wds[wd] = (drive, hour_dir)
+
+    def _unwatch(self, drive, hour_dir):
+        for wd, target in list(self._wds.items()):
+            if target == (drive, hour_dir):
+                del self._wds[wd]
+                self._inotify.rm_watch(wd)
+
+    def _sync_drives(self, initial=False):
+        # Follow DATA drives being mounted and unmounted
+        found = set(glob.glob(os.path.join(self.mj_path, DRIVE_PATTERN)))
+        gone = sorted(set(self._dirs) - found)
+        for drive in gone:
+            logger.warning("MJ drive %s went away", drive)
+            for hour_dir in self._dirs.pop(drive):
+                self._drop_dir(hour_dir)
+            if self._inotify is not None:
+                self._unwatch(drive, None)
+        if gone:
+            self._rebuild()
+        for drive in sorted(found - set(self._dirs)):
+            self._dirs[drive] = []
+            self._watch(drive, self._DRIVE_MASK, drive, None)
+            if not initial:
+                logger.info("MJ drive %s appeared, scanning it", drive)
+                self._pending.extend(_scan_mj_drive(
+                    drive, self.since, self.cache_dir)["headers"])
+            self._update_dirs(drive)
+
+    def _rebuild(self):
+        # Re-index the drives still mounted. The index holds no record of
+        # which drive a header came from, and one left behind by an
+        # unmounted drive would let --purge delete the only other copy.
+        headers = set()
+        for drive in sorted(self._dirs):
+            headers.update(_scan_mj_drive(drive, self.since,
+                                          self.cache_dir)["headers"])
+        # Pending headers came from files on the drives just rescanned
+        self._pending = []
+        dropped = len(self.headers) - len(headers)
+        self.headers = HeaderIndex(headers)
+        logger.warning("MJ index rebuilt from %d drives: %d headers dropped",
+                       len(self._dirs), max(dropped, 0))
+
+    def _update_dirs(self, drive):
+        # Watch the newest hour dirs on a drive and let older ones go
+        try:
+            with os.scandir(drive) as it:
+                names = sorted(e.name for e in it
+                               if HOUR_DIR_RE.match(e.name) and e.is_dir())
+        except OSError as e:
+            logger.warning("Cannot list %s: %s", drive, e)
+            return
+        newest = [os.path.join(drive, n) for n in names[-WATCHED_HOUR_DIRS:]]
+        watched = self._dirs.get(drive, [])
+        for hour_dir in watched:
+            if hour_dir not in newest:
+                self._drop_dir(hour_dir)
+        for hour_dir in newest:
+            if hour_dir not in watched:
+                # Watch before listing so no file slips between the two
+                self._watch(hour_dir, self._DIR_MASK, drive, hour_dir)
+                self._rescan(hour_dir)
+        self._dirs[drive] = newest
+
+    def _drop_dir(self, hour_dir):
+        if self._inotify is not None:
+            self._unwatch(os.path.dirname(hour_dir), hour_dir)
+        prefix = hour_dir + os.sep
+        self._seen = set(p for p in self._seen if not p.startswith(prefix))
+
+    def _rescan(self, hour_dir):
+        try:
+            with os.scandir(hour_dir) as it:
+                paths = sorted(e.path for e in it
+                               if e.name.endswith(".bin")
+                               and not e.name.startswith('.'))
+        except OSError as e:
+            logger.warning("Cannot list %s: %s", hour_dir, e)
+            return
+        for path in paths:
+            self._read(path)
+
+    def _read(self, path):
+        if path in self._seen:
+            return
+        try:
+            with open(path, 'rb') as f:
+                header = f.read(HEADER_SIZE)
+        except OSError as e:
+            logger.warning("Error reading %s: %s", path, e)
+            return
+        if len(header) < HEADER_SIZE:
+            return  # still being written; picked up again later
+        self._seen.add(path)
+        self._pending.append(header)
+
+    def _flush(self):
+        if not self._pending:
+            return 0
+        before = len(self.headers)
+        self.headers.add(self._pending)
+        self._pending = []
+        added = len(self.headers) - before
+        self.headers_added += added
+        return added
+
+
+@contextlib.contextmanager
+def _scrub_lock():
+    # Hold the lock StateMonitor._spawn_scrub takes with `flock -n`, so no
+    # one-shot scrub is spawned while the daemon runs
+    with open(SCRUB_LOCK_PATH, 'a') as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.info("Waiting for the running scrub to release %s",
+                        SCRUB_LOCK_PATH)
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _daemon_pass(number, metrics, ags, ags_entries, mj, mj_headers,
+                 ags_host, ags_path, mj_path, since_cutoff, recover, dry_run,
+                 purge, recover_batch, output_file, scheduler=None,
+                 compressor=None):
+    # Reconcile one run_daemon() pass and log/write its report
+    results, recovery, purge_results = _reconcile(
+        ags, ags_entries, mj, mj_headers, ags_host, ags_path, mj_path,
+        since_cutoff=since_cutoff, recover=recover, dry_run=dry_run,
+        purge=purge, recover_limit=recover_batch, scheduler=scheduler,
+        compressor=compressor,
+    )
+    metrics.add_phase("total", time.time() - metrics.started)
+    results["metrics"] = metrics.as_dict()
+    logger.info(
+        "Daemon pass %d: %d AGS triggers, %d missing on MJ, %d recovered, "
+        "%d AGS files purged (%.1fs)", number, len(ags_entries),
+        len(results["missing_on_mj"]),
+        len([r for r in recovery or [] if r["status"] == "recovered"]),
+        len(purge_results["deleted"]) if purge_results else 0,
+        metrics.phases["total"],
+    )
+    if output_file:
+        tmp = output_file + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(format_json_report(results, ags_host, recovery=recovery,
+                                       purge=purge_results))
+        os.replace(tmp, output_file)
+
+
+def run_daemon(ags_host, ags_path, mj_path, output_file=None, since=None,
+               recover=False, dry_run=False, purge=False, cache_dir=None,
+               interval=DAEMON_INTERVAL, recover_batch=DAEMON_RECOVER_BATCH,
+               max_passes=None, stop=None, metrics_file=None,
+               scheduler=None, digest=False, compressor=None):
+    """Reconcile AGS against MJ continuously and return exit code.
+
+    Keeps the MJ header index live with an MjWatcher and, every interval
+    seconds, walks the AGS incrementally (with cache_dir), recovers up to
+    recover_batch missing triggers and purges AGS files that are fully
+    confirmed. Runs until SIGTERM/SIGINT, stop is set or max_passes
+    passes are done, holding SCRUB_LOCK_PATH throughout.
+
+    Parameters
+    ----------
+    ags_host, ags_path, mj_path, since, recover, dry_run, purge, cache_dir
+    scheduler, digest, compressor
+        As for run(); the scheduler's deadline applies to each pass.
+    output_file : str or None
+        Path to rewrite with the JSON report of every pass.
+    interval : float
+        Seconds between AGS passes.
+    recover_batch : int
+        Max triggers recovered per pass; the rest wait for later passes.
+    max_passes : int or None
+        Stop after this many AGS passes (None = run until stopped).
+    stop : threading.Event or None
+        Set to stop the daemon after the current step.
+    metrics_file : str or None
+        Path to rewrite with each pass's ScrubMetrics in Prometheus
+        textfile format.
+
+    Returns
+    -------
+    int
+        Exit code.
+    """
+    if dry_run and not recover:
+        logger.warning("--dry-run has no effect without --recover")
+
+    if purge and not recover:
+        logger.error("--purge requires --recover")
+        return EXIT_NO_DATA
+
+    since_cutoff = None
+    auto_detect = False
+    if since:
+        try:
+            parsed = _parse_since(since)
+        except ValueError as e:
+            logger.error("%s", e)
+            return EXIT_NO_DATA
+        if parsed == 'auto':
+            auto_detect = True
+        else:
+            since_cutoff = parsed
+
+    if not cache_dir:
+        logger.warning("Daemon without a cache dir re-walks every AGS file "
+                       "on every pass")
+    mj_kwargs = {}
+    ags_kwargs = {}
+    if cache_dir:
+        mj_kwargs["cache_dir"] = cache_dir
+        ags_kwargs["cache_dir"] = cache_dir
+    if since_cutoff:
+        ags_kwargs["since_epoch"] = _since_epoch(since_cutoff)
+    if digest:
+        ags_kwargs["digest_headers"] = lambda: (
+            watcher.headers if watcher is not None else ())
+
+    if stop is None:
+        stop = threading.Event()
+    handlers = {}
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            handlers[signum] = signal.signal(signum, lambda *_: stop.set())
+
+    with _scrub_lock():
+        mj = None
+        watcher = None
+        passes = 0
+        next_pass = time.monotonic()
+        try:
+            while not stop.is_set():
+                # With --since auto the MJ side waits for the first AGS pass
+                if watcher is None and not auto_detect:
+                    mj = scan_mj_files(mj_path, since=since_cutoff, **mj_kwargs)
+                    watcher = MjWatcher(mj_path, mj["headers"],
+                                        since=since_cutoff,
+                                        cache_dir=cache_dir)
+                wait = next_pass - time.monotonic()
+                if wait > 0:
+                    if watcher is not None:
+                        watcher.refresh(min(wait, DAEMON_TICK))
+                    else:
+                        stop.wait(min(wait, DAEMON_TICK))
+                    continue
+                next_pass = time.monotonic() + interval
+
+                metrics = ScrubMetrics()
+                with metrics.activate():
+                    try:
+                        ags = scan_ags_files(ags_host, ags_path, stream=True,
+                                             as_table=True, **ags_kwargs)
+                    except RuntimeError as e:
+                        logger.warning("AGS scan failed: %s (retry in %ds)",
+                                       e, interval)
+                        continue
+                    ags_entries = _as_entry_table(ags["entries"])
+
+                    # The MJ side is only scanned in full once
+                    mj_pass = {}
+                    if watcher is None:
+                        since_cutoff = earliest_ags_timestamp(ags_entries)
+                        mj = scan_mj_files(mj_path, since=since_cutoff,
+                                           **mj_kwargs)
+                        watcher = MjWatcher(mj_path, mj["headers"],
+                                            since=since_cutoff,
+                                            cache_dir=cache_dir)
+                    if passes == 0:
+                        mj_pass = mj
+                    watcher.refresh()
+                    mj["headers"] = watcher.headers
+                    _record_scans(metrics, ags, mj_pass)
+
+                    if len(ags_entries):
+                        _daemon_pass(
+                            passes + 1, metrics, ags, ags_entries,
+                            dict(mj, file_count=(mj["file_count"]
+                                                 + watcher.headers_added)),
+                            watcher.headers, ags_host, ags_path, mj_path,
+                            since_cutoff, recover, dry_run, purge,
+                            recover_batch, output_file, scheduler,
+                            compressor,
+                        )
+                    else:
+                        logger.info("Daemon pass %d: no AGS data", passes + 1)
+                if metrics_file:
+                    if "total" not in metrics.phases:
+                        metrics.add_phase("total",
+                                          time.time() - metrics.started)
+                    try:
+                        metrics.write_prometheus(metrics_file)
+                    except OSError as e:
+                        logger.warning("Cannot write metrics file %s: %s",
+                                       metrics_file, e)
+
+                passes += 1
+                if max_passes is not None and passes >= max_passes:
+                    break
+        finally:
+            if watcher is not None:
+                watcher.close()
+            for signum, handler in handlers.items():
+                signal.signal(signum, handler)
+    return EXIT_OK
+
+
 def main():
     """CLI entry point."""
     parser = _build_parser()
@@ -1681,6 +5452,58 @@ def main():
         stream=sys.stderr,
     )
 
+    cache_dir = None if args.no_cache else os.path.expanduser(args.cache_dir)
+    scheduler = None
+    if args.recover:
+        try:
+            rate = (_parse_rate(args.recover_rate)
+                    if args.recover_rate else None)
+        except ValueError as e:
+            parser.error(str(e))
+        checkpoint = None
+        if cache_dir:
+            checkpoint = os.path.join(cache_dir, RECOVERY_CHECKPOINT.format(
+                host=args.ags_host))
+        budget = None
+        if args.io_budget is not None:
+            if io_budget is None:
+                parser.error("--io-budget needs io_budget.py beside "
+                             "hamma_scrub.py")
+            budget = io_budget.IOBudget(args.io_budget
+                                        or io_budget.BUDGET_PATH)
+        scheduler = RecoveryScheduler(
+            args.recover_priority, deadline=args.recover_deadline,
+            rate=rate, checkpoint_path=checkpoint, budget=budget,
+        )
+    compressor = None
+    if args.recover_compressed:
+        try:
+            compressor = CompressedRecovery(args.compress_method,
+                                            args.compress_step)
+        except ImportError as e:
+            parser.error("--recover-compressed needs hamma.compression "
+                         "({})".format(e))
+    if args.daemon:
+        if args.ndjson:
+            parser.error("--ndjson reports a single run, not --daemon")
+        sys.exit(run_daemon(
+            ags_host=args.ags_host,
+            ags_path=args.ags_path,
+            mj_path=args.mj_path,
+            output_file=args.output,
+            since=args.since,
+            recover=args.recover,
+            dry_run=args.dry_run,
+            purge=args.purge,
+            cache_dir=cache_dir,
+            interval=args.interval,
+            recover_batch=args.recover_batch,
+            metrics_file=args.metrics_file,
+            scheduler=scheduler,
+            digest=args.digest,
+            compressor=compressor,
+        ))
+
     rc = run(
         ags_host=args.ags_host,
         ags_path=args.ags_path,
@@ -1692,6 +5515,12 @@ def main():
         recover=args.recover,
         dry_run=args.dry_run,
         purge=args.purge,
+        cache_dir=cache_dir,
+        metrics_file=args.metrics_file,
+        scheduler=scheduler,
+        digest=args.digest,
+        ndjson_output=args.ndjson,
+        compressor=compressor,
     )
     sys.exit(rc)
 
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""Shared I/O budget for background work on the MJ DATA drives.
+
+Recovery writes (hamma_scrub.py --recover), compression
+(plugins/compress_data.py) and the live trigger writer all land on the
+same USB drives. Background work takes tokens from one token bucket
+shared by every process on the unit, so together it stays under one
+rate however many jobs run. Live ingest never waits: each live write is
+noted with note_live(), which pauses the bucket for LIVE_HOLD seconds
+so background work backs off for as long as a storm is being recorded.
+
+The bucket is a small JSON file in shared memory (/dev/shm), updated
+under an exclusive flock, so no daemon is needed. It also keeps the
+bytes taken and time spent waiting per consumer; --status prints them
+and --metrics-file exports them for the node_exporter textfile
+collector.
+
+Usage:
+    python3 io_budget.py --status
+    python3 io_budget.py --metrics-file /var/lib/node_exporter/io.prom
+    python3 io_budget.py --rate 4M --burst 16M
+"""
+
+# Standard library imports
+import argparse
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+BUDGET_PATH = os.path.join(
+    "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(),
+    "hamma_io_budget.json")
+DEFAULT_RATE = 8e6  # bytes/s shared by all background work
+DEFAULT_BURST = 16e6  # bytes that may be taken at once after idling
+LIVE_HOLD = 5.0  # seconds background work pauses after a live write
+MAX_SLEEP = 1.0  # waiters re-check at least this often
+METRICS_PREFIX = "hamma_io_budget"
+
+
+def parse_size(value):
+    """Parse a byte figure with optional K/M/G suffix (e.g. '500K').
+
+    Raises
+    ------
+    ValueError
+        If value is not a non-negative number with an optional suffix.
+    """
+    match = re.match(r'^\s*([0-9]*\.?[0-9]+)\s*([KMG]?)B?\s*$',
+                     str(value), re.IGNORECASE)
+    if not match:
+        raise ValueError("Invalid size '{}' (expected e.g. 250000, 500K "
+                         "or 2M)".format(value))
+    scale = {"": 1, "K": 1e3, "M": 1e6, "G": 1e9}[match.group(2).upper()]
+    return float(match.group(1)) * scale
+
+
+class IOBudget:
+    """Token bucket shared through a flock-guarded file.
+
+    Parameters
+    ----------
+    path : str
+        Bucket state file; every process using the same path shares
+        one budget.
+    rate : float or None
+        Bytes per second available to background work; 0 disables
+        throttling (live holds still apply). None keeps the rate
+        already stored in the bucket, or DEFAULT_RATE for a new one.
+    burst : float or None
+        Largest number of tokens the bucket holds. None keeps the stored
+        value, or DEFAULT_BURST.
+    live_hold : float
+        Seconds background work pauses after each live write.
+
+    Notes
+    -----
+    Times are CLOCK_MONOTONIC, which is shared by all processes and does
+    not jump when the clock is stepped by GPS/NTP after boot. The file
+    is in tmpfs, so a reboot starts a fresh bucket.
+    """
+
+    def __init__(self, path=BUDGET_PATH, rate=None, burst=None,
+                 live_hold=LIVE_HOLD):
+        self.path = path
+        self.rate = rate
+        self.burst = burst
+        self.live_hold = live_hold
+        self._broken = False
+
+    @contextlib.contextmanager
+    def _locked(self):
+        # Yield the bucket state under an exclusive lock, then save it
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        with os.fdopen(fd, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                try:
+                    state = json.loads(f.read() or "{}")
+                except ValueError:
+                    state = {}
+                now = time.monotonic()
+                self._refill(state, now)
+                yield state, now
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        # Fill in defaults and add the tokens earned since the last update
+        if self.rate is not None:
+            state["rate"] = float(self.rate)
+        if self.burst is not None:
+            state["burst"] = float(self.burst)
+        state.setdefault("rate", DEFAULT_RATE)
+        state.setdefault("burst", DEFAULT_BURST)
+        state.setdefault("tokens", state["burst"])
+        state.setdefault("live_until", 0.0)
+        state.setdefault("live", {"bytes": 0, "writes": 0})
+        state.setdefault("consumers", {})
+        updated = min(state.get("updated", now), now)
+        # Nothing accumulates while live writes hold the drives
+        earned_from = max(updated, min(state["live_until"], now))
+        if state["rate"] > 0:
+            state["tokens"] = min(state["burst"], state["tokens"]
+                                  + (now - earned_from) * state["rate"])
+        else:
+            state["tokens"] = state["burst"]
+        state["updated"] = now
+
+    def _disable(self, error):
+        # Budget trouble must never stop the work it paces
+        if not self._broken:
+            logger.warning("I/O budget %s unavailable, not throttling: %s",
+                           self.path, error)
+        self._broken = True
+
+    def take(self, nbytes, consumer="background", timeout=None):
+        """Wait until nbytes of background I/O may proceed, then take them.
+
+        A request larger than the burst waits for a full bucket and then
+        leaves it in debt, so the next taker waits for the difference.
+
+        Parameters
+        ----------
+        nbytes : int
+            Bytes about to be read or written.
+        consumer : str
+            Name the bytes and waits are accounted under (e.g. 'scrub').
+        timeout : float or None
+            Give up after this many seconds without taking anything.
+
+        Returns
+        -------
+        float or None
+            Seconds spent waiting (0.0 if the bytes were taken without
+            sleeping), or None if timeout passed first and nothing was
+            taken: the caller must then not do the I/O.
+        """
+        if self._broken:
+            return 0.0
+        t0 = time.monotonic()
+        slept = False
+        while True:
+            try:
+                with self._locked() as (state, now):
+                    if now < state["live_until"]:
+                        delay = state["live_until"] - now
+                    else:
+                        need = min(nbytes, state["burst"])
+                        delay = 0.0
+                        if state["rate"] > 0 and state["tokens"] < need:
+                            delay = (need - state["tokens"]) / state["rate"]
+                    if delay <= 0:
+                        state["tokens"] -= nbytes
+                        # Time spent on the lock alone is not a wait
+                        self._account(state, consumer, nbytes,
+                                      now - t0 if slept else 0.0)
+            except OSError as e:
+                self._disable(e)
+                return time.monotonic() - t0 if slept else 0.0
+            if delay <= 0:
+                return now - t0 if slept else 0.0
+            if timeout is not None:
+                left = t0 + timeout - time.monotonic()
+                if left <= 0:
+                    return None
+                delay = min(delay, left)
+            time.sleep(min(delay, MAX_SLEEP))
+            slept = True
+
+    @staticmethod
+    def _account(state, consumer, nbytes, waited):
+        # Per-consumer telemetry kept in the bucket itself
+        stats = state["consumers"].setdefault(
+            consumer, {"bytes": 0, "takes": 0, "waits": 0,
+                       "wait_seconds": 0.0})
+        stats["bytes"] += nbytes
+        stats["takes"] += 1
+        if waited > 0.001:
+            stats["waits"] += 1
+            stats["wait_seconds"] += waited
+
+    def note_live(self, nbytes):
+        """Record a live write; background work pauses for live_hold.
+
+        Never waits for tokens. Live bytes are not charged to the bucket,
+        which stays paused instead.
+        """
+        if self._broken:
+            return
+        try:
+            with self._locked() as (state, now):
+                state["live_until"] = max(state["live_until"],
+                                          now + self.live_hold)
+                state["live"]["bytes"] += nbytes
+                state["live"]["writes"] += 1
+        except OSError as e:
+            self._disable(e)
+
+    def status(self):
+        """Return the current bucket state (refilled to now) as a dict."""
+        with self._locked() as (state, now):
+            snapshot = json.loads(json.dumps(state))
+        snapshot["live_active"] = now < snapshot["live_until"]
+        return snapshot
+
+
+def to_prometheus(status):
+    """Format IOBudget.status() for the node_exporter textfile collector."""
+    p = METRICS_PREFIX
+    lines = []
+
+    def metric(name, kind, helptext, samples):
+        lines.append("# HELP {}_{} {}".format(p, name, helptext))
+        lines.append("# TYPE {}_{} {}".format(p, name, kind))
+        for labels, value in samples:
+            label_text = ",".join('{}="{}"'.format(k, v) for k, v in labels)
+            lines.append("{}_{}{} {}".format(
+                p, name, "{" + label_text + "}" if label_text else "",
+                repr(float(value))))
+
+    consumers = sorted(status["consumers"].items())
+    metric("rate_bytes_per_second", "gauge",
+           "Background I/O rate shared by all consumers.",
+           [((), status["rate"])])
+    metric("tokens_bytes", "gauge", "Tokens currently in the bucket.",
+           [((), status["tokens"])])
+    metric("live_active", "gauge",
+           "1 while live writes are holding background I/O.",
+           [((), int(status["live_active"]))])
+    metric("live_bytes_total", "counter", "Bytes written by live ingest.",
+           [((), status["live"]["bytes"])])
+    metric("bytes_total", "counter", "Background bytes taken per consumer.",
+           [((("consumer", k),), v["bytes"]) for k, v in consumers])
+    metric("waits_total", "counter",
+           "Takes that had to wait, per consumer.",
+           [((("consumer", k),), v["waits"]) for k, v in consumers])
+    metric("wait_seconds_total", "counter",
+           "Time spent waiting for the budget, per consumer.",
+           [((("consumer", k),), v["wait_seconds"]) for k, v in consumers])
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(status, path):
+    """Atomically replace path with to_prometheus(status) output."""
+    tmp = path + ".tmp"
+    with open(tmp, 'w') as f:
+        f.write(to_prometheus(status))
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", default=BUDGET_PATH,
+                        help="Bucket state file (default: %(default)s)")
+    parser.add_argument("--rate", metavar="BYTES_PER_SEC",
+                        help="Set the shared background rate (e.g. 4M); "
+                             "0 disables throttling")
+    parser.add_argument("--burst", metavar="BYTES",
+                        help="Set the bucket size (e.g. 16M)")
+    parser.add_argument("--status", action="store_true",
+                        help="Print the bucket state and telemetry as JSON")
+    parser.add_argument("--metrics-file", metavar="PATH",
+                        help="Write Prometheus textfile metrics to PATH")
+    args = parser.parse_args()
+
+    try:
+        rate = parse_size(args.rate) if args.rate is not None else None
+        burst = parse_size(args.burst) if args.burst is not None else None
+    except ValueError as e:
+        parser.error(str(e))
+    budget = IOBudget(args.path, rate=rate, burst=burst)
+    status = budget.status()
+    if args.metrics_file:
+        write_prometheus(status, args.metrics_file)
+    if args.status or not args.metrics_file:
+        print(json.dumps(status, indent=2, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
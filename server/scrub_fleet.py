@@ -0,0 +1,338 @@
+#!/usr/bin/env python
+
+# Run hamma_scrub.py on many Mjolnir units at once, over their SSH tunnels,
+# and collect the JSON reports into one array-wide table.
+#
+# Every unit is first surveyed with a dry run (`--recover --purge -n`), which
+# reports missing triggers and how much AGS space a purge could free right
+# now (files already fully on MJ) without transferring or deleting anything.
+# With --recover, units that have something to do then get a real run.
+# Recovery pulls trigger data through this host, so those runs have their
+# own, smaller parallelism cap and their start times are staggered.
+
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mjol_array import (
+    MjolnirArray,
+    HAMMA_SENSORS,
+    PAMMA_SENSORS,
+    AUMMA_SENSORS,
+)
+
+ARRAYS = {
+    'hamma': HAMMA_SENSORS,
+    'pamma': PAMMA_SENSORS,
+    'aumma': AUMMA_SENSORS,
+}
+
+SCRUB_SCRIPT = '/home/pi/dev/mjolnir-hamma/scripts/hamma_scrub.py'
+# Taken with `flock -n` by the state monitor's scrub and by --daemon, so a
+# fleet run never overlaps a scrub the unit started itself.
+SCRUB_LOCK = '/tmp/hamma_scrub.lock'
+SCRUB_BUSY = 75  # exit code from flock -E when the lock is held
+
+DEFAULT_PARALLEL = 4  # units surveyed at once
+DEFAULT_RECOVER_PARALLEL = 1  # recovery runs at once through the jump host
+DEFAULT_STAGGER = 60  # seconds between recovery run starts
+DEFAULT_SINCE = 'auto'
+SURVEY_TIMEOUT = 3600  # seconds per unit survey
+RECOVER_TIMEOUT = 4 * 3600  # seconds per unit recovery run
+
+# hamma_scrub.py exit codes
+EXIT_OK = 0
+EXIT_MISSING = 1
+EXIT_NO_DATA = 3
+
+
+def scrub_command(port, scrub_args):
+    # ssh command running hamma_scrub.py --json on the unit behind `port`
+    # (fully qualified), under the unit's scrub lock.
+    # scrub_args is a list of extra hamma_scrub.py arguments.
+    remote = ['flock', '-n', '-E', str(SCRUB_BUSY), SCRUB_LOCK,
+              'python3', SCRUB_SCRIPT, '--json'] + list(scrub_args)
+    return MjolnirArray._pi_ssh_cmd(port) + remote
+
+
+def run_unit(port, scrub_args, timeout):
+    # Run one scrub and classify the outcome.
+    # Returns a dict with unit, port, status, report (parsed JSON or None),
+    # error and elapsed. status is one of: down (tunnel not reachable),
+    # busy (unit already scrubbing), ok, missing (triggers still missing),
+    # no_data, timeout or error.
+    sensor_num = port - 10000
+    row = {
+        'unit': f"mj{sensor_num:02}",
+        'port': port,
+        'status': None,
+        'report': None,
+        'error': None,
+        'elapsed': 0.0,
+    }
+
+    if not MjolnirArray.status(port):
+        row['status'] = 'down'
+        return row
+
+    t0 = time.monotonic()
+    try:
+        out = subprocess.run(
+            scrub_command(port, scrub_args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            timeout=timeout,
+        )
+    except subprocess.TimeoutExpired:
+        row['status'] = 'timeout'
+        row['error'] = f"no report in {timeout}s"
+        return row
+    finally:
+        row['elapsed'] = time.monotonic() - t0
+
+    stderr = out.stderr.decode(errors="replace").strip()
+    if out.returncode == SCRUB_BUSY:
+        row['status'] = 'busy'
+    elif out.returncode == EXIT_NO_DATA:
+        row['status'] = 'no_data'
+        row['error'] = stderr.splitlines()[-1] if stderr else None
+    elif out.returncode in (EXIT_OK, EXIT_MISSING):
+        try:
+            row['report'] = json.loads(out.stdout)
+            row['status'] = 'missing' if out.returncode else 'ok'
+        except ValueError as e:
+            row['status'] = 'error'
+            row['error'] = f"bad JSON report: {e}"
+    else:
+        row['status'] = 'error'
+        last = stderr.splitlines()[-1] if stderr else ''
+        row['error'] = f"exit {out.returncode}: {last}"
+    return row
+
+
+def summarize(row):
+    # Table figures for one unit. Trigger counts come from the survey;
+    # recovery counts from the recovery run, if the unit had one.
+    # Reclaimable bytes come from whichever purge ran last: the survey's
+    # dry run, or the recovery run's real --purge ('purged' is then True).
+    survey = row.get('report') or {}
+    run = (row.get('recovery') or {}).get('report') or {}
+    recovery = run.get('recovery') or []
+    purge = run.get('purge') or survey.get('purge') or {}
+
+    def count(status):
+        return len([r for r in recovery if r['status'] == status])
+
+    return {
+        'ags_triggers': survey.get('ags_triggers'),
+        'mj_triggers': survey.get('mj_triggers'),
+        'missing': len(survey['missing_on_mj']) if survey else None,
+        'recovered': count('recovered'),
+        'failed': count('failed'),
+        'deferred': count('deferred'),
+        'reclaim_bytes': purge.get('bytes', 0),
+        'purged': not purge.get('dry_run', True),
+    }
+
+
+class StartGate():
+    # Space out task starts by at least `interval` seconds.
+    # Thread safe: each wait() reserves the next free start slot, then
+    # sleeps until it comes up.
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = None
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = now if self._next is None else max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def needs_recovery(row, purge=False):
+    # Whether a surveyed unit has anything for a real run to do
+    if row['status'] not in ('ok', 'missing'):
+        return False
+    summary = summarize(row)
+    return bool(summary['missing'] or (purge and summary['reclaim_bytes']))
+
+
+def scrub_fleet(ports, parallel=DEFAULT_PARALLEL, since=DEFAULT_SINCE,
+                recover=False, purge=False,
+                recover_parallel=DEFAULT_RECOVER_PARALLEL,
+                stagger=DEFAULT_STAGGER, recover_args=(),
+                survey_timeout=SURVEY_TIMEOUT,
+                recover_timeout=RECOVER_TIMEOUT):
+    # Survey every unit, then (with recover) run recovery where needed.
+    # ports are fully qualified. recover_args are passed through to each
+    # recovery run (e.g. ['--recover-rate', '2M']).
+    # Returns one row per port, in the order given; a unit that got a
+    # recovery run has that run's row under 'recovery'.
+    since_args = ['--since', since] if since else []
+    survey_args = since_args + ['--recover', '--purge', '--dry-run']
+
+    with ThreadPoolExecutor(max_workers=max(1, parallel)) as pool:
+        rows = list(pool.map(
+            lambda p: run_unit(p, survey_args, survey_timeout), ports))
+
+    if not recover:
+        return rows
+
+    run_args = since_args + ['--recover'] + list(recover_args)
+    if purge:
+        run_args.append('--purge')
+    gate = StartGate(stagger)
+
+    def recover_unit(row):
+        gate.wait()
+        print(f"--- {row['unit']}: starting recovery ---", flush=True)
+        row['recovery'] = run_unit(row['port'], run_args, recover_timeout)
+
+    todo = [r for r in rows if needs_recovery(r, purge)]
+    with ThreadPoolExecutor(max_workers=max(1, recover_parallel)) as pool:
+        list(pool.map(recover_unit, todo))
+    return rows
+
+
+def format_table(rows):
+    # Array-wide table, one line per unit plus a total line
+    header = (f"{'Unit':<6} {'Status':<9} {'AGS trig':>9} {'MJ trig':>9} "
+              f"{'Missing':>8} {'Recov':>6} {'Failed':>6} {'Defer':>6} "
+              f"{'Reclaim MB':>11} {'Time s':>7}")
+    lines = [header, '-' * len(header)]
+    totals = dict.fromkeys(('ags_triggers', 'mj_triggers', 'missing',
+                            'recovered', 'failed', 'deferred',
+                            'reclaim_bytes'), 0)
+
+    def num(val):
+        return '-' if val is None else str(val)
+
+    for row in rows:
+        s = summarize(row)
+        status = row['status']
+        elapsed = row['elapsed']
+        if row.get('recovery'):
+            status = row['recovery']['status']
+            elapsed += row['recovery']['elapsed']
+        for key in totals:
+            totals[key] += s[key] or 0
+        reclaim = f"{s['reclaim_bytes'] / 1e6:.1f}"
+        if s['purged']:
+            reclaim += '*'
+        lines.append(
+            f"{row['unit']:<6} {status:<9} {num(s['ags_triggers']):>9} "
+            f"{num(s['mj_triggers']):>9} {num(s['missing']):>8} "
+            f"{s['recovered']:>6} {s['failed']:>6} {s['deferred']:>6} "
+            f"{reclaim:>11} {elapsed:>7.1f}")
+
+    units = f"{len(rows)} units"
+    lines.append('-' * len(header))
+    lines.append(
+        f"{'Total':<6} {units:<9} {totals['ags_triggers']:>9} "
+        f"{totals['mj_triggers']:>9} {totals['missing']:>8} "
+        f"{totals['recovered']:>6} {totals['failed']:>6} "
+        f"{totals['deferred']:>6} {totals['reclaim_bytes'] / 1e6:>11.1f}")
+
+    problems = [r.get('recovery') or r for r in rows]
+    problems = [r for r in problems if r['error']]
+    if any(summarize(r)['purged'] for r in rows):
+        lines.append("* already reclaimed by --purge")
+    for r in problems:
+        lines.append(f"{r['unit']}: {r['error']}")
+    return "\n".join(lines)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(
+        description="Run hamma_scrub.py across an array and tabulate the "
+                    "results")
+
+    arg_parser.add_argument("-a", dest="array", choices=sorted(ARRAYS),
+                            help="Which array (e.g., hamma, pamma)")
+    arg_parser.add_argument("-p", dest="ports", action="append",
+                            help="Which ports to scrub, mod 10000 "
+                                 "(pass -p once per unit)")
+    arg_parser.add_argument("--parallel", type=int, default=DEFAULT_PARALLEL,
+                            help="Units surveyed at once "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--since", default=DEFAULT_SINCE,
+                            help="Passed to hamma_scrub.py --since "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--recover", action="store_true",
+                            help="After the survey, recover missing triggers "
+                                 "on the units that have any")
+    arg_parser.add_argument("--purge", action="store_true",
+                            help="Also purge confirmed AGS files during "
+                                 "recovery runs (requires --recover)")
+    arg_parser.add_argument("--recover-parallel", type=int,
+                            default=DEFAULT_RECOVER_PARALLEL,
+                            help="Recovery runs at once "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--stagger", type=float, default=DEFAULT_STAGGER,
+                            help="Seconds between recovery run starts "
+                                 "(default: %(default)s)")
+    arg_parser.add_argument("--recover-rate",
+                            help="Per-unit recovery bandwidth cap, passed to "
+                                 "hamma_scrub.py (e.g. 500K, 2M)")
+    arg_parser.add_argument("--recover-deadline", type=float,
+                            help="Per-unit recovery deadline in seconds, "
+                                 "passed to hamma_scrub.py")
+    arg_parser.add_argument("--io-budget", action="store_true",
+                            help="Recovery writes take from each unit's "
+                                 "shared DATA drive I/O budget")
+    arg_parser.add_argument("-o", "--output",
+                            help="Also write every unit's rows and reports "
+                                 "here as JSON")
+
+    parsed_args = arg_parser.parse_args()
+
+    if parsed_args.purge and not parsed_args.recover:
+        arg_parser.error("--purge requires --recover")
+    if parsed_args.ports is not None:
+        ports = [10000 + int(p) for p in parsed_args.ports]
+    elif parsed_args.array is not None:
+        ports = [10000 + i for i in ARRAYS[parsed_args.array]]
+    else:
+        print('You must pass either the sensors/ports or the array')
+        return 2
+
+    recover_args = []
+    if parsed_args.recover_rate:
+        recover_args += ['--recover-rate', parsed_args.recover_rate]
+    if parsed_args.recover_deadline is not None:
+        recover_args += ['--recover-deadline',
+                         str(parsed_args.recover_deadline)]
+    if parsed_args.io_budget:
+        recover_args += ['--io-budget']
+
+    rows = scrub_fleet(
+        ports,
+        parallel=parsed_args.parallel,
+        since=parsed_args.since,
+        recover=parsed_args.recover,
+        purge=parsed_args.purge,
+        recover_parallel=parsed_args.recover_parallel,
+        stagger=parsed_args.stagger,
+        recover_args=recover_args,
+    )
+    print(format_table(rows))
+
+    if parsed_args.output:
+        with open(parsed_args.output, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+    failed = [r.get('recovery') or r for r in rows]
+    return int(any(r['status'] in ('error', 'timeout') for r in failed))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
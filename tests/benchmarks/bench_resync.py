@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""Benchmark SYNC_MARKER resync throughput in hamma_scrub.
+
+Builds an AGS-style file with a long corrupted (sync-free) stretch between
+valid triggers, then times header extraction through it with the mmap
+extractor and with the seek/read fallback, both locally and with the
+remote strider script run as a local process.
+
+Usage:
+    python tests/benchmarks/bench_resync.py [--noise-mb 64] [--repeat 3]
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import pathlib
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+SCRIPT_PATH = REPO_ROOT / "scripts" / "hamma_scrub.py"
+
+DATASIZE = 1000  # words per trigger; small so the noise dominates
+
+
+def load_hamma_scrub():
+    """Load hamma_scrub module from scripts/."""
+    spec = importlib.util.spec_from_file_location(
+        "hamma_scrub", str(SCRIPT_PATH),
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_corrupted_file(path, sync, noise_mb, triggers=10):
+    """Write triggers, a sync-free stretch of noise_mb MB, then triggers."""
+    noise_block = bytes(range(0x10, 0xf0)) * 4681  # ~1 MB, no 0xf5 byte
+    with open(path, 'wb') as f:
+        for i in range(2 * triggers):
+            if i == triggers:
+                for _ in range(noise_mb):
+                    f.write(noise_block)
+            header = bytearray(128)
+            header[0:4] = sync
+            struct.pack_into('<I', header, 10, DATASIZE)
+            struct.pack_into('<I', header, 60, i)
+            f.write(bytes(header) + b'\xaa' * (DATASIZE * 2) + b'\x00' * 4)
+
+
+class _SeekReadOnly:
+    """File wrapper without fileno(), forcing the seek/read fallback."""
+
+    def __init__(self, f):
+        self._f = f
+
+    def seek(self, pos):
+        return self._f.seek(pos)
+
+    def read(self, size):
+        return self._f.read(size)
+
+
+def drop_caches_hint(path):
+    """Ask the kernel to drop cached pages for path (best effort)."""
+    if hasattr(os, "posix_fadvise"):
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def time_local(hamma_scrub, path, use_mmap, repeat):
+    """Best-of-repeat seconds and offsets for local extract_headers."""
+    size = os.path.getsize(path)
+    best = None
+    offsets = None
+    for _ in range(repeat):
+        drop_caches_hint(path)
+        with open(path, 'rb') as f:
+            fileobj = f if use_mmap else _SeekReadOnly(f)
+            t0 = time.perf_counter()
+            results = hamma_scrub.extract_headers(fileobj, size, "bench.bin")
+            elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+        offsets = [(r["offset"], r["index"]) for r in results]
+    return best, offsets
+
+
+def time_strider(hamma_scrub, data_dir, use_mmap, repeat, tmp_dir):
+    """Best-of-repeat seconds and offsets for the strider script."""
+    script_text = hamma_scrub.STRIDER_SCRIPT
+    if not use_mmap:
+        script_text = script_text.replace("    import mmap\n",
+                                          "    raise ImportError\n")
+    script = os.path.join(tmp_dir, "strider_{}.py".format(int(use_mmap)))
+    with open(script, 'w') as f:
+        f.write(script_text)
+    best = None
+    offsets = None
+    for _ in range(repeat):
+        for name in os.listdir(data_dir):
+            drop_caches_hint(os.path.join(data_dir, name))
+        t0 = time.perf_counter()
+        out = subprocess.run([sys.executable, script, data_dir],
+                             stdout=subprocess.PIPE, check=True).stdout
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+        offsets = [(e["offset"], e["index"])
+                   for e in hamma_scrub.decode_strider_output(out)]
+    return best, offsets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--noise-mb", type=int, default=64,
+                        help="Size of the corrupted stretch in MB (default: 64)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per variant; best time is reported")
+    args = parser.parse_args()
+
+    # The resync warnings are expected here
+    logging.basicConfig(level=logging.ERROR)
+    hamma_scrub = load_hamma_scrub()
+    with tempfile.TemporaryDirectory(prefix="bench_resync_") as tmp_dir:
+        data_dir = os.path.join(tmp_dir, "ags")
+        os.mkdir(data_dir)
+        path = os.path.join(data_dir, "bench.bin")
+        write_corrupted_file(path, hamma_scrub.SYNC_MARKER, args.noise_mb)
+        size_mb = os.path.getsize(path) / 1e6
+
+        rows = []
+        expected = None
+        for label, func in (
+            ("local mmap", lambda: time_local(hamma_scrub, path, True,
+                                              args.repeat)),
+            ("local seek/read", lambda: time_local(hamma_scrub, path, False,
+                                                   args.repeat)),
+            ("strider mmap", lambda: time_strider(hamma_scrub, data_dir, True,
+                                                  args.repeat, tmp_dir)),
+            ("strider seek/read", lambda: time_strider(
+                hamma_scrub, data_dir, False, args.repeat, tmp_dir)),
+        ):
+            elapsed, offsets = func()
+            if expected is None:
+                expected = offsets
+            elif offsets != expected:
+                print("ERROR: {} produced different offsets".format(label))
+                return 1
+            rows.append((label, elapsed))
+
+        print("Resync benchmark: {:.1f} MB file, {} MB corrupted, {} triggers"
+              .format(size_mb, args.noise_mb, len(expected)))
+        for label, elapsed in rows:
+            print("  {:<18} {:8.3f} s  {:8.1f} MB/s".format(
+                label, elapsed, size_mb / elapsed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
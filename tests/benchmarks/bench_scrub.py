@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""Benchmark the hamma_scrub pipeline on synthetic AGS/MJ corpora.
+
+Builds a corpus (see corpus.py) at each size and times the scrub
+phases, with ssh and scp replaced by the loopback shims from
+tests/fixtures/mock_ssh.py so the remote scripts run as local processes:
+
+    extract_headers  local header extraction over every AGS file
+    scan_mj_files    cold scan of the MJ drive tree
+    compare_headers  AGS entry table against the MJ header set
+    strider          scan_ags_files() through the remote strider
+    recovery         batch recovery of every missing trigger
+
+Every phase's result is checked against the corpus, so a fast wrong
+answer fails. Times are compared with a saved baseline and any phase
+slower than it by more than --tolerance is flagged (exit status 1);
+--save-baseline records the current run instead. A baseline recorded on
+another OS or CPU architecture is not compared against.
+
+Usage:
+    python tests/benchmarks/bench_scrub.py [--sizes 1000,10000,100000]
+        [--repeat 3] [--baseline PATH] [--save-baseline] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import logging
+import os
+import pathlib
+import platform
+import sys
+import tempfile
+import time
+
+from bench_resync import REPO_ROOT, drop_caches_hint, load_hamma_scrub
+from corpus import DATASIZE, build_corpus
+
+sys.path.insert(0, str(REPO_ROOT / "tests" / "fixtures"))
+from mock_ssh import LoopbackSSH  # noqa: E402
+
+DEFAULT_SIZES = "1000,10000,100000"
+DEFAULT_BASELINE = pathlib.Path(__file__).resolve().parent / "baselines" \
+    / "bench_scrub.json"
+DEFAULT_TOLERANCE = 0.25  # fractional slowdown flagged as a regression
+AGS_HOST = "hamma"
+PHASES = ("extract_headers", "scan_mj_files", "compare_headers", "strider",
+          "recovery")
+
+
+class BenchmarkError(Exception):
+    """A phase returned a result that does not match the corpus."""
+
+
+def _best_of(repeat, func, reset=None):
+    # Best wall time of func() over repeat runs, and its last result
+    best = None
+    result = None
+    for _ in range(repeat):
+        if reset is not None:
+            reset()
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def _check(ok, phase, message):
+    # Raise BenchmarkError unless ok
+    if not ok:
+        raise BenchmarkError("{}: {}".format(phase, message))
+
+
+def bench_size(hamma_scrub, triggers, repeat, datasize, latency, tmp_dir):
+    """Build a corpus of `triggers` triggers and time each phase on it.
+
+    Returns a dict of phase name -> best seconds.
+    """
+    root = os.path.join(tmp_dir, str(triggers))
+    damaged = max(1, triggers // 2000)
+    corpus = build_corpus(
+        root, triggers, files=max(1, triggers // 500), datasize=datasize,
+        bad_sync=damaged, bad_datasize=damaged, truncated=1,
+    )
+    ags_path = corpus["ags_path"]
+    mj_path = corpus["mj_path"]
+    ags_files = sorted(os.listdir(ags_path))
+    times = {}
+
+    def drop_ags_caches():
+        for name in ags_files:
+            drop_caches_hint(os.path.join(ags_path, name))
+
+    def extract():
+        headers = []
+        for name in ags_files:
+            path = os.path.join(ags_path, name)
+            with open(path, 'rb') as f:
+                headers.extend(r["header"] for r in hamma_scrub.extract_headers(
+                    f, os.path.getsize(path), name))
+        return headers
+
+    times["extract_headers"], headers = _best_of(repeat, extract,
+                                                 drop_ags_caches)
+    _check(headers == corpus["headers"], "extract_headers",
+           "{} headers, expected {}".format(len(headers),
+                                            len(corpus["headers"])))
+
+    times["scan_mj_files"], mj = _best_of(
+        repeat, lambda: hamma_scrub.scan_mj_files(mj_path))
+    _check(len(mj["headers"]) == corpus["mj_count"], "scan_mj_files",
+           "{} headers, expected {}".format(len(mj["headers"]),
+                                            corpus["mj_count"]))
+
+    ssh = LoopbackSSH(pathlib.Path(root) / "ssh", latency=latency).install()
+    with ssh.activate():
+        times["strider"], ags = _best_of(
+            repeat, lambda: hamma_scrub.scan_ags_files(
+                AGS_HOST, ags_path, stream=True, as_table=True),
+            drop_ags_caches)
+        _check(len(ags["entries"]) == len(corpus["headers"]), "strider",
+               "{} entries, expected {}".format(len(ags["entries"]),
+                                                len(corpus["headers"])))
+
+        times["compare_headers"], comparison = _best_of(
+            repeat, lambda: hamma_scrub.compare_headers(ags["entries"],
+                                                        mj["headers"]))
+        missing = comparison["missing_on_mj"]
+        _check(len(missing) == len(corpus["missing"]), "compare_headers",
+               "{} missing, expected {}".format(len(missing),
+                                                len(corpus["missing"])))
+
+        candidates = hamma_scrub.filter_recovery_candidates(missing,
+                                                            ags["entries"])
+        recovered = []
+
+        def remove_recovered():
+            # Each run starts from the original gaps
+            for path in recovered:
+                os.unlink(os.path.join(mj_path, path))
+            del recovered[:]
+
+        def recover():
+            results = hamma_scrub.recover_triggers(
+                candidates, AGS_HOST, ags_path, mj_path, batch=True)
+            recovered.extend(r["target_path"] for r in results
+                             if r["status"] == "recovered")
+            return results
+
+        times["recovery"], results = _best_of(repeat, recover,
+                                              remove_recovered)
+        failed = [r for r in results
+                  if r["status"] not in ("recovered", "skipped")]
+        _check(not failed, "recovery", "{} triggers not recovered: {}".format(
+            len(failed), failed[0]["error"] if failed else ""))
+    return times
+
+
+def load_baseline(path):
+    """Load a saved baseline, or None if there is none."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def machine_name():
+    """The OS and CPU architecture times are comparable across."""
+    return "{} {}".format(platform.system(), platform.machine())
+
+
+def save_baseline(path, datasize, results):
+    """Write results (size -> phase -> seconds) as the new baseline."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    baseline = {
+        "datasize": datasize,
+        "machine": "{} / Python {}".format(
+            machine_name(), platform.python_version()),
+        "sizes": {str(size): {phase: round(seconds, 4)
+                              for phase, seconds in times.items()}
+                  for size, times in sorted(results.items())},
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="Comma-separated trigger counts "
+                             "(default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per phase; best time is reported")
+    parser.add_argument("--datasize", type=int, default=DATASIZE,
+                        help="Words per trigger (default: %(default)s)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="Seconds added to every ssh/scp session")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE),
+                        help="Baseline JSON file (default: %(default)s)")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="Save this run as the baseline instead of "
+                             "comparing against it")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Slowdown flagged as a regression "
+                             "(default: %(default)s = 25%%)")
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    # Corruption warnings from the synthetic corpus are expected here
+    logging.basicConfig(level=logging.ERROR)
+    hamma_scrub = load_hamma_scrub()
+    baseline = None if args.save_baseline else load_baseline(args.baseline)
+    if baseline is not None and baseline.get("datasize") != args.datasize:
+        print("Baseline {} was recorded with datasize {}, not comparing"
+              .format(args.baseline, baseline.get("datasize")))
+        baseline = None
+    if baseline is not None:
+        saved = (baseline.get("machine") or "").split(" / ")[0]
+        if saved != machine_name():
+            print("Warning: baseline {} was recorded on {}, not {}; not "
+                  "comparing".format(args.baseline, saved or "an unknown "
+                                     "machine", machine_name()),
+                  file=sys.stderr)
+            baseline = None
+
+    results = {}
+    regressions = []
+    print("Scrub benchmark: datasize {} words, best of {}".format(
+        args.datasize, args.repeat))
+    print("  {:>8}  {:<16} {:>9} {:>12} {:>9} {:>8}".format(
+        "triggers", "phase", "seconds", "us/trigger", "baseline", "change"))
+    with tempfile.TemporaryDirectory(prefix="bench_scrub_") as tmp_dir:
+        for size in sizes:
+            try:
+                times = bench_size(hamma_scrub, size, args.repeat,
+                                   args.datasize, args.latency, tmp_dir)
+            except BenchmarkError as e:
+                print("ERROR: {} triggers: {}".format(size, e))
+                return 1
+            results[size] = times
+            saved = (baseline or {}).get("sizes", {}).get(str(size), {})
+            for phase in PHASES:
+                seconds = times[phase]
+                line = "  {:>8}  {:<16} {:9.3f} {:12.1f}".format(
+                    size, phase, seconds, seconds / size * 1e6)
+                if phase in saved:
+                    change = seconds / saved[phase] - 1 if saved[phase] else 0
+                    line += " {:9.3f} {:+7.0%}".format(saved[phase], change)
+                    if change > args.tolerance:
+                        line += "  REGRESSION"
+                        regressions.append((size, phase))
+                print(line)
+
+    if args.save_baseline:
+        save_baseline(args.baseline, args.datasize, results)
+        print("Baseline saved to {}".format(args.baseline))
+    elif baseline is None:
+        print("No baseline to compare against (run with --save-baseline)")
+    if regressions:
+        print("{} phase(s) slower than the baseline by more than {:.0%}"
+              .format(len(regressions), args.tolerance))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""Generate a synthetic AGS/MJ corpus for hamma_scrub tests and benchmarks.
+
+Writes AGS-style files of HAMMA 2.0 triggers (valid headers with unique
+GPS times, configurable datasize) with optional corruption: triggers
+whose SYNC marker is damaged, triggers with an out-of-bounds datasize,
+and files whose last trigger is cut short. A matching mjolnir tree of
+DATA drives with hourly directories holds one .bin per trigger, minus a
+controllable fraction of gaps, which is what the scrubber should report
+missing (and recover).
+
+Usage:
+    python tests/benchmarks/corpus.py OUT_DIR [--triggers 10000]
+        [--files 20] [--datasize 1000] [--gaps 0.01] [--bad-sync 5]
+        [--bad-datasize 5] [--truncated 1] [--seed 0]
+"""
+
+import argparse
+import datetime
+import os
+import random
+import struct
+import sys
+
+SYNC_MARKER = b'\xf5\xff\x50\x5d'
+HEADER_SIZE = 128
+PACKET_PAD = 4
+MAX_DATASIZE = 20000000  # words; hamma_scrub treats anything above as corrupt
+GPS_EPOCH = 315964800
+GPS_UTC_OFFSET = 18.0
+DATASIZE = 1000  # words per trigger; small so large corpora stay cheap
+START_TIME = 1775265230.0  # 2026-04-04T01:13:50Z
+UNIT_TAG = "mj41"
+
+
+def make_header(seq, when, datasize=DATASIZE, sync=SYNC_MARKER):
+    """Build a 128-byte header for trigger `seq` at Unix time `when`.
+
+    The GPS fields decode back to `when` (millisecond precision) with
+    hamma_scrub.decode_gps_time(); `seq` is also stored at offset 60 so
+    headers stay unique even if two triggers share a timestamp.
+    """
+    seconds = int(when)
+    gps = seconds - GPS_EPOCH + int(GPS_UTC_OFFSET) - 1
+    header = bytearray(HEADER_SIZE)
+    header[0:4] = sync
+    struct.pack_into('<I', header, 10, datasize)
+    struct.pack_into('<I', header, 60, seq)
+    struct.pack_into('<f', header, 80, float(gps % 604800))
+    struct.pack_into('<h', header, 84, gps // 604800)
+    struct.pack_into('<f', header, 86, GPS_UTC_OFFSET)
+    struct.pack_into('<I', header, 94, int(round((when - seconds) * 1000))
+                     * 1000000)
+    struct.pack_into('<I', header, 98, 1000000000)
+    return bytes(header)
+
+
+def _payload(seq, datasize):
+    # Sample data plus pad; the fill never contains a SYNC_MARKER byte
+    return bytes([0x10 + seq % 0xe0]) * (datasize * 2) + b'\x00' * PACKET_PAD
+
+
+def _mj_name(when):
+    # Hour directory and mjolnir filename for a trigger time
+    dt = datetime.datetime.fromtimestamp(when, tz=datetime.timezone.utc)
+    return (dt.strftime('%Y-%m-%dT%H'),
+            "{}_{}-{:03d}.bin".format(UNIT_TAG,
+                                      dt.strftime('%Y-%m-%d_%H-%M-%S'),
+                                      dt.microsecond // 1000))
+
+
+def build_corpus(root, triggers, files=20, datasize=DATASIZE, gaps=0.01,
+                 gap_run=4, bad_sync=0, bad_datasize=0, truncated=0,
+                 drives=2, seed=0, start=START_TIME):
+    """Write an AGS directory and an MJ drive tree under `root`.
+
+    Parameters
+    ----------
+    root : str
+        Output directory; 'ags' and 'mj' are created inside it.
+    triggers : int
+        Total triggers recorded, spread evenly over `files` AGS files.
+    files : int
+        Number of AGS files.
+    datasize : int
+        Datasize of every trigger, in 16-bit words.
+    gaps : float
+        Fraction of whole AGS triggers left off the MJ drives.
+    gap_run : int
+        Mean length of each run of consecutive missing triggers.
+    bad_sync : int
+        Triggers whose SYNC marker is damaged in the AGS file.
+    bad_datasize : int
+        Triggers whose AGS header has a datasize above MAX_DATASIZE.
+    truncated : int
+        AGS files (the newest first) whose last trigger is cut short.
+    drives : int
+        Number of DATA?? drives; hours are assigned round-robin.
+    seed : int
+        Seed for trigger spacing, corruption and gap placement.
+    start : float
+        Unix time of the first trigger.
+
+    Returns
+    -------
+    dict
+        ags_path, mj_path: str
+        headers: list of bytes, the headers readable from the AGS files
+        (including cut-short tails), in file order
+        missing: list of bytes, whole AGS triggers absent from MJ
+        corrupted: int (bad_sync + bad_datasize triggers)
+        truncated: int (cut-short triggers)
+        mj_count: int (.bin files written to MJ)
+        ags_bytes: int
+    """
+    rng = random.Random(seed)
+    ags_path = os.path.join(root, "ags")
+    mj_path = os.path.join(root, "mj")
+    os.makedirs(ags_path, exist_ok=True)
+    drive_paths = [os.path.join(mj_path, "DATA{:02d}".format(d + 1))
+                   for d in range(drives)]
+    for path in drive_paths:
+        os.makedirs(path, exist_ok=True)
+
+    files = max(1, min(files, triggers))
+    bounds = [triggers * i // files for i in range(files + 1)]
+    lasts = set(b - 1 for b in bounds[1:])
+    cut = set(sorted(lasts, reverse=True)[:truncated])
+    # Corruption never hits a file's last trigger: that is a tail case
+    inner = [i for i in range(triggers) if i not in lasts]
+    damaged = rng.sample(inner, min(len(inner), bad_sync + bad_datasize))
+    bad_sync_set = set(damaged[:bad_sync])
+    bad_ds_set = set(damaged[bad_sync:])
+
+    when = start
+    times = []
+    for _ in range(triggers):
+        times.append(when)
+        when = round(when + rng.uniform(0.5, 20.0), 3)
+
+    # A cut-short tail still has a readable header; MJ recorded it whole
+    readable = [i for i in range(triggers)
+                if i not in bad_sync_set and i not in bad_ds_set]
+    whole = [i for i in readable if i not in cut]
+    dropped = set()
+    want = int(round(len(whole) * gaps))
+    while len(dropped) < want:
+        first = rng.randrange(len(whole))
+        run = max(1, int(rng.expovariate(1.0 / gap_run)))
+        for k in range(first, min(first + run, len(whole))):
+            if len(dropped) < want:
+                dropped.add(whole[k])
+
+    ags_bytes = 0
+    for n in range(files):
+        name = os.path.join(ags_path, "ags{:03d}.bin".format(n))
+        with open(name, 'wb') as f:
+            for i in range(bounds[n], bounds[n + 1]):
+                header = make_header(i, times[i], datasize)
+                if i in bad_sync_set:
+                    header = b'\x00\x00\x00\x00' + header[4:]
+                elif i in bad_ds_set:
+                    header = bytearray(header)
+                    struct.pack_into('<I', header, 10, MAX_DATASIZE + 1 + i)
+                    header = bytes(header)
+                packet = header + _payload(i, datasize)
+                if i in cut:
+                    packet = packet[:HEADER_SIZE + len(packet) // 2]
+                f.write(packet)
+                ags_bytes += len(packet)
+
+    hour_drive = {}
+    made = set()
+    mj_count = 0
+    for i in range(triggers):
+        if i in dropped:
+            continue
+        hour, fname = _mj_name(times[i])
+        if hour not in hour_drive:
+            hour_drive[hour] = drive_paths[len(hour_drive) % drives]
+        subdir = os.path.join(hour_drive[hour], hour)
+        if subdir not in made:
+            os.makedirs(subdir, exist_ok=True)
+            made.add(subdir)
+        with open(os.path.join(subdir, fname), 'wb') as f:
+            f.write(make_header(i, times[i], datasize) + _payload(i, datasize))
+        mj_count += 1
+
+    return {
+        "ags_path": ags_path,
+        "mj_path": mj_path,
+        "headers": [make_header(i, times[i], datasize) for i in readable],
+        "missing": [make_header(i, times[i], datasize) for i in readable
+                    if i in dropped],
+        "corrupted": len(damaged),
+        "truncated": len(cut),
+        "mj_count": mj_count,
+        "ags_bytes": ags_bytes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("out_dir", help="Directory to write ags/ and mj/ into")
+    parser.add_argument("--triggers", type=int, default=10000,
+                        help="Total triggers (default: 10000)")
+    parser.add_argument("--files", type=int, default=20,
+                        help="AGS files (default: 20)")
+    parser.add_argument("--datasize", type=int, default=DATASIZE,
+                        help="Words per trigger (default: %(default)s)")
+    parser.add_argument("--gaps", type=float, default=0.01,
+                        help="Fraction of triggers missing on MJ "
+                             "(default: 0.01)")
+    parser.add_argument("--gap-run", type=int, default=4,
+                        help="Mean length of a run of missing triggers")
+    parser.add_argument("--bad-sync", type=int, default=0,
+                        help="Triggers with a damaged SYNC marker")
+    parser.add_argument("--bad-datasize", type=int, default=0,
+                        help="Triggers with an out-of-bounds datasize")
+    parser.add_argument("--truncated", type=int, default=0,
+                        help="AGS files whose last trigger is cut short")
+    parser.add_argument("--drives", type=int, default=2,
+                        help="MJ DATA drives (default: 2)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed (default: 0)")
+    args = parser.parse_args()
+
+    corpus = build_corpus(
+        args.out_dir, args.triggers, files=args.files,
+        datasize=args.datasize, gaps=args.gaps, gap_run=args.gap_run,
+        bad_sync=args.bad_sync, bad_datasize=args.bad_datasize,
+        truncated=args.truncated, drives=args.drives, seed=args.seed,
+    )
+    print("AGS: {} ({} readable headers, {} corrupted, {} truncated, "
+          "{:.1f} MB)".format(corpus["ags_path"], len(corpus["headers"]),
+                               corpus["corrupted"], corpus["truncated"],
+                               corpus["ags_bytes"] / 1e6))
+    print("MJ:  {} ({} files, {} missing)".format(
+        corpus["mj_path"], corpus["mj_count"], len(corpus["missing"])))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,8 +12,12 @@ from unittest.mock import MagicMock, patch
 REPO_ROOT = Path(__file__).parent.parent
 FILES_DIR = REPO_ROOT / "files"
 INSTALL_SCRIPTS_DIR = REPO_ROOT / "install_scripts"
+FIXTURES_DIR = REPO_ROOT / "tests" / "fixtures"
 
 sys.path.insert(0, str(FILES_DIR))
+sys.path.insert(0, str(FIXTURES_DIR))
+
+from mock_ssh import LoopbackSSH
 
 
 @pytest.fixture
@@ -47,6 +51,17 @@ def mock_subprocess():
         yield mock_run
 
 
+@pytest.fixture
+def mock_ssh(tmp_path):
+    """Loopback ssh/scp on PATH: "remote" commands run locally.
+
+    See LoopbackSSH in tests/fixtures/mock_ssh.py; the instance is
+    yielded so tests can inspect its calls and remote directories.
+    """
+    with LoopbackSSH(tmp_path / "ssh").install().activate() as ssh:
+        yield ssh
+
+
 @pytest.fixture
 def mock_logger():
     """Mock logger for testing logging output."""
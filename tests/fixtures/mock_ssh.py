@@ -3,10 +3,17 @@ Mock SSH-related operations for testing.
 
 This module specifically tracks ssh-keygen calls which are CRITICAL
 for the WiFi path - the previous failed attempt missed this.
+
+It also provides LoopbackSSH, stand-in ssh/scp executables that run
+"remote" commands on the local machine, so code that shells out to
+ssh (e.g. scripts/hamma_scrub.py) can be exercised end to end.
 """
 
+import contextlib
+import os
+import sys
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterator, List, Optional, Tuple
 from dataclasses import dataclass, field
 
 
@@ -167,3 +174,132 @@ def parse_ssh_keygen_args(args: List[str]) -> SSHKeygenCall:
             i += 1
 
     return call
+
+
+# Shared by the ssh and scp shims: maps a remote path into the sandbox.
+# Remote /tmp lives under <root>/remote/tmp and relative paths resolve
+# against <root>/remote/home, so concurrent runs never collide.
+_SHIM_PRELUDE = """#!{python}
+import os, re, shutil, sys, time
+ROOT = {root!r}
+HOME = os.path.join(ROOT, "remote", "home")
+TMP = os.path.join(ROOT, "remote", "tmp")
+LATENCY = {latency!r}
+
+
+# Only /tmp itself and its direct entries are remote scratch; deeper
+# paths (say a test's tmp_path) are real local data directories.
+TOP_TMP = re.compile(r"(?<![^\\s=])/tmp(/[^/\\s;]*)?(?=[\\s;]|$)")
+
+
+def remote(path):
+    if TOP_TMP.fullmatch(path):
+        return TMP + path[4:]
+    return os.path.join(HOME, path)
+
+
+def log(tool, host, detail):
+    with open(os.path.join(ROOT, "calls.log"), "a") as f:
+        f.write("{{}}\\t{{}}\\t{{}}\\n".format(tool, host, detail))
+    time.sleep(LATENCY)
+"""
+
+_SSH_SHIM = """
+OPTS_WITH_VALUE = set("bcDEeFIiJLlmOopQRSWw")
+args = sys.argv[1:]
+while args and args[0].startswith("-"):
+    opt = args.pop(0)
+    if opt[-1] in OPTS_WITH_VALUE and len(opt) == 2 and args:
+        args.pop(0)
+host, command = args[0], " ".join(args[1:])
+command = TOP_TMP.sub(lambda m: TMP + (m.group(1) or ""), command)
+log("ssh", host, command)
+os.chdir(HOME)
+os.execv("/bin/sh", ["sh", "-c", command])
+"""
+
+_SCP_SHIM = """
+args = [a for a in sys.argv[1:] if a not in ("-q", "-r", "-p", "-B")]
+paths = []
+while args:
+    arg = args.pop(0)
+    if arg in ("-P", "-o", "-i", "-F") and args:
+        args.pop(0)
+    else:
+        paths.append(arg)
+host = ""
+def local(path):
+    global host
+    if ":" in path.split("/", 1)[0]:
+        host, path = path.split(":", 1)
+        return remote(path)
+    return path
+sources = [local(p) for p in paths[:-1]]
+dest = local(paths[-1])
+log("scp", host, " ".join(paths))
+for src in sources:
+    if dest.endswith("/") or os.path.isdir(dest):
+        shutil.copy(src, os.path.join(dest, os.path.basename(src)))
+    else:
+        shutil.copy(src, dest)
+"""
+
+
+class LoopbackSSH:
+    """Fake ``ssh`` and ``scp`` that run "remote" commands locally.
+
+    install() writes the two executables to ``<root>/bin``; while
+    activate() is in effect that directory is first on PATH, so every
+    ``subprocess`` call to ssh or scp lands here instead of a network.
+    The host argument is recorded and otherwise ignored: commands run
+    under /bin/sh in ``<root>/remote/home``, and /tmp and its direct
+    entries (where deployed scripts go) are redirected to
+    ``<root>/remote/tmp``. Deeper absolute paths (e.g. an AGS directory
+    under pytest's tmp_path) are used as is.
+
+    Each invocation can sleep ``latency`` seconds first, standing in for
+    connection setup, so per-session costs show up in benchmarks.
+    """
+
+    def __init__(self, root: Path, latency: float = 0.0):
+        self.root = Path(root)
+        self.latency = latency
+        self.bin_dir = self.root / "bin"
+        self.home = self.root / "remote" / "home"
+        self.tmp = self.root / "remote" / "tmp"
+
+    def install(self) -> "LoopbackSSH":
+        """Write the ssh/scp shims and the remote directories."""
+        for path in (self.bin_dir, self.home, self.tmp):
+            path.mkdir(parents=True, exist_ok=True)
+        prelude = _SHIM_PRELUDE.format(python=sys.executable,
+                                       root=str(self.root),
+                                       latency=self.latency)
+        for name, body in (("ssh", _SSH_SHIM), ("scp", _SCP_SHIM)):
+            shim = self.bin_dir / name
+            shim.write_text(prelude + body)
+            shim.chmod(0o755)
+        return self
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["LoopbackSSH"]:
+        """Put the shims first on PATH for the duration of the block."""
+        old_path = os.environ.get("PATH", "")
+        os.environ["PATH"] = str(self.bin_dir) + os.pathsep + old_path
+        try:
+            yield self
+        finally:
+            os.environ["PATH"] = old_path
+
+    @property
+    def calls(self) -> List[Tuple[str, str, str]]:
+        """(tool, host, command or scp paths) per invocation, in order."""
+        log = self.root / "calls.log"
+        if not log.exists():
+            return []
+        return [tuple(line.split("\t", 2))
+                for line in log.read_text().splitlines()]
+
+    def session_count(self, tool: Optional[str] = None) -> int:
+        """Number of ssh and scp invocations (or of one tool only)."""
+        return sum(1 for call in self.calls if tool in (None, call[0]))
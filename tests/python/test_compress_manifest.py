@@ -0,0 +1,110 @@
+"""Tests for scripts/compress_manifest.py — the per-drive archive manifest."""
+
+import importlib.util
+import os
+import pathlib
+
+import pytest
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+SCRIPT_PATH = REPO_ROOT / "scripts" / "compress_manifest.py"
+
+
+@pytest.fixture
+def manifest():
+    """Provide the compress_manifest module."""
+    spec = importlib.util.spec_from_file_location("compress_manifest",
+                                                  str(SCRIPT_PATH))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _archive(output_path, output, data=b"HMC"):
+    # An archive at output_path/output, creating its hour directory
+    path = output_path / output
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+class TestAppendManifest:
+    """Tests for append_manifest() and read_manifest()."""
+
+    def test_torn_line_skipped_and_terminated(self, manifest, tmp_path):
+        path = tmp_path / manifest.MANIFEST_NAME
+        manifest.append_manifest(tmp_path, {"source": "a", "output": "a"})
+        with open(path, 'ab') as f:
+            f.write(b'{"source": "b", "si')
+        records, offset = manifest.read_manifest(path)
+        assert [r["source"] for r in records] == ["a"]
+        manifest.append_manifest(tmp_path, {"source": "c", "output": "c"})
+        records, _ = manifest.read_manifest(path)
+        assert [r["source"] for r in records] == ["a", "c"]
+        assert manifest.read_manifest(path, offset)[0] == [
+            {"source": "c", "output": "c"}]
+
+    def test_record_needs_source_and_output(self, manifest):
+        lines = [b'{"source": "x/a.bin", "output": "x/a.hmc"}',
+                 '{"source": "x/b.bin"}',
+                 '{"output": "x/c.hmc"}',
+                 '["x/d.bin", "x/d.hmc"]',
+                 'not json']
+        assert manifest.parse_records(lines) == [
+            {"source": "x/a.bin", "output": "x/a.hmc"}]
+
+    def test_create_adopts_existing_archives(self, manifest, tmp_path):
+        output_path = tmp_path / "compressed"
+        (tmp_path / "2026-01-15T10").mkdir()
+        (tmp_path / "2026-01-15T10" / "trigger01.bin").write_bytes(b"x" * 10)
+        _archive(output_path, "2026-01-15T10/trigger01.hmc")
+        _archive(output_path, "2026-01-15T11/mj41_0000_recovered.hmc")
+        _archive(output_path, "not-an-hour/trigger09.hmc")
+        manifest.append_manifest(output_path)
+        records, _ = manifest.read_manifest(
+            output_path / manifest.MANIFEST_NAME)
+        assert [r["output"] for r in records] == [
+            "2026-01-15T10/trigger01.hmc",
+            "2026-01-15T11/mj41_0000_recovered.hmc"]
+        compressed, recovered = records
+        assert compressed["size"] == 10
+        assert compressed["sha256"] is None
+        assert "recovered" not in compressed
+        assert recovered["size"] is None
+        assert recovered["recovered"] is True
+
+    def test_recovery_first_still_adopts(self, manifest, tmp_path):
+        # hamma_scrub may be the first writer on a drive
+        output_path = tmp_path / "compressed"
+        _archive(output_path, "2026-01-15T10/trigger01.hmc")
+        hmc = _archive(output_path, "2026-01-15T12/mj41_0001_recovered.hmc")
+        source = tmp_path / "spool" / "mj41_0001_recovered.bin"
+        source.parent.mkdir()
+        source.write_bytes(b"x" * 20)
+        record = manifest.make_record(
+            output_path, "2026-01-15T12/mj41_0001_recovered.bin",
+            "2026-01-15T12/mj41_0001_recovered.hmc", os.stat(source),
+            method="quantize", step=8, duration=0.5, recovered=True)
+        manifest.append_manifest(output_path, record)
+        records, _ = manifest.read_manifest(
+            output_path / manifest.MANIFEST_NAME)
+        assert [r["output"] for r in records] == [
+            "2026-01-15T10/trigger01.hmc",
+            "2026-01-15T12/mj41_0001_recovered.hmc"]
+        assert records[1]["size"] == 20
+        assert records[1]["mtime"] == os.stat(source).st_mtime
+        assert records[1]["sha256"] == manifest.file_sha256(hmc)
+
+    def test_only_creator_adopts(self, manifest, tmp_path):
+        # An empty manifest is not adopted into again on the next append
+        manifest.append_manifest(tmp_path)
+        _archive(tmp_path, "2026-01-15T10/trigger01.hmc")
+        _archive(tmp_path, "2026-01-15T10/trigger02.hmc")
+        record = manifest.make_record(
+            tmp_path, "2026-01-15T10/trigger02.bin",
+            "2026-01-15T10/trigger02.hmc")
+        manifest.append_manifest(tmp_path, record)
+        records, _ = manifest.read_manifest(
+            tmp_path / manifest.MANIFEST_NAME)
+        assert [r["output"] for r in records] == [
+            "2026-01-15T10/trigger02.hmc"]
@@ -5,6 +5,7 @@ These tests mock brokkr and hamma dependencies to test the plugin logic
 without requiring those packages to be installed.
 """
 
+import concurrent.futures
 import datetime
 import importlib.util
 import os
@@ -64,13 +65,35 @@ def load_compress_module():
 
 MODULE, MOCK_HAMMA_COMPRESSION = load_compress_module()
 CompressData = MODULE.CompressData
+MANIFEST = MODULE.compress_manifest
 
 
 def make_step(source_path="/media/pi", **kwargs):
     """Create a CompressData instance with sensible test defaults."""
+    # In-process unless a test asks for a pool, so mocks stay in effect
+    kwargs.setdefault("max_workers", 1)
     return CompressData(source_path=source_path, **kwargs)
 
 
+def make_hour(root, name="2026-01-15T10", count=4):
+    """Create an old hour directory with count 1000-byte trigger files."""
+    hour = root / name
+    hour.mkdir()
+    for i in range(count):
+        (hour / "trigger{:02}.bin".format(i)).write_bytes(b"\x00" * 1000)
+    three_days_ago = time.time() - 3 * 86400
+    os.utime(hour, (three_days_ago, three_days_ago))
+    return hour
+
+
+def fake_compress_file(path, output_dir, method, step):
+    """Picklable stand-in for compress_file, for real worker processes."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    with open(os.path.join(output_dir, stem + ".hmc"), 'wb') as f:
+        f.write(b"HMC")
+    return [{'ratio': 0.07, 'method': method, 'pid': os.getpid()}]
+
+
 # --- Fixtures ---
 
 @pytest.fixture
@@ -747,3 +770,453 @@ class TestResumePosition:
         step = make_step(source_path=str(tmp_path))
         result = step._find_resume_position(tmp_path)
         assert result == "2026-01-15T10"
+
+
+class TestIOBudget:
+    """Tests for taking compression I/O from the shared budget."""
+
+    def test_disabled_by_default(self):
+        assert make_step().budget is None
+
+    def test_file_size_taken_before_compressing(self, tmp_path,
+                                                mock_compress_file):
+        mock_compress_file.return_value = [
+            {'ratio': 0.07, 'method': 'quantize'}]
+        budget_file = tmp_path / "budget.json"
+        step = make_step(source_path=str(tmp_path),
+                         io_budget=str(budget_file))
+        bin_file = tmp_path / "test.bin"
+        bin_file.write_bytes(b"\x00" * 100)
+        out_dir = tmp_path / "out"
+        out_dir.mkdir()
+
+        assert step._compress_file(bin_file, out_dir) is True
+        stats = step.budget.status()["consumers"]["compress"]
+        assert stats["bytes"] == 100
+        assert stats["takes"] == 1
+
+    def test_budget_wait_reset_each_pass(self, tmp_path):
+        step = make_step(source_path=str(tmp_path))
+        step.budget_wait = 12.0
+        with patch.object(step, "_is_quiet_time", return_value=True):
+            step.compress_old_files()
+        assert step.budget_wait == 0.0
+
+    def test_load_failure_compresses_without_budget(self):
+        with patch.object(MODULE, "load_io_budget",
+                          side_effect=FileNotFoundError("io_budget.py")):
+            step = make_step(io_budget=True)
+        assert step.budget is None
+        step.logger.warning.assert_called_once()
+
+
+class TestParallelCompression:
+    """Tests for compressing with a pool of worker processes."""
+
+    def test_default_leaves_one_core(self):
+        with patch.object(MODULE.os, "cpu_count", return_value=4):
+            assert CompressData(source_path="/media/pi").max_workers == 3
+        with patch.object(MODULE.os, "cpu_count", return_value=1):
+            assert MODULE.default_max_workers() == 1
+        assert make_step(max_workers=2).max_workers == 2
+
+    def test_single_worker_compresses_in_process(self):
+        assert make_step(max_workers=1)._make_pool() is None
+
+    def test_worker_processes(self, tmp_path):
+        hour = make_hour(tmp_path)
+        (tmp_path / "compressed" / hour.name).mkdir(parents=True)
+        (tmp_path / "compressed" / hour.name / "trigger00.hmc").write_bytes(
+            b"HMC")
+        step = make_step(source_path=str(tmp_path), max_workers=2,
+                         delete_originals=True)
+        step._is_quiet_time = lambda t: True
+        with patch.object(MODULE, "compress_file", fake_compress_file):
+            counts = step.compress_old_files()
+
+        assert counts == (3, 1, 0)
+        assert sorted(p.name for p in (tmp_path / "compressed"
+                                       / hour.name).iterdir()) == [
+            "trigger{:02}.hmc".format(i) for i in range(4)]
+        assert [p.name for p in hour.iterdir()] == ["trigger00.bin"]
+        assert step.bytes_compressed == 3000
+        assert step.compress_rate() > 0
+
+    def test_worker_errors_counted(self, tmp_path):
+        make_hour(tmp_path, count=2)
+        step = make_step(source_path=str(tmp_path), max_workers=2)
+        step._is_quiet_time = lambda t: True
+        with patch.object(MODULE, "compress_file", os.stat):
+            counts = step.compress_old_files()
+        assert counts == (0, 0, 2)
+        assert step.logger.error.call_count == 2
+
+    def test_quiet_hours_end_drains_in_flight(self, tmp_path):
+        make_hour(tmp_path, count=6)
+        step = make_step(source_path=str(tmp_path), max_workers=2)
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+        # Quiet for the directory check and the first three files
+        quiet = iter([True, True, True, True])
+        step._is_quiet_time = lambda t: next(quiet, False)
+        with patch.object(step, "_make_pool", return_value=pool), \
+             patch.object(MODULE, "compress_file",
+                          side_effect=fake_compress_file) as mock_cf:
+            counts = step.compress_old_files()
+
+        assert counts == (3, 0, 0)
+        assert mock_cf.call_count == 3
+        assert pool._shutdown
+        assert any("draining" in str(c)
+                   for c in step.logger.info.call_args_list)
+
+    def test_failed_submit_does_not_strand_others(self, tmp_path):
+        hour = make_hour(tmp_path, count=4)
+        step = make_step(source_path=str(tmp_path), max_workers=2)
+        step._is_quiet_time = lambda t: True
+        pool = concurrent.futures.ThreadPoolExecutor(max_workers=2)
+
+        def take_budget(bin_file):
+            if bin_file.name == "trigger01.bin":
+                raise OSError("budget file unreadable")
+
+        with patch.object(step, "_make_pool", return_value=pool), \
+             patch.object(step, "_take_budget", side_effect=take_budget), \
+             patch.object(MODULE, "compress_file", fake_compress_file):
+            counts = step.compress_old_files()
+        assert counts == (3, 0, 1)
+        assert sorted(p.name for p in (tmp_path / "compressed"
+                                       / hour.name).iterdir()
+                      if p.suffix == ".hmc") == [
+            "trigger00.hmc", "trigger02.hmc", "trigger03.hmc"]
+
+    def test_in_flight_limited_to_max_workers(self, tmp_path):
+        make_hour(tmp_path, count=5)
+        step = make_step(source_path=str(tmp_path), max_workers=2)
+        step._is_quiet_time = lambda t: True
+        in_flight = []
+        futures = []
+
+        class RecordingPool(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                in_flight.append(sum(not f.done() for f in futures))
+                future = super().submit(fn, *args, **kwargs)
+                futures.append(future)
+                return future
+
+        def slow_compress(*args, **kwargs):
+            time.sleep(0.02)
+            return fake_compress_file(*args, **kwargs)
+
+        with patch.object(step, "_make_pool",
+                          return_value=RecordingPool(max_workers=4)), \
+             patch.object(MODULE, "compress_file", slow_compress):
+            assert step.compress_old_files() == (5, 0, 0)
+        assert max(in_flight) <= 1
+
+    def test_pass_summary_reports_rate(self, tmp_path, mock_compress_file):
+        mock_compress_file.return_value = [
+            {'ratio': 0.07, 'method': 'quantize'}]
+        make_hour(tmp_path, count=2)
+        step = make_step(source_path=str(tmp_path), max_workers=1)
+        step._is_quiet_time = lambda t: True
+        step.execute({'time': MagicMock(value=datetime.datetime.utcnow())})
+        message, *args = step.logger.info.call_args_list[-1][0]
+        assert "MB/s" in message
+        assert args[:2] == [2, 2000 / 1e6]
+
+
+class TestManifest:
+    """Tests for the per-drive compression manifest."""
+
+    def _drive(self, tmp_path, count=2):
+        # A drive with one old hour directory of count trigger files
+        return make_hour(tmp_path, count=count)
+
+    def _run(self, tmp_path, **kwargs):
+        step = make_step(source_path=str(tmp_path), **kwargs)
+        step._is_quiet_time = lambda t: True
+        # Worker processes need the picklable function itself
+        fake = (fake_compress_file if step.max_workers > 1
+                else MagicMock(side_effect=fake_compress_file))
+        with patch.object(MODULE, "compress_file", fake):
+            counts = step.compress_old_files()
+        return step, counts, fake
+
+    def test_records_each_archive(self, tmp_path):
+        hour = self._drive(tmp_path)
+        step, counts, _ = self._run(tmp_path, step=4)
+        assert counts == (2, 0, 0)
+        records, offset = MANIFEST.read_manifest(
+            tmp_path / "compressed" / MANIFEST.MANIFEST_NAME)
+        assert offset > 0
+        assert [r["source"] for r in records] == [
+            hour.name + "/trigger00.bin", hour.name + "/trigger01.bin"]
+        record = records[0]
+        assert record["output"] == hour.name + "/trigger00.hmc"
+        assert record["size"] == 1000
+        assert record["mtime"] == (hour / "trigger00.bin").stat().st_mtime
+        assert record["output_size"] == 3
+        assert (record["method"], record["step"]) == ("quantize", 4)
+        assert record["duration"] >= 0
+        assert record["sha256"] == MANIFEST.file_sha256(
+            tmp_path / "compressed" / hour.name / "trigger00.hmc")
+
+    def test_skips_from_manifest_without_probing(self, tmp_path):
+        hour = self._drive(tmp_path)
+        step, _, _ = self._run(tmp_path, delete_originals=False)
+        # Archives moved off the drive (e.g. by a --cleanup sync)
+        for hmc in (tmp_path / "compressed" / hour.name).glob("*.hmc"):
+            hmc.unlink()
+        step._is_quiet_time = lambda t: True
+        with patch.object(MODULE, "compress_file") as mock_cf:
+            assert step.compress_old_files() == (0, 0, 0)
+        mock_cf.assert_not_called()
+
+    def test_manifest_read_incrementally(self, tmp_path):
+        self._drive(tmp_path, count=1)
+        step, _, _ = self._run(tmp_path)
+        output_path = tmp_path / "compressed"
+        records = step._load_manifest(output_path)
+        with patch.object(MANIFEST, "read_manifest",
+                          wraps=MANIFEST.read_manifest) as mock_read:
+            assert step._load_manifest(output_path) == records
+        offset = mock_read.call_args[0][1]
+        assert offset == (output_path / MANIFEST.MANIFEST_NAME).stat().st_size
+
+    def test_existing_archives_adopted(self, media_tree):
+        step, counts, mock_cf = self._run(media_tree)
+        assert counts == (1, 1, 0)
+        assert "trigger02" in mock_cf.call_args[0][0]
+        records, _ = MANIFEST.read_manifest(
+            media_tree / "compressed" / MANIFEST.MANIFEST_NAME)
+        adopted, compressed = records
+        assert adopted["source"] == "2026-01-15T10/trigger01.bin"
+        assert adopted["size"] == 100
+        assert adopted["sha256"] is None
+        assert adopted["method"] is None
+        assert compressed["source"] == "2026-01-15T10/trigger02.bin"
+        assert compressed["sha256"] is not None
+
+    def test_recovered_record_does_not_move_resume(self, tmp_path):
+        # A recovery into a later hour must not strand older raw hours
+        make_hour(tmp_path, "2026-01-15T10", count=1)
+        make_hour(tmp_path, "2026-01-15T11", count=1)
+        output_path = tmp_path / "compressed"
+        (output_path / "2026-01-15T12").mkdir(parents=True)
+        (output_path / "2026-01-15T12" / "mj41_0000_recovered.hmc"
+         ).write_bytes(b"HMC")
+        MANIFEST.append_manifest(output_path, MANIFEST.make_record(
+            output_path, "2026-01-15T12/mj41_0000_recovered.bin",
+            "2026-01-15T12/mj41_0000_recovered.hmc", recovered=True))
+        step, counts, mock_cf = self._run(tmp_path)
+        assert counts == (2, 0, 0)
+        assert (output_path / "2026-01-15T10" / "trigger00.hmc").exists()
+        assert (output_path / "2026-01-15T11" / "trigger00.hmc").exists()
+
+    def test_pool_records_duration(self, tmp_path):
+        self._drive(tmp_path, count=3)
+        self._run(tmp_path, max_workers=2)
+        records, _ = MANIFEST.read_manifest(
+            tmp_path / "compressed" / MANIFEST.MANIFEST_NAME)
+        assert len(records) == 3
+        assert all(r["duration"] >= 0 for r in records)
+
+
+class TestAdaptiveScheduler:
+    """Tests for AdaptiveScheduler's load signals and levels."""
+
+    Scheduler = MODULE.AdaptiveScheduler
+
+    def _scheduler(self, tmp_path, clock, live=None, **kwargs):
+        # Scheduler over fake /proc files, a fake clock and live counter
+        mounts = tmp_path / "mounts"
+        mounts.write_text("/dev/sda1 /media/pi/DATA01 ext4 rw 0 0\n"
+                          "/dev/sdb1 /media/pi/OTHER ext4 rw 0 0\n")
+        budget = None
+        if live is not None:
+            budget = MagicMock()
+            budget.status.side_effect = lambda: {
+                "live": {"writes": live[0], "bytes": 0}}
+        kwargs.setdefault("min_interval", 0)
+        with patch.object(MODULE, "PROC_MOUNTS", str(mounts)):
+            scheduler = self.Scheduler(
+                [Path("/media/pi/DATA01")], budget=budget, **kwargs)
+        fake_time = MagicMock(monotonic=lambda: clock[0])
+        return scheduler, patch.object(MODULE, "time", fake_time)
+
+    def _diskstats(self, tmp_path, io_ms, written=160):
+        path = tmp_path / "diskstats"
+        path.write_text(
+            "   8       1 sda1 10 0 80 5 20 0 {} 9 0 {} 14\n"
+            "   8      17 sdb1 10 0 80 5 20 0 160 9 0 99999 14\n".format(
+                written, io_ms))
+        return patch.object(MODULE, "PROC_DISKSTATS", str(path))
+
+    def test_finds_data_drive_devices(self, tmp_path):
+        scheduler, _ = self._scheduler(tmp_path, [0])
+        assert scheduler.devices == ["sda1"]
+
+    def test_trigger_rate_from_live_writes(self, tmp_path):
+        clock, live = [100.0], [50]
+        scheduler, fake_time = self._scheduler(tmp_path, clock, live=live)
+        with fake_time:
+            assert scheduler.sample()["trigger_rate"] is None
+            clock[0], live[0] = 110.0, 70
+            assert scheduler.sample()["trigger_rate"] == 2.0
+
+    def test_drive_busy_from_diskstats(self, tmp_path):
+        clock = [0.0]
+        scheduler, fake_time = self._scheduler(tmp_path, clock)
+        with fake_time, self._diskstats(tmp_path, 1000):
+            assert scheduler.sample()["drive_busy"] is None
+        clock[0] = 10.0
+        with fake_time, self._diskstats(tmp_path, 4000):
+            assert scheduler.sample()["drive_busy"] == pytest.approx(0.3)
+
+    @pytest.mark.parametrize("own_sectors, busy", [(2000, 0.0),
+                                                   (1000, 0.15)])
+    def test_drive_busy_excludes_own_io(self, tmp_path, own_sectors, busy):
+        # 2000 sectors written over the interval, own_sectors of them
+        # by compression itself
+        clock = [0.0]
+        scheduler, fake_time = self._scheduler(tmp_path, clock)
+        with fake_time, self._diskstats(tmp_path, 1000):
+            scheduler.sample(own_bytes=0)
+        clock[0] = 10.0
+        with fake_time, self._diskstats(tmp_path, 4000, written=2160):
+            signals = scheduler.sample(own_bytes=own_sectors * 512)
+        assert signals["drive_busy"] == pytest.approx(busy)
+
+    def test_load_excludes_own_workers(self, tmp_path):
+        scheduler, fake_time = self._scheduler(tmp_path, [0])
+        with fake_time, \
+             patch.object(MODULE.os, "getloadavg",
+                          return_value=(3.0, 2.0, 1.0)), \
+             patch.object(MODULE.os, "cpu_count", return_value=4):
+            assert scheduler.sample(own_workers=2)["load"] == 0.25
+            assert scheduler.sample(own_workers=5)["load"] == 0.0
+
+    def test_levels_with_hysteresis(self, tmp_path):
+        scheduler, fake_time = self._scheduler(
+            tmp_path, [0], max_load=None, max_drive_busy=None)
+        levels = []
+        with fake_time:
+            for rate in [0.2, 0.6, 1.2, 0.9, 0.6, 0.2]:
+                with patch.object(scheduler, "sample",
+                                  return_value={"trigger_rate": rate}):
+                    levels.append(scheduler.update())
+        assert levels == ["run", "throttle", "pause", "pause", "throttle",
+                          "run"]
+
+    def test_level_reused_within_min_interval(self, tmp_path):
+        clock = [0.0]
+        scheduler, fake_time = self._scheduler(tmp_path, clock,
+                                               min_interval=10)
+        with fake_time, patch.object(scheduler, "sample",
+                                     return_value={"load": 5.0}) as sample:
+            assert scheduler.update() == "pause"
+            scheduler._last_time = 0.0
+            clock[0] = 5.0
+            assert scheduler.update() == "pause"
+            assert sample.call_count == 1
+
+    def test_unknown_signals_ignored(self, tmp_path):
+        scheduler, _ = self._scheduler(tmp_path, [0])
+        scheduler.signals = {"trigger_rate": None, "load": 0.1,
+                             "drive_busy": None}
+        assert scheduler.worst_ratio() == pytest.approx(0.125)
+        assert "load 0.10 (limit 0.80)" in scheduler.describe()
+
+
+class TestAdaptiveSchedule:
+    """Tests for running CompressData on the adaptive schedule."""
+
+    def _step(self, tmp_path, levels, **kwargs):
+        # Step over one old hour of triggers with a scripted scheduler
+        make_hour(tmp_path, count=3)
+        kwargs.setdefault("schedule", "adaptive")
+        step = make_step(source_path=str(tmp_path), pause_poll=0, **kwargs)
+        scheduler = MagicMock(**{"update.side_effect": levels,
+                                 "describe.return_value": "load 2.00"})
+        return step, patch.object(step, "_make_scheduler",
+                                  return_value=scheduler)
+
+    def test_unknown_schedule_rejected(self):
+        with pytest.raises(ValueError):
+            make_step(schedule="sometimes")
+
+    def test_adaptive_ignores_quiet_hours(self, tmp_path, mock_compress_file):
+        mock_compress_file.side_effect = fake_compress_file
+        step, scheduler = self._step(tmp_path, ["run"] * 3)
+        night = datetime.datetime(2026, 1, 20, 3, 0, 0)  # outside 8-0
+        assert not step._is_quiet_time(night)
+        with scheduler:
+            step.execute({'time': MagicMock(value=night)})
+        assert mock_compress_file.call_count == 3
+        # Its own reads and writes are passed on, to discount from drive busy
+        own = [c.kwargs["own_bytes"]
+               for c in step._scheduler.update.call_args_list]
+        assert own[0] == 0
+        assert all(own[i] >= 1000 * i for i in range(3))
+        assert step.io_bytes == 3 * (1000 + len(b"HMC"))
+
+    def test_outer_bound_still_applies(self, tmp_path, mock_compress_file):
+        step, scheduler = self._step(
+            tmp_path, ["run"] * 3, schedule="adaptive_in_quiet_hours")
+        night = datetime.datetime(2026, 1, 20, 3, 0, 0)
+        with scheduler:
+            step.execute({'time': MagicMock(value=night)})
+        mock_compress_file.assert_not_called()
+
+    def test_pause_then_resume(self, tmp_path, mock_compress_file):
+        mock_compress_file.side_effect = fake_compress_file
+        step, scheduler = self._step(
+            tmp_path, ["run", "pause", "pause", "run", "run"])
+        with scheduler, patch.object(MODULE.time, "sleep") as mock_sleep:
+            assert step.compress_old_files() == (3, 0, 0)
+        assert mock_sleep.call_count == 2
+        messages = [c[0][0] for c in step.logger.info.call_args_list]
+        assert any("paused for load" in m for m in messages)
+        assert any("resuming" in m for m in messages)
+
+    def test_long_pause_ends_pass(self, tmp_path, mock_compress_file):
+        step, scheduler = self._step(tmp_path, ["pause"] * 10, max_pause=0)
+        with scheduler:
+            assert step.compress_old_files() == (0, 0, 0)
+        mock_compress_file.assert_not_called()
+        assert any("ending pass" in c[0][0]
+                   for c in step.logger.info.call_args_list)
+
+    def test_throttle_runs_one_at_a_time(self, tmp_path):
+        step, scheduler = self._step(tmp_path, ["throttle"] * 3,
+                                     max_workers=3)
+        in_flight = []
+        futures = []
+
+        class RecordingPool(concurrent.futures.ThreadPoolExecutor):
+            def submit(self, fn, *args, **kwargs):
+                in_flight.append(sum(not f.done() for f in futures))
+                future = super().submit(fn, *args, **kwargs)
+                futures.append(future)
+                return future
+
+        def slow_compress(*args, **kwargs):
+            time.sleep(0.02)
+            return fake_compress_file(*args, **kwargs)
+
+        with scheduler, \
+             patch.object(step, "_make_pool",
+                          return_value=RecordingPool(max_workers=3)), \
+             patch.object(MODULE, "compress_file", slow_compress):
+            assert step.compress_old_files() == (3, 0, 0)
+        assert in_flight == [0, 0, 0]
+
+    def test_scheduler_watches_data_drives(self, tmp_path):
+        (tmp_path / "DATA01").mkdir()
+        step = make_step(source_path=str(tmp_path), drive_glob="DATA??",
+                         schedule="adaptive")
+        scheduler = step._make_scheduler()
+        assert isinstance(scheduler, MODULE.AdaptiveScheduler)
+        assert scheduler.limits == {"trigger_rate": 1.0, "load": 0.8,
+                                    "drive_busy": 0.6}
+        assert make_step()._make_scheduler() is None
@@ -3,6 +3,7 @@
 import importlib.util
 import pathlib
 import subprocess
+import sys
 from unittest.mock import patch, MagicMock
 
 import pytest
@@ -12,12 +13,16 @@ SCRIPT_PATH = REPO_ROOT / "scripts" / "hamma_download.py"
 
 
 def load_hamma_download():
-    """Load hamma_download module from scripts/."""
-    spec = importlib.util.spec_from_file_location(
-        "hamma_download", str(SCRIPT_PATH),
-    )
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    """Load hamma_download module (siblings imported from scripts/)."""
+    sys.path.insert(0, str(SCRIPT_PATH.parent))
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "hamma_download", str(SCRIPT_PATH),
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(SCRIPT_PATH.parent))
     return module
 
 
@@ -279,6 +284,8 @@ class TestDownload:
 
         with patch.object(hamma_download, "_discover_drives", return_value=["DATA37", "DATA38"]), \
              patch.object(hamma_download, "_list_remote_dirs", return_value=["2025-11-05T05"]), \
+             patch.object(hamma_download, "_read_remote_manifest",
+                          return_value=None), \
              patch("subprocess.run", return_value=mock_rsync) as mock_run:
             hamma_download.download(
                 sensor=41, dest="/tmp/test", start="2025-11-05T05",
@@ -324,6 +331,8 @@ class TestDownload:
              patch.object(hamma_download, "_list_remote_dirs", return_value=[
                  "2025-11-05T00", "2025-11-05T05", "2025-11-05T12",
              ]), \
+             patch.object(hamma_download, "_read_remote_manifest",
+                          return_value=None), \
              patch("subprocess.run", return_value=mock_rsync) as mock_run:
             hamma_download.download(
                 sensor=41, dest="/tmp/test", start="2025-11-05",
@@ -498,6 +507,8 @@ class TestSync:
                           return_value=["DATA37", "DATA38"]), \
              patch.object(hamma_download, "_list_remote_dirs",
                           return_value=["2026-03-16T08"]), \
+             patch.object(hamma_download, "_read_remote_manifest",
+                          return_value=None), \
              patch("subprocess.run", return_value=mock_rsync) as mock_run:
             hamma_download.sync(sensor=41, dest="/tmp/test")
 
@@ -566,3 +577,86 @@ class TestSyncCLI:
             with pytest.raises(SystemExit) as exc_info:
                 hamma_download.main()
             assert exc_info.value.code != 0
+
+
+class TestManifest:
+    """Tests for transferring the archives listed in drive manifests."""
+
+    RECORDS = [
+        {"source": "2026-03-15T08/a.bin", "output": "2026-03-15T08/a.hmc"},
+        {"source": "2026-03-15T08/b.bin", "output": "2026-03-15T08/b.hmc"},
+        {"source": "2026-03-16T12/c.bin", "output": "2026-03-16T12/c.hmc"},
+    ]
+
+    def _rsync(self):
+        mock_rsync = MagicMock()
+        mock_rsync.returncode = 0
+        mock_rsync.stderr = ""
+        return mock_rsync
+
+    def test_read_remote_manifest(self, hamma_download):
+        text = ('{"source": "x/a.bin", "output": "x/a.hmc"}\n'
+                '{"source": "x/b.bin"}\n'
+                '{"output": "x/b.hmc"}\n'
+                'not json\n'
+                '{"source": "x/d.bin", "output": "x/d.hmc"}\n'
+                '{"source": "x/c.bin", "out')
+        with patch.object(hamma_download, "_ssh_run",
+                          return_value=text) as mock_ssh:
+            records = hamma_download._read_remote_manifest(41, "DATA37")
+        assert [r["output"] for r in records] == ["x/a.hmc", "x/d.hmc"]
+        assert mock_ssh.call_args[0][1] == \
+            "cat /media/pi/DATA37/compressed/manifest.jsonl"
+
+    def test_missing_or_empty_manifest_is_none(self, hamma_download):
+        with patch.object(hamma_download, "_ssh_run",
+                          side_effect=RuntimeError("No such file")):
+            assert hamma_download._read_remote_manifest(41, "DATA37") is None
+        with patch.object(hamma_download, "_ssh_run", return_value=""):
+            assert hamma_download._read_remote_manifest(41, "DATA37") is None
+
+    def test_sync_transfers_listed_files(self, hamma_download):
+        with patch.object(hamma_download, "_discover_drives",
+                          return_value=["DATA37"]), \
+             patch.object(hamma_download, "_read_remote_manifest",
+                          return_value=self.RECORDS), \
+             patch.object(hamma_download, "_list_remote_dirs") as mock_list, \
+             patch("subprocess.run", return_value=self._rsync()) as mock_run:
+            rc = hamma_download.sync(sensor=41, dest="/tmp/test",
+                                     cleanup=True)
+
+        assert rc == 0
+        mock_list.assert_not_called()
+        cmd = mock_run.call_args[0][0]
+        assert "--files-from=-" in cmd
+        assert "--ignore-missing-args" in cmd
+        assert "--remove-source-files" in cmd
+        assert cmd[-2:] == [
+            "datasync@localhost:/media/pi/DATA37/compressed/", "/tmp/test"]
+        assert mock_run.call_args[1]["input"] == (
+            "2026-03-15T08/a.hmc\n2026-03-15T08/b.hmc\n2026-03-16T12/c.hmc\n")
+
+    def test_download_filters_manifest_by_date(self, hamma_download):
+        with patch.object(hamma_download, "_discover_drives",
+                          return_value=["DATA37"]), \
+             patch.object(hamma_download, "_read_remote_manifest",
+                          return_value=self.RECORDS), \
+             patch("subprocess.run", return_value=self._rsync()) as mock_run:
+            rc = hamma_download.download(sensor=41, dest="/tmp/test",
+                                         start="2026-03-16")
+
+        assert rc == 0
+        assert mock_run.call_args[1]["input"] == "2026-03-16T12/c.hmc\n"
+        assert "--remove-source-files" not in mock_run.call_args[0][0]
+
+    def test_raw_download_ignores_manifest(self, hamma_download):
+        with patch.object(hamma_download, "_discover_drives",
+                          return_value=["DATA37"]), \
+             patch.object(hamma_download, "_read_remote_manifest") \
+                as mock_manifest, \
+             patch.object(hamma_download, "_list_remote_dirs",
+                          return_value=["2026-03-16T12"]), \
+             patch("subprocess.run", return_value=self._rsync()):
+            hamma_download.download(sensor=41, dest="/tmp/test",
+                                    start="2026-03-16", compressed=False)
+        mock_manifest.assert_not_called()
@@ -1,13 +1,18 @@
 """Tests for hamma_scrub module."""
 
+import hashlib
 import importlib.util
 import io
 import json
 import os
 import pathlib
+import shutil
 import struct
 import subprocess
+import sys
+import threading
 import time
+from datetime import datetime, timezone
 
 import pytest
 from unittest.mock import patch, MagicMock
@@ -47,15 +52,20 @@ def _make_gps_header(week=2412, tow=522847.0, utc_offset=18.0,
 
 REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
 SCRIPT_PATH = REPO_ROOT / "scripts" / "hamma_scrub.py"
+CORPUS_PATH = REPO_ROOT / "tests" / "benchmarks" / "corpus.py"
 
 
 def load_hamma_scrub():
-    """Load hamma_scrub module from scripts/."""
-    spec = importlib.util.spec_from_file_location(
-        "hamma_scrub", str(SCRIPT_PATH),
-    )
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
+    """Load hamma_scrub module (siblings imported from scripts/)."""
+    sys.path.insert(0, str(SCRIPT_PATH.parent))
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "hamma_scrub", str(SCRIPT_PATH),
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(str(SCRIPT_PATH.parent))
     return module
 
 
@@ -174,6 +184,83 @@ class TestExtractHeaders:
         assert len(results) == 0
 
 
+def _corrupted_ags_data(noise_len=20000):
+    """Triggers separated by sync-free noise, bad datasizes and a split sync."""
+    data = b''
+    for i in range(3):
+        hdr, rest = _make_trigger()
+        hdr = bytearray(hdr)
+        hdr[50] = i
+        data += bytes(hdr) + rest
+    data += bytes(range(0x10, 0xf0)) * (noise_len // 224)
+    bad = bytearray(_make_trigger()[0])
+    struct.pack_into('<I', bad, 10, 0)  # datasize 0 forces a resync
+    data += bytes(bad)
+    data += b'\x00' * 1000
+    for i in range(3, 6):
+        hdr, rest = _make_trigger()
+        hdr = bytearray(hdr)
+        hdr[50] = i
+        data += bytes(hdr) + rest
+    return data + SYNC_MARKER[:2]  # partial sync at EOF
+
+
+class TestMmapExtraction:
+    """Test the mmap extractor against the seek/read fallback."""
+
+    def _offsets(self, results):
+        return [(r["offset"], r["index"], r["header"]) for r in results]
+
+    def test_mmap_matches_fallback(self, hamma_scrub, tmp_path):
+        data = _corrupted_ags_data()
+        path = tmp_path / "ags.bin"
+        path.write_bytes(data)
+        fallback = hamma_scrub.extract_headers(io.BytesIO(data), len(data),
+                                               "ags.bin")
+        with open(str(path), 'rb') as f:
+            assert hamma_scrub._map_file(f, len(data)) is not None
+            mapped = hamma_scrub.extract_headers(f, len(data), "ags.bin")
+        assert len(mapped) == 6
+        assert self._offsets(mapped) == self._offsets(fallback)
+
+    @pytest.mark.parametrize("shift", [0, 1, 2, 3, 4])
+    def test_sync_split_across_window(self, hamma_scrub, tmp_path, shift):
+        window = 4096
+        data = _corrupted_ags_data()
+        # Windows start at the first resync position (just past the third
+        # trigger) and advance by window - 3; shift the first post-noise
+        # sync marker so it straddles the end of a window
+        resync_start = 3 * 332 + 1
+        first = data.index(SYNC_MARKER, resync_start)
+        stop = resync_start + window
+        while stop - 4 + shift < first:
+            stop += window - 3
+        pad = stop - 4 + shift - first
+        data = data[:first] + b'\x00' * pad + data[first:]
+        path = tmp_path / "ags.bin"
+        path.write_bytes(data)
+        fallback = hamma_scrub.extract_headers(io.BytesIO(data), len(data),
+                                               "ags.bin")
+        with patch.object(hamma_scrub, "RESYNC_WINDOW", window), \
+             open(str(path), 'rb') as f:
+            mapped = hamma_scrub.extract_headers(f, len(data), "ags.bin")
+        assert self._offsets(mapped) == self._offsets(fallback)
+
+    def test_strider_matches_local_extraction(self, hamma_scrub, tmp_path):
+        data = _corrupted_ags_data()
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        (ags / "a.bin").write_bytes(data)
+        script = tmp_path / "strider.py"
+        script.write_text(hamma_scrub.STRIDER_SCRIPT.replace(
+            "WINDOW = 16777216", "WINDOW = 4096"))
+        out = subprocess.run([sys.executable, str(script), str(ags)],
+                             stdout=subprocess.PIPE, check=True).stdout
+        remote = hamma_scrub.decode_strider_output(out)
+        local = hamma_scrub.extract_headers(io.BytesIO(data), len(data), "a.bin")
+        assert self._offsets(remote) == self._offsets(local)
+
+
 class TestScanMjFiles:
     """Test local mjolnir .bin file scanning."""
 
@@ -203,6 +290,58 @@ class TestScanMjFiles:
         assert len(result["headers"]) == 2
         assert result["file_count"] == 2
 
+    def test_duplicates_across_drives(self, hamma_scrub, tmp_path):
+        """A header on two drives counts as one duplicate after merging."""
+        hdr, rest = _make_trigger()
+        for drive_name in ["DATA37", "DATA38"]:
+            d = tmp_path / drive_name / "2026-04-10T14"
+            d.mkdir(parents=True)
+            (d / "mj05_2026-04-10_14-00-00-000.bin").write_bytes(hdr + rest)
+        result = hamma_scrub.scan_mj_files(str(tmp_path))
+        assert result["file_count"] == 2
+        assert result["duplicate_count"] == 1
+
+    def test_drives_scanned_concurrently(self, hamma_scrub, tmp_path):
+        """Each drive gets its own worker thread."""
+        for drive_name in ["DATA37", "DATA38", "DATA39"]:
+            (tmp_path / drive_name / "2026-04-10T14").mkdir(parents=True)
+        barrier = threading.Barrier(3, timeout=5)
+        real_list = hamma_scrub._list_mj_bin_files
+
+        def list_files(drive, since):
+            barrier.wait()  # deadlocks (then times out) if run serially
+            return real_list(drive, since)
+
+        with patch.object(hamma_scrub, "_list_mj_bin_files",
+                          side_effect=list_files):
+            result = hamma_scrub.scan_mj_files(str(tmp_path))
+        assert [d["drive"] for d in result["drives"]] == [
+            "DATA37", "DATA38", "DATA39"]
+
+    def test_per_drive_throughput(self, hamma_scrub, tmp_path):
+        d = tmp_path / "DATA37" / "2026-04-10T14"
+        d.mkdir(parents=True)
+        for i in range(3):
+            hdr, rest = _make_trigger()
+            hdr = bytearray(hdr)
+            hdr[50] = i
+            (d / "mj05_{}.bin".format(i)).write_bytes(bytes(hdr) + rest)
+        result = hamma_scrub.scan_mj_files(str(tmp_path))
+        stats = result["drives"][0]
+        assert stats["files"] == 3
+        assert stats["bytes"] == 3 * (128 + TEST_DATASIZE * 2 + 4)
+        assert stats["files_per_sec"] > 0
+        assert stats["mb_per_sec"] > 0
+
+    def test_skips_hidden_temp_files(self, hamma_scrub, tmp_path):
+        """In-progress .tmp_recover_*.bin files are not scanned."""
+        d = tmp_path / "DATA37" / "2026-04-10T14"
+        d.mkdir(parents=True)
+        hdr, rest = _make_trigger()
+        (d / ".tmp_recover_x.bin").write_bytes(hdr + rest)
+        result = hamma_scrub.scan_mj_files(str(tmp_path))
+        assert result["file_count"] == 0
+
     def test_skips_hmc_files(self, hamma_scrub, tmp_path):
         """Compressed .hmc files are ignored."""
         drive = tmp_path / "DATA37" / "compressed" / "2026-04-10T14"
@@ -300,6 +439,138 @@ class TestScanMjFiles:
         assert result["dirs_skipped"] == 0
 
 
+class TestMjHeaderCache:
+    """Test the persistent per-drive MJ header cache."""
+
+    def _make_tree(self, tmp_path, count=3):
+        drive = tmp_path / "media" / "DATA37" / "2026-04-10T14"
+        drive.mkdir(parents=True)
+        headers = []
+        for i in range(count):
+            hdr, rest = _make_trigger()
+            hdr = bytearray(hdr)
+            hdr[50] = i
+            headers.append(bytes(hdr))
+            (drive / "mj05_{:03d}.bin".format(i)).write_bytes(bytes(hdr) + rest)
+        return tmp_path / "media", headers
+
+    def test_first_scan_all_misses(self, hamma_scrub, tmp_path):
+        media, headers = self._make_tree(tmp_path)
+        cache_dir = tmp_path / "cache"
+        result = hamma_scrub.scan_mj_files(str(media), cache_dir=str(cache_dir))
+        assert result["headers"] == set(headers)
+        assert result["cache"]["hits"] == 0
+        assert result["cache"]["misses"] == 3
+        assert (cache_dir / "mj_DATA37.cache").exists()
+
+    def test_repeat_scan_does_not_open_files(self, hamma_scrub, tmp_path):
+        media, headers = self._make_tree(tmp_path)
+        cache_dir = str(tmp_path / "cache")
+        hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        with patch.object(hamma_scrub, "open", create=True,
+                          side_effect=open) as mock_open:
+            result = hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        opened = [c[0][0] for c in mock_open.call_args_list]
+        assert not [p for p in opened if p.endswith(".bin")]
+        assert result["headers"] == set(headers)
+        assert result["cache"]["hits"] == 3
+        assert result["cache"]["misses"] == 0
+
+    def test_changed_file_is_reread(self, hamma_scrub, tmp_path):
+        media, headers = self._make_tree(tmp_path)
+        cache_dir = str(tmp_path / "cache")
+        hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        target = media / "DATA37" / "2026-04-10T14" / "mj05_000.bin"
+        new_hdr, rest = _make_trigger()
+        new_hdr = bytearray(new_hdr)
+        new_hdr[50] = 77
+        target.write_bytes(bytes(new_hdr) + rest + b'\x00')
+        result = hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        assert bytes(new_hdr) in result["headers"]
+        assert headers[0] not in result["headers"]
+        assert result["cache"]["misses"] == 1
+        assert result["cache"]["hits"] == 2
+
+    def test_swapped_drive_invalidates(self, hamma_scrub, tmp_path):
+        media, headers = self._make_tree(tmp_path)
+        cache_dir = str(tmp_path / "cache")
+        hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        with patch.object(hamma_scrub, "_drive_identity", return_value="other"):
+            result = hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        assert result["cache"]["invalidated"] == ["DATA37"]
+        assert result["cache"]["hits"] == 0
+        assert result["headers"] == set(headers)
+
+    def test_volume_uuid_of_mounted_device(self, hamma_scrub, tmp_path):
+        by_uuid = tmp_path / "by-uuid"
+        by_uuid.mkdir()
+        devices = {"1A2B-3C4D": 2049, "5E6F-7A8B": 2065}
+        for name in devices:
+            (by_uuid / name).write_bytes(b"")
+        drive = str(tmp_path / "DATA37")
+
+        def fake_stat(path, *args, **kwargs):
+            if path == drive:
+                return MagicMock(st_dev=2065)
+            return MagicMock(st_rdev=devices[os.path.basename(path)])
+
+        with patch.object(hamma_scrub, "DISK_BY_UUID", str(by_uuid)), \
+             patch.object(hamma_scrub.os, "stat", side_effect=fake_stat):
+            assert hamma_scrub._volume_uuid(drive) == "5E6F-7A8B"
+            devices["5E6F-7A8B"] = 2081
+            assert hamma_scrub._volume_uuid(drive) is None
+
+    def test_identity_is_volume_and_size(self, hamma_scrub, tmp_path):
+        # No device numbers, which change when the drive is re-plugged
+        vfs = os.statvfs(str(tmp_path))
+        with patch.object(hamma_scrub, "_volume_uuid",
+                          return_value="1A2B-3C4D"):
+            identity = hamma_scrub._drive_identity(str(tmp_path))
+        assert identity == "1A2B-3C4D:{}".format(
+            vfs.f_blocks * vfs.f_frsize)
+
+    def test_corrupt_cache_discarded(self, hamma_scrub, tmp_path):
+        media, headers = self._make_tree(tmp_path)
+        cache_dir = tmp_path / "cache"
+        cache_dir.mkdir()
+        (cache_dir / "mj_DATA37.cache").write_bytes(b"garbage")
+        result = hamma_scrub.scan_mj_files(str(media), cache_dir=str(cache_dir))
+        assert result["cache"]["invalidated"] == ["DATA37"]
+        assert result["headers"] == set(headers)
+
+    def test_since_keeps_unvisited_entries(self, hamma_scrub, tmp_path):
+        media, headers = self._make_tree(tmp_path)
+        new_dir = media / "DATA37" / "2026-04-12T00"
+        new_dir.mkdir()
+        hdr, rest = _make_trigger()
+        (new_dir / "mj05_new.bin").write_bytes(hdr + rest)
+        cache_dir = str(tmp_path / "cache")
+        hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        hamma_scrub.scan_mj_files(str(media), since="2026-04-11T00",
+                                  cache_dir=cache_dir)
+        result = hamma_scrub.scan_mj_files(str(media), cache_dir=cache_dir)
+        assert result["cache"]["hits"] == 4
+        assert result["cache"]["misses"] == 0
+
+    def test_no_cache_dir_reports_none(self, hamma_scrub, tmp_path):
+        media, _ = self._make_tree(tmp_path)
+        result = hamma_scrub.scan_mj_files(str(media))
+        assert result["cache"] is None
+
+    def test_cache_stats_in_json_report(self, hamma_scrub):
+        results = {
+            "ags_triggers": 1, "ags_files": 1, "ags_elapsed": 1.0,
+            "mj_triggers": 1, "mj_files_scanned": 1,
+            "mj_duplicate_count": 0, "mj_elapsed": 1.0,
+            "mj_cache": {"hits": 5, "misses": 2, "invalidated": []},
+            "matched": 1, "missing_on_mj": [], "mj_only_count": 0,
+        }
+        parsed = json.loads(hamma_scrub.format_json_report(results, "hamma"))
+        assert parsed["mj_cache"] == {"hits": 5, "misses": 2, "invalidated": []}
+        assert "MJ cache: 5 hits, 2 misses" in \
+            hamma_scrub.format_human_report(results)
+
+
 class TestParseSince:
     """Test --since date parsing."""
 
@@ -367,6 +638,12 @@ class TestStriderProtocol:
         assert len(entries) == 0
 
 
+def _mktemp_result():
+    """Result of the remote ``mktemp -d`` that precedes each deploy."""
+    return MagicMock(returncode=0, stderr=b'',
+                     stdout=b'/tmp/hamma_scrub.ab12CD34\n')
+
+
 class TestScanAgsFiles:
     """Test SSH-based AGS scanning."""
 
@@ -376,8 +653,9 @@ class TestScanAgsFiles:
         mock_result.returncode = 0
         mock_result.stdout = b''
         mock_result.stderr = b''
-
-        with patch("subprocess.run", return_value=mock_result) as mock_run, \
+        with patch("subprocess.run",
+                   side_effect=[_mktemp_result(), mock_result,
+                                mock_result]) as mock_run, \
              patch("tempfile.mkstemp",
                    return_value=(99, "/tmp/local_strider.py")), \
              patch("os.write") as mock_write, \
@@ -386,22 +664,27 @@ class TestScanAgsFiles:
              patch("os.unlink") as mock_unlink:
             result = hamma_scrub.scan_ags_files("10.10.10.1", "/ags/data")
 
-        # Two subprocess.run calls: SCP deploy + SSH run
-        assert mock_run.call_count == 2
-        scp_call = mock_run.call_args_list[0]
-        run_call = mock_run.call_args_list[1]
+        # Three subprocess.run calls: remote mktemp, SCP deploy, SSH run
+        assert mock_run.call_count == 3
+        mktemp_call, scp_call, run_call = mock_run.call_args_list
+
+        # A private directory per run, so concurrent scrubs never collide
+        assert mktemp_call[0][0] == [
+            "ssh", "10.10.10.1", "mktemp -d /tmp/hamma_scrub.XXXXXXXX"]
 
         # SCP deploys the strider script
         assert scp_call[0][0] == [
             "scp", "-q", "/tmp/local_strider.py",
-            "10.10.10.1:/tmp/hamma_strider.py",
+            "10.10.10.1:/tmp/hamma_scrub.ab12CD34/hamma_strider.py",
         ]
 
-        # SSH runs the deployed script (no stdin piping)
+        # SSH runs the deployed script (no stdin piping), keeping its exit
+        # status past the cleanup
         assert run_call[0][0] == [
             "ssh", "10.10.10.1",
-            "python3 /tmp/hamma_strider.py /ags/data; "
-            "rm -f /tmp/hamma_strider.py",
+            "python3 /tmp/hamma_scrub.ab12CD34/hamma_strider.py /ags/data "
+            "--index .hamma_strider_index.json; rc=$?; "
+            "rm -rf /tmp/hamma_scrub.ab12CD34; exit $rc",
         ]
 
         # Local temp file written and cleaned up
@@ -426,7 +709,8 @@ class TestScanAgsFiles:
         mock_result.stdout = raw
         mock_result.stderr = b''
 
-        with patch("subprocess.run", return_value=mock_result):
+        with patch("subprocess.run", side_effect=[
+                _mktemp_result(), mock_result, mock_result]):
             result = hamma_scrub.scan_ags_files("10.10.10.1", "/ags/data")
 
         assert len(result["entries"]) == 1
@@ -440,7 +724,8 @@ class TestScanAgsFiles:
         fail_result.stdout = b''
         fail_result.stderr = b'No route to host'
 
-        with patch("subprocess.run", return_value=fail_result):
+        with patch("subprocess.run", side_effect=[
+                _mktemp_result(), fail_result, fail_result]):
             with pytest.raises(RuntimeError, match="Failed to deploy strider"):
                 hamma_scrub.scan_ags_files("10.10.10.1", "/ags/data")
 
@@ -457,7 +742,7 @@ class TestScanAgsFiles:
         fail_result.stderr = b'Connection refused'
 
         with patch("subprocess.run",
-                   side_effect=[ok_result, fail_result]):
+                   side_effect=[_mktemp_result(), ok_result, fail_result]):
             with pytest.raises(RuntimeError, match="Connection refused"):
                 hamma_scrub.scan_ags_files("10.10.10.1", "/ags/data")
 
@@ -477,7 +762,8 @@ class TestScanAgsFiles:
         mock_result.stdout = raw
         mock_result.stderr = b''
 
-        with patch("subprocess.run", return_value=mock_result):
+        with patch("subprocess.run", side_effect=[
+                _mktemp_result(), mock_result, mock_result]):
             result = hamma_scrub.scan_ags_files("10.10.10.1", "/ags/data")
 
         assert len(result["entries"]) == 3
@@ -485,6 +771,459 @@ class TestScanAgsFiles:
         assert result["duplicate_count"] == 2
 
 
+def _write_ags_file(path, count, start=0):
+    """Append `count` unique small triggers to an AGS-style file."""
+    with open(str(path), 'ab') as f:
+        for i in range(start, start + count):
+            hdr, rest = _make_trigger()
+            hdr = bytearray(hdr)
+            struct.pack_into('<I', hdr, 60, i)
+            f.write(bytes(hdr) + rest)
+
+
+def _run_local_strider(hamma_scrub, tmp_path):
+    """Return a _run_strider replacement that runs the script locally."""
+    script = tmp_path / "strider.py"
+    script.write_text(hamma_scrub.STRIDER_SCRIPT)
+    calls = []
+
+    def run_strider(ags_host, ags_path, extra_args=""):
+        calls.append(extra_args)
+        args = extra_args.split()
+        for flag in ("--checkpoint", "--index"):
+            if flag in args:
+                i = args.index(flag) + 1
+                args[i] = str(tmp_path / args[i])
+        out = subprocess.run(
+            ["python3", str(script), ags_path] + args,
+            stdout=subprocess.PIPE, check=True,
+        )
+        return out.stdout
+
+    return run_strider, calls
+
+
+class TestStriderCheckpoint:
+    """Test the checkpointed, resumable strider and local mirror."""
+
+    def test_resume_only_walks_new_triggers(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            first = hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+            _write_ags_file(ags / "a.bin", 2, start=3)
+            second = hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+        assert len(first["entries"]) == 3
+        assert first["checkpoint"]["new_entries"] == 3
+        assert len(second["entries"]) == 5
+        assert second["checkpoint"]["new_entries"] == 2
+        assert second["checkpoint"]["files_resumed"] == 1
+        assert [e["index"] for e in second["entries"]] == [0, 1, 2, 3, 4]
+        full = hamma_scrub.decode_strider_output(
+            run_strider("hamma", str(ags)))
+        assert second["entries"] == full
+
+    def test_missing_mirror_forces_reset(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        run_strider, calls = _run_local_strider(hamma_scrub, tmp_path)
+        cache = tmp_path / "cache"
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=str(cache))
+            for mirror in cache.glob("ags_*.mirror"):
+                mirror.unlink()
+            result = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                                cache_dir=str(cache))
+        assert len(result["entries"]) == 3
+        assert all("--reset" in c for c in calls)
+
+    def test_stale_mirror_triggers_full_walk(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        run_strider, calls = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        mirror_path = hamma_scrub._ags_mirror_path(cache, "hamma")
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+            table = hamma_scrub.load_ags_mirror(mirror_path)
+            hamma_scrub.save_ags_mirror(mirror_path, table[:1])
+            result = hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+        assert len(result["entries"]) == 3
+        assert "--reset" not in calls[1]
+        assert "--reset" in calls[2]
+
+    def test_replaced_file_is_rewalked(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+            (ags / "a.bin").unlink()
+            _write_ags_file(ags / "b.bin", 1)
+            _write_ags_file(ags / "a.bin", 4, start=10)
+            result = hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+        by_file = {}
+        for e in result["entries"]:
+            by_file.setdefault(e["filename"], []).append(e)
+        assert len(by_file["a.bin"]) == 4
+        assert len(by_file["b.bin"]) == 1
+
+    def test_deleted_file_dropped(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 2)
+        _write_ags_file(ags / "b.bin", 2)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+            (ags / "a.bin").unlink()
+            result = hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+        assert {e["filename"] for e in result["entries"]} == {"b.bin"}
+
+    def test_mirror_round_trip(self, hamma_scrub, tmp_path):
+        entries = [{"filename": "b.bin", "offset": i * 100, "index": i,
+                    "header": SYNC_MARKER + bytes([i]) * 124}
+                   for i in range(3)]
+        table = hamma_scrub.AgsEntryTable.from_entries(entries)
+        # A file the strider listed without any triggers yet
+        table = hamma_scrub.AgsEntryTable(["a.bin", "b.bin"],
+                                          table.rows.copy())
+        table.rows["file_id"] = 1
+        path = str(tmp_path / "ags_hamma.mirror")
+        hamma_scrub.save_ags_mirror(path, table)
+        loaded = hamma_scrub.load_ags_mirror(path)
+        assert loaded.filenames == ["a.bin", "b.bin"]
+        assert list(loaded) == entries
+        with open(path, 'ab') as f:
+            f.write(b'\x00' * 10)
+        assert not hamma_scrub.load_ags_mirror(path).filenames
+
+    def test_cached_scan_returns_table(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+            _write_ags_file(ags / "a.bin", 1, start=3)
+            result = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                                cache_dir=cache, as_table=True)
+        assert isinstance(result["entries"], hamma_scrub.AgsEntryTable)
+        assert [e["index"] for e in result["entries"]] == [0, 1, 2, 3]
+        assert result["checkpoint"]["cached_entries"] == 3
+
+    def test_decode_skips_file_records(self, hamma_scrub):
+        raw = b'\x00a.bin\x00' + struct.pack('<QQQIB', 1, 2, 0, 0, 1)
+        raw += b'a.bin\x00' + struct.pack('<QI', 0, 0) + SYNC_MARKER + b'\x00' * 124
+        entries = hamma_scrub.decode_strider_output(raw)
+        assert len(entries) == 1
+        assert entries[0]["filename"] == "a.bin"
+
+
+class TestStriderIndex:
+    """Test the remote per-file GPS range index and --since-epoch."""
+
+    def _setup(self, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        # 2026-04-04 and 2026-04-11
+        _write_gps_ags_file(ags / "old.bin", [_make_gps_header()] * 2)
+        _write_gps_ags_file(ags / "new.bin",
+                            [_make_gps_header(week=2413)] * 3)
+        return ags
+
+    def _since(self, hamma_scrub):
+        return hamma_scrub._since_epoch("2026-04-10T00")
+
+    def test_since_epoch(self, hamma_scrub):
+        assert self._since(hamma_scrub) == 1775779200
+
+    def test_old_unchanged_file_skipped(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, calls = _run_local_strider(hamma_scrub, tmp_path)
+        since = self._since(hamma_scrub)
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            # The first walk has no index yet, so it reads everything
+            first = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                               since_epoch=since)
+            second = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                                since_epoch=since)
+        assert len(first["entries"]) == 5
+        assert first["skipped_files"] == []
+        assert {e["filename"] for e in second["entries"]} == {"new.bin"}
+        skipped = second["skipped_files"]
+        assert [(r["filename"], r["count"]) for r in skipped] == [
+            ("old.bin", 2)]
+        assert skipped[0]["last_time"] < since
+        assert "--since-epoch 1775779200" in calls[1]
+        index = json.loads((tmp_path / hamma_scrub.AGS_INDEX_PATH)
+                           .read_text())
+        assert index["old.bin"]["count"] == 2
+
+    def test_changed_or_gpsless_file_walked(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        _write_gps_ags_file(ags / "nogps.bin",
+                            [_make_gps_header(week=0, tow=0.0)])
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        since = self._since(hamma_scrub)
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags))
+            with open(str(ags / "old.bin"), 'ab') as f:
+                f.write((ags / "old.bin").read_bytes()[:128 + 2 * TEST_DATASIZE
+                                                        + 4])
+            result = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                                since_epoch=since)
+        assert result["skipped_files"] == []
+        assert len(result["entries"]) == 7
+
+    def test_checkpoint_mirror_keeps_skipped_files(self, hamma_scrub,
+                                                   tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, calls = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        since = self._since(hamma_scrub)
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache)
+            recent = hamma_scrub.scan_ags_files(
+                "hamma", str(ags), cache_dir=cache, since_epoch=since)
+            full = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                              cache_dir=cache)
+        assert {e["filename"] for e in recent["entries"]} == {"new.bin"}
+        assert len(full["entries"]) == 5
+        assert full["checkpoint"]["files_resumed"] == 2
+        assert not any("--reset" in c for c in calls[1:])
+
+
+class TestDigestTransport:
+    """Test the compressed, digest-only strider transport."""
+
+    def _setup(self, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 30)
+        _write_ags_file(ags / "b.bin", 20, start=100)
+        return ags
+
+    def test_digest_records_match_full_walk(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        full = hamma_scrub.decode_strider_output(run_strider("h", str(ags)))
+        raw = run_strider("h", str(ags), " --digest")
+        # Fed a byte at a time, so every record and varint is split
+        decoder = hamma_scrub.StriderStreamDecoder(compressed=True)
+        records = []
+        for i in range(len(raw)):
+            records.extend(decoder.feed(raw[i:i + 1]))
+        assert decoder.pending == 0
+        assert [k for k, _ in records] == ["digest"] * len(full)
+        for (_, rec), entry in zip(records, full):
+            assert (rec["filename"], rec["offset"], rec["index"]) == (
+                entry["filename"], entry["offset"], entry["index"])
+            assert rec["digest"] == hashlib.md5(entry["header"]).digest()
+            assert rec["fields"] == (entry["header"][10:14]
+                                     + entry["header"][80:102])
+        assert len(raw) < len(run_strider("h", str(ags))) / 2
+
+    def test_only_missing_headers_fetched(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, calls = _run_local_strider(hamma_scrub, tmp_path)
+        full = hamma_scrub.decode_strider_output(run_strider("h", str(ags)))
+        mj = set(e["header"] for e in full[2:])
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        batch = hamma_scrub.extract_triggers_batch
+        with deploy, command, \
+             patch.object(hamma_scrub, "_run_strider",
+                          side_effect=run_strider), \
+             patch.object(hamma_scrub, "extract_triggers_batch",
+                          side_effect=batch) as mock_batch:
+            result = hamma_scrub.scan_ags_files("h", str(ags),
+                                                digest_headers=lambda: mj)
+        assert "--digest" in calls[-1]
+        # The fetched (missing) triggers follow the matched ones
+        assert result["entries"] == full[2:] + full[:2]
+        extents = mock_batch.call_args[0][2]
+        assert extents == [("a.bin", e["offset"], 128) for e in full[:2]]
+
+    def test_matched_digests_stream_through(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        full = hamma_scrub.decode_strider_output(run_strider("h", str(ags)))
+        digests = hamma_scrub._iter_strider_records(
+            run_strider("h", str(ags), " --digest"), compressed=True)
+        consumed = []
+
+        def walk():
+            for record in digests:
+                consumed.append(record)
+                yield record
+
+        resolved = hamma_scrub.resolve_digest_records(
+            walk(), "h", str(ags), [e["header"] for e in full])
+        kind, first = next(resolved)
+        assert kind == "trigger" and first == full[0]
+        assert len(consumed) == 1
+        with patch.object(hamma_scrub, "extract_triggers_batch") as batch:
+            assert [rec for _, rec in resolved] == full[1:]
+        batch.assert_not_called()
+
+    def test_streamed_digest_walk(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        full = hamma_scrub.decode_strider_output(run_strider("h", str(ags)))
+        with patch.object(hamma_scrub, "_deploy_strider"), \
+             patch.object(hamma_scrub, "_strider_command",
+                          side_effect=_local_strider_command(hamma_scrub,
+                                                             tmp_path)):
+            result = hamma_scrub.scan_ags_files(
+                "h", str(ags), stream=True,
+                digest_headers=set(e["header"] for e in full))
+        assert result["entries"] == full
+        assert result["bytes_received"] < 50 * 146 / 2
+
+    def test_stale_header_raises(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        stale = [(0, b'\x00' * 128, None)]
+        with patch.object(hamma_scrub, "_run_strider",
+                          side_effect=run_strider), \
+             patch.object(hamma_scrub, "extract_triggers_batch",
+                          return_value=iter(stale)):
+            with pytest.raises(RuntimeError, match="changed"):
+                hamma_scrub.scan_ags_files("h", str(ags),
+                                           digest_headers=set())
+
+    def test_checkpoint_resume_in_digest_mode(self, hamma_scrub, tmp_path):
+        ags = self._setup(tmp_path)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        with patch.object(hamma_scrub, "_run_strider",
+                          side_effect=run_strider):
+            full = hamma_scrub.decode_strider_output(
+                run_strider("h", str(ags)))
+            mj = set(e["header"] for e in full)
+            hamma_scrub.scan_ags_files("h", str(ags), cache_dir=cache,
+                                       digest_headers=mj)
+            _write_ags_file(ags / "a.bin", 2, start=30)
+            mj.update(e["header"] for e in hamma_scrub.decode_strider_output(
+                run_strider("h", str(ags))))
+            result = hamma_scrub.scan_ags_files("h", str(ags),
+                                                cache_dir=cache,
+                                                digest_headers=mj)
+        assert result["checkpoint"]["new_entries"] == 2
+        assert result["entries"] == hamma_scrub.decode_strider_output(
+            run_strider("h", str(ags)))
+
+
+def _local_strider_command(hamma_scrub, tmp_path):
+    """Return a _strider_command replacement that runs the script locally."""
+    script = tmp_path / "strider.py"
+    script.write_text(hamma_scrub.STRIDER_SCRIPT)
+
+    def strider_command(ags_host, ags_path, remote_script, extra_args=""):
+        args = extra_args.split()
+        for flag in ("--checkpoint", "--index"):
+            if flag in args:
+                i = args.index(flag) + 1
+                args[i] = str(tmp_path / args[i])
+        return ["python3", str(script), ags_path] + args
+
+    return strider_command
+
+
+class TestStriderStream:
+    """Test incremental decoding of streamed strider output."""
+
+    def _raw(self, count):
+        raw = b'\x00a.bin\x00' + struct.pack('<QQQIB', 1, 2, 0, 0, 1)
+        for i in range(count):
+            hdr = bytearray(128)
+            hdr[0:4] = SYNC_MARKER
+            hdr[50] = i
+            raw += b'a.bin\x00' + struct.pack('<QI', i * 100, i) + bytes(hdr)
+        return raw
+
+    def test_byte_at_a_time_matches_whole(self, hamma_scrub):
+        raw = self._raw(4)
+        decoder = hamma_scrub.StriderStreamDecoder()
+        records = []
+        for i in range(len(raw)):
+            records.extend(decoder.feed(raw[i:i + 1]))
+        assert records == list(hamma_scrub._iter_strider_records(raw))
+        assert decoder.pending == 0
+        assert decoder.bytes_fed == len(raw)
+        assert decoder.records == 5
+
+    def test_buffer_holds_only_partial_record(self, hamma_scrub):
+        raw = self._raw(3)
+        decoder = hamma_scrub.StriderStreamDecoder()
+        records = decoder.feed(raw[:-10])
+        assert len(records) == 3  # file record + 2 triggers
+        assert decoder.pending < 150
+        records = decoder.feed(raw[-10:])
+        assert [r[1]["index"] for r in records] == [2]
+        assert decoder.pending == 0
+
+    def test_stream_runs_local_process(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 5)
+        with patch.object(hamma_scrub, "_deploy_strider"), \
+             patch.object(hamma_scrub, "_strider_command",
+                          side_effect=_local_strider_command(hamma_scrub,
+                                                             tmp_path)):
+            result = hamma_scrub.scan_ags_files("hamma", str(ags), stream=True)
+        assert [e["index"] for e in result["entries"]] == list(range(5))
+        assert result["bytes_received"] == 5 * (6 + 12 + 128)
+
+    def test_stream_failure_raises_with_stderr(self, hamma_scrub):
+        cmd = [sys.executable, "-c",
+               "import sys; sys.stderr.write('Connection refused'); sys.exit(255)"]
+        with patch.object(hamma_scrub, "_deploy_strider"), \
+             patch.object(hamma_scrub, "_strider_command", return_value=cmd):
+            with pytest.raises(RuntimeError, match="Connection refused"):
+                hamma_scrub.scan_ags_files("hamma", "/ags/data", stream=True)
+
+    def test_stream_timeout_kills_process(self, hamma_scrub):
+        cmd = [sys.executable, "-c", "import time; time.sleep(30)"]
+        with patch.object(hamma_scrub, "_deploy_strider"), \
+             patch.object(hamma_scrub, "_strider_command", return_value=cmd), \
+             patch.object(hamma_scrub, "STRIDER_TIMEOUT", 0.2):
+            with pytest.raises(RuntimeError, match="timed out"):
+                hamma_scrub.scan_ags_files("hamma", "/ags/data", stream=True)
+
+    def test_stale_mirror_rerun_lists_each_entry_once(self, hamma_scrub,
+                                                      tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 2)
+        _write_ags_file(ags / "b.bin", 3)
+        cache = str(tmp_path / "cache")
+        mirror_path = hamma_scrub._ags_mirror_path(cache, "hamma")
+        with patch.object(hamma_scrub, "_deploy_strider"), \
+             patch.object(hamma_scrub, "_strider_command",
+                          side_effect=_local_strider_command(hamma_scrub,
+                                                             tmp_path)):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache,
+                                       stream=True)
+            table = hamma_scrub.load_ags_mirror(mirror_path)
+            # Keep a.bin's two triggers and only the first of b.bin's
+            hamma_scrub.save_ags_mirror(mirror_path, table[:3])
+            result = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                                cache_dir=cache, stream=True)
+        keys = [(e["filename"], e["offset"]) for e in result["entries"]]
+        assert len(keys) == 5
+        assert len(set(keys)) == 5
+
+
 class TestCompareHeaders:
     """Test header set comparison logic."""
 
@@ -547,6 +1286,71 @@ class TestCompareHeaders:
         assert result["mj_only_count"] == 0
 
 
+class TestHeaderIndex:
+    """Test the digest-keyed header membership index."""
+
+    def _headers(self, n):
+        headers = []
+        for i in range(n):
+            hdr = bytearray(128)
+            hdr[0:4] = SYNC_MARKER
+            struct.pack_into('<I', hdr, 60, i)
+            headers.append(bytes(hdr))
+        return headers
+
+    def test_membership(self, hamma_scrub):
+        headers = self._headers(50)
+        index = hamma_scrub.HeaderIndex(headers[:25] + headers[:5])
+        assert len(index) == 25
+        mask = index.contains(headers)
+        assert list(mask) == [True] * 25 + [False] * 25
+        assert headers[3] in index
+        assert headers[30] not in index
+        assert set(index) == set(headers[:25])
+
+    def test_trailing_null_headers(self, hamma_scrub):
+        short = SYNC_MARKER + b'\x00' * 124
+        index = hamma_scrub.HeaderIndex([short])
+        assert short in index
+        assert list(index) == [short]
+
+    def test_digest_collisions_verified(self, hamma_scrub):
+        """Equal digests fall back to full-header comparison."""
+        headers = self._headers(10)
+
+        def constant_digest(arr):
+            return hamma_scrub.np.zeros(len(arr), dtype=hamma_scrub.np.uint64)
+
+        with patch.object(hamma_scrub, "_header_digests",
+                          side_effect=constant_digest):
+            index = hamma_scrub.HeaderIndex(headers[:6])
+            mask = index.contains(headers)
+        assert list(mask) == [True] * 6 + [False] * 4
+
+    def test_add(self, hamma_scrub):
+        headers = self._headers(4)
+        index = hamma_scrub.HeaderIndex(headers[:2])
+        index.add({headers[1], headers[2]})
+        assert len(index) == 3
+        assert list(index.contains(headers)) == [True, True, True, False]
+
+    def test_empty(self, hamma_scrub):
+        index = hamma_scrub.HeaderIndex()
+        assert len(index) == 0
+        assert self._headers(1)[0] not in index
+
+    def test_compare_and_purge_accept_index(self, hamma_scrub):
+        headers = self._headers(3)
+        entries = [{"filename": "ags00{}.bin".format(i), "offset": 0,
+                    "index": 0, "header": h} for i, h in enumerate(headers)]
+        mj = set(headers[:2]) | {b'\x07' * 128}
+        index = hamma_scrub.HeaderIndex(mj)
+        assert (hamma_scrub.compare_headers(entries, index)
+                == hamma_scrub.compare_headers(entries, mj))
+        assert (hamma_scrub.identify_purgeable_files(entries, index)
+                == hamma_scrub.identify_purgeable_files(entries, mj))
+
+
 class TestDecodeGpsTime:
     """Test GPS time extraction from raw headers."""
 
@@ -582,6 +1386,61 @@ class TestDecodeGpsTime:
         assert result == "2025-03-05T11:19:43.500"
 
 
+class TestDecodeGpsTimes:
+    """Test vectorized GPS decoding against decode_gps_time()."""
+
+    def _random_headers(self, hamma_scrub, n=2000, seed=7):
+        rng = hamma_scrub.np.random.default_rng(seed)
+        headers = []
+        for _ in range(n):
+            ecc = int(rng.choice([0, 999999937, 1000000000, 50000000]))
+            headers.append(_make_gps_header(
+                week=int(rng.integers(-5, 2600)),
+                tow=float(rng.uniform(0, 604800)),
+                utc_offset=float(rng.choice([0.0, 18.0, 17.5])),
+                subsecond=int(rng.integers(0, ecc or 1000000000)),
+                ecc=ecc,
+            ))
+        return headers
+
+    def test_matches_scalar_decode(self, hamma_scrub):
+        headers = self._random_headers(hamma_scrub)
+        times, valid = hamma_scrub.decode_gps_times(b''.join(headers))
+        stamps = hamma_scrub.np.datetime_as_string(times, unit='ms')
+        for header, stamp, ok in zip(headers, stamps, valid):
+            expected = hamma_scrub.decode_gps_time(header)
+            assert ok == (expected is not None)
+            if ok:
+                assert stamp == expected
+
+    def test_input_forms_agree(self, hamma_scrub):
+        np = hamma_scrub.np
+        headers = self._random_headers(hamma_scrub, n=20)
+        from_bytes = hamma_scrub.decode_gps_times(b''.join(headers))
+        from_list = hamma_scrub.decode_gps_times(headers)
+        from_array = hamma_scrub.decode_gps_times(
+            np.array(headers, dtype='S128'))
+        for times, valid in (from_list, from_array):
+            assert np.array_equal(times, from_bytes[0], equal_nan=True)
+            assert np.array_equal(valid, from_bytes[1])
+
+    def test_short_header_invalid(self, hamma_scrub):
+        times, valid = hamma_scrub.decode_gps_times([SYNC_MARKER])
+        assert not valid[0]
+        assert hamma_scrub.np.isnat(times[0])
+
+    def test_batch_target_paths(self, hamma_scrub):
+        headers = [_make_gps_header(), _make_gps_header(week=0, tow=0.0)]
+        paths = hamma_scrub.compute_target_paths(
+            headers, [0, 924005544], "mj", "41")
+        assert paths == [
+            ("2026-04-04T01", "mj41_2026-04-04_01-13-50-808_recovered.bin"),
+            ("unknown",
+             "mj41_0000-00-00_00-00-00-000_off924005544_recovered.bin"),
+        ]
+        assert hamma_scrub.compute_target_paths([], [], "mj", "41") == []
+
+
 class TestEarliestAgsTimestamp:
     """Test earliest_ags_timestamp() — derives --since cutoff from AGS data."""
 
@@ -668,6 +1527,112 @@ class TestEarliestAgsTimestamp:
         assert result == expected
 
 
+class TestAgsEntryTable:
+    """Test the NumPy-backed AGS entry table and its dict adapters."""
+
+    def _entries(self):
+        entries = []
+        for fname, week in (("ags_b.bin", 2412), ("ags_a.bin", 2413),
+                            ("ags_b.bin", 0), ("ags_c.bin", 2412)):
+            hdr = bytearray(_make_gps_header(week=week,
+                                              tow=500000.5 + len(entries)))
+            hdr[-1] = 0  # trailing nulls must survive the round trip
+            entries.append({"filename": fname, "offset": len(entries) * 1000,
+                            "index": len(entries), "header": bytes(hdr)})
+        return entries
+
+    def test_round_trip(self, hamma_scrub):
+        entries = self._entries()
+        table = hamma_scrub.AgsEntryTable.from_entries(entries)
+        assert len(table) == 4
+        assert list(table) == entries
+        assert table[1] == entries[1]
+        assert table.filenames == ["ags_a.bin", "ags_b.bin", "ags_c.bin"]
+        assert table.file_count == 3
+        assert list(table.rows["datasize"]) == [TEST_DATASIZE] * 4
+
+    def test_file_bytes_spans_last_trigger(self, hamma_scrub):
+        table = hamma_scrub.AgsEntryTable.from_entries(self._entries())
+        stride = 128 + TEST_DATASIZE * 2 + 4
+        assert table.file_bytes(["ags_b.bin", "ags_c.bin", "gone.bin"]) == {
+            "ags_b.bin": 2000 + stride,
+            "ags_c.bin": 3000 + stride,
+            "gone.bin": 0,
+        }
+
+    def test_gps_seconds_match_decode_gps_time(self, hamma_scrub):
+        entries = self._entries()
+        entries.append({"filename": "x.bin", "offset": 0, "index": 0,
+                        "header": _make_gps_header(subsecond=999999999)})
+        table = hamma_scrub.AgsEntryTable.from_entries(entries)
+        for entry, seconds in zip(entries, table.rows["gps_seconds"]):
+            expected = hamma_scrub.decode_gps_time(entry["header"])
+            if expected is None:
+                assert seconds != seconds  # NaN
+                continue
+            dt = datetime.fromtimestamp(seconds, tz=timezone.utc)
+            assert dt.strftime('%Y-%m-%dT%H:%M:%S.%f')[:23] == expected
+
+    def test_slices_share_filenames(self, hamma_scrub):
+        table = hamma_scrub.AgsEntryTable.from_entries(self._entries())
+        sub = table[table.rows["file_id"] == 1]
+        assert len(sub) == 2
+        assert {e["filename"] for e in sub} == {"ags_b.bin"}
+        assert sub.filenames is table.filenames
+
+    def test_compare_mirrors_input_type(self, hamma_scrub):
+        entries = self._entries()
+        mj = {entries[0]["header"], b'\x07' * 128}
+        table = hamma_scrub.AgsEntryTable.from_entries(entries)
+        from_list = hamma_scrub.compare_headers(entries, mj)
+        from_table = hamma_scrub.compare_headers(table, mj)
+        assert isinstance(from_list["missing_on_mj"], list)
+        assert isinstance(from_table["missing_on_mj"],
+                          hamma_scrub.AgsEntryTable)
+        assert list(from_table["missing_on_mj"]) == from_list["missing_on_mj"]
+        assert from_table["matched"] == from_list["matched"] == 1
+        assert from_table["mj_only_count"] == from_list["mj_only_count"] == 1
+
+    def test_phases_agree_for_table_and_list(self, hamma_scrub):
+        entries = self._entries()
+        table = hamma_scrub.AgsEntryTable.from_entries(entries)
+        mj = {entries[1]["header"]}
+        recovery = [{"source_file": "ags_b.bin", "source_offset": 2000,
+                     "status": "failed", "header": entries[2]["header"],
+                     "error": "dd extraction failed"}]
+        assert (hamma_scrub.earliest_ags_timestamp(table)
+                == hamma_scrub.earliest_ags_timestamp(entries))
+        assert (hamma_scrub.identify_purgeable_files(table, mj, recovery)
+                == hamma_scrub.identify_purgeable_files(entries, mj, recovery))
+        missing = hamma_scrub.compare_headers(table, mj)["missing_on_mj"]
+        assert (list(hamma_scrub.filter_recovery_candidates(
+                    missing, table, since_cutoff="2026-04-10T00"))
+                == list(hamma_scrub.filter_recovery_candidates(
+                    list(missing), entries, since_cutoff="2026-04-10T00")))
+
+    def test_scan_ags_files_as_table(self, hamma_scrub, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        _write_ags_file(ags / "b.bin", 2)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            as_list = hamma_scrub.scan_ags_files("hamma", str(ags))
+            as_table = hamma_scrub.scan_ags_files("hamma", str(ags),
+                                                  as_table=True)
+        assert isinstance(as_table["entries"], hamma_scrub.AgsEntryTable)
+        assert list(as_table["entries"]) == as_list["entries"]
+        assert isinstance(as_table["headers"], hamma_scrub.HeaderIndex)
+        assert set(as_table["headers"]) == as_list["headers"]
+        assert as_table["duplicate_count"] == as_list["duplicate_count"]
+        mj = set(list(as_list["headers"])[:2])
+        given = hamma_scrub.compare_headers(
+            as_table["entries"], mj, ags_headers=as_table["headers"])
+        derived = hamma_scrub.compare_headers(as_table["entries"], mj)
+        assert given["mj_only_count"] == derived["mj_only_count"]
+        assert given["matched"] == derived["matched"]
+
+
 class TestDetectUnitName:
     """Test hostname-based unit name detection."""
 
@@ -957,7 +1922,26 @@ class TestFilterRecoveryCandidates:
 
     def test_empty_input(self, hamma_scrub):
         result = hamma_scrub.filter_recovery_candidates([], [])
-        assert result == []
+        assert list(result) == []
+
+    def test_returns_table_with_skip_column(self, hamma_scrub):
+        old = self._make_entry("ags_aaa.bin", 0, 0)
+        no_gps = self._make_entry("ags_bbb.bin", 0, 0, bad_gps=True)
+        last = self._make_entry("ags_zzz.bin", 22000132, 1)
+        all_ags = [old, no_gps, self._make_entry("ags_zzz.bin", 0, 0), last]
+        table = hamma_scrub.AgsEntryTable.from_entries(all_ags)
+        missing = table[hamma_scrub.np.array([0, 1, 3])]
+        with patch.object(hamma_scrub.AgsEntryTable, "__iter__",
+                          side_effect=AssertionError("rows made dicts")):
+            result = hamma_scrub.filter_recovery_candidates(
+                missing, table, since_cutoff="2026-04-10T00")
+        assert isinstance(result, hamma_scrub.RecoveryCandidates)
+        assert result.rows is missing.rows
+        assert result.skip_status.tolist() == [2, 0, 1]
+        assert [c["skip_status"] for c in result] == [
+            "skipped_before_since", None, "skipped"]
+        assert [c["filename"] for c in result.recoverable()] == [
+            "ags_bbb.bin"]
 
 
 class TestCleanupOrphanedTemps:
@@ -984,6 +1968,15 @@ class TestCleanupOrphanedTemps:
         assert count == 0
         assert tmp_file.exists()
 
+    def test_deletes_old_work_dirs(self, hamma_scrub, tmp_path):
+        work_dir = tmp_path / "DATA37" / ".tmp_recover_abc123.d"
+        work_dir.mkdir(parents=True)
+        (work_dir / "trigger.hmc").write_bytes(b'\x00' * 100)
+        old_time = time.time() - 7200
+        os.utime(str(work_dir), (old_time, old_time))
+        assert hamma_scrub.cleanup_orphaned_temps(str(tmp_path)) == 1
+        assert not work_dir.exists()
+
     def test_no_drives(self, hamma_scrub, tmp_path):
         count = hamma_scrub.cleanup_orphaned_temps(str(tmp_path))
         assert count == 0
@@ -1187,6 +2180,436 @@ class TestRecoverTriggers:
         assert "unknown" in results[0]["target_path"]
 
 
+def _local_extractor(hamma_scrub, tmp_path):
+    """Patches that deploy and run the batch extractor locally."""
+    remote = tmp_path / "remote"
+    remote.mkdir(exist_ok=True)
+
+    def deploy(ags_host, files):
+        for name, content in files.items():
+            (remote / name).write_bytes(content)
+        return str(remote)
+
+    def command(ags_host, ags_path, remote_dir):
+        return [sys.executable, str(remote / "hamma_extractor.py"), ags_path,
+                str(remote / "hamma_extents.txt")]
+
+    return (patch.object(hamma_scrub, "_deploy_files", side_effect=deploy),
+            patch.object(hamma_scrub, "_extractor_command", side_effect=command))
+
+
+class TestBatchRecovery:
+    """Test multi-trigger recovery over a single SSH session."""
+
+    SIZE = 128 + TEST_DATASIZE * 2 + 4
+
+    def _setup(self, tmp_path, count=3):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", count)
+        raw = (ags / "a.bin").read_bytes()
+        (tmp_path / "DATA01" / "2026-04-10T14").mkdir(parents=True)
+        candidates = []
+        for i in range(count):
+            candidates.append({
+                "header": raw[i * self.SIZE:i * self.SIZE + 128],
+                "filename": "a.bin", "offset": i * self.SIZE, "index": i,
+                "skip_reason": None, "skip_status": None,
+            })
+        return ags, raw, candidates
+
+    def test_batch_recovers_all(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = self._setup(tmp_path)
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")), \
+             patch.object(hamma_scrub, "extract_trigger") as mock_extract:
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        mock_extract.assert_not_called()
+        assert [r["status"] for r in results] == ["recovered"] * 3
+        for i, r in enumerate(results):
+            target = tmp_path / r["target_path"]
+            assert target.read_bytes() == raw[i * self.SIZE:(i + 1) * self.SIZE]
+
+    def test_per_extent_error_does_not_stop_batch(self, hamma_scrub, tmp_path):
+        ags, _, candidates = self._setup(tmp_path)
+        candidates[1] = dict(candidates[1], filename="gone.bin")
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        assert [r["status"] for r in results] == [
+            "recovered", "failed", "recovered"]
+        assert "gone.bin" in results[1]["error"]
+
+    def test_short_extent_fails_verification(self, hamma_scrub, tmp_path):
+        ags, _, candidates = self._setup(tmp_path, count=2)
+        candidates[1] = dict(candidates[1], offset=self.SIZE + 10)
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        assert results[0]["status"] == "recovered"
+        assert results[1]["status"] == "failed"
+        assert "size mismatch" in results[1]["error"]
+
+    def test_ssh_failure_fails_remaining(self, hamma_scrub, tmp_path):
+        ags, _, candidates = self._setup(tmp_path)
+        cmd = [sys.executable, "-c",
+               "import sys; sys.stderr.write('Connection reset'); sys.exit(255)"]
+        with patch.object(hamma_scrub, "_deploy_files"), \
+             patch.object(hamma_scrub, "_extractor_command", return_value=cmd), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        assert [r["status"] for r in results] == ["failed"] * 3
+        assert all("Connection reset" in r["error"] for r in results)
+        assert not list(tmp_path.glob("DATA01/.tmp_recover_*"))
+
+    def test_deploy_failure_fails_all(self, hamma_scrub, tmp_path):
+        ags, _, candidates = self._setup(tmp_path)
+        fail = MagicMock(returncode=1, stdout=b'', stderr=b'No route to host')
+        with patch("subprocess.run", return_value=fail), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        assert [r["status"] for r in results] == ["failed"] * 3
+        assert "No route to host" in results[0]["error"]
+
+    def test_remote_command_keeps_exit_status(self, hamma_scrub, tmp_path):
+        remote_dir = tmp_path / "hamma_scrub.x"
+        remote_dir.mkdir()
+        (remote_dir / "hamma_extents.txt").write_text("")
+        line = hamma_scrub._run_and_clean(
+            "{} -c 'import sys; sys.exit(3)'".format(sys.executable),
+            str(remote_dir))
+        result = subprocess.run(["sh", "-c", line])
+        assert result.returncode == 3
+        assert not remote_dir.exists()
+
+    def test_deploy_failure_removes_remote_dir(self, hamma_scrub):
+        scp = MagicMock(returncode=1, stderr=b'Permission denied')
+        with patch("subprocess.run", side_effect=[
+                _mktemp_result(), scp, MagicMock()]) as mock_run:
+            with pytest.raises(RuntimeError, match="Permission denied"):
+                hamma_scrub._deploy_files("hamma", {"a.txt": b"x"})
+        assert mock_run.call_args_list[2][0][0] == [
+            "ssh", "hamma", "rm -rf /tmp/hamma_scrub.ab12CD34"]
+
+    def test_extractor_path_uses_shlex_quote(self, hamma_scrub):
+        cmd = hamma_scrub._extractor_command("hamma", "/ags/my data",
+                                             "/tmp/x")
+        assert cmd[:2] == ["ssh", "hamma"]
+        assert "hamma_extractor.py '/ags/my data' " in cmd[2]
+
+    def test_queued_triggers_reserve_free_space(self, hamma_scrub, tmp_path):
+        ags, _, candidates = self._setup(tmp_path)
+        free = hamma_scrub.MIN_FREE_SPACE + 2 * self.SIZE - 1
+        usage = MagicMock(free=free)
+        failed = [(i, None, "skipped in test") for i in range(2)]
+        with patch("shutil.disk_usage", return_value=usage) as mock_usage, \
+             patch.object(hamma_scrub, "extract_triggers_batch",
+                          return_value=iter(failed)) as mock_batch, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        # Free space is read once and debited per queued trigger
+        assert mock_usage.call_count == 1
+        assert len(mock_batch.call_args[0][2]) == 2
+        assert results[2]["status"] == "failed"
+        assert "free space" in results[2]["error"]
+
+
+class TestRecoveryScheduler:
+    """Test recovery ordering, deadline, rate cap and checkpoint."""
+
+    SIZE = TestBatchRecovery.SIZE
+
+    def _candidate(self, filename, index, header):
+        return {"header": header, "filename": filename,
+                "offset": index * self.SIZE, "index": index,
+                "skip_reason": None, "skip_status": None}
+
+    def test_priorities(self, hamma_scrub):
+        candidates = [
+            self._candidate("b.bin", 0, _make_gps_header(tow=1000.0)),
+            self._candidate("a.bin", 1, _make_gps_header(tow=3000.0)),
+            self._candidate("a.bin", 0, _make_gps_header(week=0, tow=0.0)),
+        ]
+        order = {p: hamma_scrub.RecoveryScheduler(p).order(candidates)
+                 for p in hamma_scrub.RECOVERY_PRIORITIES}
+        assert order == {"oldest-file": [2, 1, 0], "newest": [1, 0, 2],
+                         "order": [0, 1, 2]}
+
+    def test_unknown_priority_raises(self, hamma_scrub):
+        with pytest.raises(ValueError, match="priority"):
+            hamma_scrub.RecoveryScheduler("random")
+
+    def test_deadline_defers_and_next_run_resumes(self, hamma_scrub,
+                                                   tmp_path):
+        ags, _, candidates = TestBatchRecovery()._setup(tmp_path)
+        checkpoint = tmp_path / "cache" / "recovery_hamma.json"
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        scheduler = hamma_scrub.RecoveryScheduler(
+            deadline=0, checkpoint_path=str(checkpoint))
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+                scheduler=scheduler,
+            )
+        assert [r["status"] for r in results] == [
+            "recovered", "deferred", "deferred"]
+        assert "deadline" in results[1]["error"]
+        saved = json.loads(checkpoint.read_text())["deferred"]
+        assert saved == [["a.bin", self.SIZE], ["a.bin", 2 * self.SIZE]]
+
+        # The next run fetches the deferred triggers first
+        scheduler = hamma_scrub.RecoveryScheduler(
+            "order", checkpoint_path=str(checkpoint))
+        assert scheduler.order(candidates) == [1, 2, 0]
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+                scheduler=scheduler,
+            )
+        assert [r["status"] for r in results] == [
+            "skipped", "recovered", "recovered"]
+        assert not checkpoint.exists()
+
+    def test_rate_cap_paces_and_budgets(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path)
+        drive = str(tmp_path / "DATA01")
+        # Two triggers fit in the deadline at this rate; the third cannot
+        scheduler = hamma_scrub.RecoveryScheduler(
+            deadline=2.5, rate=float(self.SIZE))
+        data = [raw[i * self.SIZE:(i + 1) * self.SIZE] for i in range(3)]
+        with patch.object(hamma_scrub, "select_target_drive",
+                          return_value=drive), \
+             patch.object(hamma_scrub, "extract_trigger",
+                          side_effect=data) as mock_extract, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")), \
+             patch.object(hamma_scrub.time, "sleep") as mock_sleep:
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path),
+                scheduler=scheduler,
+            )
+        assert [r["status"] for r in results] == [
+            "recovered", "recovered", "deferred"]
+        assert "budget" in results[2]["error"]
+        assert mock_extract.call_count == 2
+        delays = [c[0][0] for c in mock_sleep.call_args_list]
+        assert len(delays) == 2
+        assert 0.5 < delays[0] <= 1.0 and 1.5 < delays[1] <= 2.0
+
+    def test_io_budget_takes_recovered_bytes(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path)
+        budget = MagicMock()
+        budget.take.return_value = 0.25
+        scheduler = hamma_scrub.RecoveryScheduler(deadline=60, budget=budget)
+        data = [raw[i * self.SIZE:(i + 1) * self.SIZE] for i in range(3)]
+        metrics = hamma_scrub.ScrubMetrics()
+        with patch.object(hamma_scrub, "select_target_drive",
+                          return_value=str(tmp_path / "DATA01")), \
+             patch.object(hamma_scrub, "extract_trigger", side_effect=data), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")), \
+             metrics.activate():
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path),
+                scheduler=scheduler,
+            )
+        assert [r["status"] for r in results] == ["recovered"] * 3
+        assert [c[0][:2] for c in budget.take.call_args_list] == [
+            (self.SIZE, "scrub")] * 3
+        assert all(0 < c[1]["timeout"] <= 60
+                   for c in budget.take.call_args_list)
+        assert metrics.phases["io_budget_wait"] == pytest.approx(0.75)
+
+    def test_budget_timeout_defers_without_writing(self, hamma_scrub,
+                                                   tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path)
+        budget = MagicMock()
+        budget.take.side_effect = [0.0, None]
+        scheduler = hamma_scrub.RecoveryScheduler(deadline=60, budget=budget)
+        data = [raw[i * self.SIZE:(i + 1) * self.SIZE] for i in range(3)]
+        drive = tmp_path / "DATA01"
+        with patch.object(hamma_scrub, "select_target_drive",
+                          return_value=str(drive)), \
+             patch.object(hamma_scrub, "extract_trigger", side_effect=data), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path),
+                scheduler=scheduler,
+            )
+        assert [r["status"] for r in results] == [
+            "recovered", "deferred", "deferred"]
+        written = [p for p in drive.rglob("*") if p.is_file()]
+        assert len(written) == 1
+
+    def test_drive_selector_reserves(self, hamma_scrub, tmp_path):
+        for name, hour in (("DATA01", "2026-04-10T14"),
+                           ("DATA02", "2026-04-10T15")):
+            (tmp_path / name / hour).mkdir(parents=True)
+        base = hamma_scrub.MIN_FREE_SPACE
+        with patch("shutil.disk_usage",
+                   return_value=MagicMock(free=base + 100)):
+            selector = hamma_scrub.DriveSelector(str(tmp_path))
+        assert selector.select() == str(tmp_path / "DATA02")
+        selector.reserve(selector.select(), 101)
+        assert selector.select() == str(tmp_path / "DATA01")
+        selector.reserve(selector.select(), 101)
+        assert selector.select() is None
+
+    def test_parse_rate(self, hamma_scrub):
+        assert hamma_scrub._parse_rate("250000") == 250000
+        assert hamma_scrub._parse_rate("500K") == 500e3
+        assert hamma_scrub._parse_rate("1.5MB") == 1.5e6
+        with pytest.raises(ValueError):
+            hamma_scrub._parse_rate("fast")
+        with pytest.raises(ValueError, match="Invalid rate"):
+            hamma_scrub._parse_rate("0")
+        with patch.object(hamma_scrub, "io_budget", None), \
+                pytest.raises(ValueError, match="io_budget.py"):
+            hamma_scrub._parse_rate("500K")
+
+    def test_human_report_counts_deferred(self, hamma_scrub):
+        results = TestRecoveryReport()._make_results_with_recovery()
+        recovery = [{"source_file": "data.bin", "source_offset": 0,
+                     "trigger_index": i, "target_path": None, "size": 1,
+                     "status": status, "error": None}
+                    for i, status in enumerate(("recovered", "deferred"))]
+        report = hamma_scrub.format_human_report(results, recovery=recovery)
+        assert "Recovery: 1 attempted, 1 succeeded, 0 failed" in report
+        assert "Deferred to next run: 1 triggers" in report
+
+
+class TestChunkedRecovery:
+    """Test chunked, resumable batch recovery."""
+
+    SIZE = TestBatchRecovery.SIZE
+    CHUNK = 128  # three chunks per test trigger
+
+    def _recover(self, hamma_scrub, tmp_path, ags, candidates, fail=None):
+        # Run a batch recovery, replacing extents in `fail` with errors
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        batch = hamma_scrub.extract_triggers_batch
+        calls = []
+
+        def extract(host, path, extents):
+            calls.append(list(extents))
+            for seq, data, error in batch(host, path, extents):
+                if fail and seq in fail:
+                    data, error = None, "stalled"
+                yield seq, data, error
+
+        with deploy, command, \
+             patch.object(hamma_scrub, "RECOVER_CHUNK_SIZE", self.CHUNK), \
+             patch.object(hamma_scrub, "extract_triggers_batch",
+                          side_effect=extract), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+            )
+        return results, calls[0] if calls else []
+
+    def test_chunks_reassemble(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path, count=2)
+        results, extents = self._recover(hamma_scrub, tmp_path, ags,
+                                         candidates)
+        assert [r["status"] for r in results] == ["recovered"] * 2
+        assert [e[1:] for e in extents[:3]] == [(0, 128), (128, 128),
+                                                (256, self.SIZE - 256)]
+        for i, r in enumerate(results):
+            target = tmp_path / r["target_path"]
+            assert target.read_bytes() == raw[i * self.SIZE:
+                                              (i + 1) * self.SIZE]
+        assert not list(tmp_path.glob("DATA01/.tmp_recover_*"))
+
+    def test_failed_transfer_resumes(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path, count=1)
+        results, _ = self._recover(hamma_scrub, tmp_path, ags, candidates,
+                                   fail={2})
+        assert results[0]["status"] == "failed"
+        assert "256 of 332 bytes kept" in results[0]["error"]
+        partial, = tmp_path.glob("DATA01/.tmp_recover_*.partial")
+        assert partial.read_bytes() == raw[:256]
+
+        results, extents = self._recover(hamma_scrub, tmp_path, ags,
+                                         candidates)
+        assert results[0]["status"] == "recovered"
+        assert extents == [("a.bin", 256, self.SIZE - 256)]
+        assert (tmp_path / results[0]["target_path"]).read_bytes() == raw
+        assert not partial.exists()
+
+    def test_partial_tail_and_stale_header(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path, count=2)
+        name = hamma_scrub._partial_name(candidates[0], self.SIZE)
+        # Half a chunk past the first, e.g. from a crash mid-write
+        (tmp_path / "DATA01" / name).write_bytes(raw[:200])
+        name = hamma_scrub._partial_name(candidates[1], self.SIZE)
+        (tmp_path / "DATA01" / name).write_bytes(b'\x00' * 256)
+        results, extents = self._recover(hamma_scrub, tmp_path, ags,
+                                         candidates)
+        assert [r["status"] for r in results] == ["recovered"] * 2
+        assert [e[1] for e in extents] == [128, 256, self.SIZE,
+                                           self.SIZE + 128, self.SIZE + 256]
+
+    def test_crc_mismatch_and_idle_timeout(self, hamma_scrub):
+        script = (
+            "import struct, sys, time, zlib\n"
+            "out = sys.stdout.buffer\n"
+            "for seq, bad in ((0, 0), (1, 1), (2, 0)):\n"
+            "    data = b'x' * 10\n"
+            "    crc = zlib.crc32(data) ^ bad\n"
+            "    out.write(struct.pack('<IBQI', seq, 0, 10, crc) + data)\n"
+            "    out.flush()\n"
+            "    time.sleep(0.2)\n"
+        )
+        cmd = [sys.executable, "-c", script]
+        with patch.object(hamma_scrub, "_deploy_files"), \
+             patch.object(hamma_scrub, "_extractor_command", return_value=cmd), \
+             patch.object(hamma_scrub, "RECOVER_TIMEOUT", 0.4):
+            got = list(hamma_scrub.extract_triggers_batch(
+                "hamma", "/ags", [("a.bin", 0, 10)] * 3))
+        # Under a second in all, but never 0.4 s without a frame
+        assert got == [(0, b'x' * 10, None), (1, None, "CRC mismatch"),
+                       (2, b'x' * 10, None)]
+
+    def test_cleanup_keeps_partials_longer(self, hamma_scrub, tmp_path):
+        drive = tmp_path / "DATA01"
+        drive.mkdir()
+        day = drive / ".tmp_recover_aaaa.partial"
+        week = drive / ".tmp_recover_bbbb.partial"
+        for path, age in ((day, 86400), (week, 8 * 86400)):
+            path.write_bytes(b'x')
+            old = time.time() - age
+            os.utime(str(path), (old, old))
+        assert hamma_scrub.cleanup_orphaned_temps(str(tmp_path)) == 1
+        assert day.exists() and not week.exists()
+
+
 class TestIdentifyPurgeableFiles:
     """Test AGS file purge eligibility logic."""
 
@@ -1473,6 +2896,146 @@ class TestPurgeAgsFiles:
         assert "'/ags/data/ags file.bin'" in cmd[2]
 
 
+def _local_purger(hamma_scrub, tmp_path):
+    """Patches that deploy and run the batch purger locally."""
+    remote = tmp_path / "remote"
+    remote.mkdir(exist_ok=True)
+
+    def deploy(ags_host, files):
+        for name, content in files.items():
+            (remote / name).write_bytes(content)
+        return str(remote)
+
+    def command(ags_host, ags_path, remote_dir):
+        return [sys.executable, str(remote / "hamma_purger.py"), ags_path,
+                str(remote / "hamma_purge.txt")]
+
+    return (patch.object(hamma_scrub, "_deploy_files", side_effect=deploy),
+            patch.object(hamma_scrub, "_purger_command", side_effect=command))
+
+
+class TestBatchPurge:
+    """Test AGS file deletion over a single SSH session."""
+
+    def _ags(self, tmp_path, names):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        for name in names:
+            (ags / name).write_bytes(b"x")
+        return ags
+
+    def test_batch_deletes_each_file_in_one_session(self, hamma_scrub,
+                                                    tmp_path):
+        ags = self._ags(tmp_path, ["a.bin", "b file.bin", "keep.bin"])
+        deploy, command = _local_purger(hamma_scrub, tmp_path)
+        with deploy as mock_deploy, command as mock_command:
+            results = hamma_scrub.purge_ags_files(
+                "hamma", str(ags), ["a.bin", "b file.bin"], batch=True)
+        assert results == [
+            {"filename": "a.bin", "status": "deleted", "error": None},
+            {"filename": "b file.bin", "status": "deleted", "error": None},
+        ]
+        assert sorted(os.listdir(str(ags))) == ["keep.bin"]
+        mock_deploy.assert_called_once()
+        mock_command.assert_called_once()
+
+    def test_per_file_error_does_not_stop_batch(self, hamma_scrub, tmp_path):
+        ags = self._ags(tmp_path, ["a.bin", "c.bin"])
+        deploy, command = _local_purger(hamma_scrub, tmp_path)
+        with deploy, command:
+            results = hamma_scrub.purge_ags_files(
+                "hamma", str(ags), ["a.bin", "gone.bin", "c.bin"], batch=True)
+        assert [r["status"] for r in results] == [
+            "deleted", "failed", "deleted"]
+        assert "gone.bin" in results[1]["error"]
+
+    def test_refuses_paths_and_globs(self, hamma_scrub, tmp_path):
+        ags = self._ags(tmp_path, ["a.bin", "*.bin"])
+        (tmp_path / "outside.bin").write_bytes(b"x")
+        deploy, command = _local_purger(hamma_scrub, tmp_path)
+        with deploy, command:
+            results = hamma_scrub.purge_ags_files(
+                "hamma", str(ags), ["../outside.bin", "*.bin", "..", "x\ny"],
+                batch=True)
+        assert [r["status"] for r in results] == [
+            "failed", "deleted", "failed", "failed"]
+        assert (tmp_path / "outside.bin").exists()
+        assert (ags / "a.bin").exists()
+        assert results[3]["error"] == "invalid filename"
+
+    def test_session_failure_fails_remaining_files(self, hamma_scrub):
+        cmd = [sys.executable, "-c",
+               "import sys; print('{\"seq\": 0}'); sys.stdout.flush(); "
+               "sys.stderr.write('Connection reset'); sys.exit(255)"]
+        with patch.object(hamma_scrub, "_deploy_files"), \
+             patch.object(hamma_scrub, "_purger_command", return_value=cmd):
+            results = hamma_scrub.purge_ags_files(
+                "hamma", "/ags/data", ["a.bin", "b.bin", "c.bin"], batch=True)
+        assert [r["status"] for r in results] == [
+            "deleted", "failed", "failed"]
+        assert "Connection reset" in results[1]["error"]
+
+    def test_remote_crash_fails_files_over_ssh(self, hamma_scrub, tmp_path,
+                                               mock_ssh):
+        ags = self._ags(tmp_path, ["a.bin", "b.bin"])
+        crash = "import sys\nsys.exit('purger crashed')\n"
+        with patch.object(hamma_scrub, "PURGER_SCRIPT", crash):
+            results = hamma_scrub.purge_ags_files(
+                "hamma", str(ags), ["a.bin", "b.bin"], batch=True)
+        assert [r["status"] for r in results] == ["failed", "failed"]
+        assert "rc=1" in results[0]["error"]
+        assert "purger crashed" in results[0]["error"]
+        assert not os.listdir(str(mock_ssh.tmp))
+
+    def test_remote_dir_removed_over_ssh(self, hamma_scrub, tmp_path,
+                                         mock_ssh):
+        ags = self._ags(tmp_path, ["a.bin", "keep.bin"])
+        results = hamma_scrub.purge_ags_files(
+            "hamma", str(ags), ["a.bin"], batch=True)
+        assert results[0]["status"] == "deleted"
+        assert os.listdir(str(ags)) == ["keep.bin"]
+        assert not os.listdir(str(mock_ssh.tmp))
+
+    def _slow_remote(self, delays):
+        # A purger that reports each file after the given delay
+        return [sys.executable, "-c",
+                "import sys, time\n"
+                "for seq, delay in enumerate({!r}):\n"
+                "    time.sleep(delay)\n"
+                "    print('{{\"seq\": %d}}' % seq, flush=True)\n"
+                .format(delays)]
+
+    def test_timeout_is_per_file(self, hamma_scrub):
+        cmd = self._slow_remote([0.2, 0.2, 0.2])
+        with patch.object(hamma_scrub, "_deploy_files"), \
+             patch.object(hamma_scrub, "_purger_command", return_value=cmd), \
+             patch.object(hamma_scrub, "PURGE_TIMEOUT", 0.4):
+            results = hamma_scrub.purge_ags_files(
+                "hamma", "/ags/data", ["a.bin", "b.bin", "c.bin"], batch=True)
+        assert [r["status"] for r in results] == ["deleted"] * 3
+
+    def test_stalled_remote_times_out(self, hamma_scrub):
+        # A long list must not stretch how long a stall is waited out
+        cmd = self._slow_remote([0, 3])
+        names = ["f{:02}.bin".format(i) for i in range(20)]
+        with patch.object(hamma_scrub, "_deploy_files"), \
+             patch.object(hamma_scrub, "_purger_command", return_value=cmd), \
+             patch.object(hamma_scrub, "PURGE_TIMEOUT", 0.3):
+            results = hamma_scrub.purge_ags_files(
+                "hamma", "/ags/data", names, batch=True)
+        assert [r["status"] for r in results] == ["deleted"] + ["failed"] * 19
+        assert "timed out" in results[1]["error"]
+
+    def test_dry_run_skips_remote(self, hamma_scrub):
+        with patch.object(hamma_scrub, "_deploy_files") as mock_deploy, \
+             patch("subprocess.run") as mock_run:
+            results = hamma_scrub.purge_ags_files(
+                "hamma", "/ags/data", ["a.bin"], dry_run=True, batch=True)
+        mock_deploy.assert_not_called()
+        mock_run.assert_not_called()
+        assert results[0]["status"] == "dry_run"
+
+
 class TestRecoveryReport:
     """Test recovery sections in human and JSON reports."""
 
@@ -1618,6 +3181,7 @@ class TestPurgeReport:
         }
         purge = {
             "deleted": ["ags001.bin"],
+            "bytes": 2500000,
             "failed": [],
             "retained": [],
             "dry_run": True,
@@ -1625,7 +3189,7 @@ class TestPurgeReport:
         report = hamma_scrub.format_human_report(
             results, purge=purge,
         )
-        assert "Would delete: 1" in report
+        assert "Would delete: 1 AGS files (2.5 MB)" in report
 
     def test_human_report_no_purge(self, hamma_scrub):
         """Human report without purge has no purge section."""
@@ -1710,6 +3274,15 @@ class TestFormatReport:
         assert "Missing on MJ" in report
         assert "data.bin" in report
 
+    def test_ags_duplicates_reported(self, hamma_scrub):
+        results = self._make_results()
+        results["ags_duplicate_count"] = 4
+        results["ags_unique_triggers"] = 96
+        report = hamma_scrub.format_human_report(results)
+        assert "AGS duplicate headers: 4 (96 unique)" in report
+        parsed = json.loads(hamma_scrub.format_json_report(results, "h"))
+        assert parsed["ags_unique_triggers"] == 96
+
     def test_human_report_no_missing(self, hamma_scrub):
         results = self._make_results()
         results["missing_on_mj"] = []
@@ -1773,6 +3346,8 @@ class TestCLI:
         assert args.output is None
         assert args.limit == 20
         assert args.since is None
+        assert args.cache_dir == "~/.cache/hamma_scrub"
+        assert args.no_cache is False
 
     def test_custom_args(self, hamma_scrub):
         parser = hamma_scrub._build_parser()
@@ -2081,6 +3656,38 @@ class TestMain:
         mock_purge.assert_called_once()
         assert rc == hamma_scrub.EXIT_OK
 
+    def test_run_purge_reports_bytes(self, hamma_scrub, tmp_path):
+        """The purge report sizes deleted files from their walked triggers."""
+        h1 = _make_gps_header()
+        h2 = _make_gps_header(tow=522848.0)
+        ags_result = {
+            "entries": [
+                {"filename": "ags001.bin", "offset": 0, "index": 0,
+                 "header": h1},
+                {"filename": "ags001.bin", "offset": 332, "index": 1,
+                 "header": h2},
+            ],
+            "headers": {h1, h2}, "duplicate_count": 0, "elapsed": 1.0,
+        }
+        mj_result = {
+            "headers": {h1, h2}, "file_count": 2, "duplicate_count": 0,
+            "skipped": 0, "dirs_skipped": 0, "elapsed": 0.5,
+        }
+        report_path = tmp_path / "report.json"
+        with patch.object(hamma_scrub, "scan_ags_files",
+                          return_value=ags_result), \
+             patch.object(hamma_scrub, "scan_mj_files",
+                          return_value=mj_result), \
+             patch.object(hamma_scrub, "identify_purgeable_files",
+                          return_value={"purgeable": ["ags001.bin"],
+                                        "retained": []}):
+            hamma_scrub.run("hamma", "/ags/data", "/home/pi/data",
+                            recover=True, purge=True, dry_run=True,
+                            output_file=str(report_path))
+        purge = json.loads(report_path.read_text())["purge"]
+        assert purge["deleted"] == ["ags001.bin"]
+        assert purge["bytes"] == 332 + 128 + TEST_DATASIZE * 2 + 4
+
     def test_run_without_purge_no_purge(self, hamma_scrub):
         """run() without purge=True does not call purge functions."""
         h1 = b'\x01' * 128
@@ -2229,3 +3836,779 @@ class TestRunSinceAuto:
                 mj_path="/media/pi", since="auto",
             )
             assert rc == hamma_scrub.EXIT_SSH_ERROR
+
+
+def _write_gps_ags_file(path, headers):
+    """Write one small trigger per 128-byte GPS header."""
+    with open(str(path), 'wb') as f:
+        for i, hdr in enumerate(headers):
+            hdr = bytearray(hdr)
+            struct.pack_into('<I', hdr, 60, i)
+            f.write(bytes(hdr) + b'\xAA' * (TEST_DATASIZE * 2) + b'\x00' * 4)
+
+
+class TestOverlappedScan:
+    """Test the strider probe prelude and concurrent AGS/MJ scans."""
+
+    STRIDE = 128 + TEST_DATASIZE * 2 + 4
+
+    def _ags_dir(self, tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        bad = _make_gps_header(week=0, tow=0.0)
+        _write_gps_ags_file(ags / "a.bin", [bad, _make_gps_header(tow=1000.0),
+                                            _make_gps_header(tow=2000.0)])
+        _write_gps_ags_file(ags / "b.bin", [bad, bad])
+        _write_gps_ags_file(ags / "c.bin", [_make_gps_header(tow=500.0)])
+        return ags
+
+    def test_probe_prelude_precedes_walk(self, hamma_scrub, tmp_path):
+        ags = self._ags_dir(tmp_path)
+        run_strider, _ = _run_local_strider(hamma_scrub, tmp_path)
+        records = list(hamma_scrub._iter_strider_records(
+            run_strider("hamma", str(ags), " --probe")))
+        kinds = [kind for kind, _ in records]
+        assert kinds[:3] == ["probe", "probe", "prelude_end"]
+        assert set(kinds[3:]) == {"trigger"}
+        probes = [rec for kind, rec in records if kind == "probe"]
+        assert [(p["filename"], p["offset"]) for p in probes] == \
+            [("a.bin", self.STRIDE), ("c.bin", 0)]
+        assert hamma_scrub.decode_strider_output(
+            run_strider("hamma", str(ags), " --probe")) == \
+            hamma_scrub.decode_strider_output(run_strider("hamma", str(ags)))
+
+    def test_checkpoint_records_first_valid_offset(self, hamma_scrub,
+                                                   tmp_path):
+        ags = self._ags_dir(tmp_path)
+        run_strider, calls = _run_local_strider(hamma_scrub, tmp_path)
+        cache = str(tmp_path / "cache")
+        probed = []
+        with patch.object(hamma_scrub, "_run_strider", side_effect=run_strider):
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache,
+                                       on_probe=probed.append)
+            hamma_scrub.scan_ags_files("hamma", str(ags), cache_dir=cache,
+                                       on_probe=probed.append)
+        ckpt = json.loads((tmp_path / hamma_scrub.AGS_CHECKPOINT_PATH)
+                          .read_text())
+        assert {name: c["first"] for name, c in ckpt.items()} == \
+            {"a.bin": self.STRIDE, "b.bin": -1, "c.bin": 0}
+        assert all("--probe" in c for c in calls)
+        assert len(probed) == 2
+        assert [p["offset"] for p in probed[1]] == [self.STRIDE, 0]
+
+    def test_on_probe_called_before_entries(self, hamma_scrub, tmp_path):
+        ags = self._ags_dir(tmp_path)
+        events = []
+        stream = hamma_scrub._stream_strider
+
+        def recording_stream(*args, **kwargs):
+            for kind, rec in stream(*args, **kwargs):
+                if kind == "trigger":
+                    events.append("entry")
+                yield kind, rec
+
+        with patch.object(hamma_scrub, "_deploy_strider"), \
+             patch.object(hamma_scrub, "_strider_command",
+                          side_effect=_local_strider_command(hamma_scrub,
+                                                             tmp_path)), \
+             patch.object(hamma_scrub, "_stream_strider",
+                          side_effect=recording_stream):
+            result = hamma_scrub.scan_ags_files(
+                "hamma", str(ags), stream=True,
+                on_probe=lambda probes: events.append(len(probes)))
+        assert events == [2] + ["entry"] * 6
+        assert len(result["entries"]) == 6
+
+    def _mocks(self, hamma_scrub, ags_entries, probes=None):
+        """Patch scans so the AGS walk only ends once the MJ scan runs."""
+        mj_started = threading.Event()
+        mj_calls = []
+        hdrs = {e["header"] for e in ags_entries}
+
+        def scan_ags(ags_host, ags_path, **kwargs):
+            if "on_probe" in kwargs and probes is not None:
+                kwargs["on_probe"](probes)
+            assert mj_started.wait(5), "MJ scan did not overlap the AGS walk"
+            return {"entries": ags_entries, "headers": hdrs,
+                    "duplicate_count": 0, "elapsed": 1.0}
+
+        def scan_mj(mj_path, since=None):
+            mj_calls.append(since)
+            mj_started.set()
+            return {"headers": hdrs, "file_count": 1, "duplicate_count": 0,
+                    "skipped": 0, "dirs_skipped": 0, "elapsed": 1.0}
+
+        return scan_ags, scan_mj, mj_calls
+
+    def test_mj_scan_overlaps_ags_walk(self, hamma_scrub):
+        hdr = _make_gps_header()
+        entries = [{"header": hdr, "filename": "f.bin", "offset": 0,
+                    "index": 0}]
+        scan_ags, scan_mj, mj_calls = self._mocks(hamma_scrub, entries)
+        with patch.object(hamma_scrub, "scan_ags_files", side_effect=scan_ags), \
+             patch.object(hamma_scrub, "scan_mj_files", side_effect=scan_mj):
+            rc = hamma_scrub.run(ags_host="hamma", ags_path="/ags/data",
+                                 mj_path="/media/pi", since="2026-04-01")
+        assert rc == hamma_scrub.EXIT_OK
+        assert mj_calls == ["2026-04-01T00"]
+
+    def test_since_auto_starts_mj_scan_from_probe(self, hamma_scrub):
+        hdr = _make_gps_header()
+        entries = [{"header": hdr, "filename": "f.bin", "offset": 0,
+                    "index": 0}]
+        scan_ags, scan_mj, mj_calls = self._mocks(hamma_scrub, entries,
+                                                  probes=entries)
+        with patch.object(hamma_scrub, "scan_ags_files", side_effect=scan_ags), \
+             patch.object(hamma_scrub, "scan_mj_files", side_effect=scan_mj):
+            rc = hamma_scrub.run(ags_host="hamma", ags_path="/ags/data",
+                                 mj_path="/media/pi", since="auto")
+        assert rc == hamma_scrub.EXIT_OK
+        assert mj_calls == [hamma_scrub.decode_gps_time(hdr)[:13]]
+
+    def test_since_auto_rescans_if_probe_cutoff_too_late(self, hamma_scrub):
+        early = _make_gps_header(tow=100000.0)
+        late = _make_gps_header()
+        entries = [{"header": h, "filename": "f.bin", "offset": i, "index": i}
+                   for i, h in enumerate([early, late])]
+        scan_ags, scan_mj, mj_calls = self._mocks(
+            hamma_scrub, entries, probes=[dict(entries[1], index=0)])
+        with patch.object(hamma_scrub, "scan_ags_files", side_effect=scan_ags), \
+             patch.object(hamma_scrub, "scan_mj_files", side_effect=scan_mj):
+            rc = hamma_scrub.run(ags_host="hamma", ags_path="/ags/data",
+                                 mj_path="/media/pi", since="auto")
+        assert rc == hamma_scrub.EXIT_OK
+        assert mj_calls == [hamma_scrub.decode_gps_time(late)[:13],
+                            hamma_scrub.decode_gps_time(early)[:13]]
+
+
+def _mj_header(i):
+    """Distinct 128-byte MJ header."""
+    hdr = bytearray(128)
+    hdr[0:4] = SYNC_MARKER
+    struct.pack_into('<I', hdr, 60, i)
+    return bytes(hdr)
+
+
+class TestMjWatcher:
+    """Test the live MJ header index used by --daemon."""
+
+    def _drive(self, tmp_path, hours=("2026-04-10T13", "2026-04-10T14")):
+        drive = tmp_path / "DATA01"
+        for i, hour in enumerate(hours):
+            (drive / hour).mkdir(parents=True)
+            (drive / hour / "old{}.bin".format(i)).write_bytes(_mj_header(i))
+        return drive
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_new_file_is_indexed(self, hamma_scrub, tmp_path, use_inotify):
+        drive = self._drive(tmp_path)
+        mj = hamma_scrub.scan_mj_files(str(tmp_path))
+        watcher = hamma_scrub.MjWatcher(str(tmp_path), mj["headers"],
+                                        use_inotify=use_inotify)
+        try:
+            if use_inotify and not watcher.inotify:
+                pytest.skip("inotify not available")
+            assert watcher.refresh() == 0
+            (drive / "2026-04-10T14" / "new.bin").write_bytes(_mj_header(9))
+            (drive / "2026-04-10T14" / ".tmp_recover_x.bin").write_bytes(
+                _mj_header(10))
+            assert watcher.refresh(0.5) == 1
+            assert _mj_header(9) in watcher.headers
+            assert _mj_header(10) not in watcher.headers
+        finally:
+            watcher.close()
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_new_hour_dir_is_followed(self, hamma_scrub, tmp_path,
+                                      use_inotify):
+        drive = self._drive(tmp_path)
+        watcher = hamma_scrub.MjWatcher(str(tmp_path), set(),
+                                        use_inotify=use_inotify)
+        try:
+            if use_inotify and not watcher.inotify:
+                pytest.skip("inotify not available")
+            # Only the newest hour dirs are listed, not the whole drive
+            assert len(watcher.headers) == 2
+            (drive / "2026-04-10T15").mkdir()
+            watcher.refresh(0.2)
+            (drive / "2026-04-10T15" / "a.bin").write_bytes(_mj_header(20))
+            watcher.refresh(0.5)
+            assert _mj_header(20) in watcher.headers
+            assert watcher._dirs[str(drive)] == [
+                str(drive / "2026-04-10T14"), str(drive / "2026-04-10T15")]
+        finally:
+            watcher.close()
+
+    def test_mounted_drive_is_scanned(self, hamma_scrub, tmp_path):
+        self._drive(tmp_path)
+        watcher = hamma_scrub.MjWatcher(str(tmp_path), set(),
+                                        use_inotify=False)
+        drive2 = tmp_path / "DATA02" / "2026-04-01T00"
+        drive2.mkdir(parents=True)
+        (drive2 / "x.bin").write_bytes(_mj_header(30))
+        watcher.refresh()
+        assert _mj_header(30) in watcher.headers
+        assert watcher.headers_added == 3
+
+    def test_unmounted_drive_is_dropped(self, hamma_scrub, tmp_path):
+        self._drive(tmp_path)
+        drive2 = tmp_path / "DATA02" / "2026-04-01T00"
+        drive2.mkdir(parents=True)
+        (drive2 / "x.bin").write_bytes(_mj_header(30))
+        (drive2 / "y.bin").write_bytes(_mj_header(0))
+        mj = hamma_scrub.scan_mj_files(str(tmp_path))
+        watcher = hamma_scrub.MjWatcher(str(tmp_path), mj["headers"],
+                                        use_inotify=False)
+        assert _mj_header(30) in watcher.headers
+        shutil.rmtree(tmp_path / "DATA02")
+        watcher.refresh()
+        assert _mj_header(30) not in watcher.headers
+        # Still on DATA01
+        assert _mj_header(0) in watcher.headers
+
+    def test_partial_header_is_retried(self, hamma_scrub, tmp_path):
+        drive = self._drive(tmp_path)
+        watcher = hamma_scrub.MjWatcher(str(tmp_path), set(),
+                                        use_inotify=False)
+        path = drive / "2026-04-10T14" / "slow.bin"
+        path.write_bytes(_mj_header(40)[:50])
+        assert watcher.refresh() == 0
+        path.write_bytes(_mj_header(40))
+        assert watcher.refresh() == 1
+
+
+class TestRunDaemon:
+    """Test --daemon reconciliation passes."""
+
+    def _setup(self, tmp_path):
+        hour = tmp_path / "mj" / "DATA01" / "2026-04-10T14"
+        hour.mkdir(parents=True)
+        (hour / "b.bin").write_bytes(_mj_header(3))
+        entries = [{"filename": "a.bin", "offset": i * 100, "index": i,
+                    "header": _mj_header(i)} for i in range(3)]
+        entries.append({"filename": "b.bin", "offset": 0, "index": 0,
+                        "header": _mj_header(3)})
+        ags_result = {"entries": entries,
+                      "headers": set(e["header"] for e in entries),
+                      "duplicate_count": 0, "elapsed": 1.0}
+        return str(tmp_path / "mj"), ags_result
+
+    def _recover(self, candidates, *args, **kwargs):
+        return [{"source_file": c["filename"], "source_offset": c["offset"],
+                 "trigger_index": c["index"], "header": c["header"],
+                 "target_path": "x", "size": 100, "status": "recovered",
+                 "error": None} for c in candidates]
+
+    def test_recovers_in_batches_then_purges(self, hamma_scrub, tmp_path):
+        mj_path, ags_result = self._setup(tmp_path)
+        purge = MagicMock(return_value=[{"filename": "a.bin",
+                                         "status": "deleted", "error": None}])
+        with patch.object(hamma_scrub, "SCRUB_LOCK_PATH",
+                          str(tmp_path / "lock")), \
+             patch.object(hamma_scrub, "scan_ags_files",
+                          return_value=ags_result), \
+             patch.object(hamma_scrub, "recover_triggers",
+                          side_effect=self._recover) as mock_recover, \
+             patch.object(hamma_scrub, "purge_ags_files", purge), \
+             patch.object(hamma_scrub, "cleanup_orphaned_temps"):
+            rc = hamma_scrub.run_daemon(
+                "hamma", "/ags/data", mj_path, recover=True, purge=True,
+                interval=0, recover_batch=2, max_passes=2,
+                output_file=str(tmp_path / "report.json"),
+            )
+        assert rc == hamma_scrub.EXIT_OK
+        batches = [[c["index"] for c in call[0][0]]
+                   for call in mock_recover.call_args_list]
+        assert batches == [[0, 1], [2]]
+        purge.assert_called_once()
+        assert purge.call_args[0][2] == ["a.bin"]
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert report["missing_on_mj"] == []
+        assert [r["trigger_index"] for r in report["recovery"]] == [2]
+
+    def test_unmounted_drive_is_not_purged_against(self, hamma_scrub,
+                                                   tmp_path):
+        mj_path, ags_result = self._setup(tmp_path)
+        hour = tmp_path / "mj" / "DATA02" / "2026-04-10T14"
+        hour.mkdir(parents=True)
+        (hour / "c.bin").write_bytes(_mj_header(4))
+        entries = [{"filename": "b.bin", "offset": 0, "index": 0,
+                    "header": _mj_header(3)},
+                   {"filename": "c.bin", "offset": 0, "index": 0,
+                    "header": _mj_header(4)}]
+        ags_result = dict(ags_result, entries=entries,
+                          headers=set(e["header"] for e in entries))
+
+        def scan_ags(*args, **kwargs):
+            # DATA02 is unplugged after the MJ scan, before the pass
+            shutil.rmtree(tmp_path / "mj" / "DATA02")
+            return ags_result
+
+        purge = MagicMock(return_value=[])
+        with patch.object(hamma_scrub, "SCRUB_LOCK_PATH",
+                          str(tmp_path / "lock")), \
+             patch.object(hamma_scrub, "scan_ags_files",
+                          side_effect=scan_ags), \
+             patch.object(hamma_scrub, "recover_triggers",
+                          return_value=[]), \
+             patch.object(hamma_scrub, "purge_ags_files", purge), \
+             patch.object(hamma_scrub, "cleanup_orphaned_temps"):
+            rc = hamma_scrub.run_daemon(
+                "hamma", "/ags/data", mj_path, recover=True, purge=True,
+                interval=0, max_passes=1,
+                output_file=str(tmp_path / "report.json"),
+            )
+        assert rc == hamma_scrub.EXIT_OK
+        purge.assert_called_once()
+        assert purge.call_args[0][2] == ["b.bin"]
+        report = json.loads((tmp_path / "report.json").read_text())
+        assert len(report["missing_on_mj"]) == 1
+
+    def test_holds_scrub_lock(self, hamma_scrub, tmp_path):
+        import fcntl
+        mj_path, ags_result = self._setup(tmp_path)
+        lock_path = str(tmp_path / "lock")
+        held = []
+
+        def scan_ags(*args, **kwargs):
+            with open(lock_path, 'a') as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    held.append(True)
+            return ags_result
+
+        with patch.object(hamma_scrub, "SCRUB_LOCK_PATH", lock_path), \
+             patch.object(hamma_scrub, "scan_ags_files", side_effect=scan_ags):
+            hamma_scrub.run_daemon("hamma", "/ags/data", mj_path,
+                                   interval=0, max_passes=1)
+        assert held == [True]
+
+    def test_ags_failure_is_retried(self, hamma_scrub, tmp_path):
+        mj_path, ags_result = self._setup(tmp_path)
+        with patch.object(hamma_scrub, "SCRUB_LOCK_PATH",
+                          str(tmp_path / "lock")), \
+             patch.object(hamma_scrub, "scan_ags_files",
+                          side_effect=[RuntimeError("SSH failed"),
+                                       ags_result]) as mock_ags:
+            rc = hamma_scrub.run_daemon("hamma", "/ags/data", mj_path,
+                                        interval=0, max_passes=1)
+        assert rc == hamma_scrub.EXIT_OK
+        assert mock_ags.call_count == 2
+
+    def test_stop_event_ends_daemon(self, hamma_scrub, tmp_path):
+        mj_path, ags_result = self._setup(tmp_path)
+        stop = threading.Event()
+
+        def scan_ags(*args, **kwargs):
+            stop.set()
+            return ags_result
+
+        with patch.object(hamma_scrub, "SCRUB_LOCK_PATH",
+                          str(tmp_path / "lock")), \
+             patch.object(hamma_scrub, "scan_ags_files",
+                          side_effect=scan_ags) as mock_ags:
+            rc = hamma_scrub.run_daemon("hamma", "/ags/data", mj_path,
+                                        interval=3600, stop=stop)
+        assert rc == hamma_scrub.EXIT_OK
+        mock_ags.assert_called_once()
+
+
+class TestScrubMetrics:
+    """Test per-phase metrics collection and export."""
+
+    def test_prometheus_histogram_is_cumulative(self, hamma_scrub):
+        metrics = hamma_scrub.ScrubMetrics()
+        for seconds in (0.5, 3.0, 3.0, 500.0):
+            metrics.observe_recovery(seconds, 100)
+        metrics.add_phase("compare", 1.5)
+        text = metrics.to_prometheus()
+        lines = dict(line.rsplit(" ", 1) for line in text.splitlines()
+                     if not line.startswith("#"))
+        name = "hamma_scrub_recovery_latency_seconds"
+        assert lines[name + '_bucket{le="1"}'] == "1"
+        assert lines[name + '_bucket{le="5"}'] == "3"
+        assert lines[name + '_bucket{le="300"}'] == "3"
+        assert lines[name + '_bucket{le="+Inf"}'] == "4"
+        assert lines[name + "_count"] == "4"
+        assert float(lines[name + "_sum"]) == 506.5
+        assert float(lines['hamma_scrub_phase_seconds{phase="compare"}']) == 1.5
+        assert float(lines['hamma_scrub_bytes{source="recovery"}']) == 400
+        assert float(lines["hamma_scrub_peak_rss_bytes"]) > 0
+
+    def test_helpers_report_only_when_active(self, hamma_scrub):
+        hamma_scrub._count_session("strider")  # no collector: ignored
+        outer = hamma_scrub.ScrubMetrics()
+        inner = hamma_scrub.ScrubMetrics()
+        with outer.activate():
+            hamma_scrub._count_session("strider")
+            with inner.activate():
+                hamma_scrub._count_session("purge")
+            hamma_scrub._count_session("strider")
+        assert outer.sessions == {"strider": 2}
+        assert inner.sessions == {"purge": 1}
+        assert hamma_scrub._active_metrics is None
+
+    def test_batch_recovery_records_latency_and_session(self, hamma_scrub,
+                                                        tmp_path):
+        ags = tmp_path / "ags"
+        ags.mkdir()
+        _write_ags_file(ags / "a.bin", 3)
+        raw = (ags / "a.bin").read_bytes()
+        size = 128 + TEST_DATASIZE * 2 + 4
+        (tmp_path / "DATA01").mkdir()
+        candidates = [{"header": raw[i * size:i * size + 128],
+                       "filename": "a.bin", "offset": i * size, "index": i,
+                       "skip_reason": None, "skip_status": None}
+                      for i in range(3)]
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        metrics = hamma_scrub.ScrubMetrics()
+        with deploy, command, metrics.activate(), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            hamma_scrub.recover_triggers(candidates, "hamma", str(ags),
+                                         str(tmp_path), batch=True)
+        assert metrics.sessions == {"extract": 1}
+        assert len(metrics.latencies) == 3
+        assert metrics.bytes == {"recovery": 3 * size}
+
+    def test_run_exports_json_and_textfile(self, hamma_scrub, tmp_path):
+        h1 = b'\x01' * 128
+        ags_result = {
+            "entries": [{"filename": "ags001.bin", "offset": 0, "index": 0,
+                         "header": h1}],
+            "headers": {h1}, "duplicate_count": 0, "elapsed": 2.0,
+            "bytes_received": 146,
+        }
+        mj_result = {
+            "headers": {h1}, "file_count": 1, "duplicate_count": 0,
+            "skipped": 0, "dirs_skipped": 0, "elapsed": 0.5,
+            "drives": [{"drive": "DATA01", "files": 1, "bytes": 1000,
+                        "elapsed": 0.5, "files_per_sec": 2.0,
+                        "mb_per_sec": 0.002}],
+        }
+        report_path = tmp_path / "report.json"
+        metrics_path = tmp_path / "scrub.prom"
+        with patch.object(hamma_scrub, "scan_ags_files",
+                          return_value=ags_result), \
+             patch.object(hamma_scrub, "scan_mj_files",
+                          return_value=mj_result):
+            rc = hamma_scrub.run("hamma", "/ags/data", "/media/pi",
+                                 output_file=str(report_path),
+                                 metrics_file=str(metrics_path))
+        assert rc == hamma_scrub.EXIT_OK
+        report = json.loads(report_path.read_text())["metrics"]
+        assert report["phases"]["ags_scan"] == 2.0
+        assert report["phases"]["mj_scan"] == 0.5
+        assert {"compare", "total"} <= set(report["phases"])
+        assert report["bytes"] == {"ags_walk": 146, "mj_scanned": 1000}
+        text = metrics_path.read_text()
+        assert 'hamma_scrub_drive_read_mb_per_second{drive="DATA01"} 0.002' \
+            in text
+        assert 'hamma_scrub_phase_seconds{phase="total"}' in text
+
+
+def _load_corpus():
+    """Load the synthetic corpus generator from tests/benchmarks/."""
+    spec = importlib.util.spec_from_file_location("corpus", str(CORPUS_PATH))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TestSyntheticCorpus:
+    """Test the benchmark corpus generator against the scrub pipeline."""
+
+    def test_extract_headers_skips_corruption(self, hamma_scrub, tmp_path):
+        corpus = _load_corpus().build_corpus(
+            str(tmp_path), 300, files=3, bad_sync=4, bad_datasize=4,
+            truncated=2)
+        headers = []
+        for name in sorted(os.listdir(corpus["ags_path"])):
+            path = os.path.join(corpus["ags_path"], name)
+            with open(path, 'rb') as f:
+                headers.extend(r["header"] for r in hamma_scrub.extract_headers(
+                    f, os.path.getsize(path), name))
+        assert headers == corpus["headers"]
+        assert len(headers) == 300 - 8
+        assert corpus["truncated"] == 2
+
+    def test_headers_decode_to_increasing_times(self, hamma_scrub, tmp_path):
+        corpus = _load_corpus().build_corpus(str(tmp_path), 50, files=1)
+        times = [hamma_scrub.decode_gps_time(h) for h in corpus["headers"]]
+        assert times[0] == "2026-04-04T01:13:50.000"
+        assert None not in times
+        assert times == sorted(times)
+
+    def test_gaps_found_and_recovered_over_mock_ssh(self, hamma_scrub,
+                                                    tmp_path, mock_ssh):
+        corpus = _load_corpus().build_corpus(
+            str(tmp_path / "data"), 400, files=4, gaps=0.05, bad_sync=2,
+            bad_datasize=1)
+        ags = hamma_scrub.scan_ags_files("hamma", corpus["ags_path"],
+                                         stream=True, as_table=True)
+        mj = hamma_scrub.scan_mj_files(corpus["mj_path"])
+        comparison = hamma_scrub.compare_headers(ags["entries"], mj["headers"])
+        assert len(comparison["missing_on_mj"]) == len(corpus["missing"]) == 20
+        # Corrupted in the AGS file, but recorded whole on MJ
+        assert comparison["mj_only_count"] == 3
+
+        candidates = hamma_scrub.filter_recovery_candidates(
+            comparison["missing_on_mj"], ags["entries"])
+        with patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", corpus["ags_path"], corpus["mj_path"],
+                batch=True)
+        assert [r["status"] for r in results].count("recovered") == \
+            len([c for c in candidates if not c["skip_reason"]])
+
+        mj = hamma_scrub.scan_mj_files(corpus["mj_path"])
+        recheck = hamma_scrub.compare_headers(ags["entries"], mj["headers"])
+        assert len(recheck["missing_on_mj"]) == \
+            len([c for c in candidates if c["skip_reason"]])
+        # One strider walk and one batch extraction, each deployed by scp
+        # into its own mktemp -d directory
+        assert mock_ssh.session_count("ssh") == 4
+        assert mock_ssh.session_count("scp") == 2
+        assert not os.listdir(str(mock_ssh.tmp))
+
+
+class TestNdjsonReport:
+    """Test the streaming NDJSON report."""
+
+    def test_run_streams_records_then_summary(self, hamma_scrub, tmp_path,
+                                              mock_ssh, capsys):
+        corpus = _load_corpus().build_corpus(
+            str(tmp_path / "data"), 200, files=2, gaps=0.05)
+        report_path = tmp_path / "report.ndjson"
+        with patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            rc = hamma_scrub.run("hamma", corpus["ags_path"],
+                                 corpus["mj_path"], recover=True, purge=True,
+                                 output_file=str(report_path),
+                                 ndjson_output=True)
+        assert rc == hamma_scrub.EXIT_OK
+        out = capsys.readouterr().out
+        assert report_path.read_text() == out
+        records = [json.loads(line) for line in out.splitlines()]
+        types = [r["type"] for r in records]
+        # The newest AGS file may still be recording, so it is kept
+        assert types == (["missing"] * 10 + ["recovery"] * 10
+                         + ["purge", "summary"])
+        assert {r["gps_time"] for r in records[:10]} == {
+            hamma_scrub.decode_gps_time(h) for h in corpus["missing"]}
+        assert all(r["status"] == "recovered" for r in records[10:20])
+        assert records[20]["status"] == "deleted"
+
+        summary = records[-1]
+        assert summary["missing_on_mj"] == 0
+        assert summary["recovery"] == {"recovered": 10}
+        assert summary["purge"]["deleted"] == 1
+        assert summary["purge"]["retained"] == 1
+        assert summary["purge"]["failed"] == 0
+        assert summary["ags_triggers"] == 200
+        assert "total" in summary["metrics"]["phases"]
+
+    def test_recovery_results_reported_as_settled(self, hamma_scrub,
+                                                  tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path)
+        stream = io.StringIO()
+        reporter = hamma_scrub.NdjsonReporter([stream])
+        seen = []
+
+        def on_result(result):
+            # Each record is on the stream before the next is produced
+            seen.append(len(stream.getvalue().splitlines()))
+            reporter.recovery(result)
+
+        size = TestBatchRecovery.SIZE
+        data = [raw[i * size:(i + 1) * size] for i in range(3)]
+        with patch.object(hamma_scrub, "select_target_drive",
+                          return_value=str(tmp_path / "DATA01")), \
+             patch.object(hamma_scrub, "extract_trigger", side_effect=data), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path),
+                on_result=on_result)
+        assert seen == [0, 1, 2]
+        lines = [json.loads(l) for l in stream.getvalue().splitlines()]
+        assert [l["trigger_index"] for l in lines] == [0, 1, 2]
+        assert all("header" not in l for l in lines)
+        assert [l["status"] for l in lines] == [r["status"] for r in results]
+
+    def test_purge_results_reported(self, hamma_scrub):
+        seen = []
+        results = hamma_scrub.purge_ags_files(
+            "hamma", "/ags/data", ["a.bin", "b.bin"], dry_run=True,
+            on_result=seen.append)
+        assert seen == results
+        assert [r["status"] for r in seen] == ["dry_run", "dry_run"]
+
+    def test_json_and_ndjson_exclusive(self, hamma_scrub):
+        parser = hamma_scrub._build_parser()
+        assert parser.parse_args(["--ndjson"]).ndjson is True
+        with pytest.raises(SystemExit):
+            parser.parse_args(["--json", "--ndjson"])
+
+
+class TestCompressedRecovery:
+    """Test recovery straight to compressed .hmc archives."""
+
+    SIZE = TestBatchRecovery.SIZE
+
+    def _compressor(self, hamma_scrub, tmp_path, fail=False):
+        # CompressedRecovery over a stand-in hamma.compression that
+        # "compresses" by prefixing the raw bytes, named like the real one
+        calls = []
+
+        def compress_file(path, output_dir, method, step):
+            calls.append((path, method, step))
+            if fail:
+                raise RuntimeError("bad data")
+            stem = os.path.splitext(os.path.basename(path))[0]
+            with open(path, 'rb') as f:
+                data = f.read()
+            with open(os.path.join(output_dir, stem + ".hmc"), 'wb') as f:
+                f.write(b"HMC" + data)
+            return [{"ratio": 1.0, "method": method}]
+
+        compression = MagicMock(compress_file=compress_file)
+        with patch.dict('sys.modules', {
+                'hamma': MagicMock(compression=compression),
+                'hamma.compression': compression}):
+            compressor = hamma_scrub.CompressedRecovery(
+                step=4, spool_dir=str(tmp_path / "spool"))
+        return compressor, calls
+
+    def test_batch_writes_archives_and_journal(self, hamma_scrub, tmp_path):
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path)
+        compressor, calls = self._compressor(hamma_scrub, tmp_path)
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+                compressor=compressor,
+            )
+        assert [r["status"] for r in results] == ["recovered"] * 3
+        for i, r in enumerate(results):
+            parts = pathlib.PurePath(r["target_path"]).parts
+            assert parts[:2] == ("DATA01", "compressed")
+            assert parts[-1].endswith("_recovered.hmc")
+            assert (tmp_path / r["target_path"]).read_bytes() == \
+                b"HMC" + raw[i * self.SIZE:(i + 1) * self.SIZE]
+        assert [c[1:] for c in calls] == [("quantize", 4)] * 3
+        assert all(c[0].endswith("_recovered.bin") for c in calls)
+        # Compressed from the resumable partials on the drive
+        assert all(c[0].startswith(str(tmp_path / "DATA01")) for c in calls)
+        # Nothing raw left on the drive, the spool unused
+        assert not list(tmp_path.glob("DATA01/*/*.bin"))
+        assert not list(tmp_path.glob("DATA01/.tmp_recover_*"))
+        assert not list(tmp_path.glob("DATA01/compressed/*/.tmp_recover_*"))
+        assert not (tmp_path / "spool").exists()
+
+        # The next MJ scan counts them as recorded
+        mj = hamma_scrub.scan_mj_files(str(tmp_path))
+        assert mj["headers"] == {c["header"] for c in candidates}
+        assert mj["file_count"] == 3
+
+    def _single_shot(self, hamma_scrub, tmp_path, compressor):
+        # Recover one trigger with extract_trigger() onto DATA01
+        ags, raw, candidates = TestBatchRecovery()._setup(tmp_path, count=1)
+        with patch.object(hamma_scrub, "select_target_drive",
+                          return_value=str(tmp_path / "DATA01")), \
+             patch.object(hamma_scrub, "extract_trigger",
+                          return_value=raw[:self.SIZE]), \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path),
+                compressor=compressor,
+            )
+        return candidates, results
+
+    def test_single_shot_recovery(self, hamma_scrub, tmp_path):
+        compressor, calls = self._compressor(hamma_scrub, tmp_path)
+        candidates, results = self._single_shot(hamma_scrub, tmp_path,
+                                                compressor)
+        assert results[0]["status"] == "recovered"
+        assert (tmp_path / results[0]["target_path"]).exists()
+        # Compressed from the spool; only the archive reaches the drive
+        assert calls[0][0].startswith(str(tmp_path / "spool"))
+        assert not os.listdir(str(tmp_path / "spool"))
+        assert not list(tmp_path.glob("DATA01/.tmp_recover_*"))
+        assert hamma_scrub.read_recovered_journal(str(tmp_path / "DATA01")) \
+            == [candidates[0]["header"]]
+        manifest = tmp_path / "DATA01" / "compressed" / "manifest.jsonl"
+        record = json.loads(manifest.read_text())
+        assert record["output"] == results[0]["target_path"].split(
+            os.sep, 2)[2]
+        assert record["source"].endswith("_recovered.bin")
+        assert record["size"] == self.SIZE
+        assert record["recovered"] is True
+        assert record["sha256"] == hashlib.sha256(
+            (tmp_path / results[0]["target_path"]).read_bytes()).hexdigest()
+
+    def test_journal_failure_still_recovered(self, hamma_scrub, tmp_path):
+        compressor, _ = self._compressor(hamma_scrub, tmp_path)
+        with patch.object(compressor, "_journal",
+                          side_effect=OSError("disk full")):
+            _, results = self._single_shot(hamma_scrub, tmp_path, compressor)
+        assert results[0]["status"] == "recovered"
+        assert (tmp_path / results[0]["target_path"]).exists()
+
+    def test_compression_failure_fails_trigger(self, hamma_scrub, tmp_path):
+        ags, _, candidates = TestBatchRecovery()._setup(tmp_path, count=2)
+        compressor, _ = self._compressor(hamma_scrub, tmp_path, fail=True)
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            results = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+                compressor=compressor,
+            )
+        assert [r["status"] for r in results] == ["failed", "failed"]
+        assert "compression failed: bad data" in results[0]["error"]
+        assert not list(tmp_path.glob("DATA01/compressed/*/*"))
+        assert hamma_scrub.read_recovered_journal(
+            str(tmp_path / "DATA01")) == []
+
+    def test_existing_archive_skipped(self, hamma_scrub, tmp_path):
+        ags, _, candidates = TestBatchRecovery()._setup(tmp_path, count=1)
+        compressor, calls = self._compressor(hamma_scrub, tmp_path)
+        deploy, command = _local_extractor(hamma_scrub, tmp_path)
+        with deploy, command, \
+             patch.object(hamma_scrub, "detect_unit_name",
+                          return_value=("mj", "41")):
+            first = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+                compressor=compressor)
+            again = hamma_scrub.recover_triggers(
+                candidates, "hamma", str(ags), str(tmp_path), batch=True,
+                compressor=compressor)
+        assert again[0]["status"] == "skipped"
+        assert again[0]["target_path"] == first[0]["target_path"]
+        assert len(calls) == 1
+
+    def test_journal_since_and_torn_record(self, hamma_scrub, tmp_path):
+        journal = tmp_path / "DATA01" / "compressed" / ".recovered_headers"
+        journal.parent.mkdir(parents=True)
+        journal.write_bytes(b"2026-04-10T13" + b"\x01" * 128
+                            + b"2026-04-10T14" + b"\x02" * 128
+                            + b"2026-04-10T15" + b"\x03" * 60)
+        drive = str(tmp_path / "DATA01")
+        assert hamma_scrub.read_recovered_journal(drive) == [
+            b"\x01" * 128, b"\x02" * 128]
+        assert hamma_scrub.read_recovered_journal(
+            drive, since="2026-04-10T14") == [b"\x02" * 128]
+
+    def test_cli_flags(self, hamma_scrub):
+        args = hamma_scrub._build_parser().parse_args(
+            ["--recover", "--recover-compressed", "--compress-step", "2"])
+        assert args.recover_compressed is True
+        assert args.compress_method == "quantize"
+        assert args.compress_step == 2
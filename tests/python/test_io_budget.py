@@ -0,0 +1,152 @@
+"""Tests for scripts/io_budget.py — the shared DATA drive I/O budget."""
+
+import importlib.util
+import json
+import pathlib
+import subprocess
+import sys
+import time
+
+import pytest
+from unittest.mock import patch
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+SCRIPT_PATH = REPO_ROOT / "scripts" / "io_budget.py"
+
+
+@pytest.fixture
+def io_budget():
+    """Provide the io_budget module."""
+    spec = importlib.util.spec_from_file_location("io_budget",
+                                                  str(SCRIPT_PATH))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Bucket file for one test."""
+    return str(tmp_path / "budget.json")
+
+
+class TestTake:
+    """Tests for IOBudget.take() and the token bucket."""
+
+    def test_within_burst_does_not_wait(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=1e3, burst=1e6)
+        with patch.object(io_budget.time, "sleep") as mock_sleep:
+            # Time spent on the lock alone is not reported as a wait
+            assert budget.take(500000, "scrub") == 0.0
+            assert budget.take(500000, "scrub") == 0.0
+        mock_sleep.assert_not_called()
+        stats = budget.status()["consumers"]["scrub"]
+        assert stats["bytes"] == 1000000
+        assert stats["takes"] == 2
+        assert stats["waits"] == 0
+
+    def test_empty_bucket_waits_for_refill(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=1e6, burst=50000)
+        budget.take(50000, "compress")
+        waited = budget.take(50000, "compress")
+        assert 0.04 < waited < 0.5
+        stats = budget.status()["consumers"]["compress"]
+        assert stats["waits"] == 1
+        assert stats["wait_seconds"] == pytest.approx(waited)
+
+    def test_oversized_take_leaves_debt(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=1e6, burst=1000)
+        assert budget.take(100000, "compress") < 0.1
+        assert budget.status()["tokens"] < -90000
+        assert budget.take(1000, "scrub") > 0.09
+
+    def test_processes_share_one_bucket(self, io_budget, path):
+        io_budget.IOBudget(path, rate=1e3, burst=1000).take(1000, "scrub")
+        other = io_budget.IOBudget(path)
+        status = other.status()
+        assert status["rate"] == 1e3
+        assert status["tokens"] < 100
+        assert other.take(1000, "compress", timeout=0.05) is None
+        assert "compress" not in other.status()["consumers"]
+
+    def test_zero_rate_never_waits(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=0, burst=10)
+        for _ in range(3):
+            assert budget.take(10 ** 9, "scrub") < 0.1
+
+    def test_corrupt_state_is_reset(self, io_budget, path):
+        with open(path, 'w') as f:
+            f.write("{not json")
+        budget = io_budget.IOBudget(path, rate=1e6, burst=1e6)
+        assert budget.take(1000, "scrub") < 0.1
+        with open(path) as f:
+            assert json.load(f)["consumers"]["scrub"]["bytes"] == 1000
+
+    def test_unusable_path_does_not_throttle(self, io_budget, tmp_path):
+        budget = io_budget.IOBudget(str(tmp_path / "no" / "budget.json"))
+        assert budget.take(10 ** 9, "scrub") < 0.1
+        budget.note_live(1000)
+        assert budget.take(10 ** 9, "scrub") == 0.0
+
+
+class TestLivePriority:
+    """Tests for note_live() holding background I/O."""
+
+    def test_live_write_pauses_background(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=0, live_hold=0.1)
+        budget.note_live(4096)
+        t0 = time.monotonic()
+        waited = budget.take(1000, "scrub")
+        assert waited >= 0.09
+        assert time.monotonic() - t0 >= 0.09
+        status = budget.status()
+        assert status["live"] == {"bytes": 4096, "writes": 1}
+        assert status["consumers"]["scrub"]["waits"] == 1
+
+    def test_no_tokens_earned_during_hold(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=1e6, burst=1e6,
+                                    live_hold=0.1)
+        budget.take(10 ** 6, "scrub")
+        budget.note_live(100)
+        time.sleep(0.1)
+        assert budget.status()["tokens"] < 0.05e6
+
+    def test_timeout_gives_up_during_hold(self, io_budget, path):
+        budget = io_budget.IOBudget(path, live_hold=60)
+        budget.note_live(100)
+        t0 = time.monotonic()
+        assert budget.take(1000, "scrub", timeout=0.05) is None
+        assert time.monotonic() - t0 < 0.5
+        status = budget.status()
+        assert status["live_active"]
+        assert "scrub" not in status["consumers"]
+
+
+class TestTelemetry:
+    """Tests for the Prometheus export and the command line."""
+
+    def test_to_prometheus(self, io_budget, path):
+        budget = io_budget.IOBudget(path, rate=2e6)
+        budget.take(1000, "scrub")
+        budget.note_live(512)
+        text = io_budget.to_prometheus(budget.status())
+        assert "hamma_io_budget_rate_bytes_per_second 2000000.0" in text
+        assert 'hamma_io_budget_bytes_total{consumer="scrub"} 1000.0' in text
+        assert "hamma_io_budget_live_bytes_total 512.0" in text
+        assert "hamma_io_budget_live_active 1.0" in text
+        assert "# TYPE hamma_io_budget_wait_seconds_total counter" in text
+
+    def test_parse_size(self, io_budget):
+        assert io_budget.parse_size("4M") == 4e6
+        assert io_budget.parse_size("0") == 0
+        with pytest.raises(ValueError):
+            io_budget.parse_size("lots")
+
+    def test_cli_sets_rate_and_writes_metrics(self, path, tmp_path):
+        metrics = tmp_path / "budget.prom"
+        result = subprocess.run(
+            [sys.executable, str(SCRIPT_PATH), "--path", path, "--rate",
+             "4M", "--status", "--metrics-file", str(metrics)],
+            capture_output=True, text=True, check=True)
+        assert json.loads(result.stdout)["rate"] == 4e6
+        assert "hamma_io_budget_tokens_bytes" in metrics.read_text()
@@ -0,0 +1,89 @@
+"""
+Unit tests for plugins/io_budget_live.py - live write priority on the I/O budget.
+
+These tests mock brokkr to test the plugin logic without requiring it to be
+installed; the budget itself is the real scripts/io_budget.py.
+"""
+
+import importlib.util
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+REPO_ROOT = Path(__file__).parent.parent.parent
+PLUGIN_PATH = REPO_ROOT / "plugins" / "io_budget_live.py"
+
+
+class MockOutputStep:
+    """Stand-in for brokkr.pipeline.base.OutputStep."""
+
+    def __init__(self, **kwargs):
+        self.logger = MagicMock()
+        self.name = kwargs.get("name", "test_step")
+
+
+def load_live_module():
+    """Load the io_budget_live plugin with a mocked brokkr."""
+    mock_brokkr_base = MagicMock()
+    mock_brokkr_base.OutputStep = MockOutputStep
+    mock_brokkr_pipeline = MagicMock()
+    mock_brokkr_pipeline.base = mock_brokkr_base
+    mock_brokkr = MagicMock()
+    mock_brokkr.pipeline = mock_brokkr_pipeline
+
+    with patch.dict('sys.modules', {
+        'brokkr': mock_brokkr,
+        'brokkr.pipeline': mock_brokkr_pipeline,
+        'brokkr.pipeline.base': mock_brokkr_base,
+    }):
+        spec = importlib.util.spec_from_file_location(
+            "io_budget_live", PLUGIN_PATH)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    return module
+
+
+MODULE = load_live_module()
+IOBudgetLive = MODULE.IOBudgetLive
+
+
+def _packet(data):
+    return {"science_packet": MagicMock(value=data)}
+
+
+@pytest.fixture
+def step(tmp_path):
+    """An IOBudgetLive step on a per-test bucket file."""
+    return IOBudgetLive(budget_path=str(tmp_path / "budget.json"),
+                        live_hold=30)
+
+
+class TestIOBudgetLive:
+    """Tests for marking live writes and exporting budget telemetry."""
+
+    def test_packet_noted_as_live_write(self, step):
+        data = _packet(b"\x00" * 4096)
+        assert step.execute(data) is data
+        status = step.budget.status()
+        assert status["live"] == {"bytes": 4096, "writes": 1}
+        assert status["live_active"]
+
+    def test_background_yields_after_live_write(self, step):
+        step.execute(_packet(b"\x00" * 128))
+        background = step.io_budget.IOBudget(step.budget.path)
+        background.take(1000, "scrub", timeout=0.05)
+        assert "scrub" not in background.status()["consumers"]
+
+    def test_missing_packet_logged_not_raised(self, step):
+        assert step.execute({}) == {}
+        step.logger.error.assert_called_once()
+
+    def test_metrics_written_at_interval(self, tmp_path):
+        metrics = tmp_path / "budget.prom"
+        step = IOBudgetLive(budget_path=str(tmp_path / "budget.json"),
+                            metrics_file=str(metrics), metrics_interval=3600)
+        step.execute(_packet(b"\x00" * 10))
+        assert "hamma_io_budget_live_bytes_total 10.0" in metrics.read_text()
+        step.execute(_packet(b"\x00" * 10))
+        assert "hamma_io_budget_live_bytes_total 10.0" in metrics.read_text()
@@ -0,0 +1,268 @@
+"""Tests for server/scrub_fleet.py — array-wide hamma_scrub runs."""
+
+import importlib.util
+import json
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+from unittest.mock import patch, MagicMock
+
+REPO_ROOT = pathlib.Path(__file__).resolve().parent.parent.parent
+SERVER_DIR = REPO_ROOT / "server"
+SCRIPT_PATH = SERVER_DIR / "scrub_fleet.py"
+
+
+@pytest.fixture
+def fleet():
+    """Provide the scrub_fleet module (mjol_array imported from server/)."""
+    sys.path.insert(0, str(SERVER_DIR))
+    try:
+        spec = importlib.util.spec_from_file_location(
+            "scrub_fleet", str(SCRIPT_PATH),
+        )
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        yield module
+    finally:
+        sys.path.remove(str(SERVER_DIR))
+
+
+def _report(missing=0, reclaim=0, recovered=0, dry_run=True):
+    """A hamma_scrub.py --json report with the fields the fleet reads."""
+    return {
+        "ags_triggers": 100,
+        "mj_triggers": 100 - missing,
+        "missing_on_mj": [{"ags_file": "a.bin"}] * missing,
+        "recovery": [{"status": "dry_run" if dry_run else "recovered"}]
+        * (recovered or missing),
+        "purge": {"deleted": [], "bytes": reclaim, "dry_run": dry_run},
+    }
+
+
+def _completed(rc=0, report=None, stderr=b""):
+    stdout = json.dumps(report).encode() if report is not None else b""
+    return MagicMock(returncode=rc, stdout=stdout, stderr=stderr)
+
+
+class TestScrubCommand:
+    """Tests for scrub_command()."""
+
+    def test_runs_under_unit_scrub_lock(self, fleet):
+        cmd = fleet.scrub_command(10003, ["--since", "auto"])
+        i = cmd.index("flock")
+        assert cmd[i:i + 5] == ["flock", "-n", "-E", "75",
+                                "/tmp/hamma_scrub.lock"]
+        assert cmd[-4:] == [fleet.SCRUB_SCRIPT, "--json", "--since", "auto"]
+
+    def test_uses_tunnel_port(self, fleet):
+        cmd = fleet.scrub_command(10003, [])
+        assert cmd[:len(fleet.MjolnirArray._pi_ssh_cmd(10003))] == \
+            fleet.MjolnirArray._pi_ssh_cmd(10003)
+        assert "10003" in cmd
+
+
+class TestRunUnit:
+    """Tests for run_unit() outcome classification."""
+
+    def _run(self, fleet, result, up=True):
+        with patch.object(fleet.MjolnirArray, "status", return_value=up), \
+             patch.object(fleet.subprocess, "run") as mock_run:
+            if isinstance(result, Exception):
+                mock_run.side_effect = result
+            else:
+                mock_run.return_value = result
+            row = fleet.run_unit(10002, [], timeout=5)
+        return row, mock_run
+
+    def test_tunnel_down_skips_ssh(self, fleet):
+        row, mock_run = self._run(fleet, _completed(), up=False)
+        assert row["status"] == "down"
+        assert row["unit"] == "mj02"
+        mock_run.assert_not_called()
+
+    def test_report_parsed(self, fleet):
+        row, _ = self._run(fleet, _completed(0, _report()))
+        assert row["status"] == "ok"
+        assert row["report"]["ags_triggers"] == 100
+
+    def test_missing_exit_code(self, fleet):
+        row, _ = self._run(fleet, _completed(1, _report(missing=3)))
+        assert row["status"] == "missing"
+        assert len(row["report"]["missing_on_mj"]) == 3
+
+    def test_lock_held_is_busy(self, fleet):
+        row, _ = self._run(fleet, _completed(fleet.SCRUB_BUSY))
+        assert row["status"] == "busy"
+        assert row["report"] is None
+
+    def test_timeout(self, fleet):
+        row, _ = self._run(fleet, subprocess.TimeoutExpired("ssh", 5))
+        assert row["status"] == "timeout"
+        assert "5s" in row["error"]
+
+    def test_bad_json_is_error(self, fleet):
+        row, _ = self._run(fleet, MagicMock(returncode=0, stdout=b"{",
+                                            stderr=b""))
+        assert row["status"] == "error"
+        assert "bad JSON" in row["error"]
+
+    def test_ssh_failure_reports_last_stderr_line(self, fleet):
+        row, _ = self._run(fleet, _completed(
+            255, stderr=b"warning\nssh: connect to host localhost port "
+                        b"10002: Connection refused\n"))
+        assert row["status"] == "error"
+        assert row["error"].startswith("exit 255: ssh: connect")
+
+
+class TestStartGate:
+    """Tests for StartGate staggering."""
+
+    def test_first_start_is_immediate(self, fleet):
+        gate = fleet.StartGate(10)
+        t0 = time.monotonic()
+        gate.wait()
+        assert time.monotonic() - t0 < 1
+
+    def test_concurrent_starts_are_spaced(self, fleet):
+        gate = fleet.StartGate(0.05)
+        starts = []
+        lock = threading.Lock()
+
+        def task():
+            gate.wait()
+            with lock:
+                starts.append(time.monotonic())
+
+        threads = [threading.Thread(target=task) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        starts.sort()
+        assert starts[1] - starts[0] >= 0.045
+        assert starts[2] - starts[1] >= 0.045
+
+
+class TestScrubFleet:
+    """Tests for the survey and recovery passes of scrub_fleet()."""
+
+    def _fake_run_unit(self, fleet, reports, active=None):
+        calls = []
+        lock = threading.Lock()
+        peak = [0]
+        running = [0]
+
+        def run_unit(port, scrub_args, timeout):
+            with lock:
+                calls.append((port, list(scrub_args)))
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            report = reports[port]
+            status = "missing" if report["missing_on_mj"] else "ok"
+            return {"unit": "mj{:02}".format(port - 10000), "port": port,
+                    "status": status, "report": report, "error": None,
+                    "elapsed": 1.0}
+
+        return run_unit, calls, peak
+
+    def test_survey_is_dry_run_with_parallel_cap(self, fleet):
+        reports = {10000 + i: _report() for i in range(1, 7)}
+        run_unit, calls, peak = self._fake_run_unit(fleet, reports)
+        with patch.object(fleet, "run_unit", side_effect=run_unit):
+            rows = fleet.scrub_fleet(sorted(reports), parallel=2)
+        assert [r["port"] for r in rows] == sorted(reports)
+        assert peak[0] == 2
+        assert all(args == ["--since", "auto", "--recover", "--purge",
+                            "--dry-run"] for _, args in calls)
+
+    def test_recovery_only_where_needed(self, fleet):
+        reports = {10001: _report(missing=2), 10002: _report(),
+                   10003: _report(reclaim=5000000)}
+        run_unit, calls, _ = self._fake_run_unit(fleet, reports)
+        with patch.object(fleet, "run_unit", side_effect=run_unit):
+            rows = fleet.scrub_fleet(sorted(reports), recover=True,
+                                     stagger=0,
+                                     recover_args=["--recover-rate", "1M"])
+        recovery_calls = [(p, a) for p, a in calls if "--dry-run" not in a]
+        assert recovery_calls == [
+            (10001, ["--since", "auto", "--recover", "--recover-rate", "1M"]),
+        ]
+        assert "recovery" in rows[0]
+        assert "recovery" not in rows[1]
+
+    def test_purge_also_runs_reclaimable_units(self, fleet):
+        reports = {10001: _report(), 10002: _report(reclaim=5000000)}
+        run_unit, calls, _ = self._fake_run_unit(fleet, reports)
+        with patch.object(fleet, "run_unit", side_effect=run_unit):
+            fleet.scrub_fleet(sorted(reports), recover=True, purge=True,
+                              stagger=0)
+        recovery_calls = [(p, a) for p, a in calls if "--dry-run" not in a]
+        assert recovery_calls == [
+            (10002, ["--since", "auto", "--recover", "--purge"]),
+        ]
+
+    def test_recovery_runs_are_staggered(self, fleet):
+        reports = {10000 + i: _report(missing=1) for i in range(1, 4)}
+        run_unit, _, peak = self._fake_run_unit(fleet, reports)
+        waits = []
+        with patch.object(fleet, "run_unit", side_effect=run_unit), \
+             patch.object(fleet.StartGate, "wait",
+                          lambda gate: waits.append(gate.interval)):
+            fleet.scrub_fleet(sorted(reports), recover=True,
+                              recover_parallel=1, stagger=30)
+        assert waits == [30, 30, 30]
+
+    def test_unreachable_units_not_recovered(self, fleet):
+        with patch.object(fleet, "run_unit", return_value={
+                "unit": "mj01", "port": 10001, "status": "busy",
+                "report": None, "error": None, "elapsed": 0.0}) as mock_run:
+            fleet.scrub_fleet([10001], recover=True, stagger=0)
+        assert mock_run.call_count == 1
+
+
+class TestFormatTable:
+    """Tests for the array-wide table."""
+
+    def test_totals_and_reclaim(self, fleet):
+        rows = [
+            {"unit": "mj01", "port": 10001, "status": "missing",
+             "report": _report(missing=4, reclaim=2500000), "error": None,
+             "elapsed": 3.0},
+            {"unit": "mj02", "port": 10002, "status": "down",
+             "report": None, "error": None, "elapsed": 0.0},
+        ]
+        table = fleet.format_table(rows)
+        lines = table.splitlines()
+        assert lines[2].split()[:5] == ["mj01", "missing", "100", "96", "4"]
+        assert "2.5" in lines[2]
+        assert lines[3].split()[:5] == ["mj02", "down", "-", "-", "-"]
+        total = [l for l in lines if l.startswith("Total")][0]
+        assert total.split()[:6] == ["Total", "2", "units", "100", "96", "4"]
+
+    def test_recovery_run_figures(self, fleet):
+        rows = [{
+            "unit": "mj01", "port": 10001, "status": "missing",
+            "report": _report(missing=4, reclaim=1000000), "error": None,
+            "elapsed": 3.0,
+            "recovery": {"unit": "mj01", "port": 10001, "status": "ok",
+                         "report": _report(missing=0, recovered=4,
+                                           reclaim=8000000, dry_run=False),
+                         "error": None, "elapsed": 10.0},
+        }]
+        line = fleet.format_table(rows).splitlines()[2].split()
+        assert line[:6] == ["mj01", "ok", "100", "96", "4", "4"]
+        assert "8.0*" in line
+        assert line[-1] == "13.0"
+
+    def test_errors_listed(self, fleet):
+        rows = [{"unit": "mj05", "port": 10005, "status": "timeout",
+                 "report": None, "error": "no report in 3600s",
+                 "elapsed": 3600.0}]
+        assert "mj05: no report in 3600s" in fleet.format_table(rows)